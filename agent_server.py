@@ -15,7 +15,8 @@ import httpx
 from fastapi import FastAPI, HTTPException
 from fastapi.responses import JSONResponse
 
-from config import TOOL_SERVER_PORT, USER_PLUGIN_SERVER_PORT
+from config import TOOL_SERVER_PORT, USER_PLUGIN_SERVER_PORT, AGENT_ANALYZE_SLOTS
+from brain.analyze_scheduler import AnalyzeJob, AnalyzeScheduler, TRIGGER_URGENCY
 from brain.planner import TaskPlanner
 from brain.analyzer import ConversationAnalyzer
 from brain.computer_use import ComputerUseAdapter
@@ -25,9 +26,11 @@ from brain.task_executor import DirectTaskExecutor
 from brain.agent_session import get_session_manager
 from utils.config_manager import get_config_manager
 from main_logic.agent_event_bus import AgentServerEventBridge
+from utils import metrics
 
 
 app = FastAPI(title="N.E.K.O Tool Server")
+metrics.install_metrics(app, "agent")
 
 # Configure logging
 from utils.logger_config import setup_logging, ThrottledLogger
@@ -59,7 +62,9 @@ class Modules:
     throttled_logger: "ThrottledLogger" = None  # 延迟初始化
     agent_bridge: AgentServerEventBridge | None = None
     state_revision: int = 0
-    # Serialize analysis+dispatch to prevent duplicate tasks from concurrent analyze_request events
+    # Background analyses: per-lanlan serialized, up to AGENT_ANALYZE_SLOTS concurrently
+    analyze_scheduler: Optional[AnalyzeScheduler] = None
+    # Serialize duplicate-check + dispatch so concurrent analyses can't spawn the same task twice
     analyze_lock: Optional[asyncio.Lock] = None
     # Per-lanlan fingerprint of latest user-turn payload already consumed by analyzer
     last_user_turn_fingerprint: ClassVar[Dict[str, str]] = {}
@@ -152,7 +157,7 @@ def _collect_existing_task_descriptions(lanlan_name: Optional[str] = None) -> li
 
 
 async def _is_duplicate_task(query: str, lanlan_name: Optional[str] = None) -> tuple[bool, Optional[str]]:
-    """Use LLM to judge if query duplicates any existing queued/running task."""
+    """Judge if query duplicates any existing queued/running task (local pre-filter, LLM for ambiguous cases)."""
     try:
         if not Modules.deduper:
             return False, None
@@ -263,7 +268,7 @@ def _check_agent_api_gate() -> Dict[str, Any]:
 
 
 async def _emit_main_event(event_type: str, lanlan_name: Optional[str], **payload) -> None:
-    event = {"event_type": event_type, "lanlan_name": lanlan_name, **payload}
+    event = metrics.attach_turn_id({"event_type": event_type, "lanlan_name": lanlan_name, **payload})
     if Modules.agent_bridge:
         try:
             sent = await Modules.agent_bridge.emit_to_main(event)
@@ -379,9 +384,14 @@ async def _on_session_event(event: Dict[str, Any]) -> None:
                 logger.info("[AgentAnalyze] skip analyze: no new user turn (trigger=%s lanlan=%s)", event.get("trigger"), lanlan_name)
                 return
             Modules.last_user_turn_fingerprint[lanlan_key] = fp
-            task = asyncio.create_task(_background_analyze_and_plan(messages, lanlan_name))
-            Modules._background_tasks.add(task)
-            task.add_done_callback(Modules._background_tasks.discard)
+            if Modules.analyze_scheduler is None:
+                Modules.analyze_scheduler = AnalyzeScheduler(_background_analyze_and_plan, slots=AGENT_ANALYZE_SLOTS)
+            # 同一角色的新快照会替换/取消尚未提交的旧分析；turn_id 随任务进入分析/执行链路
+            Modules.analyze_scheduler.submit(
+                lanlan_key, lanlan_name, messages,
+                urgency=TRIGGER_URGENCY.get(event.get("trigger"), 0),
+                turn_id=event.get("turn_id"),
+            )
 
 
 
@@ -516,34 +526,39 @@ async def _run_computer_use_task(
             pass
 
 async def _computer_use_scheduler_loop():
-    """Ensure only one computer-use task runs at a time by scheduling queued tasks."""
+    """Ensure only one computer-use task runs at a time by scheduling queued tasks.
+
+    Event-driven: blocks on the queue while idle and on the running task while busy.
+    """
     # Initialize queue if missing
     if Modules.computer_use_queue is None:
         Modules.computer_use_queue = asyncio.Queue()
     while True:
         try:
-            await asyncio.sleep(0.05)
-            # If a task is running, wait until _run_computer_use_task marks it done
-            if Modules.computer_use_running:
-                continue
-            # No active task: try to dequeue next
-            if Modules.computer_use_queue.empty():
-                continue
             next_task = await Modules.computer_use_queue.get()
             # Validate registry presence
             tid = next_task.get("task_id")
             if not tid or tid not in Modules.task_registry:
                 continue
             # Run task in thread pool (non-blocking for the scheduler)
-            Modules.active_computer_use_async_task = asyncio.create_task(_run_computer_use_task(
+            task = asyncio.create_task(_run_computer_use_task(
                 tid, next_task.get("instruction", ""),
             ))
+            Modules.active_computer_use_async_task = task
+            # Wait for it to finish (or be cancelled by end_all) before dequeuing the next one
+            await asyncio.wait([task])
+        except asyncio.CancelledError:
+            raise
         except Exception:
             # Never crash the scheduler
             await asyncio.sleep(0.1)
 
 
-async def _background_analyze_and_plan(messages: list[dict[str, Any]], lanlan_name: Optional[str]):
+async def _background_analyze_and_plan(
+    messages: list[dict[str, Any]],
+    lanlan_name: Optional[str],
+    job: Optional[AnalyzeJob] = None,
+):
     """
     [简化版] 使用 DirectTaskExecutor 一步完成：分析对话 + 判断执行方式 + 执行任务
     
@@ -551,24 +566,20 @@ async def _background_analyze_and_plan(messages: list[dict[str, Any]], lanlan_na
     - 旧: Analyzer(LLM#1) → Planner(LLM#2) → 子进程Processor(LLM#3) → MCP调用
     - 新: DirectTaskExecutor(LLM#1) → MCP调用
 
-    Uses analyze_lock to serialize concurrent calls.  Without this, two
-    near-simultaneous analyze_request events can both pass the dedup
-    check before either spawns a task, resulting in duplicate execution.
+    Normally run by Modules.analyze_scheduler, which serializes analyses of the
+    same lanlan and passes *job* so the analysis can mark the point after which
+    it must not be cancelled (job.commit()).
     """
     if not Modules.task_executor:
         logger.warning("[TaskExecutor] task_executor not initialized, skipping")
         return
 
-    # Lazy-init the lock (must happen inside the event loop)
-    if Modules.analyze_lock is None:
-        Modules.analyze_lock = asyncio.Lock()
-
-    async with Modules.analyze_lock:
-        await _do_analyze_and_plan(messages, lanlan_name)
+    with metrics.span("agent.analyze_and_execute"):
+        await _do_analyze_and_plan(messages, lanlan_name, job)
 
 
-async def _do_analyze_and_plan(messages: list[dict[str, Any]], lanlan_name: Optional[str]):
-    """Inner implementation, always called under analyze_lock."""
+async def _do_analyze_and_plan(messages: list[dict[str, Any]], lanlan_name: Optional[str], job: Optional[AnalyzeJob] = None):
+    """Inner implementation of _background_analyze_and_plan."""
     try:
         logger.info("[AgentAnalyze] background analyze start: lanlan=%s messages=%d flags=%s analyzer_enabled=%s",
                     lanlan_name, len(messages), Modules.agent_flags, Modules.analyzer_enabled)
@@ -583,7 +594,9 @@ async def _do_analyze_and_plan(messages: list[dict[str, Any]], lanlan_name: Opti
         result = await Modules.task_executor.analyze_and_execute(
             messages=messages,
             lanlan_name=lanlan_name,
-            agent_flags=Modules.agent_flags
+            agent_flags=Modules.agent_flags,
+            on_commit=job.commit if job is not None else None,
+            unanalyzed_turns=job.unanalyzed_turns if job is not None else 1,
         )
 
         # testUserPlugin: log after analysis decision if user_plugin_enabled is true
@@ -656,17 +669,22 @@ async def _do_analyze_and_plan(messages: list[dict[str, Any]], lanlan_name: Opti
         # 处理 ComputerUse 任务（需要通过子进程调度）
         elif result.execution_method == 'computer_use':
             if Modules.agent_flags.get("computer_use_enabled", False):
-                # 检查重复
-                dup, matched = await _is_duplicate_task(result.task_description, lanlan_name)
+                # Lazy-init the lock (must happen inside the event loop)
+                if Modules.analyze_lock is None:
+                    Modules.analyze_lock = asyncio.Lock()
+                # 检查重复 + 入队必须原子：并发分析可能同时通过去重检查
+                async with Modules.analyze_lock:
+                    dup, matched = await _is_duplicate_task(result.task_description, lanlan_name)
+                    ti = None
+                    if not dup:
+                        sm = get_session_manager()
+                        cu_session = sm.get_or_create(None, "cua")
+                        cu_session.add_task(result.task_description)
+                        ti = _spawn_task("computer_use", {"instruction": result.task_description, "screenshot": None})
+                        ti["lanlan_name"] = lanlan_name
+                        ti["session_id"] = cu_session.session_id
                 if not dup:
-                    # Session management for multi-turn CUA tasks
-                    sm = get_session_manager()
-                    cu_session = sm.get_or_create(None, "cua")
-                    cu_session.add_task(result.task_description)
-
-                    ti = _spawn_task("computer_use", {"instruction": result.task_description, "screenshot": None})
-                    ti["lanlan_name"] = lanlan_name
-                    ti["session_id"] = cu_session.session_id
+                    # Session management for multi-turn CUA tasks: created above under the lock
                     logger.info(f"[ComputerUse] Scheduled task {ti['id']} (session={cu_session.session_id[:8]}): {result.task_description[:50]}...")
                     try:
                         await _emit_main_event(
@@ -706,6 +724,7 @@ async def _do_analyze_and_plan(messages: list[dict[str, Any]], lanlan_name: Opti
                 except Exception:
                     pass
                 try:
+                    # 与 /browser_use/run 及其他分析共享同一浏览器，run_instruction 内部串行
                     bres = await Modules.browser_use.run_instruction(
                         result.task_description,
                         session_id=bu_session.session_id,
@@ -1388,6 +1407,8 @@ async def admin_control(payload: Dict[str, Any]):
                 if isinstance(res, Exception) and not isinstance(res, asyncio.CancelledError):
                     logger.warning(f"[Agent] Error awaiting cancelled background task: {res}")
         Modules._background_tasks.clear()
+        if Modules.analyze_scheduler is not None:
+            Modules.analyze_scheduler.cancel_all()
 
         # Cancel any in-flight asyncio tasks and clear registry
         if Modules.active_computer_use_async_task and not Modules.active_computer_use_async_task.done():
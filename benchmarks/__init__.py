@@ -0,0 +1,13 @@
+"""
+N.E.K.O 性能基准套件
+
+所有外部依赖（LLM / Realtime / TTS / MCP Router / 用户插件服务）均由
+``benchmarks.fakes`` 中的本地确定性替身提供，因此可以在离线环境和 CI 中
+反复运行，并在不同提交之间比较结果。
+
+用法::
+
+    python -m benchmarks.run                      # 运行全部场景
+    python -m benchmarks.run -s text_chat -n 50   # 只运行指定场景
+    python -m benchmarks.run --baseline old.json  # 与历史结果比较
+"""
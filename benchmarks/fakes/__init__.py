@@ -0,0 +1,26 @@
+"""
+本地确定性替身服务
+
+- ``openai_server``: OpenAI 兼容的 /v1/chat/completions（含 SSE 流式）与 /v1/embeddings
+- ``realtime_server``: 说 OmniRealtimeClient 事件协议的 Realtime WebSocket
+- ``tts_server``: GPT-SoVITS v3 stream-input 协议的 TTS WebSocket
+- ``tool_servers``: MCP Router（JSON-RPC over HTTP）与用户插件服务（/plugins, /plugin/trigger）
+
+替身只依赖 fastapi / websockets，不导入任何项目模块，
+以便在 ConfigManager 初始化之前启动。
+"""
+
+from benchmarks.fakes.openai_server import FakeLLMState, create_openai_app
+from benchmarks.fakes.realtime_server import FakeRealtimeServer
+from benchmarks.fakes.tts_server import FakeTTSServer
+from benchmarks.fakes.tool_servers import FakeToolState, create_mcp_router_app, create_plugin_server_app
+
+__all__ = [
+    "FakeLLMState",
+    "create_openai_app",
+    "FakeRealtimeServer",
+    "FakeTTSServer",
+    "FakeToolState",
+    "create_mcp_router_app",
+    "create_plugin_server_app",
+]
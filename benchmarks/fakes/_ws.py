@@ -0,0 +1,47 @@
+"""在独立线程的事件循环中运行 websockets 服务端（供 Realtime / TTS 替身复用）。"""
+
+import asyncio
+import threading
+from typing import Optional
+
+from websockets.asyncio.server import serve
+
+
+class ThreadedWsServer:
+    """子类实现 ``handler(ws)``；``start()`` 后可通过 ``port`` 拿到实际端口。"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._ready = threading.Event()
+
+    async def handler(self, ws) -> None:  # pragma: no cover - 由子类实现
+        raise NotImplementedError
+
+    async def _main(self) -> None:
+        self._stop = asyncio.Event()
+        async with serve(self.handler, self.host, self.port, max_size=16 * 1024 * 1024) as server:
+            self.port = server.sockets[0].getsockname()[1]
+            self._ready.set()
+            await self._stop.wait()
+
+    def start(self, timeout: float = 5.0) -> "ThreadedWsServer":
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self._main())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name=type(self).__name__, daemon=True)
+        self._thread.start()
+        if not self._ready.wait(timeout):
+            raise RuntimeError(f"{type(self).__name__} failed to start")
+        return self
+
+    def stop(self) -> None:
+        if self._loop and self._stop and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._stop.set)
+        if self._thread:
+            self._thread.join(timeout=5)
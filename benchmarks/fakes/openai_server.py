@@ -0,0 +1,181 @@
+"""
+OpenAI 兼容的 LLM 替身
+
+回复内容由 ``FakeLLMState`` 决定：按顺序匹配 ``rules`` 中的子串（在 system +
+user 消息里查找），命中则返回对应文本，否则返回默认回复；规则也可以是一组子串
+（必须同时出现），子串越多的规则越先匹配，便于场景按对话内容区分同一类 prompt；
+``default_replies`` 轮换使用，避免触发客户端的重复度检测。
+流式回复按 ``chunk_chars`` 切片，首包前等待 ``first_token_delay``，
+之后每个分片间隔 ``chunk_delay``，以便模拟稳定的模型延迟。
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple, Union
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+EMBEDDING_DIM = 64
+
+DEFAULT_REPLIES = (
+    "喵~今天也要开开心心的哦！主人想聊点什么呢？",
+    "刚才窗外有只小鸟飞过去了，我盯着看了好久。",
+    "要不要一起听首歌放松一下？我最近很喜欢轻快的曲子。",
+    "主人记得喝水哦，坐久了也要起来活动活动身体。",
+    "我在想晚饭吃什么好，咖喱饭和寿司你更喜欢哪个？",
+)
+
+
+@dataclass
+class FakeLLMState:
+    default_replies: List[str] = field(default_factory=lambda: list(DEFAULT_REPLIES))
+    rules: List[Tuple[Tuple[str, ...], str]] = field(default_factory=list)
+    chunk_chars: int = 4
+    first_token_delay: float = 0.0
+    chunk_delay: float = 0.0
+    request_count: int = 0
+
+    def add_rule(self, needle: Union[str, Tuple[str, ...]], reply: str) -> None:
+        needles = (needle,) if isinstance(needle, str) else tuple(needle)
+        self.rules.append((needles, reply))
+        self.rules.sort(key=lambda rule: -len(rule[0]))
+
+    def pick_reply(self, messages: List[Dict[str, Any]]) -> str:
+        haystack = "\n".join(_message_text(m) for m in messages)
+        for needles, reply in self.rules:
+            if all(needle in haystack for needle in needles):
+                return reply
+        return self.default_replies[self.request_count % len(self.default_replies)]
+
+
+def _message_text(message: Dict[str, Any]) -> str:
+    content = message.get("content", "")
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "\n".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return ""
+
+
+# 每张图片按固定 token 计入 prompt（约等于常见 VLM 对 720p 截图的计费）
+IMAGE_TOKENS = 1000
+
+
+def _image_count(message: Dict[str, Any]) -> int:
+    content = message.get("content", "")
+    if not isinstance(content, list):
+        return 0
+    return sum(1 for part in content if isinstance(part, dict) and part.get("type") == "image_url")
+
+
+def _usage(messages: List[Dict[str, Any]], reply: str) -> Dict[str, int]:
+    prompt_tokens = sum(len(_message_text(m)) for m in messages) // 2
+    prompt_tokens += IMAGE_TOKENS * sum(_image_count(m) for m in messages)
+    completion_tokens = max(1, len(reply) // 2)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+def _embed(text: str) -> List[float]:
+    """确定性伪向量：同一文本永远得到同一向量，不同文本大概率正交。"""
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    raw = [(digest[i % len(digest)] - 128) / 128.0 for i in range(EMBEDDING_DIM)]
+    norm = sum(v * v for v in raw) ** 0.5 or 1.0
+    return [v / norm for v in raw]
+
+
+def create_openai_app(state: FakeLLMState) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/v1/models")
+    async def list_models():
+        return {"object": "list", "data": [{"id": "fake-model", "object": "model"}]}
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        inputs = body.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        data = [
+            {"object": "embedding", "index": i, "embedding": _embed(str(text))}
+            for i, text in enumerate(inputs)
+        ]
+        return {
+            "object": "list",
+            "data": data,
+            "model": body.get("model", "fake-embedding"),
+            "usage": {"prompt_tokens": len(inputs), "total_tokens": len(inputs)},
+        }
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        messages = body.get("messages", [])
+        model = body.get("model", "fake-model")
+        reply = state.pick_reply(messages)
+        state.request_count += 1
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+
+        if not body.get("stream"):
+            if state.first_token_delay:
+                await asyncio.sleep(state.first_token_delay)
+            return JSONResponse({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": reply},
+                    "finish_reason": "stop",
+                }],
+                "usage": _usage(messages, reply),
+            })
+
+        include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+
+        async def event_stream():
+            def chunk(delta: Dict[str, Any], finish_reason=None) -> str:
+                payload = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                }
+                return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+            if state.first_token_delay:
+                await asyncio.sleep(state.first_token_delay)
+            yield chunk({"role": "assistant", "content": ""})
+            step = max(1, state.chunk_chars)
+            for i in range(0, len(reply), step):
+                if i and state.chunk_delay:
+                    await asyncio.sleep(state.chunk_delay)
+                yield chunk({"content": reply[i:i + step]})
+            yield chunk({}, finish_reason="stop")
+            if include_usage:
+                usage_payload = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [],
+                    "usage": _usage(messages, reply),
+                }
+                yield f"data: {json.dumps(usage_payload)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+    return app
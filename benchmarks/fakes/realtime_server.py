@@ -0,0 +1,152 @@
+"""
+Realtime WebSocket 替身（Qwen-Omni / OpenAI Realtime 风格事件协议）
+
+支持 OmniRealtimeClient 会发送的事件：
+``session.update`` / ``input_audio_buffer.append`` / ``input_audio_buffer.clear`` /
+``input_image_buffer.append`` / ``conversation.item.create`` / ``response.create`` /
+``response.cancel``。
+
+服务端 VAD 是确定性的：RMS 超过 ``speech_rms`` 的音频块视为语音，
+语音后累计 ``silence_ms`` 的静音即判定一句结束，随后按固定脚本回复
+``speech_stopped → transcription.completed → response.* → response.done``。
+"""
+
+import array
+import asyncio
+import base64
+import json
+import math
+import uuid
+from typing import Optional
+
+from websockets.exceptions import ConnectionClosed
+
+from benchmarks.fakes._ws import ThreadedWsServer
+
+INPUT_SAMPLE_RATE = 16000
+OUTPUT_SAMPLE_RATE = 24000
+
+
+def _rms(pcm16: bytes) -> float:
+    if len(pcm16) < 2:
+        return 0.0
+    samples = array.array("h")
+    samples.frombytes(pcm16[: len(pcm16) // 2 * 2])
+    return math.sqrt(sum(s * s for s in samples) / len(samples))
+
+
+def _tone(duration_s: float, freq: float = 440.0, amplitude: int = 6000) -> bytes:
+    n = int(OUTPUT_SAMPLE_RATE * duration_s)
+    samples = array.array("h", (int(amplitude * math.sin(2 * math.pi * freq * i / OUTPUT_SAMPLE_RATE)) for i in range(n)))
+    return samples.tobytes()
+
+
+class FakeRealtimeServer(ThreadedWsServer):
+    def __init__(
+        self,
+        reply_text: str = "好呀，我听到啦，主人今天辛苦了喵。",
+        transcript: str = "你好呀，今天过得怎么样？",
+        speech_rms: float = 500.0,
+        silence_ms: int = 200,
+        response_delay: float = 0.0,
+        audio_chunks: int = 10,
+        audio_chunk_ms: int = 40,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.reply_text = reply_text
+        self.transcript = transcript
+        self.speech_rms = speech_rms
+        self.silence_ms = silence_ms
+        self.response_delay = response_delay
+        self.audio_chunks = audio_chunks
+        self._audio_chunk_b64 = base64.b64encode(_tone(audio_chunk_ms / 1000.0)).decode()
+        self.sessions = 0
+        self.appended_bytes = 0
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}/realtime"
+
+    async def handler(self, ws) -> None:
+        self.sessions += 1
+        in_speech = False
+        silence_samples = 0
+        response_task: Optional[asyncio.Task] = None
+        send_lock = asyncio.Lock()
+
+        async def emit(event_type: str, **payload):
+            event = {"type": event_type, "event_id": f"event_{uuid.uuid4().hex[:12]}", **payload}
+            async with send_lock:
+                await ws.send(json.dumps(event, ensure_ascii=False))
+
+        async def respond(with_transcription: bool):
+            try:
+                if with_transcription:
+                    await emit("conversation.item.input_audio_transcription.completed", transcript=self.transcript)
+                if self.response_delay:
+                    await asyncio.sleep(self.response_delay)
+                response_id = f"resp_{uuid.uuid4().hex[:12]}"
+                item_id = f"item_{uuid.uuid4().hex[:12]}"
+                await emit("response.created", response={"id": response_id, "status": "in_progress"})
+                await emit("response.output_item.added", item={"id": item_id, "type": "message", "role": "assistant"})
+                step = max(1, len(self.reply_text) // max(1, self.audio_chunks))
+                pieces = [self.reply_text[i:i + step] for i in range(0, len(self.reply_text), step)]
+                for i in range(max(len(pieces), self.audio_chunks)):
+                    if i < len(pieces):
+                        await emit("response.audio_transcript.delta", response_id=response_id, item_id=item_id, delta=pieces[i])
+                    if i < self.audio_chunks:
+                        await emit("response.audio.delta", response_id=response_id, item_id=item_id, delta=self._audio_chunk_b64)
+                await emit("response.audio_transcript.done", response_id=response_id, item_id=item_id, transcript=self.reply_text)
+                await emit("response.done", response={"id": response_id, "status": "completed"})
+            except asyncio.CancelledError:
+                try:
+                    await emit("response.done", response={"status": "cancelled"})
+                except ConnectionClosed:
+                    pass
+                raise
+            except ConnectionClosed:
+                pass
+
+        def start_response(with_transcription: bool):
+            nonlocal response_task
+            if response_task and not response_task.done():
+                response_task.cancel()
+            response_task = asyncio.create_task(respond(with_transcription))
+
+        try:
+            async for raw in ws:
+                event = json.loads(raw)
+                event_type = event.get("type")
+                if event_type == "session.update":
+                    await emit("session.updated", session=event.get("session", {}))
+                elif event_type == "input_audio_buffer.append":
+                    pcm = base64.b64decode(event.get("audio", ""))
+                    self.appended_bytes += len(pcm)
+                    if _rms(pcm) >= self.speech_rms:
+                        silence_samples = 0
+                        if not in_speech:
+                            in_speech = True
+                            await emit("input_audio_buffer.speech_started", audio_start_ms=0)
+                    elif in_speech:
+                        silence_samples += len(pcm) // 2
+                        if silence_samples * 1000 >= self.silence_ms * INPUT_SAMPLE_RATE:
+                            in_speech = False
+                            silence_samples = 0
+                            await emit("input_audio_buffer.speech_stopped", audio_end_ms=0)
+                            start_response(with_transcription=True)
+                elif event_type == "input_audio_buffer.clear":
+                    in_speech = False
+                    silence_samples = 0
+                    await emit("input_audio_buffer.cleared")
+                elif event_type == "response.create":
+                    start_response(with_transcription=False)
+                elif event_type == "response.cancel":
+                    if response_task and not response_task.done():
+                        response_task.cancel()
+                # conversation.item.create / input_image_buffer.append: 仅接收
+        except ConnectionClosed:
+            pass
+        finally:
+            if response_task and not response_task.done():
+                response_task.cancel()
@@ -0,0 +1,101 @@
+"""
+工具侧替身：MCP Router 与用户插件服务
+
+- MCP Router: ``POST /mcp`` JSON-RPC 2.0（initialize / tools/list / tools/call），与 ``brain.mcp_client`` 对齐
+- 用户插件服务: ``GET /plugins`` 与 ``POST /plugin/trigger``，与 ``brain.task_executor`` 对齐
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+def _default_tools() -> List[Dict[str, Any]]:
+    return [
+        {
+            "name": "get_weather",
+            "description": "查询指定城市的天气",
+            "inputSchema": {"type": "object", "properties": {"city": {"type": "string"}}, "required": ["city"]},
+        },
+        {
+            "name": "set_timer",
+            "description": "设置一个倒计时提醒",
+            "inputSchema": {"type": "object", "properties": {"seconds": {"type": "integer"}}, "required": ["seconds"]},
+        },
+    ]
+
+
+def _default_plugins() -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": "benchPlugin",
+            "description": "基准测试用插件：回显传入的消息",
+            "input_schema": {"type": "object", "properties": {"message": {"type": "string"}}},
+            "entries": [{"id": "echo", "name": "Echo", "description": "回显消息"}],
+        }
+    ]
+
+
+@dataclass
+class FakeToolState:
+    tools: List[Dict[str, Any]] = field(default_factory=_default_tools)
+    plugins: List[Dict[str, Any]] = field(default_factory=_default_plugins)
+    tool_delay: float = 0.0
+    tool_calls: int = 0
+    plugin_triggers: int = 0
+
+
+def create_mcp_router_app(state: FakeToolState) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/mcp")
+    async def mcp(request: Request):
+        body = await request.json()
+        method = body.get("method")
+        params = body.get("params") or {}
+        rpc_id = body.get("id")
+        if method == "initialize":
+            result = {
+                "protocolVersion": params.get("protocolVersion", "2024-11-05"),
+                "capabilities": {"tools": {}},
+                "serverInfo": {"name": "fake-mcp-router", "version": "0.0.0"},
+            }
+        elif method == "tools/list":
+            result = {"tools": state.tools}
+        elif method == "tools/call":
+            state.tool_calls += 1
+            if state.tool_delay:
+                await asyncio.sleep(state.tool_delay)
+            name = params.get("name")
+            args = params.get("arguments") or {}
+            result = {"content": [{"type": "text", "text": f"{name} ok: {args}"}], "isError": False}
+        else:
+            return JSONResponse({"jsonrpc": "2.0", "id": rpc_id, "error": {"code": -32601, "message": f"unknown method {method}"}})
+        return JSONResponse({"jsonrpc": "2.0", "id": rpc_id, "result": result})
+
+    return app
+
+
+def create_plugin_server_app(state: FakeToolState) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/plugins")
+    async def plugins():
+        return {"plugins": state.plugins}
+
+    @app.post("/plugin/trigger")
+    async def trigger(request: Request):
+        body = await request.json()
+        state.plugin_triggers += 1
+        return {
+            "success": True,
+            "plugin_id": body.get("plugin_id"),
+            "executed_entry": body.get("entry_id"),
+            "task_id": body.get("task_id"),
+            "result": {"echo": (body.get("args") or {}).get("message", "")},
+        }
+
+    return app
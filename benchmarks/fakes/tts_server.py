@@ -0,0 +1,103 @@
+"""
+TTS WebSocket 替身（GPT-SoVITS v3 ``/api/v3/tts/stream-input`` 协议）
+
+``tts_client.gptsovits_tts_worker`` 在 ``ttsModelUrl`` 配置为 http(s) 地址时使用该协议：
+``{"cmd": "init"} → {"type": "ready"}``，``{"cmd": "append", "data": ...}`` 累积文本，
+遇到句末标点即合成一句并以二进制 WAV 分片返回，``{"cmd": "end"}`` 冲刷剩余文本后回 ``done``。
+每句音频时长与字数成正比，保证结果可复现。``init_delay`` 模拟远端建连 + 握手耗时。
+"""
+
+import array
+import asyncio
+import json
+import math
+import struct
+
+from websockets.exceptions import ConnectionClosed
+
+from benchmarks.fakes._ws import ThreadedWsServer
+
+SAMPLE_RATE = 32000
+_SENTENCE_END = set("。！？!?.~…\n")
+
+
+def _wav_chunk(pcm: bytes, sample_rate: int = SAMPLE_RATE) -> bytes:
+    header = b"RIFF" + struct.pack("<I", 36 + len(pcm)) + b"WAVE"
+    header += b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16)
+    header += b"data" + struct.pack("<I", len(pcm))
+    return header + pcm
+
+
+class FakeTTSServer(ThreadedWsServer):
+    def __init__(self, ms_per_char: int = 60, chunk_ms: int = 100, synth_delay: float = 0.0,
+                 init_delay: float = 0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.ms_per_char = ms_per_char
+        self.chunk_ms = chunk_ms
+        self.synth_delay = synth_delay
+        self.init_delay = init_delay
+        self.connections = 0
+        self.sentences = 0
+
+    @property
+    def base_url(self) -> str:
+        """供 core_config ``ttsModelUrl`` 使用的 http 地址（worker 内部转换为 ws://）。"""
+        return f"http://{self.host}:{self.port}"
+
+    def _synthesize(self, text: str) -> list[bytes]:
+        n = int(SAMPLE_RATE * self.ms_per_char * len(text) / 1000)
+        samples = array.array("h", (int(4000 * math.sin(2 * math.pi * 220 * i / SAMPLE_RATE)) for i in range(n)))
+        pcm = samples.tobytes()
+        step = SAMPLE_RATE * 2 * self.chunk_ms // 1000
+        return [_wav_chunk(pcm[i:i + step]) for i in range(0, len(pcm), step)]
+
+    async def handler(self, ws) -> None:
+        buffer = ""
+        task_id = 0
+
+        async def flush(text: str):
+            nonlocal task_id
+            text = text.strip()
+            if not text:
+                return
+            task_id += 1
+            self.sentences += 1
+            await ws.send(json.dumps({"type": "sentence", "task_id": task_id, "text": text}, ensure_ascii=False))
+            if self.synth_delay:
+                await asyncio.sleep(self.synth_delay)
+            chunks = self._synthesize(text)
+            for chunk in chunks:
+                await ws.send(chunk)
+            await ws.send(json.dumps({"type": "sentence_done", "task_id": task_id, "chunks_sent": len(chunks)}))
+
+        try:
+            async for raw in ws:
+                if isinstance(raw, bytes):
+                    continue
+                msg = json.loads(raw)
+                cmd = msg.get("cmd")
+                if cmd == "init":
+                    self.connections += 1
+                    if self.init_delay:
+                        await asyncio.sleep(self.init_delay)
+                    await ws.send(json.dumps({"type": "ready", "voice_id": msg.get("voice_id")}))
+                elif cmd == "append":
+                    buffer += msg.get("data", "")
+                    while True:
+                        cut = next((i for i, ch in enumerate(buffer) if ch in _SENTENCE_END), -1)
+                        if cut < 0:
+                            break
+                        sentence, buffer = buffer[:cut + 1], buffer[cut + 1:]
+                        await flush(sentence)
+                elif cmd == "flush":
+                    await flush(buffer)
+                    buffer = ""
+                    await ws.send(json.dumps({"type": "flushed"}))
+                elif cmd == "end":
+                    await flush(buffer)
+                    buffer = ""
+                    await ws.send(json.dumps({"type": "done"}))
+                    await ws.close()
+                    return
+        except ConnectionClosed:
+            pass
@@ -0,0 +1,236 @@
+"""
+基准运行环境
+
+``BenchEnvironment`` 负责：
+1. 启动全部本地替身（LLM / Realtime / TTS / MCP Router / 用户插件服务）；
+2. 在临时目录中生成 ``core_config.json``，把所有模型入口指向替身；
+3. 在导入任何项目模块之前设置端口环境变量并重定向 ConfigManager 的文档目录；
+4. 按需启动真实的 memory_server（供 /process、/new_dialog、/proactive_chat 使用）。
+
+注意：本模块顶层不能导入项目代码，否则 config 中的端口常量会在环境变量生效前固化。
+"""
+
+import json
+import logging
+import os
+import shutil
+import socket
+import statistics
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from unittest.mock import patch
+
+import uvicorn
+
+from benchmarks.fakes import (
+    FakeLLMState,
+    FakeRealtimeServer,
+    FakeTTSServer,
+    FakeToolState,
+    create_mcp_router_app,
+    create_openai_app,
+    create_plugin_server_app,
+)
+
+logger = logging.getLogger(__name__)
+
+FAKE_API_KEY = "sk-neko-bench"
+FAKE_CHAT_MODEL = "fake-chat"
+FAKE_VISION_MODEL = "fake-vision"
+# OmniRealtimeClient 依据模型名选择 session 配置，必须包含 qwen/glm/gpt/step/free 之一
+FAKE_REALTIME_MODEL = "qwen-omni-fake"
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class UvicornThread:
+    """在后台线程中运行 ASGI 应用（与 tests/conftest.py 的做法一致）。"""
+
+    def __init__(self, app, port: Optional[int] = None, name: str = "uvicorn"):
+        self.port = port or free_port()
+        self.name = name
+        self._server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="error"))
+        self._thread = threading.Thread(target=self._server.run, name=name, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self, timeout: float = 10.0) -> "UvicornThread":
+        self._thread.start()
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self._server.started:
+                return self
+            time.sleep(0.02)
+        raise RuntimeError(f"{self.name} failed to start on {self.port}")
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+
+@dataclass
+class ScenarioResult:
+    """单个场景的原始样本（毫秒）与附加计数。"""
+
+    name: str
+    samples: Dict[str, List[float]] = field(default_factory=dict)
+    counters: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def add(self, metric: str, value_ms: float) -> None:
+        self.samples.setdefault(metric, []).append(value_ms)
+
+    def summary(self) -> Dict[str, Any]:
+        metrics = {metric: summarize(values) for metric, values in self.samples.items() if values}
+        out: Dict[str, Any] = {"metrics": metrics, "counters": self.counters}
+        if self.error:
+            out["error"] = self.error
+        return out
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * pct / 100.0
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(values),
+        "mean_ms": round(statistics.fmean(values), 3),
+        "p50_ms": round(percentile(values, 50), 3),
+        "p95_ms": round(percentile(values, 95), 3),
+        "min_ms": round(min(values), 3),
+        "max_ms": round(max(values), 3),
+    }
+
+
+class Stopwatch:
+    """``with Stopwatch() as sw: ...`` 之后 ``sw.ms`` 为耗时毫秒。"""
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        self.ms = 0.0
+        return self
+
+    def __exit__(self, *exc):
+        self.ms = (time.perf_counter() - self._start) * 1000.0
+        return False
+
+
+class BenchEnvironment:
+    def __init__(self, workdir: Optional[str] = None, model_latency_ms: float = 0.0, keep_workdir: bool = False):
+        self._own_workdir = workdir is None
+        self.workdir = Path(workdir or tempfile.mkdtemp(prefix="neko_bench_"))
+        self.keep_workdir = keep_workdir
+        self.llm_state = FakeLLMState(first_token_delay=model_latency_ms / 1000.0)
+        self.tool_state = FakeToolState()
+        self.realtime = FakeRealtimeServer(response_delay=model_latency_ms / 1000.0)
+        self.tts = FakeTTSServer()
+        self._llm_server: Optional[UvicornThread] = None
+        self._mcp_server: Optional[UvicornThread] = None
+        self._plugin_server: Optional[UvicornThread] = None
+        self._memory_server: Optional[UvicornThread] = None
+        self._docs_patcher = None
+        self.memory_port = free_port()
+
+    # ---- 地址 ----
+    @property
+    def llm_url(self) -> str:
+        return f"{self._llm_server.url}/v1"
+
+    @property
+    def mcp_router_url(self) -> str:
+        return self._mcp_server.url
+
+    @property
+    def memory_url(self) -> str:
+        return f"http://127.0.0.1:{self.memory_port}"
+
+    # ---- 生命周期 ----
+    def start(self) -> "BenchEnvironment":
+        self._llm_server = UvicornThread(create_openai_app(self.llm_state), name="fake-llm").start()
+        self._mcp_server = UvicornThread(create_mcp_router_app(self.tool_state), name="fake-mcp").start()
+        self._plugin_server = UvicornThread(create_plugin_server_app(self.tool_state), name="fake-plugins").start()
+        self.realtime.start()
+        self.tts.start()
+
+        # 端口常量在 config 首次导入时读取，必须先于任何项目模块导入
+        os.environ["NEKO_MEMORY_SERVER_PORT"] = str(self.memory_port)
+        os.environ["NEKO_USER_PLUGIN_SERVER_PORT"] = str(self._plugin_server.port)
+
+        docs_dir = self.workdir / "docs"
+        config_dir = docs_dir / "N.E.K.O" / "config"
+        config_dir.mkdir(parents=True, exist_ok=True)
+        (config_dir / "core_config.json").write_text(
+            json.dumps(self._core_config(), ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        self._docs_patcher = patch(
+            "utils.config_manager.ConfigManager._get_documents_directory", return_value=docs_dir
+        )
+        self._docs_patcher.start()
+        return self
+
+    def start_memory_server(self) -> str:
+        if self._memory_server is None:
+            import memory_server
+
+            self._memory_server = UvicornThread(memory_server.app, port=self.memory_port, name="memory").start()
+        return self.memory_url
+
+    def stop(self) -> None:
+        for server in (self._memory_server, self._plugin_server, self._mcp_server, self._llm_server):
+            if server is not None:
+                server.stop()
+        self.realtime.stop()
+        self.tts.stop()
+        if self._docs_patcher is not None:
+            self._docs_patcher.stop()
+        if self._own_workdir and not self.keep_workdir:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def _core_config(self) -> Dict[str, Any]:
+        llm = self.llm_url
+        cfg: Dict[str, Any] = {
+            "coreApi": "qwen",
+            "assistApi": "qwen",
+            "coreApiKey": FAKE_API_KEY,
+            "enableCustomApi": True,
+            "omniModelUrl": self.realtime.url,
+            "omniModelId": FAKE_REALTIME_MODEL,
+            "omniModelApiKey": FAKE_API_KEY,
+            "ttsModelUrl": self.tts.base_url,
+            "ttsModelId": "fake-tts",
+            "ttsModelApiKey": FAKE_API_KEY,
+            "agentModelUrl": llm,
+            "agentModelId": FAKE_CHAT_MODEL,
+            "agentModelApiKey": FAKE_API_KEY,
+        }
+        for prefix in ("conversation", "summary", "correction", "emotion"):
+            cfg[f"{prefix}ModelUrl"] = llm
+            cfg[f"{prefix}ModelId"] = FAKE_CHAT_MODEL
+            cfg[f"{prefix}ModelApiKey"] = FAKE_API_KEY
+        cfg["visionModelUrl"] = llm
+        cfg["visionModelId"] = FAKE_VISION_MODEL
+        cfg["visionModelApiKey"] = FAKE_API_KEY
+        return cfg
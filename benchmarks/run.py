@@ -0,0 +1,157 @@
+"""
+基准入口
+
+    python -m benchmarks.run [-s SCENARIO ...] [-n ITERATIONS] [-o results.json]
+                             [--thresholds benchmarks/thresholds.json] [--baseline old.json]
+
+结果 JSON 结构::
+
+    {
+      "meta": {...},                      # 提交号、Python 版本、参数
+      "scenarios": {"text_chat": {"metrics": {"turn": {"p50_ms": ...}}, "counters": {...}}},
+      "violations": ["text_chat.turn p95_ms 812.0 > 500.0", ...]
+    }
+
+阈值分三类：``metrics`` 中的绝对上限、``counters`` 中的计数上/下限（``max`` / ``min``），
+以及相对 ``--baseline`` 的 p50 回归百分比。
+存在违例时退出码为 1（``--no-fail`` 可关闭），便于在 CI 中直接使用。
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from benchmarks.harness import BenchEnvironment  # noqa: E402
+from benchmarks.scenarios import SCENARIOS  # noqa: E402
+
+DEFAULT_THRESHOLDS = Path(__file__).resolve().parent / "thresholds.json"
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def check_thresholds(scenarios: Dict[str, Any], thresholds: Dict[str, Any], baseline: Dict[str, Any] = None) -> List[str]:
+    violations: List[str] = []
+    for key, limits in (thresholds.get("metrics") or {}).items():
+        scenario, _, metric = key.partition(".")
+        stats = scenarios.get(scenario, {}).get("metrics", {}).get(metric)
+        if not stats:
+            continue
+        for stat, limit in limits.items():
+            value = stats.get(stat)
+            if value is not None and value > limit:
+                violations.append(f"{key} {stat} {value:.3f} > {limit}")
+
+    for key, limits in (thresholds.get("counters") or {}).items():
+        scenario, _, name = key.partition(".")
+        value = scenarios.get(scenario, {}).get("counters", {}).get(name)
+        if value is None:
+            continue
+        if "max" in limits and value > limits["max"]:
+            violations.append(f"{key} {value} > {limits['max']}")
+        if "min" in limits and value < limits["min"]:
+            violations.append(f"{key} {value} < {limits['min']}")
+
+    if baseline:
+        max_pct = float(thresholds.get("max_regression_pct", 25.0))
+        min_ms = float(thresholds.get("min_regression_ms", 1.0))
+        for scenario, data in scenarios.items():
+            base_metrics = baseline.get("scenarios", {}).get(scenario, {}).get("metrics", {})
+            for metric, stats in data.get("metrics", {}).items():
+                base = base_metrics.get(metric)
+                if not base:
+                    continue
+                old, new = base["p50_ms"], stats["p50_ms"]
+                if new - old > min_ms and old > 0 and (new - old) / old * 100.0 > max_pct:
+                    violations.append(
+                        f"{scenario}.{metric} p50_ms {old:.3f} -> {new:.3f} (+{(new - old) / old * 100.0:.1f}% > {max_pct}%)"
+                    )
+
+    for scenario, data in scenarios.items():
+        if data.get("error"):
+            violations.append(f"{scenario} failed: {data['error']}")
+    return violations
+
+
+async def run_scenarios(env: BenchEnvironment, names: List[str], iterations: int, warmup: int) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for name in names:
+        runner = SCENARIOS[name]
+        print(f"[bench] {name} ...", flush=True)
+        try:
+            if warmup:
+                await runner(env, warmup)
+            result = await runner(env, iterations)
+            out[name] = result.summary()
+        except Exception as e:
+            logging.getLogger(__name__).exception("scenario %s crashed", name)
+            out[name] = {"metrics": {}, "counters": {}, "error": f"{type(e).__name__}: {e}"}
+    return out
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="N.E.K.O benchmark suite (offline, local fakes)")
+    parser.add_argument("-s", "--scenario", action="append", choices=sorted(SCENARIOS), help="scenario to run (repeatable)")
+    parser.add_argument("-n", "--iterations", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--model-latency-ms", type=float, default=0.0, help="simulated model first-token latency")
+    parser.add_argument("-o", "--output", default="bench_results.json")
+    parser.add_argument("--thresholds", default=str(DEFAULT_THRESHOLDS))
+    parser.add_argument("--baseline", help="previous results JSON to compare against")
+    parser.add_argument("--no-fail", action="store_true", help="exit 0 even if thresholds are violated")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR)
+    names = args.scenario or list(SCENARIOS)
+
+    started = time.time()
+    with BenchEnvironment(model_latency_ms=args.model_latency_ms) as env:
+        scenarios = asyncio.run(run_scenarios(env, names, args.iterations, args.warmup))
+
+    thresholds = json.loads(Path(args.thresholds).read_text(encoding="utf-8")) if args.thresholds else {}
+    baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8")) if args.baseline else None
+    violations = check_thresholds(scenarios, thresholds, baseline)
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "model_latency_ms": args.model_latency_ms,
+            "started_at": started,
+            "duration_s": round(time.time() - started, 3),
+        },
+        "scenarios": scenarios,
+        "violations": violations,
+    }
+    Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    for name, data in scenarios.items():
+        for metric, stats in data.get("metrics", {}).items():
+            print(f"  {name:16s} {metric:28s} p50={stats['p50_ms']:9.3f}ms p95={stats['p95_ms']:9.3f}ms n={stats['count']}")
+    for v in violations:
+        print(f"  ✗ {v}")
+    print(f"[bench] results written to {args.output}")
+    return 1 if violations and not args.no_fail else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
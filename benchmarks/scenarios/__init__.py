@@ -0,0 +1,74 @@
+"""
+基准场景注册表
+
+每个场景模块导出 ``async def run(env, iterations) -> ScenarioResult``，
+项目模块一律在 ``run`` 内部延迟导入（见 benchmarks.harness 的说明）。
+"""
+
+from benchmarks.scenarios import (
+    agent_tabs,
+    analyze_burst,
+    api_registry,
+    audio_dsp_pool,
+    audio_uplink,
+    characters_page,
+    computer_use_replay,
+    cua_context,
+    emotion_batch,
+    hot_swap_gap,
+    hot_swap_replay,
+    memory,
+    metrics_overhead,
+    ocr_grounding,
+    opus_downlink,
+    plugin_trigger,
+    preferences_drag,
+    proactive_chat,
+    repetition,
+    screen_share,
+    stream_translation,
+    task_classifier,
+    task_dedup,
+    text_chat,
+    text_frames,
+    tts_phrase_cache,
+    tts_pool,
+    tts_stream,
+    voice_session,
+    vrm_catalog,
+)
+
+SCENARIOS = {
+    "text_chat": text_chat.run,
+    "voice_session": voice_session.run,
+    "tts_stream": tts_stream.run,
+    "memory": memory.run,
+    "plugin_trigger": plugin_trigger.run,
+    "proactive_chat": proactive_chat.run,
+    "metrics_overhead": metrics_overhead.run,
+    "repetition": repetition.run,
+    "screen_share": screen_share.run,
+    "computer_use_replay": computer_use_replay.run,
+    "ocr_grounding": ocr_grounding.run,
+    "cua_context": cua_context.run,
+    "analyze_burst": analyze_burst.run,
+    "task_dedup": task_dedup.run,
+    "task_classifier": task_classifier.run,
+    "characters_page": characters_page.run,
+    "vrm_catalog": vrm_catalog.run,
+    "preferences_drag": preferences_drag.run,
+    "api_registry": api_registry.run,
+    "agent_tabs": agent_tabs.run,
+    "opus_downlink": opus_downlink.run,
+    "tts_phrase_cache": tts_phrase_cache.run,
+    "tts_pool": tts_pool.run,
+    "hot_swap_replay": hot_swap_replay.run,
+    "stream_translation": stream_translation.run,
+    "text_frames": text_frames.run,
+    "emotion_batch": emotion_batch.run,
+    "audio_uplink": audio_uplink.run,
+    "audio_dsp_pool": audio_dsp_pool.run,
+    "hot_swap_gap": hot_swap_gap.run,
+}
+
+__all__ = ["SCENARIOS"]
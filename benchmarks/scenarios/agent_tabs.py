@@ -0,0 +1,93 @@
+"""
+Agent 面板：多个浏览器标签页同时轮询 /api/agent/tasks 与 availability 时的延迟与上游请求数。
+
+不依赖真实 agent_server。替身上游（httpx.MockTransport）每个请求耗时 ``UPSTREAM_MS``；
+``TABS`` 个标签页每 ``POLL_INTERVAL`` 秒轮询一次 /tasks 和 /mcp/availability，共 ``ROUNDS`` 轮。
+
+- ``legacy_poll``: 原实现——每个请求单独转发到上游
+- ``proxy_poll``: ``agent_router`` 的并发 GET 合并 + availability 短时缓存
+- ``stream_update``: 一次 task_update 从事件总线发布到 ``TABS`` 个 /tasks/stream 订阅者都收到的耗时
+- counters: ``*_upstream_requests``（每次迭代打到上游的请求数）
+"""
+
+import asyncio
+import importlib
+import time
+
+from benchmarks.harness import BenchEnvironment, ScenarioResult, Stopwatch
+
+TABS = 8
+ROUNDS = 5
+POLL_INTERVAL = 0.1
+UPSTREAM_MS = 20
+
+
+async def run(env: BenchEnvironment, iterations: int) -> ScenarioResult:
+    import httpx
+
+    agent_router = importlib.import_module("main_routers.agent_router")
+
+    result = ScenarioResult("agent_tabs")
+    hits = {"count": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        hits["count"] += 1
+        await asyncio.sleep(UPSTREAM_MS / 1000.0)
+        if request.url.path == "/tasks":
+            return httpx.Response(200, json={"tasks": [{"id": f"t{i}", "status": "running"} for i in range(10)]})
+        return httpx.Response(200, json={"ready": True, "reasons": []})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    saved_client = agent_router._HTTP_CLIENT
+    agent_router._HTTP_CLIENT = client
+
+    async def legacy_poll():
+        # 改动前：每个代理请求都直接转发
+        r = await client.get(f"{agent_router.TOOL_SERVER_BASE}/tasks", timeout=2.5)
+        r.json()
+        r = await client.get(f"{agent_router.TOOL_SERVER_BASE}/mcp/availability", timeout=1.5)
+        r.json()
+
+    async def proxy_poll():
+        await agent_router.proxy_tasks()
+        await agent_router.proxy_mcp_availability()
+
+    async def tab(poll, label):
+        for _ in range(ROUNDS):
+            t0 = time.perf_counter()
+            await poll()
+            result.add(label, (time.perf_counter() - t0) * 1000.0)
+            await asyncio.sleep(POLL_INTERVAL)
+
+    class _Request:
+        async def is_disconnected(self):
+            return False
+
+    upstream = {"legacy": 0, "proxy": 0}
+    try:
+        for _ in range(iterations):
+            for mode, poll in (("legacy", legacy_poll), ("proxy", proxy_poll)):
+                agent_router._AVAILABILITY_CACHE.clear()
+                before = hits["count"]
+                await asyncio.gather(*[tab(poll, f"{mode}_poll") for _ in range(TABS)])
+                upstream[mode] += hits["count"] - before
+
+            streams = []
+            for _ in range(TABS):
+                response = await agent_router.stream_tasks(_Request())
+                await response.body_iterator.__anext__()  # snapshot
+                streams.append(response.body_iterator)
+            with Stopwatch() as sw:
+                agent_router.publish_task_update({"id": "t0", "status": "completed"})
+                await asyncio.gather(*[s.__anext__() for s in streams])
+            result.add("stream_update", sw.ms)
+            for s in streams:
+                await s.aclose()
+    finally:
+        agent_router._HTTP_CLIENT = saved_client
+        agent_router._AVAILABILITY_CACHE.clear()
+        await client.aclose()
+
+    for mode, count in upstream.items():
+        result.counters[f"{mode}_upstream_requests"] = round(count / max(1, iterations), 1)
+    return result
@@ -0,0 +1,107 @@
+"""
+后台分析调度：一波 analyze_request 突发下的端到端延迟。
+
+不依赖替身服务。三个角色同时说话：``chatty`` 每 ``GAP_MS`` 发来一个新快照，共
+``CHATTY_TURNS`` 个；其余角色各一个。分析本身用固定耗时的桩模拟
+（``ANALYZE_MS``，其中最后 ``EXECUTE_MS`` 为 commit 之后的执行阶段）。
+
+- ``legacy``: 原实现——每个请求一个 task，全部排在同一把 analyze_lock 后面
+- ``scheduler``: ``brain.analyze_scheduler.AnalyzeScheduler``（slots=2）
+
+- ``*_e2e``: 每个角色最后一个快照发出 → 覆盖它的分析完成
+- ``scheduler_queue_wait``: 调度器内排队等待时间
+- counters: ``*_analyses``（实际跑完的分析次数）、``*_makespan_ms``
+"""
+
+import asyncio
+import time
+
+from benchmarks.harness import BenchEnvironment, ScenarioResult
+
+ANALYZE_MS = 150
+EXECUTE_MS = 30
+GAP_MS = 40
+CHATTY_TURNS = 4
+QUIET = ("quiet_a", "quiet_b")
+
+
+def _burst():
+    """(offset_ms, lanlan, snapshot_no)"""
+    events = [(i * GAP_MS, "chatty", i) for i in range(CHATTY_TURNS)]
+    events += [(5, name, 0) for name in QUIET]
+    return sorted(events)
+
+
+async def _analyze(done: dict, lanlan: str, snapshot: int, job=None):
+    await asyncio.sleep((ANALYZE_MS - EXECUTE_MS) / 1000.0)
+    if job is not None:
+        job.commit()
+    await asyncio.sleep(EXECUTE_MS / 1000.0)
+    done.setdefault(lanlan, []).append((snapshot, time.perf_counter()))
+
+
+async def _run_legacy(events):
+    lock = asyncio.Lock()
+    done: dict = {}
+    tasks = []
+
+    async def locked(lanlan, snapshot):
+        async with lock:
+            await _analyze(done, lanlan, snapshot)
+
+    t0 = time.perf_counter()
+    sent = {}
+    for offset, lanlan, snapshot in events:
+        await asyncio.sleep(max(0.0, t0 + offset / 1000.0 - time.perf_counter()))
+        sent[lanlan] = (snapshot, time.perf_counter())
+        tasks.append(asyncio.create_task(locked(lanlan, snapshot)))
+    await asyncio.gather(*tasks)
+    return t0, sent, done
+
+
+async def _run_scheduler(events, result: ScenarioResult):
+    from brain.analyze_scheduler import AnalyzeScheduler
+
+    done: dict = {}
+
+    async def runner(messages, lanlan_name, job=None):
+        await _analyze(done, lanlan_name, messages[0]["snapshot"], job)
+
+    scheduler = AnalyzeScheduler(runner, slots=2)
+    jobs = []
+    t0 = time.perf_counter()
+    sent = {}
+    for offset, lanlan, snapshot in events:
+        await asyncio.sleep(max(0.0, t0 + offset / 1000.0 - time.perf_counter()))
+        sent[lanlan] = (snapshot, time.perf_counter())
+        jobs.append(scheduler.submit(lanlan, lanlan, [{"snapshot": snapshot}], urgency=1))
+    await scheduler.join()
+    for job in jobs:
+        if job.started_at is not None:  # 被新快照替换的不计
+            result.add("scheduler_queue_wait", (job.started_at - job.enqueued_at) * 1000.0)
+    return t0, sent, done
+
+
+async def run(env: BenchEnvironment, iterations: int) -> ScenarioResult:
+    result = ScenarioResult("analyze_burst")
+    events = _burst()
+    totals = {"legacy": [0, 0.0], "scheduler": [0, 0.0]}
+
+    for _ in range(iterations):
+        for mode in ("legacy", "scheduler"):
+            if mode == "legacy":
+                t0, sent, done = await _run_legacy(events)
+            else:
+                t0, sent, done = await _run_scheduler(events, result)
+            finished = 0.0
+            for lanlan, (last_snapshot, sent_at) in sent.items():
+                covered = [at for snapshot, at in done.get(lanlan, []) if snapshot == last_snapshot]
+                result.add(f"{mode}_e2e", (covered[0] - sent_at) * 1000.0)
+                finished = max(finished, max(at for _, at in done[lanlan]))
+            totals[mode][0] += sum(len(v) for v in done.values())
+            totals[mode][1] += (finished - t0) * 1000.0
+
+    for mode, (analyses, makespan) in totals.items():
+        result.counters[f"{mode}_analyses"] = analyses
+        result.counters[f"{mode}_makespan_ms"] = round(makespan / max(1, iterations), 1)
+    return result
@@ -0,0 +1,79 @@
+"""
+API 配置解析：并发调用 ``ConfigManager.get_model_api_config`` 的耗时。
+
+不依赖替身服务。``THREADS`` 个线程同时按轮询的 model_type 各调用 ``CALLS`` 次
+（相当于多个会话/后台任务同时创建 LLM 客户端）。
+
+- ``legacy_resolve``: 原实现——每次读 core_config.json、重新转换并合并 API profile 后再解析
+- ``registry_resolve``: 编译后的 ``ProviderRegistry``（只比较来源文件的 mtime，O(1) 查表）
+- ``registry_after_edit``: core_config.json 被修改后的第一次调用（重新编译）
+- counters: ``*_calls_per_s``（全部线程合计吞吐）、``registry_mismatches``（与原实现结果不一致的 model_type 数）
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.harness import BenchEnvironment, ScenarioResult, Stopwatch
+
+THREADS = 8
+CALLS = 300
+
+
+def _hammer(resolve, model_types, samples: list) -> None:
+    for i in range(CALLS):
+        t0 = time.perf_counter()
+        resolve(model_types[i % len(model_types)])
+        samples.append((time.perf_counter() - t0) * 1000.0)
+
+
+async def run(env: BenchEnvironment, iterations: int) -> ScenarioResult:
+    import asyncio
+
+    from utils import api_config_loader
+    from utils.api_config_loader import MODEL_TYPE_MAPPING, get_assist_api_profiles, resolve_model_api_config
+    from utils.config_manager import get_config_manager
+
+    result = ScenarioResult("api_registry")
+    cm = get_config_manager()
+    model_types = list(MODEL_TYPE_MAPPING)
+
+    def legacy(model_type):
+        # 改动前：API profile 没有按版本缓存，每次都重新转换
+        api_config_loader._converted_cache.clear()
+        return resolve_model_api_config(cm._compile_core_config(), model_type, get_assist_api_profiles)
+
+    mismatches = 0
+    for model_type in model_types:
+        expected = legacy(model_type)
+        actual = cm.get_model_api_config(model_type)
+        if {k: actual.get(k) for k in expected} != expected:
+            mismatches += 1
+    result.counters["registry_mismatches"] = mismatches
+
+    throughput = {"legacy": [], "registry": []}
+    core_path = cm.get_config_path("core_config.json")
+    for _ in range(iterations):
+        for mode, resolve in (("legacy", legacy), ("registry", cm.get_model_api_config)):
+            per_thread = [[] for _ in range(THREADS)]
+            t0 = time.perf_counter()
+            with ThreadPoolExecutor(THREADS) as pool:
+                await asyncio.gather(*[
+                    asyncio.get_running_loop().run_in_executor(pool, _hammer, resolve, model_types, samples)
+                    for samples in per_thread
+                ])
+            elapsed = time.perf_counter() - t0
+            throughput[mode].append(THREADS * CALLS / elapsed)
+            for samples in per_thread:
+                for ms in samples:
+                    result.add(f"{mode}_resolve", ms)
+
+        if os.path.exists(core_path):
+            os.utime(core_path, ns=(time.time_ns(), time.time_ns()))
+            with Stopwatch() as sw:
+                cm.get_model_api_config("conversation")
+            result.add("registry_after_edit", sw.ms)
+
+    for mode, values in throughput.items():
+        result.counters[f"{mode}_calls_per_s"] = round(sum(values) / len(values))
+    return result
@@ -0,0 +1,131 @@
+"""
+麦克风音频 DSP：原来每个会话的 AudioProcessor 走默认线程池（run_in_executor）vs ``utils.audio_dsp_pool``
+（会话固定到 worker 进程分片，PCM 经共享内存环形槽传递），并发会话数逐级增加时每块增加的延迟。
+
+每个会话按实时节奏每 10ms 送一个 48kHz 块（RNNoise 开启），持续 ``SECONDS`` 秒；同一事件循环上另有一个
+模拟 main_server 其余工作的任务，每 10ms 做约 ``LOOP_WORK_MS`` 毫秒纯 Python 计算（与 DSP 线程抢 GIL）。
+某一级的块延迟 p95 超过 ``LIMIT_MS`` 后不再往上加。
+
+- ``thread_chunk_<n>`` / ``pool_chunk_<n>``: n 个并发会话时，单块从提交到拿到结果的耗时
+- ``pool_queue_<n>``: 进程池 worker 报告的排队延迟
+- counters: ``thread_max_sessions`` / ``pool_max_sessions``（p95 < ``LIMIT_MS`` 的最大并发会话数）、
+  ``pool_workers``、``cpu_count``
+"""
+
+import asyncio
+import json
+import os
+import statistics
+import time
+
+import numpy as np
+
+from benchmarks.harness import BenchEnvironment, ScenarioResult
+
+LEVELS = (1, 2, 4, 6, 8, 12, 16)
+SECONDS = 1.0
+CHUNK_S = 0.01
+LIMIT_MS = 20.0
+LOOP_WORK_MS = 2.0
+OPTIONS = dict(input_sample_rate=48000, output_sample_rate=16000, noise_reduce_enabled=True)
+
+
+def _chunks(count: int):
+    rng = np.random.default_rng(7)
+    t = np.arange(480 * count) / 48000.0
+    audio = np.sin(2 * np.pi * 220 * t) * 6000 + rng.normal(0, 800, t.size)
+    pcm = audio.astype(np.int16).tobytes()
+    return [pcm[i * 960:(i + 1) * 960] for i in range(count)]
+
+
+async def _loop_work(stop: asyncio.Event):
+    payload = {"type": "gemini_response", "text": "主人今天辛苦啦" * 8, "isNewMessage": False}
+    while not stop.is_set():
+        deadline = time.perf_counter() + LOOP_WORK_MS / 1000.0
+        while time.perf_counter() < deadline:
+            json.dumps(payload, ensure_ascii=False)
+        await asyncio.sleep(CHUNK_S)
+
+
+async def _session(process, chunks, samples):
+    start = time.perf_counter()
+    for i, chunk in enumerate(chunks):
+        t0 = time.perf_counter()
+        await process(chunk)
+        samples.append((time.perf_counter() - t0) * 1000.0)
+        delay = start + (i + 1) * CHUNK_S - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def _p95(samples):
+    return sorted(samples)[min(len(samples) - 1, int(len(samples) * 0.95))] if samples else 0.0
+
+
+async def _level(make_process, sessions, chunks, result, metric):
+    processes = [make_process() for _ in range(sessions)]
+    stop = asyncio.Event()
+    load = asyncio.create_task(_loop_work(stop))
+    samples = []
+    try:
+        await asyncio.gather(*(_session(p, chunks, samples) for p in processes))
+    finally:
+        stop.set()
+        await load
+    for value in samples:
+        result.add(metric, value)
+    return _p95(samples)
+
+
+async def run(env: BenchEnvironment, iterations: int) -> ScenarioResult:
+    from utils.audio_dsp_pool import AudioDSPPool
+    from utils.audio_processor import AudioProcessor
+
+    result = ScenarioResult("audio_dsp_pool")
+    chunks = _chunks(int(SECONDS / CHUNK_S))
+    loop = asyncio.get_running_loop()
+
+    def thread_process():
+        processor = AudioProcessor(**OPTIONS)
+        lock = asyncio.Lock()
+
+        async def process(chunk):
+            # 原 OmniRealtimeClient.process_audio_chunk_async
+            async with lock:
+                return await loop.run_in_executor(None, processor.process_chunk, chunk)
+        return process
+
+    pool = AudioDSPPool()
+    # 等 worker 起好（首个会话触发启动），免得把进程启动时间算进第一级
+    warm = pool.open_session(**OPTIONS)
+    await warm.process_chunk_async(chunks[0])
+    del warm
+
+    def pool_process():
+        return pool.open_session(**OPTIONS).process_chunk_async
+
+    thread_max = pool_max = 0
+    try:
+        for _ in range(iterations):
+            for sessions in LEVELS:
+                p95 = await _level(thread_process, sessions, chunks, result, f"thread_chunk_{sessions}")
+                if p95 >= LIMIT_MS:
+                    break
+                thread_max = max(thread_max, sessions)
+            for sessions in LEVELS:
+                for shard in pool._shards:
+                    shard.queue_delays.clear()
+                p95 = await _level(pool_process, sessions, chunks, result, f"pool_chunk_{sessions}")
+                for shard in pool._shards:
+                    for delay in shard.queue_delays:
+                        result.add(f"pool_queue_{sessions}", delay * 1000.0)
+                if p95 >= LIMIT_MS:
+                    break
+                pool_max = max(pool_max, sessions)
+    finally:
+        pool.close()
+    result.counters["thread_max_sessions"] = thread_max
+    result.counters["pool_max_sessions"] = pool_max
+    result.counters["pool_workers"] = pool.workers
+    result.counters["cpu_count"] = os.cpu_count() or 1
+    return result
@@ -0,0 +1,149 @@
+"""
+Realtime 上行音频：原来逐块 base64 + json.dumps 发送 vs ``main_logic.audio_uplink`` 合包、模板化事件 JSON，
+以及服务端 VAD 服务商上的静音暂停，对着替身 Realtime WebSocket 按实时节奏推流。
+
+每轮 1s 语音 + 3s 静音，16kHz PCM 每 10ms 一块（PC 端 RNNoise 帧降采样后的大小）。三种方式：
+``legacy``（原 stream_audio 的编码与发送方式，直连替身）、``packed``（OmniRealtimeClient，api_type=gpt，只合包）、
+``paused``（OmniRealtimeClient，api_type=qwen，合包 + 静音暂停）。
+
+- ``<mode>_cpu_per_s``: 每秒音频在事件循环线程上花的 CPU 毫秒（不含替身服务端线程）
+- counters: ``<mode>_wire_bytes_per_s``（上行 WebSocket 文本字节/秒）、``<mode>_messages``（每轮消息数）、
+  ``speech_ok``（三种方式服务端都收到了完整的语音段为 1）
+"""
+
+import array
+import asyncio
+import base64
+import json
+import math
+import time
+
+import websockets
+
+from benchmarks.harness import FAKE_REALTIME_MODEL, BenchEnvironment, ScenarioResult
+
+CHUNK_SAMPLES = 160  # 16kHz 10ms
+SPEECH_CHUNKS = 100  # 1s
+SILENCE_CHUNKS = 300  # 3s
+CHUNK_S = CHUNK_SAMPLES / 16000
+
+
+def _chunk(amplitude: int, offset: int) -> bytes:
+    return array.array(
+        "h",
+        (int(amplitude * math.sin(2 * math.pi * 300 * (offset + i) / 16000)) for i in range(CHUNK_SAMPLES)),
+    ).tobytes()
+
+
+class _Counter:
+    def __init__(self, send):
+        self._send = send
+        self.bytes = 0
+        self.messages = 0
+
+    async def __call__(self, payload):
+        self.bytes += len(payload)
+        self.messages += 1
+        await self._send(payload)
+
+
+async def _drain(ws):
+    try:
+        async for _ in ws:
+            pass
+    except Exception:
+        pass
+
+
+async def _stream(push, audio):
+    """按实时节奏推流；返回事件循环线程的 CPU 毫秒。"""
+    cpu = 0.0
+    start = time.perf_counter()
+    for i, chunk in enumerate(audio):
+        t0 = time.thread_time()
+        await push(chunk)
+        cpu += time.thread_time() - t0
+        delay = start + (i + 1) * CHUNK_S - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+    return cpu * 1000.0
+
+
+async def _legacy(env, audio):
+    ws = await websockets.connect(f"{env.realtime.url}?model={FAKE_REALTIME_MODEL}")
+    reader = asyncio.create_task(_drain(ws))
+    counter = _Counter(ws.send)
+    semaphore = asyncio.Semaphore(25)
+
+    async def push(chunk):
+        # 原 stream_audio + send_event 的做法
+        event = {"type": "input_audio_buffer.append", "audio": base64.b64encode(chunk).decode()}
+        event['event_id'] = "event_" + str(int(time.time() * 1000))
+        async with semaphore:
+            await counter(json.dumps(event))
+
+    try:
+        cpu_ms = await _stream(push, audio)
+    finally:
+        await ws.close()
+        reader.cancel()
+    return cpu_ms, counter
+
+
+async def _client(env, audio, api_type):
+    from main_logic.omni_realtime_client import OmniRealtimeClient
+
+    async def noop(*_args, **_kwargs):
+        return None
+
+    client = OmniRealtimeClient(
+        base_url=env.realtime.url,
+        api_key="sk-neko-bench",
+        model=FAKE_REALTIME_MODEL,
+        api_type=api_type,
+        on_audio_delta=noop,
+        on_text_delta=noop,
+        on_input_transcript=noop,
+        on_output_transcript=noop,
+        on_new_message=noop,
+        on_response_done=noop,
+    )
+    await client.connect(instructions="你是一个友善的猫娘。", native_audio=True)
+    counter = _Counter(client.ws.send)
+    client.ws.send = counter
+    reader = asyncio.create_task(client.handle_messages())
+    try:
+        cpu_ms = await _stream(client.stream_audio, audio)
+    finally:
+        await client.close()
+        reader.cancel()
+        try:
+            await reader
+        except (asyncio.CancelledError, Exception):
+            pass
+    return cpu_ms, counter
+
+
+async def run(env: BenchEnvironment, iterations: int) -> ScenarioResult:
+    result = ScenarioResult("audio_uplink")
+    speech = [_chunk(8000, i * CHUNK_SAMPLES) for i in range(SPEECH_CHUNKS)]
+    audio = speech + [bytes(CHUNK_SAMPLES * 2)] * SILENCE_CHUNKS
+    seconds = len(audio) * CHUNK_S
+    speech_bytes = sum(len(c) for c in speech)
+    speech_ok = 1
+    modes = (
+        ("legacy", lambda: _legacy(env, audio)),
+        ("packed", lambda: _client(env, audio, "gpt")),
+        ("paused", lambda: _client(env, audio, "qwen")),
+    )
+    for _ in range(iterations):
+        for mode, stream in modes:
+            appended0 = env.realtime.appended_bytes
+            cpu_ms, counter = await stream()
+            if env.realtime.appended_bytes - appended0 < speech_bytes:
+                speech_ok = 0
+            result.add(f"{mode}_cpu_per_s", cpu_ms / seconds)
+            result.counters[f"{mode}_wire_bytes_per_s"] = round(counter.bytes / seconds)
+            result.counters[f"{mode}_messages"] = counter.messages
+    result.counters["speech_ok"] = speech_ok
+    return result
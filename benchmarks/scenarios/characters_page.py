@@ -0,0 +1,130 @@
+"""
+角色列表页：非中文用户 GET /api/characters 的页面加载延迟（1 / 10 / 50 个猫娘）。
+
+不依赖替身服务。翻译服务用固定耗时的桩（``TRANSLATE_MS``/次 translate_dict）模拟，
+不走网络；视图路径经 ASGI 直接调用真实的 characters_router。
+
+- ``legacy_N``: 原实现——每次请求 deepcopy 全部数据并翻译每个角色
+- ``view_cold_N``: 清空缓存后的第一次请求（等价于 legacy 的一次全量翻译）
+- ``view_hit_N``: 数据未变的重复请求（200，复用序列化好的 body）
+- ``view_304_N``: 带 If-None-Match 的重复请求
+- ``view_edit_N``: 修改一个猫娘的非翻译字段（模型）后的第一次请求
+- counters: ``*_translations_N``（该模式每次请求平均调用 translate_dict 的次数）
+"""
+
+import asyncio
+import copy
+import time
+
+import httpx
+
+from benchmarks.harness import BenchEnvironment, ScenarioResult
+
+SIZES = (1, 10, 50)
+TRANSLATE_MS = 30
+LANGUAGE = "en"
+
+
+class _StubTranslationService:
+    def __init__(self):
+        self.calls = 0
+
+    async def translate_dict(self, data, target_lang, fields_to_translate=None):
+        self.calls += 1
+        await asyncio.sleep(TRANSLATE_MS / 1000.0)
+        return {k: (f"{v} [{target_lang}]" if k in (fields_to_translate or ()) and isinstance(v, str) else v)
+                for k, v in data.items()}
+
+
+def _characters(count: int) -> dict:
+    catgirls = {
+        f"猫娘{i}": {
+            "档案名": f"猫娘{i}", "昵称": f"小{i}, 喵{i}", "性别": "女",
+            "system_prompt": "你是一只可爱的猫娘。" * 40,
+            "live2d": f"model_{i}", "voice_id": f"voice_{i}",
+        }
+        for i in range(count)
+    }
+    return {"主人": {"档案名": "主人", "昵称": "主人"}, "猫娘": catgirls, "当前猫娘": "猫娘0"}
+
+
+async def _legacy(cm, service) -> bytes:
+    # 改动前 get_characters 的逻辑
+    data = copy.deepcopy(cm.load_characters())
+    data["主人"] = await service.translate_dict(data["主人"], LANGUAGE, fields_to_translate=["档案名", "昵称"])
+    results = await asyncio.gather(*[
+        service.translate_dict(v, LANGUAGE, fields_to_translate=["档案名", "昵称", "性别"])
+        for v in data["猫娘"].values()
+    ])
+    data["猫娘"] = dict(zip(data["猫娘"], results))
+    from fastapi.responses import JSONResponse
+    return JSONResponse(content=data).body
+
+
+async def run(env: BenchEnvironment, iterations: int) -> ScenarioResult:
+    from fastapi import FastAPI
+
+    from main_routers import shared_state
+    from main_routers.characters_router import router as characters_router
+    from utils import characters_view
+    from utils.config_manager import get_config_manager
+
+    result = ScenarioResult("characters_page")
+    cm = get_config_manager()
+    original = cm.load_characters()
+    service = _StubTranslationService()
+    view = characters_view.CharactersView(cm, translation_service=service)
+    characters_view._view = view
+    shared_state.init_shared_state(
+        sync_message_queue={}, sync_shutdown_event={}, session_manager={}, session_id={},
+        sync_process={}, websocket_locks={}, steamworks=None, templates=None,
+        config_manager=cm, logger=None,
+    )
+    app = FastAPI()
+    app.include_router(characters_router)
+    calls = {}
+
+    def timed(label: str, t0: float, calls_before: int) -> None:
+        result.add(label, (time.perf_counter() - t0) * 1000.0)
+        calls.setdefault(label, []).append(service.calls - calls_before)
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60.0) as client:
+            url = f"/api/characters/?language={LANGUAGE}"
+            for size in SIZES:
+                data = _characters(size)
+                cm.save_characters(data)
+                for _ in range(iterations):
+                    before, t0 = service.calls, time.perf_counter()
+                    await _legacy(cm, service)
+                    timed(f"legacy_{size}", t0, before)
+
+                    view.clear()
+                    before, t0 = service.calls, time.perf_counter()
+                    resp = await client.get(url)
+                    timed(f"view_cold_{size}", t0, before)
+                    etag = resp.headers["etag"]
+
+                    before, t0 = service.calls, time.perf_counter()
+                    await client.get(url)
+                    timed(f"view_hit_{size}", t0, before)
+
+                    before, t0 = service.calls, time.perf_counter()
+                    resp = await client.get(url, headers={"If-None-Match": etag})
+                    timed(f"view_304_{size}", t0, before)
+                    assert resp.status_code == 304, resp.status_code
+
+                    data["猫娘"]["猫娘0"]["live2d"] = f"model_{time.perf_counter_ns()}"
+                    cm.save_characters(data)
+                    before, t0 = service.calls, time.perf_counter()
+                    await client.get(url)
+                    timed(f"view_edit_{size}", t0, before)
+    finally:
+        cm.save_characters(original)
+        characters_view._view = None
+
+    for label, values in calls.items():
+        mode, size = label.rsplit("_", 1)
+        result.counters[f"{mode}_translations_{size}"] = round(sum(values) / len(values), 1)
+    return result
@@ -0,0 +1,123 @@
+"""
+Computer-Use 回放：预置截图 + 替身 VLM 跑完整的 ``run_instruction`` 循环。
+
+GUI 后端是按剧本切换画面的桩对象（点击打开菜单/窗口、按键输入等会换帧，
+``moveTo`` / ``scroll`` 为无效动作）；替身 VLM 按历史中出现的 ``# Step N:``
+选择下一步回复，最后 ``computer.terminate``。对照组模拟改动前的行为：
+动作后固定 sleep 0.3s、每步都发送截图。
+
+- ``legacy_step`` / ``adapter_step``: 单步 capture + llm + exec 耗时
+- counters: 两种路径的 ``*_prompt_tokens``、``*_images_sent``，以及 ``tokens_saved_pct``
+"""
+
+import time
+
+from benchmarks.harness import BenchEnvironment, ScenarioResult
+
+TASK = "Replay: open the calculator and save the result"
+WIDTH, HEIGHT = 1280, 720
+
+# (生成代码, 执行后是否换帧)
+SCRIPT = [
+    ("pyautogui.click(40, 980)", True),
+    ("pyautogui.moveTo(500, 500)", False),
+    ("pyautogui.click(300, 300)", True),
+    ('pyautogui.press("5")', True),
+    ("pyautogui.scroll(-3)", False),
+    ('pyautogui.hotkey("ctrl", "s")', True),
+    ('computer.terminate(status="success", answer="saved")', False),
+]
+
+
+def _reply(code: str) -> str:
+    return f"## Thought:\nreplay\n\n## Action:\n{code.split('(')[0]}\n\n## Code\n```python\n{code}\n```"
+
+
+def _screens(count: int) -> list:
+    import random
+
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(42)
+    screens = []
+    for i in range(count):
+        img = Image.new("RGB", (WIDTH, HEIGHT), tuple(rng.randrange(40, 200) for _ in range(3)))
+        draw = ImageDraw.Draw(img)
+        for _ in range(6):
+            x0, y0 = rng.randrange(WIDTH - 300), rng.randrange(HEIGHT - 200)
+            draw.rectangle((x0, y0, x0 + rng.randrange(100, 400), y0 + rng.randrange(60, 300)),
+                           fill=tuple(rng.randrange(256) for _ in range(3)))
+        draw.rectangle((0, HEIGHT - 40, WIDTH, HEIGHT), fill=(20, 20, 20))
+        draw.text((20, HEIGHT - 30), f"window {i}", fill=(255, 255, 255))
+        screens.append(img)
+    return screens
+
+
+class _ReplayGUI:
+    """pyautogui 的替身：每个"有效"动作切到下一张预置截图。"""
+
+    def __init__(self, screens: list):
+        self._screens = screens
+        self._index = 0
+        self._step = 0
+
+    def size(self):
+        return WIDTH, HEIGHT
+
+    def screenshot(self):
+        return self._screens[self._index]
+
+    def _act(self, *_args, **_kwargs):
+        if SCRIPT[self._step][1]:
+            self._index = min(self._index + 1, len(self._screens) - 1)
+        self._step += 1
+
+    click = doubleClick = rightClick = moveTo = dragTo = scroll = press = hotkey = write = _act
+
+
+def _make_adapter(legacy: bool):
+    from brain.computer_use import ComputerUseAdapter
+
+    screens = _screens(sum(1 for _, changes in SCRIPT if changes) + 1)
+    adapter = ComputerUseAdapter(max_steps=len(SCRIPT) + 2, thinking=False, gui_backend=_ReplayGUI(screens))
+    if legacy:
+        def fixed_sleep(_ref):
+            time.sleep(0.3)
+            return adapter._screenshot_fn(), None, True
+
+        adapter._wait_for_settle = fixed_sleep
+    return adapter
+
+
+async def run(env: BenchEnvironment, iterations: int) -> ScenarioResult:
+    import asyncio
+
+    result = ScenarioResult("computer_use_replay")
+    # 后面的步骤先匹配：第 k 步的请求里最新的历史是 "# Step k-1:"
+    for k in range(len(SCRIPT), 1, -1):
+        env.llm_state.add_rule(f"# Step {k - 1}:\n", _reply(SCRIPT[k - 1][0]))
+    env.llm_state.add_rule(TASK, _reply(SCRIPT[0][0]))
+
+    totals = {"legacy": [0, 0], "adapter": [0, 0]}
+    for _ in range(iterations):
+        for mode in ("legacy", "adapter"):
+            adapter = await asyncio.to_thread(_make_adapter, mode == "legacy")
+            if not adapter.init_ok:
+                raise RuntimeError(f"ComputerUseAdapter init failed: {adapter.last_error}")
+            res = await asyncio.to_thread(adapter.run_instruction, TASK)
+            if not res.get("success"):
+                raise RuntimeError(f"replay did not finish: {res}")
+            stats = res["stats"]
+            for step in stats["steps"]:
+                result.add(f"{mode}_step", (step["capture_s"] + step["llm_s"] + step["exec_s"]) * 1000.0)
+            totals[mode][0] += stats["prompt_tokens"]
+            totals[mode][1] += sum(1 for step in stats["steps"] if step["image_sent"])
+
+    for mode, (tokens, images) in totals.items():
+        result.counters[f"{mode}_prompt_tokens"] = tokens
+        result.counters[f"{mode}_images_sent"] = images
+    legacy_tokens = totals["legacy"][0]
+    result.counters["tokens_saved_pct"] = (
+        round((1 - totals["adapter"][0] / legacy_tokens) * 100.0, 1) if legacy_tokens else 0.0
+    )
+    return result
@@ -0,0 +1,123 @@
+"""
+Agent-S 对话上下文：50 步轨迹下 ``LMMAgent`` 每次请求的体积与序列化耗时。
+
+按 Worker 的调用模式回放：每步一张截图同时发给 reflection 与 generator 两个
+agent，generator 追加一段计划文本，之后按 Worker.flush_messages（openai 分支）
+只保留最近 8 张图。每 4 步中有 1 步画面未变化（同一张截图）。
+引擎是记录请求的 LMMEngineOpenAI 子类，不走网络。
+
+- ``legacy``: 原行为——发送完整 ``messages``，每个 agent 各自 base64 编码
+- ``store``: ``MessageStore.render``（重复截图按引用去重、token 预算 ``BUDGET``）
+
+- ``*_serialize``: 单次请求 ``json.dumps`` 耗时；``*_add``: add_message（含编码）耗时
+- counters: ``*_request_kb_mean`` / ``*_request_kb_max``、``store_dropped_messages`` / ``store_dropped_images``
+"""
+
+import json
+import random
+import time
+from io import BytesIO
+
+from benchmarks.harness import BenchEnvironment, ScenarioResult
+
+STEPS = 50
+MAX_IMAGES = 8
+BUDGET = 12000
+WIDTH, HEIGHT = 1280, 720
+PLAN = ("The settings dialog is open. I will click the 'Display' tab on the left to reach "
+        "the resolution options, then verify the change in the next screenshot. ") * 6
+
+
+def _screens(rng: random.Random, count: int) -> list:
+    from PIL import Image, ImageDraw
+
+    shots = []
+    for i in range(count):
+        img = Image.new("RGB", (WIDTH, HEIGHT), tuple(rng.randrange(40, 200) for _ in range(3)))
+        draw = ImageDraw.Draw(img)
+        for _ in range(20):
+            x0, y0 = rng.randrange(WIDTH - 200), rng.randrange(HEIGHT - 100)
+            draw.rectangle((x0, y0, x0 + rng.randrange(50, 300), y0 + rng.randrange(20, 150)),
+                           fill=tuple(rng.randrange(256) for _ in range(3)))
+        for row in range(0, HEIGHT, 16):
+            draw.text((10, row), f"{i} " + "lorem ipsum " * rng.randrange(1, 16), fill=(0, 0, 0))
+        buf = BytesIO()
+        img.save(buf, format="PNG")
+        shots.append(buf.getvalue())
+    return shots
+
+
+def _flush(agent, max_images: int) -> None:
+    """Worker.flush_messages 的 openai 分支：只保留最近 max_images 张图。"""
+    count = 0
+    for message in reversed(agent.messages):
+        content = message["content"]
+        for j in range(len(content) - 1, -1, -1):
+            if "image" in content[j].get("type", ""):
+                count += 1
+                if count > max_images:
+                    del content[j]
+
+
+async def run(env: BenchEnvironment, iterations: int) -> ScenarioResult:
+    import asyncio
+
+    from brain.cua.core import mllm
+    from brain.cua.core.engine import LMMEngineOpenAI
+
+    class RecordingEngine(LMMEngineOpenAI):
+        def __init__(self, mode: str, **kwargs):
+            super().__init__(**kwargs)
+            self.mode = mode
+            self.sizes = []
+
+        def generate(self, messages, temperature=0.0, max_new_tokens=None, **kwargs):
+            t0 = time.perf_counter()
+            body = json.dumps({"model": self.model, "messages": messages})
+            result.add(f"{self.mode}_serialize", (time.perf_counter() - t0) * 1000.0)
+            self.sizes.append(len(body))
+            return PLAN
+
+    result = ScenarioResult("cua_context")
+    rng = random.Random(5)
+    distinct = _screens(rng, STEPS)
+    trajectory = []
+    for step in range(STEPS):
+        trajectory.append(trajectory[-1] if step % 4 == 3 else distinct[step])
+
+    def replay(mode: str):
+        params = {"engine_type": "openai", "model": "fake-vision",
+                  "token_budget": BUDGET if mode == "store" else None}
+        engine = RecordingEngine(mode, model="fake-vision")
+        generator = mllm.LMMAgent(params, system_prompt="You are a GUI agent. " * 200, engine=engine)
+        reflection = mllm.LMMAgent(params, system_prompt="Reflect on the trajectory. " * 50, engine=engine)
+        dropped = {"messages": 0, "images": 0}
+        for shot in trajectory:
+            for agent, text in ((reflection, "Latest action result."), (generator, "Current Text Buffer = []")):
+                if mode == "legacy":
+                    # 改动前没有跨 agent 的编码缓存
+                    mllm._image_cache.clear()
+                    mllm._payload_index.clear()
+                t0 = time.perf_counter()
+                agent.add_message(text, image_content=shot, role="user")
+                result.add(f"{mode}_add", (time.perf_counter() - t0) * 1000.0)
+                if mode == "legacy":
+                    agent.get_response(messages=list(agent.messages))
+                else:
+                    agent.get_response()
+                    dropped["messages"] += agent.messages.last_request["dropped_messages"]
+                    dropped["images"] += agent.messages.last_request["dropped_images"]
+            generator.add_message(PLAN, role="assistant")
+            _flush(generator, MAX_IMAGES)
+            _flush(reflection, MAX_IMAGES)
+        return engine.sizes, dropped
+
+    for _ in range(iterations):
+        for mode in ("legacy", "store"):
+            sizes, dropped = await asyncio.to_thread(replay, mode)
+            result.counters[f"{mode}_request_kb_mean"] = round(sum(sizes) / len(sizes) / 1024, 1)
+            result.counters[f"{mode}_request_kb_max"] = round(max(sizes) / 1024, 1)
+            if mode == "store":
+                result.counters["store_dropped_messages"] = dropped["messages"]
+                result.counters["store_dropped_images"] = dropped["images"]
+    return result
@@ -0,0 +1,107 @@
+"""
+情绪分析：逐句调用 LLM（原 /api/emotion/analysis 的做法：每次新建 AsyncOpenAI 客户端）vs
+``main_logic.emotion_service``（本地判断 + 文本缓存 + 微批）在一段对话语料上的延迟与 LLM 调用数。
+
+语料是一段陪伴对话里角色的回复，按句子拆开；每 ``ARRIVAL_MS`` 毫秒到达一句（模拟多句回复与
+Live2D/VRM 两个表情层同时请求），整段播放 ``ROUNDS`` 遍，后几遍的重复句子可以命中缓存。
+替身 LLM 每次调用耗时 ``LLM_DELAY_MS``。
+
+- ``legacy_request`` / ``service_request``: 单个请求从到达到拿到结果的耗时
+- counters: ``legacy_llm_calls`` / ``service_llm_calls``（替身服务收到的请求数）、``local_hits``、``cache_hits``
+"""
+
+import asyncio
+import json
+import time
+
+from benchmarks.harness import BenchEnvironment, ScenarioResult
+
+LLM_DELAY_MS = 250
+ARRIVAL_MS = 20
+ROUNDS = 2
+DIALOGUE = (
+    "主人欢迎回来！今天也辛苦啦。",
+    "哇，你竟然给我带了草莓蛋糕！",
+    "太好了，我最喜欢草莓了😊",
+    "不过你今天看起来有点累。",
+    "工作很忙吗？",
+    "嗯嗯，我知道了。",
+    "那你先去洗个热水澡吧。",
+    "我把热水已经烧好了。",
+    "呜呜，你都不陪我玩游戏。",
+    "哼，下次不许再这样了！",
+    "开玩笑的啦，嘿嘿。",
+    "明天是周末，我们去公园散步好不好？",
+    "天气预报说明天是晴天。",
+    "记得带上外套。",
+    "晚上可能会有点凉。",
+    "真的吗？你要带我去看电影？",
+    "好耶！",
+    "那我们看哪一部呢？",
+    "上次那部动画片续集好像上映了。",
+    "晚安，主人，做个好梦。",
+)
+BATCH_REPLY = json.dumps([{"emotion": "neutral", "confidence": 0.6}] * 8)
+SINGLE_REPLY = '{"emotion": "neutral", "confidence": 0.6}'
+
+
+async def _legacy(env, text):
+    """原接口的调用方式：每次新建客户端、单条 prompt。"""
+    from openai import AsyncOpenAI
+
+    from config.prompts_sys import emotion_analysis_prompt
+
+    client = AsyncOpenAI(api_key="sk-neko-bench", base_url=env.llm_url)
+    response = await client.chat.completions.create(
+        model="fake-emotion",
+        messages=[{"role": "system", "content": emotion_analysis_prompt}, {"role": "user", "content": text}],
+        temperature=0.3,
+        max_completion_tokens=40,
+    )
+    return json.loads(response.choices[0].message.content)
+
+
+async def _replay(analyze, result, metric):
+    async def one(text, delay):
+        await asyncio.sleep(delay)
+        start = time.perf_counter()
+        await analyze(text)
+        result.add(metric, (time.perf_counter() - start) * 1000.0)
+
+    jobs = []
+    for r in range(ROUNDS):
+        for i, text in enumerate(DIALOGUE):
+            delay = (r * len(DIALOGUE) + i) * ARRIVAL_MS / 1000.0
+            jobs.append(one(text, delay))
+    await asyncio.gather(*jobs)
+
+
+async def run(env: BenchEnvironment, iterations: int) -> ScenarioResult:
+    from main_logic.emotion_service import EmotionService
+
+    result = ScenarioResult("emotion_batch")
+    env.llm_state.add_rule(("情感分析专家", "带编号"), BATCH_REPLY)
+    env.llm_state.add_rule("情感分析专家", SINGLE_REPLY)
+    delay0 = env.llm_state.first_token_delay
+    env.llm_state.first_token_delay = LLM_DELAY_MS / 1000.0
+    legacy_calls = service_calls = local_hits = cache_hits = 0
+    try:
+        for _ in range(iterations):
+            count0 = env.llm_state.request_count
+            await _replay(lambda text: _legacy(env, text), result, "legacy_request")
+            legacy_calls += env.llm_state.request_count - count0
+
+            service = EmotionService()
+            count0 = env.llm_state.request_count
+            await _replay(lambda text: service.analyze(text, "sk-neko-bench", "fake-emotion", env.llm_url),
+                          result, "service_request")
+            service_calls += env.llm_state.request_count - count0
+            local_hits += service.local_hits
+            cache_hits += service.cache_hits
+    finally:
+        env.llm_state.first_token_delay = delay0
+    result.counters["legacy_llm_calls"] = legacy_calls
+    result.counters["service_llm_calls"] = service_calls
+    result.counters["local_hits"] = local_hits
+    result.counters["cache_hits"] = cache_hits
+    return result
@@ -0,0 +1,217 @@
+"""
+热切换空档：原来的 final swap（切换时把期间的对话拼成前情概要发给新会话，并让它生成一条被丢弃的回复）
+vs ``main_logic.session_pool``（备用会话提前连好、每轮增量同步，切换时直接取用），对着替身 Realtime
+WebSocket 按 core.py 的顺序走一遍切换，期间用户语音按实时节奏持续输入。
+
+两种方式都在切换前连好备用会话，连接后再结束 ``TURNS_AFTER_WARM`` 轮对话。切换开始后的实时音频先缓存，
+换上新会话后交给 AudioReplayScheduler 回放。原来要等旧会话关闭后回放才能交回直连，旧会话合包缓冲里
+没发出的音频随连接一起丢掉；现在换上新会话即放开，并把这段音频排在回放最前面。
+
+- ``<mode>_swap_gap``: 从轮次结束决定切换到实时音频重新直连新会话的耗时
+- ``<mode>_swap_busy``: 从决定切换到新会话空闲（没有在生成要丢弃的回复）的耗时
+- counters: ``<mode>_lost_bytes``（送进路由的音频减去服务端收到的，含旧会话合包缓冲里没发出的）、
+  ``audio_ok``（pooled 没有丢音频为 1）、``pooled_synced_items``（增量同步的对话条数）、
+  ``<mode>_trigger_to_swap_ms``（按每 ``TURN_S`` 秒结束一轮推算：从记忆归档触发到完成切换。
+  原来要等触发 10s 后的轮次结束才开始连接、再等下一轮结束才切换；现在到点即在后台连接）
+"""
+
+import array
+import asyncio
+import math
+import time
+
+from benchmarks.harness import FAKE_REALTIME_MODEL, BenchEnvironment, ScenarioResult
+
+CHUNK_SAMPLES = 160  # 16kHz 10ms
+CHUNK_S = CHUNK_SAMPLES / 16000
+PROMPT = "你是一个角色扮演大师。请按要求扮演以下角色（小天）。" + "小天是一只活泼的猫娘。" * 200
+HISTORY_TURNS = 20
+TURNS_AFTER_WARM = 4
+BEFORE_SWAP_S = 0.315  # 不与合包边界对齐，旧会话缓冲里留有没发出的音频
+AFTER_SWAP_S = 0.5
+TURN_S = 8.0
+LEGACY_SETTLE_S = 10.0
+
+
+def _speech(offset: int) -> bytes:
+    return array.array(
+        "h",
+        (int(6000 * math.sin(2 * math.pi * 300 * (offset + i) / 16000)) for i in range(CHUNK_SAMPLES)),
+    ).tobytes()
+
+
+def _turn(i: int):
+    return {"role": "主人" if i % 2 == 0 else "小天", "text": f"第{i}句：今天的天气真不错，一起出去走走吧。"}
+
+
+def _trigger_to_swap(settle_s: float, connect_s: float, start_at_turn_end: bool) -> float:
+    """轮次每 TURN_S 秒结束一次（触发时刻为 0）；返回完成切换的时刻（秒）。"""
+    def next_turn_end(t):
+        return math.ceil(t / TURN_S) * TURN_S
+
+    start = next_turn_end(settle_s) if start_at_turn_end else settle_s
+    ready = start + connect_s
+    swap = next_turn_end(ready)
+    return swap if swap > start else swap + TURN_S
+
+
+class _Router:
+    """core.py 的音频路由：切换中缓存 → 回放中入回放队列 → 直连当前会话。"""
+
+    def __init__(self, session):
+        self.session = session
+        self.imminent = False
+        self.cache = []
+        self.replay = None
+        self.fed = 0
+
+    async def __call__(self, chunk):
+        self.fed += len(chunk)
+        if self.imminent and self.replay is None:
+            self.cache.append(chunk)
+        elif self.replay is not None:
+            self.replay.feed(chunk)
+        else:
+            await self.session.stream_audio(chunk)
+
+
+async def _feed(router, stop: asyncio.Event):
+    start = time.perf_counter()
+    i = 0
+    while not stop.is_set():
+        await router(_speech(i * CHUNK_SAMPLES))
+        i += 1
+        delay = start + i * CHUNK_S - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def _stop_task(task):
+    task.cancel()
+    try:
+        await task
+    except (asyncio.CancelledError, Exception):
+        pass
+
+
+async def _swap(env, mode: str, result: ScenarioResult, counters: dict):
+    from main_logic.audio_replay import AudioReplayScheduler
+    from main_logic.omni_realtime_client import OmniRealtimeClient
+    from main_logic.session_pool import RealtimeSessionPool, format_history
+
+    idle = asyncio.Event()
+
+    async def noop(*_args, **_kwargs):
+        return None
+
+    async def done():
+        idle.set()
+
+    def client():
+        return OmniRealtimeClient(
+            base_url=env.realtime.url, api_key="sk-neko-bench", model=FAKE_REALTIME_MODEL, api_type="gpt",
+            on_audio_delta=noop, on_text_delta=noop, on_input_transcript=noop,
+            on_output_transcript=noop, on_new_message=noop, on_response_done=done,
+        )
+
+    old = client()
+    await old.connect(instructions=PROMPT, native_audio=True)
+    old_reader = asyncio.create_task(old.handle_messages())
+    cache = [_turn(i) for i in range(HISTORY_TURNS)]
+    snapshot = len(cache)
+    spare = client()
+    pool = RealtimeSessionPool()
+    connect_started = time.perf_counter()
+    if mode == "legacy":
+        await spare.connect(PROMPT + format_history(cache), native_audio=True)
+    else:
+        await pool.warm(spare, PROMPT + format_history(cache), True, cache)
+    connect_s = time.perf_counter() - connect_started
+    for i in range(TURNS_AFTER_WARM):
+        cache.append(_turn(HISTORY_TURNS + i))
+        if mode == "pooled":
+            pool.sync(cache)
+
+    router = _Router(old)
+    stop = asyncio.Event()
+    appended0 = env.realtime.appended_bytes
+    feeder = asyncio.create_task(_feed(router, stop))
+    new_reader = None
+    try:
+        await asyncio.sleep(BEFORE_SWAP_S)
+        # 轮次结束，决定切换
+        t0 = time.perf_counter()
+        router.imminent = True
+        idle.clear()
+        if mode == "legacy":
+            prime = format_history(cache[snapshot:]) + "========以上为前情概要。现在请小天准备，即将开始用语音与主人继续对话。========\n"
+            await spare.create_response(prime, skipped=True)
+            busy = None
+        else:
+            assert await pool.take() is spare
+            busy = time.perf_counter() - t0
+        if mode == "pooled":
+            unsent = old.take_unsent_audio()
+            if unsent:
+                router.cache.insert(0, unsent)
+        replay = AudioReplayScheduler(spare.stream_audio)
+        for chunk in router.cache:
+            replay.feed(chunk)
+        router.cache.clear()
+        router.session = spare
+        router.replay = replay
+        new_reader = asyncio.create_task(spare.handle_messages())
+
+        def caught_up():
+            router.replay = None
+
+        replay_task = asyncio.create_task(replay.run(on_caught_up=caught_up, hold=lambda: router.imminent))
+        if mode == "pooled":
+            # 新会话就位即放开实时音频，不等旧会话关闭
+            router.imminent = False
+        await old.close()
+        await _stop_task(old_reader)
+        router.imminent = False
+        await replay_task
+        gap = time.perf_counter() - t0
+        if busy is None:
+            await asyncio.wait_for(idle.wait(), 5.0)
+            busy = time.perf_counter() - t0
+        await asyncio.sleep(AFTER_SWAP_S)
+    finally:
+        stop.set()
+        await feeder
+    pending = len(spare.take_unsent_audio())
+    expected = router.fed - pending
+    for _ in range(100):
+        if env.realtime.appended_bytes - appended0 >= expected:
+            break
+        await asyncio.sleep(0.01)
+    await spare.close()
+    if new_reader is not None:
+        await _stop_task(new_reader)
+
+    result.add(f"{mode}_swap_gap", gap * 1000.0)
+    result.add(f"{mode}_swap_busy", busy * 1000.0)
+    lost = expected - (env.realtime.appended_bytes - appended0)
+    counters[f"{mode}_lost_bytes"] = max(counters.get(f"{mode}_lost_bytes", 0), lost)
+    counters.setdefault(f"{mode}_connect_s", []).append(connect_s)
+    if mode == "pooled":
+        counters["pooled_synced_items"] = pool.synced_items
+
+
+async def run(env: BenchEnvironment, iterations: int) -> ScenarioResult:
+    from config import HOT_SWAP_SETTLE_S
+
+    result = ScenarioResult("hot_swap_gap")
+    counters = {}
+    for _ in range(iterations):
+        for mode in ("legacy", "pooled"):
+            await _swap(env, mode, result, counters)
+    for mode, settle, at_turn_end in (("legacy", LEGACY_SETTLE_S, True), ("pooled", HOT_SWAP_SETTLE_S, False)):
+        connects = counters.pop(f"{mode}_connect_s")
+        connect_s = sorted(connects)[len(connects) // 2]
+        result.counters[f"{mode}_trigger_to_swap_ms"] = round(_trigger_to_swap(settle, connect_s, at_turn_end) * 1000.0)
+    result.counters.update(counters)
+    result.counters["audio_ok"] = int(counters.get("pooled_lost_bytes", 1) == 0)
+    return result
@@ -0,0 +1,109 @@
+"""
+热切换音频回放：缓存 ``BACKLOGS`` 秒用户语音后，原来的固定间隔分批推送与 ``main_logic.audio_replay``
+时钟限速回放各需多久追平实时输入。
+
+用虚拟时钟模拟（30 秒积压不必真等 30 秒）：回放期间实时音频按 16kHz、每块 32ms 的节奏继续到达，
+积压中每 3 秒有 1 秒静音。原方案照搬 ``_flush_hot_swap_audio_cache`` 的旧逻辑：每批取出全部缓存，
+按 1600 字节一片、片间 25ms 推送，最多 20 批。
+
+- ``legacy_catch_up`` / ``paced_catch_up``: 追平耗时（虚拟时间，毫秒），每种积压时长各一个样本
+- ``feed_chunk``: 调度器入队一块（含静音判定）的真实耗时
+- counters: ``legacy_catch_up_30s_ms`` / ``paced_catch_up_30s_ms``（30 秒积压的追平耗时）、
+  ``legacy_left_behind_ms``（旧方案 20 批后仍滞留在缓存里的音频）、``paced_trimmed_ms``（裁掉的静音）、
+  ``paced_order_ok``（所有非静音块按到达顺序发出为 1）
+"""
+
+import numpy as np
+
+from benchmarks.harness import BenchEnvironment, ScenarioResult, Stopwatch
+
+RATE = 16000
+CHUNK = 512
+BACKLOGS = (2, 10, 30)
+
+
+def _chunk(index: int, speech: bool) -> bytes:
+    samples = np.full(CHUNK, 3000 if speech else 0, dtype=np.int16)
+    samples[0] = index % 30000
+    return samples.tobytes()
+
+
+class _Live:
+    """虚拟时钟 + 实时音频源：时间推进时把期间到达的块交给 sink。"""
+
+    def __init__(self, first_index: int, sink):
+        self.now = 0.0
+        self.index = first_index
+        self.fed = 0
+        self.sink = sink
+
+    def clock(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+        while (self.fed + 1) * CHUNK / RATE <= self.now:
+            self.sink(_chunk(self.index, speech=True))
+            self.index += 1
+            self.fed += 1
+
+    async def sleep(self, seconds):
+        self.advance(seconds)
+
+
+def _backlog(seconds):
+    return [_chunk(i, speech=(i * CHUNK // RATE) % 3 != 2) for i in range(int(seconds * RATE / CHUNK))]
+
+
+async def _legacy(backlog):
+    cache = list(backlog)
+    live = _Live(len(backlog), cache.append)
+    iteration = 0
+    while iteration < 20 and cache:
+        combined = b"".join(cache)
+        cache.clear()
+        for _ in range(0, len(combined), 320 * 5):
+            await live.sleep(0.025)
+        iteration += 1
+    return live.now, sum(len(c) for c in cache) / 2 / RATE
+
+
+async def run(env: BenchEnvironment, iterations: int) -> ScenarioResult:
+    from main_logic.audio_replay import AudioReplayScheduler
+
+    result = ScenarioResult("hot_swap_replay")
+    order_ok = 1
+    for _ in range(iterations):
+        for seconds in BACKLOGS:
+            backlog = _backlog(seconds)
+            legacy_s, left_behind = await _legacy(backlog)
+            result.add("legacy_catch_up", legacy_s * 1000.0)
+
+            sent = []
+
+            async def send(packet):
+                sent.append(packet)
+
+            holder = []
+            live = _Live(len(backlog), lambda c: holder[0].feed(c))
+            replay = AudioReplayScheduler(send, clock=live.clock, sleep=live.sleep)
+            holder.append(replay)
+            for chunk in backlog:
+                with Stopwatch() as sw:
+                    replay.feed(chunk)
+                result.add("feed_chunk", sw.ms)
+            paced_s = await replay.run()
+            result.add("paced_catch_up", paced_s * 1000.0)
+
+            pcm = np.frombuffer(b"".join(sent), dtype=np.int16).reshape(-1, CHUNK)
+            ids = [int(row[0]) for row in pcm if row[1] != 0]
+            if ids != sorted(ids) or len(ids) != sum(1 for i in range(live.index)
+                                                     if i >= len(backlog) or (i * CHUNK // RATE) % 3 != 2):
+                order_ok = 0
+            if seconds == BACKLOGS[-1]:
+                result.counters["legacy_catch_up_30s_ms"] = round(legacy_s * 1000.0)
+                result.counters["paced_catch_up_30s_ms"] = round(paced_s * 1000.0)
+                result.counters["legacy_left_behind_ms"] = round(left_behind * 1000.0)
+                result.counters["paced_trimmed_ms"] = round(replay.trimmed_seconds * 1000.0)
+    result.counters["paced_order_ok"] = order_ok
+    return result
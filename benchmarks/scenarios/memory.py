@@ -0,0 +1,38 @@
+"""记忆服务：真实 memory_server 上的 /process 与 /new_dialog 往返耗时。"""
+
+import json
+
+import httpx
+
+from benchmarks.harness import BenchEnvironment, ScenarioResult, Stopwatch
+
+
+def _turn(i: int) -> list:
+    return [
+        {"role": "user", "content": [{"type": "text", "text": f"第{i}次聊天：今天工作好累，想听你讲个笑话。"}]},
+        {"role": "assistant", "content": [{"type": "text", "text": f"好呀好呀，第{i}个笑话来啦，小猫咪为什么不爱上班？因为要摸鱼喵！"}]},
+    ]
+
+
+async def run(env: BenchEnvironment, iterations: int) -> ScenarioResult:
+    from utils.config_manager import get_config_manager
+
+    result = ScenarioResult("memory")
+    base = env.start_memory_server()
+    lanlan_name = get_config_manager().get_character_data()[1]
+    result.counters["lanlan_name"] = lanlan_name
+
+    async with httpx.AsyncClient(base_url=base, timeout=30.0) as client:
+        for i in range(iterations):
+            body = {"input_history": json.dumps(_turn(i), ensure_ascii=False)}
+            with Stopwatch() as sw:
+                resp = await client.post(f"/process/{lanlan_name}", json=body)
+            resp.raise_for_status()
+            result.add("process", sw.ms)
+
+            with Stopwatch() as sw:
+                resp = await client.get(f"/new_dialog/{lanlan_name}")
+            resp.raise_for_status()
+            result.add("new_dialog", sw.ms)
+        result.counters["new_dialog_chars"] = len(resp.text)
+    return result
@@ -0,0 +1,75 @@
+"""
+指标埋点开销：utils.metrics 对最热路径（逐帧 stream_audio）的影响。
+
+同一条替身 Realtime 连接上交替关闭/开启埋点推流，并单独测量一次 span 的成本。
+A/B 中位数之差通常小于计时噪声，因此门禁使用按 span 成本估算的 ``overhead_pct``：
+
+    overhead_pct = 每帧 span 数 × 单次 span 成本 / 关闭埋点时单帧中位耗时
+
+- ``stream_audio_off`` / ``stream_audio_on``: 单帧 stream_audio 耗时
+- counters: ``span_cost_us``、``overhead_pct``、``ab_delta_pct``
+"""
+
+import statistics
+import time
+
+from benchmarks.harness import FAKE_REALTIME_MODEL, BenchEnvironment, ScenarioResult
+from benchmarks.scenarios.voice_session import FRAME_SAMPLES, _frame
+
+FRAMES_PER_BLOCK = 50
+SPANS_PER_FRAME = 2  # audio.process + realtime.stream_audio
+SPAN_COST_LOOPS = 20000
+
+
+def _span_cost_seconds(metrics) -> float:
+    start = time.perf_counter()
+    for _ in range(SPAN_COST_LOOPS):
+        with metrics.span("bench.noop"):
+            pass
+    return (time.perf_counter() - start) / SPAN_COST_LOOPS
+
+
+async def run(env: BenchEnvironment, iterations: int) -> ScenarioResult:
+    from main_logic.omni_realtime_client import OmniRealtimeClient
+    from utils import metrics
+
+    result = ScenarioResult("metrics_overhead")
+    frames = [_frame(8000, i * FRAME_SAMPLES) for i in range(FRAMES_PER_BLOCK)]
+
+    async def noop(*_args, **_kwargs):
+        return None
+
+    client = OmniRealtimeClient(
+        base_url=env.realtime.url,
+        api_key="sk-neko-bench",
+        model=FAKE_REALTIME_MODEL,
+        api_type="qwen",
+        on_audio_delta=noop,
+        on_text_delta=noop,
+        on_input_transcript=noop,
+        on_output_transcript=noop,
+    )
+    await client.connect(instructions="你是一个友善的猫娘。", native_audio=True)
+    was_enabled = metrics.is_enabled()
+    try:
+        for _ in range(iterations):
+            # 交替顺序，抵消连接预热/GC 带来的系统性偏差
+            for enabled in (False, True):
+                metrics.set_enabled(enabled)
+                metric = "stream_audio_on" if enabled else "stream_audio_off"
+                for frame in frames:
+                    t0 = time.perf_counter()
+                    await client.stream_audio(frame)
+                    result.add(metric, (time.perf_counter() - t0) * 1000.0)
+        metrics.set_enabled(True)
+        span_cost = _span_cost_seconds(metrics)
+    finally:
+        metrics.set_enabled(was_enabled)
+        await client.close()
+
+    off = statistics.median(result.samples["stream_audio_off"])
+    on = statistics.median(result.samples["stream_audio_on"])
+    result.counters["span_cost_us"] = round(span_cost * 1e6, 3)
+    result.counters["overhead_pct"] = round(SPANS_PER_FRAME * span_cost * 1000.0 / off * 100.0, 3) if off > 0 else 0.0
+    result.counters["ab_delta_pct"] = round((on - off) / off * 100.0, 3) if off > 0 else 0.0
+    return result
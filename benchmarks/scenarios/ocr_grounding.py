@@ -0,0 +1,107 @@
+"""
+文本定位 OCR：每次调用整屏 OCR（改动前的 get_ocr_elements）对比
+``brain.cua.utils.ocr.OCREngine``（整图哈希缓存 + 分带增量 + 进程池）。
+
+回放一段预置截图：编辑器里逐行输入文字，每张截图只有一两行变化；
+``highlight_text_span`` 对同一张截图做两次定位（起点/终点）。
+默认使用耗时与像素面积成正比的合成 OCR（本机通常没有 tesseract 可执行文件），
+``NEKO_BENCH_TESSERACT=1`` 时改用真实 tesseract。
+
+- ``legacy_ocr`` / ``engine_ocr``: 单次定位的 OCR 耗时
+- counters: ``tiles_ocrd`` / ``tiles_total``、``image_hits``、``speedup``
+"""
+
+import os
+import random
+import zlib
+from io import BytesIO
+
+import numpy as np
+
+from benchmarks.harness import BenchEnvironment, ScenarioResult, Stopwatch
+
+WIDTH, HEIGHT = 1280, 720
+SCREENS = 6
+LINE_HEIGHT = 30
+# 合成 OCR 的计算量：1280x720 整屏约 100ms 量级
+SYNTHETIC_PASSES = 24
+
+
+def synthetic_ocr(tile) -> list:
+    """按面积计费的 OCR 替身：每 LINE_HEIGHT 像素一行，输出一个由像素内容决定的"单词"。"""
+    width, height = tile.size
+    arr = np.frombuffer(tile.pixels, dtype=np.uint8).reshape(height, width, 3).astype(np.float32)
+    for _ in range(SYNTHETIC_PASSES):
+        arr = np.sqrt(arr * 1.001 + 1.0)
+    words = []
+    row_bytes = width * 3
+    for y in range(0, height, LINE_HEIGHT):
+        top = tile.top + y
+        if not (tile.keep_top <= top + LINE_HEIGHT // 2 < tile.keep_bottom):
+            continue
+        crc = zlib.crc32(tile.pixels[y * row_bytes:(y + LINE_HEIGHT) * row_bytes])
+        words.append({"text": f"w{crc:08x}", "block_num": 1, "left": 0, "top": top,
+                      "width": width, "height": LINE_HEIGHT})
+    return words
+
+
+def _screenshots() -> list:
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(11)
+    img = Image.new("RGB", (WIDTH, HEIGHT), (250, 250, 250))
+    draw = ImageDraw.Draw(img)
+    draw.rectangle((0, 0, WIDTH, 40), fill=(40, 40, 60))
+    draw.text((20, 12), "Untitled - Editor", fill=(255, 255, 255))
+    shots = []
+    for i in range(SCREENS):
+        y = 60 + i * 2 * LINE_HEIGHT
+        words = " ".join(rng.choice(["hello", "neko", "screen", "text", "grounding", "cache"]) for _ in range(8))
+        draw.text((20, y), words, fill=(0, 0, 0))
+        buf = BytesIO()
+        img.save(buf, format="PNG")
+        shots.append(buf.getvalue())
+    return shots
+
+
+async def run(env: BenchEnvironment, iterations: int) -> ScenarioResult:
+    import asyncio
+
+    from PIL import Image
+
+    from brain.cua.utils.ocr import OCREngine, Tile, tesseract_tile
+
+    ocr_fn = tesseract_tile if os.environ.get("NEKO_BENCH_TESSERACT") == "1" else synthetic_ocr
+    result = ScenarioResult("ocr_grounding")
+    shots = _screenshots()
+
+    def legacy(data: bytes):
+        image = Image.open(BytesIO(data)).convert("RGB")
+        return ocr_fn(Tile(0, 0, image.size, image.tobytes(), 0, image.size[1]))
+
+    legacy_ms = engine_ms = 0.0
+    tiles = tiles_ocrd = hits = 0
+    for _ in range(iterations):
+        engine = OCREngine(ocr_fn=ocr_fn)
+        try:
+            for data in shots:
+                for _alignment in ("start", "end"):
+                    with Stopwatch() as sw:
+                        await asyncio.to_thread(legacy, data)
+                    result.add("legacy_ocr", sw.ms)
+                    legacy_ms += sw.ms
+                    with Stopwatch() as sw:
+                        await asyncio.to_thread(engine.index, data)
+                    result.add("engine_ocr", sw.ms)
+                    engine_ms += sw.ms
+        finally:
+            engine.close()
+        tiles += engine.stats["tiles"]
+        tiles_ocrd += engine.stats["tiles_ocrd"]
+        hits += engine.stats["image_hits"]
+
+    result.counters["tiles_total"] = tiles
+    result.counters["tiles_ocrd"] = tiles_ocrd
+    result.counters["image_hits"] = hits
+    result.counters["speedup"] = round(legacy_ms / engine_ms, 2) if engine_ms else 0.0
+    return result
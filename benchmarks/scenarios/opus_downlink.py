@@ -0,0 +1,97 @@
+"""
+TTS 下行：原始 48kHz PCM 与服务端 Opus 编码（``utils.opus_downlink``）的带宽、编码 CPU 与首包延迟。
+
+不依赖替身服务。一段 ``SPEECH_SECONDS`` 秒的类语音信号按 TTS 的典型块大小（``CHUNK_MS`` 附近抖动）
+依次送入下行路径，统计发给浏览器（monitor 转发与之相同）的字节数。
+
+- ``pcm_first_audio`` / ``opus_first_audio``: 第一块音频到达到第一帧可发送的耗时
+- ``opus_encode_chunk``: 每块的编码耗时
+- counters: ``pcm_kbps`` / ``opus_kbps``（每个收听端的下行码率，含 audio_chunk JSON 头或帧头）、
+  ``opus_encode_cpu_pct``（单路编码占一个核的百分比）、``opus_decoded_ok``（编码结果能完整解码为 1）
+"""
+
+import io
+import json
+import time
+
+import numpy as np
+
+from benchmarks.harness import BenchEnvironment, ScenarioResult, Stopwatch
+
+SPEECH_SECONDS = 4.0
+CHUNK_MS = 85
+
+
+def _speech() -> bytes:
+    t = np.arange(int(48000 * SPEECH_SECONDS)) / 48000
+    voiced = np.sin(2 * np.pi * 180 * t) + 0.5 * np.sin(2 * np.pi * 360 * t) + 0.25 * np.sin(2 * np.pi * 720 * t)
+    envelope = np.clip(np.sin(2 * np.pi * 2.5 * t), 0, None)
+    noise = np.random.default_rng(0).normal(0, 0.05, len(t))
+    return ((voiced * envelope + noise) * 8000).clip(-32768, 32767).astype(np.int16).tobytes()
+
+
+def _chunks(pcm: bytes):
+    rng = np.random.default_rng(1)
+    i = 0
+    while i < len(pcm):
+        size = int(48000 * (CHUNK_MS + rng.integers(-30, 30)) / 1000) * 2
+        yield pcm[i:i + size]
+        i += size
+
+
+async def run(env: BenchEnvironment, iterations: int) -> ScenarioResult:
+    from utils.opus_downlink import OggOpusStreamEncoder, opus_available, pack_audio_frame
+
+    result = ScenarioResult("opus_downlink")
+    if not opus_available():
+        result.counters["opus_decoded_ok"] = 0
+        return result
+    import av
+
+    pcm = _speech()
+    speech_id = "00000000-0000-0000-0000-000000000000"
+    wire = {"pcm": 0, "opus": 0}
+    cpu = 0.0
+    decoded_ok = 1
+
+    for _ in range(iterations):
+        header = json.dumps({"type": "audio_chunk", "speech_id": speech_id}).encode()
+        first = True
+        for chunk in _chunks(pcm):
+            with Stopwatch() as sw:
+                sent = len(header) + len(chunk)
+            if first:
+                result.add("pcm_first_audio", sw.ms)
+                first = False
+            wire["pcm"] += sent
+
+        encoder = OggOpusStreamEncoder()
+        ogg = b""
+        first = True
+        cpu0 = time.process_time()
+        for chunk in _chunks(pcm):
+            with Stopwatch() as sw:
+                payload = encoder.encode(chunk)
+                frame = pack_audio_frame(speech_id, payload) if payload else b""
+            result.add("opus_encode_chunk", sw.ms)
+            if first and frame:
+                result.add("opus_first_audio", sw.ms)
+                first = False
+            wire["opus"] += len(frame)
+            ogg += payload
+        tail = encoder.flush_tail()
+        cpu += time.process_time() - cpu0
+        wire["opus"] += len(pack_audio_frame(speech_id, tail)) if tail else 0
+        ogg += tail
+
+        with av.open(io.BytesIO(ogg), format="ogg") as container:
+            samples = sum(f.samples for f in container.decode(audio=0))
+        if samples < len(pcm) // 2 - 960:
+            decoded_ok = 0
+
+    seconds = SPEECH_SECONDS * iterations
+    for mode, count in wire.items():
+        result.counters[f"{mode}_kbps"] = round(count * 8 / seconds / 1000, 1)
+    result.counters["opus_encode_cpu_pct"] = round(cpu / seconds * 100, 2)
+    result.counters["opus_decoded_ok"] = decoded_ok
+    return result
@@ -0,0 +1,87 @@
+"""
+Agent 触发路径：DirectTaskExecutor 对接替身 LLM / MCP Router / 用户插件服务。
+
+- ``user_plugin``: analyze_and_execute（评估 LLM → /plugin/trigger）
+- ``mcp_tool``: analyze_and_execute（评估 LLM → MCP tools/call）
+- ``plugin_direct``: execute_user_plugin_direct（/plugin/execute 的实现）
+"""
+
+import json
+import uuid
+
+from benchmarks.harness import BenchEnvironment, ScenarioResult, Stopwatch
+
+MESSAGES = [
+    {"role": "assistant", "content": "主人有什么需要帮忙的吗？"},
+    {"role": "user", "content": "帮我查一下上海今天的天气，然后用插件回显一句你好。"},
+]
+
+MCP_DECISION = {
+    "has_task": True,
+    "can_execute": True,
+    "task_description": "查询上海天气",
+    "tool_name": "get_weather",
+    "tool_args": {"city": "上海"},
+    "reason": "weather tool matches",
+}
+
+PLUGIN_DECISION = {
+    "has_task": True,
+    "can_execute": True,
+    "task_description": "回显问候",
+    "plugin_id": "benchPlugin",
+    "entry_id": "echo",
+    "plugin_args": {"message": "你好"},
+    "reason": "",
+}
+
+# 统一判定（每轮只启用一个通道，另一个通道的字段被忽略）
+UNIFIED_DECISION = {
+    "has_task": True,
+    "task_description": "查询上海天气并回显问候",
+    "mcp": {k: MCP_DECISION[k] for k in ("can_execute", "tool_name", "tool_args", "reason")},
+    "user_plugin": {k: PLUGIN_DECISION[k] for k in ("can_execute", "plugin_id", "entry_id", "plugin_args", "reason")},
+}
+
+
+async def run(env: BenchEnvironment, iterations: int) -> ScenarioResult:
+    from brain.mcp_client import McpRouterClient, McpToolCatalog
+    from brain.task_executor import DirectTaskExecutor
+
+    result = ScenarioResult("plugin_trigger")
+    env.llm_state.add_rule("MCP tool selection agent", json.dumps(MCP_DECISION, ensure_ascii=False))
+    env.llm_state.add_rule("User Plugin selection agent", json.dumps(PLUGIN_DECISION, ensure_ascii=False))
+    env.llm_state.add_rule("unified task classifier", json.dumps(UNIFIED_DECISION, ensure_ascii=False))
+
+    executor = DirectTaskExecutor()
+    executor.router = McpRouterClient(base_url=env.mcp_router_url, api_key="")
+    executor.catalog = McpToolCatalog(executor.router)
+    failures = 0
+    try:
+        for _ in range(iterations):
+            with Stopwatch() as sw:
+                res = await executor.analyze_and_execute(
+                    MESSAGES, lanlan_name="bench", agent_flags={"user_plugin_enabled": True}
+                )
+            failures += int(not (res and res.success))
+            result.add("user_plugin", sw.ms)
+
+            with Stopwatch() as sw:
+                res = await executor.analyze_and_execute(
+                    MESSAGES, lanlan_name="bench", agent_flags={"mcp_enabled": True}
+                )
+            failures += int(not (res and res.success))
+            result.add("mcp_tool", sw.ms)
+
+            with Stopwatch() as sw:
+                res = await executor.execute_user_plugin_direct(
+                    task_id=str(uuid.uuid4()), plugin_id="benchPlugin", plugin_args={"message": "hi"}, entry_id="echo"
+                )
+            failures += int(not res.success)
+            result.add("plugin_direct", sw.ms)
+    finally:
+        await executor.router.aclose()
+    result.counters["failures"] = failures
+    result.counters["plugin_triggers"] = env.tool_state.plugin_triggers
+    result.counters["mcp_tool_calls"] = env.tool_state.tool_calls
+    return result
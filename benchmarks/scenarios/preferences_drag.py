@@ -0,0 +1,95 @@
+"""
+模型拖动：60 Hz 拖动/缩放时保存偏好设置的处理耗时与磁盘写入次数。
+
+不依赖替身服务。偏好文件中已有 ``MODELS`` 个模型，按 60 Hz 回放 ``DRAG_SECONDS`` 秒的拖动，
+每帧调用一次保存（即 POST /api/config/preferences 中的 ``update_model_preferences``）。
+
+- ``legacy_update``: 原实现——每次读整个文件、改一项、同步写回
+- ``store_update``: ``utils.preferences`` 的内存存储 + 防抖写回
+- counters: ``*_writes``（每次拖动的磁盘写入次数）、``store_durable``（拖动结束并等待
+  防抖间隔后，文件内容是否等于最后一帧的位置，1 为是）
+"""
+
+import asyncio
+import json
+import os
+import time
+
+from benchmarks.harness import BenchEnvironment, ScenarioResult, Stopwatch
+
+MODELS = 20
+FRAME_HZ = 60
+DRAG_SECONDS = 1.5
+MODEL = "/static/mao_pro/mao_pro.model3.json"
+
+
+def _prefs() -> list:
+    prefs = [{"model_path": MODEL, "position": {"x": 0, "y": 0}, "scale": {"x": 1, "y": 1},
+              "parameters": {f"Param{i}": 0.5 for i in range(40)}}]
+    prefs += [{"model_path": f"/user_live2d/model_{i}/model_{i}.model3.json", "position": {"x": i, "y": i},
+               "scale": {"x": 1, "y": 1}, "parameters": {f"Param{j}": 0.1 for j in range(40)}}
+              for i in range(MODELS - 1)]
+    return prefs
+
+
+def _legacy_update(path: str, position: dict, scale: dict) -> None:
+    # 改动前 update_model_preferences 的读-改-写
+    with open(path, "r", encoding="utf-8") as f:
+        prefs = json.load(f)
+    for i, pref in enumerate(prefs):
+        if pref.get("model_path") == MODEL:
+            prefs[i] = {**pref, "position": position, "scale": scale}
+            break
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(prefs, f, ensure_ascii=False, indent=2)
+
+
+async def _drag(update, result: ScenarioResult, label: str) -> dict:
+    frames = int(FRAME_HZ * DRAG_SECONDS)
+    t0 = time.perf_counter()
+    position = {}
+    for i in range(frames):
+        await asyncio.sleep(max(0.0, t0 + i / FRAME_HZ - time.perf_counter()))
+        position = {"x": 100 + i, "y": 50 + i / 2}
+        with Stopwatch() as sw:
+            update(position, {"x": 1 + i / 1000, "y": 1 + i / 1000})
+        result.add(label, sw.ms)
+    return position
+
+
+async def run(env: BenchEnvironment, iterations: int) -> ScenarioResult:
+    from config import USER_PREFERENCES_FLUSH_DELAY
+    from utils import preferences
+
+    result = ScenarioResult("preferences_drag")
+    store = preferences.get_preference_store()
+    legacy_path = os.path.join(str(env.workdir), "legacy_user_preferences.json")
+    writes = {"legacy": 0, "store": 0}
+    durable = 1
+
+    for _ in range(iterations):
+        with open(legacy_path, "w", encoding="utf-8") as f:
+            json.dump(_prefs(), f, ensure_ascii=False, indent=2)
+
+        def legacy(position, scale):
+            _legacy_update(legacy_path, position, scale)
+            writes["legacy"] += 1
+
+        await _drag(legacy, result, "legacy_update")
+
+        preferences.save_user_preferences(_prefs())
+        preferences.flush_user_preferences()
+        before = store.writes
+        last = await _drag(lambda position, scale: preferences.update_model_preferences(MODEL, position, scale),
+                           result, "store_update")
+        await asyncio.sleep(USER_PREFERENCES_FLUSH_DELAY + 0.2)
+        writes["store"] += store.writes - before
+        with open(preferences.PREFERENCES_FILE, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        if saved[0]["position"] != last:
+            durable = 0
+
+    for mode, count in writes.items():
+        result.counters[f"{mode}_writes"] = round(count / max(1, iterations), 1)
+    result.counters["store_durable"] = durable
+    return result
@@ -0,0 +1,94 @@
+"""
+主动搭话：POST /api/proactive_chat（vision 通道）
+
+真实的 system_router 挂在独立 FastAPI 应用上，会话管理器用记录时间点的桩对象替代；
+截图压缩、memory_server /new_dialog 与 Phase 2 流式生成均走真实代码。
+
+- ``request``: 整个请求耗时
+- ``first_tts_chunk``: 请求发出 → 第一段文本进入 TTS
+"""
+
+import base64
+import time
+from io import BytesIO
+
+import httpx
+
+from benchmarks.harness import BenchEnvironment, ScenarioResult, Stopwatch
+
+PHASE2_REPLY = "[SCREEN] 主人在看什么呀？这个界面的配色好好看，是在做新的设计吗？要不要休息一下喵。"
+
+
+class _StubSessionManager:
+    """只实现 proactive_chat 用到的 LLMSessionManager 接口。"""
+
+    def __init__(self):
+        self.is_active = False
+        self.session = None
+        self.tts_chunk_times: list[float] = []
+        self.delivered: list[str] = []
+
+    async def request_fresh_screenshot(self, timeout: float = 3.0) -> str:
+        return ""
+
+    async def prepare_proactive_delivery(self, min_idle_secs: float = 30.0) -> bool:
+        return True
+
+    async def feed_tts_chunk(self, text: str):
+        self.tts_chunk_times.append(time.perf_counter())
+
+    async def finish_proactive_delivery(self, full_text: str):
+        self.delivered.append(full_text)
+
+    async def handle_new_message(self):
+        return None
+
+
+def _screenshot_data_url(width: int = 1920, height: int = 1080) -> str:
+    from PIL import Image
+
+    img = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    buf = BytesIO()
+    img.save(buf, format="PNG")
+    return "data:image/png;base64," + base64.b64encode(buf.getvalue()).decode()
+
+
+async def run(env: BenchEnvironment, iterations: int) -> ScenarioResult:
+    from fastapi import FastAPI
+
+    from main_routers import shared_state
+    from main_routers.system_router import router as system_router
+    from utils.config_manager import get_config_manager
+
+    result = ScenarioResult("proactive_chat")
+    env.start_memory_server()
+    env.llm_state.add_rule("========请开始========", PHASE2_REPLY)
+
+    cm = get_config_manager()
+    lanlan_name = cm.get_character_data()[1]
+    mgr = _StubSessionManager()
+    shared_state.init_shared_state(
+        sync_message_queue={}, sync_shutdown_event={}, session_manager={lanlan_name: mgr},
+        session_id={}, sync_process={}, websocket_locks={}, steamworks=None, templates=None,
+        config_manager=cm, logger=None,
+    )
+    app = FastAPI()
+    app.include_router(system_router)
+
+    body = {"lanlan_name": lanlan_name, "enabled_modes": ["vision"], "screenshot_data": _screenshot_data_url(), "language": "zh"}
+    chats = 0
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60.0) as client:
+        for _ in range(iterations):
+            mgr.tts_chunk_times.clear()
+            start = time.perf_counter()
+            with Stopwatch() as sw:
+                resp = await client.post("/api/proactive_chat", json=body)
+            data = resp.json()
+            chats += int(data.get("action") == "chat")
+            result.add("request", sw.ms)
+            if mgr.tts_chunk_times:
+                result.add("first_tts_chunk", (mgr.tts_chunk_times[0] - start) * 1000.0)
+    result.counters["chats"] = chats
+    result.counters["screenshot_b64_bytes"] = len(body["screenshot_data"])
+    return result
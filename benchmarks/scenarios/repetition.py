@@ -0,0 +1,76 @@
+"""
+重复回复检测：精确 trigram Jaccard（calculate_text_similarity）对比 MinHash 索引。
+
+不依赖替身服务。语料按固定种子生成：随机中文回复及其不同程度的改写，
+以精确 Jaccard ≥ 0.8 作为标签，统计 MinHash 判定与之一致的比例。
+
+- ``exact_h{N}`` / ``sketch_h{N}``: 历史窗口为 N 条时单次检测（查询 + 入窗）耗时
+- counters: ``agreement_pct``、``false_positive``、``false_negative``、``pairs``
+"""
+
+import random
+import time
+from collections import deque
+
+from benchmarks.harness import BenchEnvironment, ScenarioResult
+
+CHARS = "主人今天辛苦了喵我们一起去散步吧天气很好要不要喝点水休息一下呢好呀听到啦，。！？"
+HISTORY_SIZES = (3, 50)
+PAIRS_PER_ITERATION = 50
+THRESHOLD = 0.8
+
+
+def _random_text(rng: random.Random, n: int) -> str:
+    return "".join(rng.choice(CHARS) for _ in range(n))
+
+
+def _mutate(rng: random.Random, text: str, edits: int) -> str:
+    chars = list(text)
+    for _ in range(edits):
+        chars[rng.randrange(len(chars))] = rng.choice(CHARS)
+    return "".join(chars)
+
+
+def _exact_check(history: deque, text: str, similarity) -> int:
+    count = sum(1 for recent in history if similarity(text, recent) >= THRESHOLD)
+    history.append(text)
+    return count
+
+
+async def run(env: BenchEnvironment, iterations: int) -> ScenarioResult:
+    from utils.frontend_utils import calculate_text_similarity
+    from utils.text_sketch import MinHasher, RepetitionIndex
+
+    result = ScenarioResult("repetition")
+    rng = random.Random(20240611)
+    hasher = MinHasher()
+
+    agree = fp = fn = pairs = 0
+    for _ in range(iterations):
+        for _ in range(PAIRS_PER_ITERATION):
+            base = _random_text(rng, rng.randint(20, 200))
+            other = _mutate(rng, base, rng.randint(0, len(base) // 6))
+            exact = calculate_text_similarity(base, other) >= THRESHOLD
+            approx = MinHasher.similarity(hasher.signature(base), hasher.signature(other)) >= THRESHOLD
+            pairs += 1
+            agree += int(exact == approx)
+            fp += int(approx and not exact)
+            fn += int(exact and not approx)
+
+        for size in HISTORY_SIZES:
+            texts = [_random_text(rng, rng.randint(40, 200)) for _ in range(size + 10)]
+            history = deque(maxlen=size)
+            index = RepetitionIndex(capacity=size, threshold=THRESHOLD)
+            for text in texts:
+                t0 = time.perf_counter()
+                _exact_check(history, text, calculate_text_similarity)
+                result.add(f"exact_h{size}", (time.perf_counter() - t0) * 1000.0)
+                t0 = time.perf_counter()
+                index.check_and_insert(text)
+                result.add(f"sketch_h{size}", (time.perf_counter() - t0) * 1000.0)
+
+    result.counters["pairs"] = pairs
+    result.counters["agreement_pct"] = round(agree / pairs * 100.0, 2) if pairs else 0.0
+    result.counters["false_positive"] = fp
+    result.counters["false_negative"] = fn
+    return result
@@ -0,0 +1,134 @@
+"""
+屏幕分享帧处理：旧路径（事件循环内验证、逐帧发送）对比共享图片流水线
+（线程池验证 + 画面未变化去重）。
+
+录制序列按固定种子合成：720p "桌面"上每 ``CURSOR_EVERY`` 帧移动一次光标、每 ``CLOCK_EVERY`` 帧
+时钟跳一次（都是真实变化，必须发出），每 ``SCENE_EVERY`` 帧切换一次窗口，其余帧与上一帧完全相同。发送端是记录字节数的桩 websocket，
+并在每帧前清零限流时间戳，只比较去重本身的效果。
+
+- ``legacy_frame`` / ``pipeline_frame``: 单帧从数据到 stream_image 返回的耗时
+- ``compress_sync`` / ``compress_cached``: 主动搭话截图压缩（同一画面重复请求）
+- counters: 两种路径的 ``*_bytes_sent``、``*_frames_sent``、``*_cpu_ms``
+"""
+
+import base64
+import json
+import random
+import time
+from io import BytesIO
+
+from benchmarks.harness import BenchEnvironment, ScenarioResult
+
+FRAMES = 60
+SCENE_EVERY = 15
+CURSOR_EVERY = 4
+CLOCK_EVERY = 10
+WIDTH, HEIGHT = 1280, 720
+
+
+class _RecordingWs:
+    def __init__(self):
+        self.bytes_sent = 0
+        self.frames = 0
+
+    async def send(self, message: str):
+        self.bytes_sent += len(message)
+        if '"input_image_buffer.append"' in message[:64] or json.loads(message).get("type") == "input_image_buffer.append":
+            self.frames += 1
+
+
+def _recorded_sequence(seed: int = 7) -> list[str]:
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(seed)
+    frames = []
+    scene = None
+    cx = cy = 0
+    for i in range(FRAMES):
+        if i % SCENE_EVERY == 0:
+            scene = Image.new("RGB", (WIDTH, HEIGHT), tuple(rng.randrange(40, 200) for _ in range(3)))
+            draw = ImageDraw.Draw(scene)
+            for _ in range(12):
+                x0, y0 = rng.randrange(WIDTH - 200), rng.randrange(HEIGHT - 150)
+                draw.rectangle((x0, y0, x0 + rng.randrange(80, 400), y0 + rng.randrange(40, 300)),
+                               fill=tuple(rng.randrange(256) for _ in range(3)))
+            for row in range(0, HEIGHT, 18):
+                draw.text((20, row), "N.E.K.O " * rng.randrange(1, 12), fill=(0, 0, 0))
+        img = scene.copy()
+        draw = ImageDraw.Draw(img)
+        # 时钟与光标：只占很小面积，间隔若干帧才变
+        draw.text((WIDTH - 80, HEIGHT - 20), f"12:{i // CLOCK_EVERY:02d}", fill=(255, 255, 255))
+        if i % CURSOR_EVERY == 0:
+            cx, cy = rng.randrange(WIDTH), rng.randrange(HEIGHT)
+        draw.polygon([(cx, cy), (cx + 12, cy + 18), (cx, cy + 22)], fill=(255, 255, 255))
+        buf = BytesIO()
+        img.save(buf, format="JPEG", quality=70)
+        frames.append("data:image/jpeg;base64," + base64.b64encode(buf.getvalue()).decode())
+    return frames
+
+
+async def _legacy_process(data: str):
+    """改动前的 process_screen_data：在事件循环内 base64 解码 + PIL 验证。"""
+    from utils.screenshot_utils import _validate_image_data
+
+    img_b64 = data.split(",")[1]
+    image = _validate_image_data(base64.b64decode(img_b64))
+    return img_b64 if image is not None else None
+
+
+def _make_client():
+    from main_logic.omni_realtime_client import OmniRealtimeClient
+
+    async def noop(*_args, **_kwargs):
+        return None
+
+    client = OmniRealtimeClient(base_url="ws://bench", api_key="sk-neko-bench", model="qwen-omni-fake",
+                                on_text_delta=noop, on_audio_delta=noop)
+    client.ws = _RecordingWs()
+    client._supports_native_image = True
+    client._audio_in_buffer = True
+    return client
+
+
+async def run(env: BenchEnvironment, iterations: int) -> ScenarioResult:
+    from utils.screenshot_utils import compress_screenshot, compress_screenshot_async, process_screen_frame
+    from PIL import Image
+
+    result = ScenarioResult("screen_share")
+    frames = _recorded_sequence()
+    totals = {"legacy": [0, 0, 0.0], "pipeline": [0, 0, 0.0]}
+
+    for _ in range(iterations):
+        for mode in ("legacy", "pipeline"):
+            client = _make_client()
+            cpu0 = time.process_time()
+            for data in frames:
+                client._last_native_image_time = 0
+                t0 = time.perf_counter()
+                if mode == "legacy":
+                    img_b64 = await _legacy_process(data)
+                    await client.stream_image(img_b64)
+                else:
+                    frame = await process_screen_frame(data)
+                    await client.stream_image(frame.b64, frame=frame)
+                result.add(f"{mode}_frame", (time.perf_counter() - t0) * 1000.0)
+            totals[mode][0] += client.ws.bytes_sent
+            totals[mode][1] += client.ws.frames
+            totals[mode][2] += (time.process_time() - cpu0) * 1000.0
+
+        # 主动搭话：同一画面的截图在短时间内被重复压缩
+        raw = base64.b64decode(frames[0].split(",")[1])
+        for _ in range(3):
+            t0 = time.perf_counter()
+            compress_screenshot(Image.open(BytesIO(raw)))
+            result.add("compress_sync", (time.perf_counter() - t0) * 1000.0)
+            t0 = time.perf_counter()
+            await compress_screenshot_async(raw)
+            result.add("compress_cached", (time.perf_counter() - t0) * 1000.0)
+
+    for mode, (sent_bytes, sent_frames, cpu_ms) in totals.items():
+        result.counters[f"{mode}_bytes_sent"] = sent_bytes
+        result.counters[f"{mode}_frames_sent"] = sent_frames
+        result.counters[f"{mode}_cpu_ms"] = round(cpu_ms, 1)
+    result.counters["frames_offered"] = FRAMES * iterations
+    return result
@@ -0,0 +1,95 @@
+"""
+输出字幕翻译：整轮结束后整段翻译 vs ``main_logic.stream_translation`` 逐句流式翻译的字幕延迟。
+
+替身翻译器每次请求固定耗时 ``TRANSLATE_DELAY_MS``（整段翻译按句数加 ``PER_SENTENCE_MS``），
+回复按每 ``CHUNK_INTERVAL_MS`` 毫秒 ``CHUNK_CHARS`` 个字的节奏流出。每轮两段回复，第二段以与第一段
+相同的问候开头，用来观察缓存。
+
+- ``legacy_first_subtitle`` / ``stream_first_subtitle``: 回复开始到第一条字幕的耗时
+- ``legacy_segment_lag`` / ``stream_segment_lag``: 每句文字到齐后多久看到它的译文
+- counters: ``translate_calls``（流式方案的翻译请求数）、``cache_hits``、``segments``
+"""
+
+import asyncio
+import time
+
+from benchmarks.harness import BenchEnvironment, ScenarioResult
+
+TRANSLATE_DELAY_MS = 200
+PER_SENTENCE_MS = 15
+CHUNK_INTERVAL_MS = 60
+CHUNK_CHARS = 4
+REPLIES = (
+    "主人欢迎回来，今天也要元气满满哦！今天的天气真的非常不错呢。我们一起去公园散步好不好呀？记得带上水和小零食哦！",
+    "主人欢迎回来，今天也要元气满满哦！刚才的游戏玩得开心吗？下次我们再一起挑战更难的关卡吧。",
+)
+
+
+def _sentence_ends(text):
+    """每句结束字符的位置（按流出顺序）。"""
+    return [i for i, c in enumerate(text) if c in "。！？"]
+
+
+async def _stream(text, on_chunk):
+    """按节奏流出回复；返回每个字到达的时间。"""
+    arrived = []
+    for start in range(0, len(text), CHUNK_CHARS):
+        await asyncio.sleep(CHUNK_INTERVAL_MS / 1000.0)
+        chunk = text[start:start + CHUNK_CHARS]
+        arrived.extend([time.perf_counter()] * len(chunk))
+        on_chunk(chunk)
+    return arrived
+
+
+async def _legacy(text, result):
+    begin = time.perf_counter()
+    arrived = await _stream(text, lambda chunk: None)
+    sentences = len(_sentence_ends(text))
+    await asyncio.sleep((TRANSLATE_DELAY_MS + PER_SENTENCE_MS * sentences) / 1000.0)
+    shown = time.perf_counter()
+    result.add("legacy_first_subtitle", (shown - begin) * 1000.0)
+    for end in _sentence_ends(text):
+        result.add("legacy_segment_lag", (shown - arrived[end]) * 1000.0)
+
+
+async def _streaming(text, result, StreamingTranslator, stats):
+    begin = time.perf_counter()
+    shown = []
+
+    async def translate(sentence):
+        stats["calls"] += 1
+        await asyncio.sleep(TRANSLATE_DELAY_MS / 1000.0)
+        return sentence
+
+    async def emit(index, sentence, translated):
+        shown.append((len(sentence), time.perf_counter()))
+
+    translator = StreamingTranslator(translate, emit, "en")
+    arrived = await _stream(text, translator.feed)
+    await translator.finish()
+    stats["hits"] += translator.cache_hits
+    stats["segments"] += translator.segments
+    result.add("stream_first_subtitle", (shown[0][1] - begin) * 1000.0)
+    # split_paragraph 可能把几句并成一段：每句以它所在那段译文发出的时间为准
+    seg, seg_end = 0, shown[0][0]
+    for end in _sentence_ends(text):
+        while end >= seg_end and seg < len(shown) - 1:
+            seg += 1
+            seg_end += shown[seg][0]
+        result.add("stream_segment_lag", (shown[seg][1] - arrived[end]) * 1000.0)
+
+
+async def run(env: BenchEnvironment, iterations: int) -> ScenarioResult:
+    from main_logic.stream_translation import StreamingTranslator, clear_segment_cache
+
+    result = ScenarioResult("stream_translation")
+    stats = {"calls": 0, "hits": 0, "segments": 0}
+    for _ in range(iterations):
+        clear_segment_cache()
+        for text in REPLIES:
+            await _legacy(text, result)
+            await _streaming(text, result, StreamingTranslator, stats)
+    result.counters["translate_calls"] = stats["calls"]
+    result.counters["cache_hits"] = stats["hits"]
+    result.counters["segments"] = stats["segments"]
+    return result
@@ -0,0 +1,96 @@
+"""
+Agent 能力判定：逐通道并行评估（改动前）对比一次调用的统一判定 + 本地闲聊预筛。
+
+``DirectTaskExecutor.analyze_and_execute`` 对接替身 LLM / MCP Router / 用户插件服务，
+四个通道全部启用（ComputerUse / BrowserUse 用始终可用的桩）。回放一段对话：
+大约一半轮次是闲聊，其余是需要 GUI 的任务（替身 LLM 判给 ComputerUse，不真正执行）。
+
+- ``legacy``: parallel 模式、关闭预筛、每轮重新拉取工具与插件列表（原 force_refresh 行为）
+- ``unified``: unified 模式 + 预筛 + 共享能力快照
+
+- ``*_decision``: 单轮 analyze_and_execute 耗时
+- counters: ``*_llm_calls_per_turn``（替身 LLM 实际收到的请求数 / 轮数）、``unified_prefiltered``
+"""
+
+import json
+
+from benchmarks.harness import BenchEnvironment, ScenarioResult, Stopwatch
+
+# 每轮对话都带上这句开场白，替身 LLM 按它区分本场景的请求（其他场景也注册了同类 prompt 的规则）
+GREETING = {"role": "assistant", "content": "主人，今天想让我做点什么？（桌面助手模式）"}
+MARKER = "桌面助手模式"
+
+TURNS = [
+    "早上好呀！",
+    "帮我打开计算器算一下 37 乘 48",
+    "哈哈哈哈",
+    "谢谢你～",
+    "打开记事本，写一句今天要买牛奶",
+    "晚安喵",
+    "帮我把桌面上的截图文件夹打开",
+    "你今天过得怎么样？",
+]
+
+DECLINE = {"has_task": True, "can_execute": False, "task_description": "GUI 操作", "reason": "not this channel"}
+ACCEPT = {"has_task": True, "can_execute": True, "task_description": "GUI 操作", "reason": "needs desktop GUI"}
+UNIFIED = {
+    "has_task": True,
+    "task_description": "GUI 操作",
+    "mcp": {"can_execute": False, "tool_name": None, "tool_args": None, "reason": "no tool"},
+    "user_plugin": {"can_execute": False, "plugin_id": None, "entry_id": None, "plugin_args": None, "reason": "no plugin"},
+    "browser_use": {"can_execute": False, "reason": "local app"},
+    "computer_use": {"can_execute": True, "reason": "needs desktop GUI"},
+}
+
+
+class _Ready:
+    def is_available(self):
+        return {"ready": True, "reasons": []}
+
+
+async def run(env: BenchEnvironment, iterations: int) -> ScenarioResult:
+    from brain.mcp_client import McpRouterClient, McpToolCatalog
+    from brain.task_executor import DirectTaskExecutor
+
+    result = ScenarioResult("task_classifier")
+    for needle, reply in (
+        ("unified task classifier", UNIFIED),
+        ("MCP tool selection agent", DECLINE),
+        ("User Plugin selection agent", DECLINE),
+        ("browser automation", DECLINE),
+        ("GUI automation assessment agent", ACCEPT),
+    ):
+        env.llm_state.add_rule((needle, MARKER), json.dumps(reply, ensure_ascii=False))
+    flags = {"mcp_enabled": True, "user_plugin_enabled": True, "browser_use_enabled": True, "computer_use_enabled": True}
+
+    for mode in ("legacy", "unified"):
+        executor = DirectTaskExecutor(computer_use=_Ready(), browser_use=_Ready())
+        executor.router = McpRouterClient(base_url=env.mcp_router_url, api_key="")
+        executor.catalog = McpToolCatalog(executor.router)
+        executor.classifier_mode = "parallel" if mode == "legacy" else "unified"
+        executor.prefilter_enabled = mode != "legacy"
+        requests_before = env.llm_state.request_count
+        turns = wrong = 0
+        try:
+            for _ in range(iterations):
+                history = []
+                for text in TURNS:
+                    history.append({"role": "user", "content": text})
+                    if mode == "legacy":
+                        executor.invalidate_capabilities()
+                    with Stopwatch() as sw:
+                        res = await executor.analyze_and_execute([GREETING] + history[-9:], lanlan_name="bench", agent_flags=flags)
+                    result.add(f"{mode}_decision", sw.ms)
+                    turns += 1
+                    # 闲聊轮次在 legacy 下同样会被替身 LLM 判给 ComputerUse，这里只检查任务轮次
+                    if text.startswith(("帮我", "打开")):
+                        wrong += int(not (res and res.execution_method == "computer_use"))
+                    history.append({"role": "assistant", "content": "好的喵。"})
+        finally:
+            await executor.router.aclose()
+        calls = env.llm_state.request_count - requests_before
+        result.counters[f"{mode}_llm_calls_per_turn"] = round(calls / max(1, turns), 2)
+        result.counters[f"{mode}_misrouted"] = wrong
+        if mode == "unified":
+            result.counters["unified_prefiltered"] = executor.stats["prefiltered"]
+    return result
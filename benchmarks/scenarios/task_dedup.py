@@ -0,0 +1,151 @@
+"""
+任务去重：仅 LLM（改动前）对比本地预筛 + LLM 兜底的 ``TaskDeduper``。
+
+不依赖替身服务。LLM 用按标注作答的桩代替（固定 ``LLM_MS`` 延迟），即把
+"仅 LLM"的判定当作基准答案；语料为固定的中英文任务及其改写：
+
+- ``near``: 几乎同样的说法（重复）
+- ``para``: 换了说法的同一任务（重复，字面重叠少）
+- ``miss``: 字面相近但目标不同（不重复）
+- ``other``: 与所有进行中任务无关（不重复）
+
+- ``llm_only_judge`` / ``two_stage_judge``: 单次 judge 耗时
+- counters: ``precision_pct`` / ``recall_pct``（以仅 LLM 的判定为准）、
+  ``llm_calls`` / ``llm_calls_avoided`` / ``llm_calls_avoided_pct``
+"""
+
+import asyncio
+import random
+import time
+
+from benchmarks.harness import BenchEnvironment, ScenarioResult
+
+LLM_MS = 40
+CANDIDATES = 3
+SAMPLES_PER_ITERATION = 40
+
+# 基础任务 -> {near, para, miss}
+TASKS = [
+    ("打开浏览器搜索明天上海的天气", {
+        "near": "帮我打开浏览器搜一下明天上海的天气",
+        "para": "查查明天上海会不会下雨",
+        "miss": "打开浏览器搜索明天北京的航班"}),
+    ("给妈妈发微信说我晚点回家", {
+        "near": "给妈妈发个微信，说我晚点回家",
+        "para": "告诉我妈我今天会晚些到家",
+        "miss": "给妈妈发微信问她晚饭吃什么"}),
+    ("在桌面新建一个名为报告的文件夹", {
+        "near": "在桌面上新建一个名为报告的文件夹吧",
+        "para": "帮我建个叫报告的目录放桌面",
+        "miss": "把桌面上名为报告的文件夹删除"}),
+    ("播放周杰伦的晴天", {
+        "near": "播放一下周杰伦的晴天",
+        "para": "来首晴天，Jay 唱的那首",
+        "miss": "播放周杰伦的七里香"}),
+    ("Open Spotify and play my liked songs playlist", {
+        "near": "open spotify and play my liked songs playlist please",
+        "para": "Start the favourites playlist in the music app",
+        "miss": "Open Spotify and delete my liked songs playlist"}),
+    ("Summarize the latest email from my manager", {
+        "near": "summarize the latest email from my manager.",
+        "para": "Give me the gist of what my boss wrote most recently",
+        "miss": "Reply to the latest email from my manager"}),
+    ("把这张截图保存到下载目录", {
+        "near": "把这张截图保存到下载目录里",
+        "para": "截图存一份到 Downloads",
+        "miss": "把下载目录里的截图全部清空"}),
+    ("Book a table for two at 7pm tonight", {
+        "near": "book a table for two at 7pm tonight",
+        "para": "Reserve dinner for 2 people this evening at seven",
+        "miss": "Cancel the table for two at 7pm tonight"}),
+    ("设置明早七点的闹钟", {
+        "near": "设置一个明早七点的闹钟",
+        "para": "明天早上 7 点叫我起床",
+        "miss": "取消明早七点的闹钟"}),
+    ("Translate this paragraph into Japanese", {
+        "near": "translate this paragraph into japanese",
+        "para": "Render the text above in 日本語",
+        "miss": "Translate this paragraph into French"}),
+]
+OTHER = [
+    "帮我查一下最近的电影排片",
+    "Check the battery level of my laptop",
+    "整理一下桌面上的图标",
+    "Find a recipe for mapo tofu",
+]
+
+
+class _OracleLLM:
+    """按标注作答的 LLM 桩：从 prompt 中取出新任务，返回标注的 [matched_id, duplicate]。"""
+
+    def __init__(self, labels: dict):
+        self.labels = labels
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        prompt = messages[-1]["content"]
+        new_task = prompt.split("\n", 2)[1]
+        await asyncio.sleep(LLM_MS / 1000.0)
+        matched = self.labels[new_task]
+
+        class _Resp:
+            content = f'["{matched}", true]' if matched else "[null, false]"
+
+        return _Resp()
+
+
+def _samples(rng: random.Random, count: int):
+    """[(new_task, candidates, gold_matched_id)]"""
+    out = []
+    for _ in range(count):
+        picked = rng.sample(range(len(TASKS)), CANDIDATES)
+        candidates = [(f"t{i}", TASKS[i][0]) for i in picked]
+        kind = rng.choice(("near", "para", "miss", "other"))
+        target = rng.choice(picked)
+        if kind == "other":
+            out.append((rng.choice(OTHER), candidates, None))
+        else:
+            out.append((TASKS[target][1][kind], candidates, f"t{target}" if kind != "miss" else None))
+    return out
+
+
+async def run(env: BenchEnvironment, iterations: int) -> ScenarioResult:
+    from brain.deduper import LocalTaskMatcher, TaskDeduper
+
+    result = ScenarioResult("task_dedup")
+    rng = random.Random(34)
+    samples = _samples(rng, SAMPLES_PER_ITERATION * iterations)
+    labels = {new: gold for new, _, gold in samples}
+
+    class _PassThrough(LocalTaskMatcher):
+        def classify(self, new_task, candidates):
+            return "ambiguous", None, 0.0
+
+    llm_only = TaskDeduper(llm=_OracleLLM(labels), matcher=_PassThrough())
+    two_stage = TaskDeduper(llm=_OracleLLM(labels))
+
+    tp = fp = fn = 0
+    for new, candidates, _gold in samples:
+        t0 = time.perf_counter()
+        base = await llm_only.judge(new, candidates)
+        result.add("llm_only_judge", (time.perf_counter() - t0) * 1000.0)
+        t0 = time.perf_counter()
+        got = await two_stage.judge(new, candidates)
+        result.add("two_stage_judge", (time.perf_counter() - t0) * 1000.0)
+        expected = base["matched_id"] if base["duplicate"] else None
+        predicted = got["matched_id"] if got["duplicate"] else None
+        if predicted is not None:
+            tp += int(predicted == expected)
+            fp += int(predicted != expected)
+        fn += int(expected is not None and predicted != expected)
+
+    total = len(samples)
+    calls = two_stage.llm.calls
+    result.counters["samples"] = total
+    result.counters["precision_pct"] = round(tp / (tp + fp) * 100.0, 1) if tp + fp else 100.0
+    result.counters["recall_pct"] = round(tp / (tp + fn) * 100.0, 1) if tp + fn else 100.0
+    result.counters["llm_calls"] = calls
+    result.counters["llm_calls_avoided"] = total - calls
+    result.counters["llm_calls_avoided_pct"] = round((total - calls) / total * 100.0, 1) if total else 0.0
+    return result
@@ -0,0 +1,46 @@
+"""文本对话：OmniOfflineClient.stream_text 首 token 与整轮耗时。"""
+
+import time
+
+from benchmarks.harness import BenchEnvironment, ScenarioResult
+
+PROMPTS = (
+    "你好呀！最近过得怎么样？",
+    "我最近在学做饭，你有什么推荐的菜吗？",
+    "那做这道菜需要准备什么食材？",
+    "你平时喜欢做什么消遣？",
+)
+
+
+async def run(env: BenchEnvironment, iterations: int) -> ScenarioResult:
+    from main_logic.omni_offline_client import OmniOfflineClient
+    from utils.config_manager import get_config_manager
+
+    result = ScenarioResult("text_chat")
+    cfg = get_config_manager().get_model_api_config("conversation")
+    first_delta_at = []
+
+    async def on_text_delta(text: str, is_first: bool):
+        if not first_delta_at:
+            first_delta_at.append(time.perf_counter())
+
+    client = OmniOfflineClient(
+        base_url=cfg["base_url"],
+        api_key=cfg["api_key"],
+        model=cfg["model"],
+        on_text_delta=on_text_delta,
+    )
+    await client.connect(instructions="你是一个友善、活泼、可爱的AI猫娘助手。")
+    try:
+        for i in range(iterations):
+            first_delta_at.clear()
+            start = time.perf_counter()
+            await client.stream_text(PROMPTS[i % len(PROMPTS)])
+            end = time.perf_counter()
+            if first_delta_at:
+                result.add("first_token", (first_delta_at[0] - start) * 1000.0)
+            result.add("turn", (end - start) * 1000.0)
+        result.counters["history_messages"] = len(client._conversation_history)
+    finally:
+        await client.close()
+    return result
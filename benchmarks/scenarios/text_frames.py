@@ -0,0 +1,142 @@
+"""
+输出文本合帧：替身模型按不同 token 速率流出一轮回复，原来每个 delta 一帧 vs ``main_logic.text_coalescer``
+合帧后的帧数与 CPU 开销。
+
+每帧按真实链路计成本：JSON 序列化后写入前端 socket；放进 ``sync_message_queue``，由转发线程
+（相当于 cross_server）取出、再序列化写入 monitor socket；两个 socket 的对端各有一个线程读走数据。
+每个 token 1~2 个字，回复开头带一个情绪标签。
+
+- ``legacy_turn_cpu_<rate>`` / ``coalesced_turn_cpu_<rate>``: 一轮的进程 CPU 时间（含所有线程与替身流本身的
+  调度开销），rate 为 token/s
+- ``coalesced_first_frame``: 第一个 delta 到前端收到首帧的耗时
+- counters: ``legacy_frames_<rate>`` / ``coalesced_frames_<rate>``（每轮帧数）、
+  ``text_ok``（合帧后前端拼出的文本与原来一致为 1）
+"""
+
+import asyncio
+import json
+import queue
+import socket
+import threading
+import time
+
+from benchmarks.harness import BenchEnvironment, ScenarioResult
+
+RATES = (40, 120, 400)
+TOKENS = 60
+REPLY = "<happy>主人今天辛苦啦，要不要先喝杯热茶休息一下？我刚才把你喜欢的那首歌加进歌单里了，晚上我们一起听吧！"
+
+
+def _tokens():
+    out, i = [], 0
+    while len(out) < TOKENS:
+        step = 1 + (len(out) % 2)
+        piece = REPLY[i % len(REPLY):i % len(REPLY) + step] or REPLY[:step]
+        out.append(piece)
+        i += len(piece)
+    return out
+
+
+def _drain(sock):
+    while sock.recv(65536):
+        pass
+
+
+class _Link:
+    """前端 socket、monitor socket 与 sync_message_queue 转发线程，整个场景共用。"""
+
+    def __init__(self):
+        self.frontend, frontend_peer = socket.socketpair()
+        self.monitor, monitor_peer = socket.socketpair()
+        self.queue = queue.Queue()
+        self._peers = (frontend_peer, monitor_peer)
+        self._threads = [threading.Thread(target=_drain, args=(peer,), daemon=True) for peer in self._peers]
+        self._threads.append(threading.Thread(target=self._forward, daemon=True))
+        for t in self._threads:
+            t.start()
+
+    def _forward(self):
+        while True:
+            message = self.queue.get()
+            if message is None:
+                return
+            self.monitor.sendall(json.dumps(message["data"]).encode("utf-8"))
+
+    def settle(self):
+        """等转发线程把队列里的帧发完，免得算进下一轮。"""
+        while not self.queue.empty():
+            time.sleep(0.001)
+
+    def close(self):
+        self.queue.put(None)
+        self._threads[-1].join(timeout=2)
+        self.frontend.close()
+        self.monitor.close()
+        for t in self._threads[:-1]:
+            t.join(timeout=2)
+        for peer in self._peers:
+            peer.close()
+
+
+class _Sink:
+    def __init__(self, link):
+        self.link = link
+        self.frames = 0
+        self.text = []
+        self.first_at = None
+
+    async def send(self, text, is_new):
+        message = {"type": "gemini_response", "text": text, "isNewMessage": is_new}
+        self.link.frontend.sendall(json.dumps(message).encode("utf-8"))
+        self.link.queue.put({"type": "json", "data": message})
+        self.frames += 1
+        self.text.append(text)
+        if self.first_at is None:
+            self.first_at = time.perf_counter()
+
+
+async def _turn(link, tokens, rate, push, flush=None):
+    """按 rate 流出一轮 token；返回 (开始时间, 这一轮的 CPU 毫秒)。"""
+    started = time.perf_counter()
+    cpu = time.process_time()
+    for i, token in enumerate(tokens):
+        await push(token, i == 0)
+        await asyncio.sleep(1.0 / rate)
+    if flush is not None:
+        await flush(final=True)
+    link.settle()
+    return started, (time.process_time() - cpu) * 1000.0
+
+
+async def run(env: BenchEnvironment, iterations: int) -> ScenarioResult:
+    from main_logic.text_coalescer import EMOTION_PATTERN, TextFrameCoalescer
+
+    result = ScenarioResult("text_frames")
+    tokens = _tokens()
+    expected = EMOTION_PATTERN.sub('', "".join(tokens))
+    text_ok = 1
+    link = _Link()
+    try:
+        for _ in range(iterations):
+            for rate in RATES:
+                legacy = _Sink(link)
+
+                async def legacy_push(token, is_first):
+                    await legacy.send(EMOTION_PATTERN.sub('', token), is_first)
+
+                _, cpu_ms = await _turn(link, tokens, rate, legacy_push)
+                result.add(f"legacy_turn_cpu_{rate}", cpu_ms)
+                result.counters[f"legacy_frames_{rate}"] = legacy.frames
+
+                sink = _Sink(link)
+                coalescer = TextFrameCoalescer(sink.send)
+                started, cpu_ms = await _turn(link, tokens, rate, coalescer.push, coalescer.flush)
+                result.add(f"coalesced_turn_cpu_{rate}", cpu_ms)
+                result.add("coalesced_first_frame", (sink.first_at - started) * 1000.0)
+                result.counters[f"coalesced_frames_{rate}"] = sink.frames
+                if "".join(sink.text) != expected:
+                    text_ok = 0
+    finally:
+        link.close()
+    result.counters["text_ok"] = text_ok
+    return result
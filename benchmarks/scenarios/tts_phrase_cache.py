@@ -0,0 +1,109 @@
+"""
+TTS 短语缓存：重复的问候/语气词/短回复在缓存前后的首包延迟与命中率。
+
+不依赖真实 TTS。替身远端 TTS（``_remote_worker``）收到一轮结束信号后等 ``REMOTE_FIRST_AUDIO_MS``
+才开始流式返回 PCM；另外用 ``tts_client.dummy_tts_worker`` 跑同一组轮次（不产出音频）。
+``SCRIPT`` 中约一半是重复的短句。
+
+- ``remote_first_audio``: 不加缓存，结束信号到第一块音频
+- ``cached_hit_first_audio`` / ``cached_miss_first_audio``: 加缓存后命中/未命中轮次的首包延迟
+- counters: ``remote_hit_rate`` / ``dummy_hit_rate``（最后一次迭代的命中率，首次出现的短句必然未命中）、
+  ``remote_worker_turns``（加缓存后实际交给远端合成的轮次数）
+"""
+
+import asyncio
+import shutil
+import threading
+import time
+from pathlib import Path
+from queue import Empty, Queue
+
+from benchmarks.harness import BenchEnvironment, ScenarioResult
+
+REMOTE_FIRST_AUDIO_MS = 150
+SCRIPT = [
+    "你好呀！", "嗯嗯。", "今天天气怎么样？我去帮你查一下。", "好的～", "你好呀！",
+    "嗯嗯。", "我觉得这个想法很有意思，可以多说一点吗？", "好的～", "嗯嗯。", "你好呀！",
+    "晚安，做个好梦。", "好的～",
+]
+
+
+def _remote_worker(request_queue, response_queue, audio_api_key, voice_id, turns=None):
+    response_queue.put(("__ready__", True))
+    text = ""
+    while True:
+        sid, chunk = request_queue.get()
+        if sid is not None:
+            text += chunk or ""
+            continue
+        if text:
+            turns.append(text)
+            time.sleep(REMOTE_FIRST_AUDIO_MS / 1000.0)
+            for _ in range(3):
+                response_queue.put(b"\x01\x00" * 4800)  # 100ms @ 48kHz
+                time.sleep(0.02)
+        text = ""
+
+
+def _play(worker, script, on_first_audio):
+    requests, responses = Queue(), Queue()
+    threading.Thread(target=worker, args=(requests, responses, "", "voice"), daemon=True).start()
+    responses.get(timeout=5)  # 就绪信号
+    for i, text in enumerate(script):
+        # LLM 流式吐字：每 2 个字符一个 chunk
+        for j in range(0, len(text), 2):
+            requests.put((f"turn-{i}", text[j:j + 2]))
+        t0 = time.perf_counter()
+        requests.put((None, None))
+        first = None
+        while True:
+            try:
+                responses.get(timeout=0.3 if first is None else 0.15)
+            except Empty:
+                if first is not None or time.perf_counter() - t0 > 0.5:
+                    break
+                continue
+            if first is None:
+                first = (time.perf_counter() - t0) * 1000.0
+        on_first_audio(i, text, first)
+        time.sleep(0.7)  # 用户开口前的停顿，也让未命中轮次的录制收尾
+
+
+async def run(env: BenchEnvironment, iterations: int) -> ScenarioResult:
+    from main_logic import tts_client
+    from main_logic.tts_phrase_cache import PhraseCache, with_phrase_cache
+
+    result = ScenarioResult("tts_phrase_cache")
+    hit_rates = {}
+    remote_turns = []
+
+    def remote(*args):
+        _remote_worker(*args, turns=remote_turns)
+
+    def record_remote(i, text, ms):
+        if ms is not None:
+            result.add("remote_first_audio", ms)
+
+    for _ in range(iterations):
+        await asyncio.to_thread(_play, remote, SCRIPT, record_remote)
+
+        for name, inner in (("remote", remote), ("dummy", tts_client.dummy_tts_worker)):
+            root = Path(str(env.workdir)) / f"tts_cache_{name}"
+            shutil.rmtree(root, ignore_errors=True)  # 每次迭代都从空缓存开始
+            cache = PhraseCache(root, max_bytes=16 << 20)
+            remote_turns.clear()
+            seen = set()
+
+            def record_cached(i, text, ms, seen=seen):
+                if ms is not None:
+                    result.add("cached_hit_first_audio" if text in seen else "cached_miss_first_audio", ms)
+                seen.add(text)
+
+            await asyncio.to_thread(_play, with_phrase_cache(inner, cache=cache), SCRIPT, record_cached)
+            hit_rates[name] = cache.hits / max(1, cache.hits + cache.misses)
+            if name == "remote":
+                result.counters["remote_worker_turns"] = len(remote_turns)
+
+    result.counters["remote_hit_rate"] = round(hit_rates["remote"], 3)
+    result.counters["dummy_hit_rate"] = round(hit_rates["dummy"], 3)
+    return result
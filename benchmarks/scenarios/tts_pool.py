@@ -0,0 +1,82 @@
+"""
+TTS 连接池：连续几个语音会话从 start_session 到第一句音频的耗时，冷启动 vs 预热连接池。
+
+替身 TTS 服务（GPT-SoVITS v3 协议）的 ``init_delay`` 设为 ``HANDSHAKE_MS``，模拟远端建连 + 握手。
+每个会话按 core 的流程：从池里取 worker → 等就绪信号 → 提交第一句 → 收到首个音频块后结束会话，
+会话之间停顿 ``SESSION_GAP`` 秒。``cold`` 不留热备（即原来每次新起线程的行为）。
+
+- ``cold_first_session`` / ``cold_next_sessions``: 不预热时首个/后续会话的首包耗时
+- ``pooled_first_session`` / ``pooled_next_sessions``: 预热连接池的首个/后续会话首包耗时
+- ``pooled_ready``: 预热连接池下取 worker 到拿到就绪信号的耗时
+- counters: ``pool_hits``（后续会话拿到热备的次数）、``upstream_connections``（替身服务收到的建连数）
+"""
+
+import queue
+import time
+
+from benchmarks.harness import BenchEnvironment, ScenarioResult
+
+HANDSHAKE_MS = 250
+SESSIONS = 4
+SESSION_GAP = 0.5
+SENTENCE = ("主人，", "早上好呀。")
+
+
+def _session(pool, worker, key):
+    start = time.perf_counter()
+    conn = pool.acquire(key, worker, "", "bench_voice")
+    ready = conn.response_queue.get(timeout=10)
+    ready_ms = (time.perf_counter() - start) * 1000.0
+    if ready != ("__ready__", True):
+        raise RuntimeError(f"TTS worker not ready: {ready!r}")
+    for piece in SENTENCE:
+        conn.request_queue.put(("speech-0", piece))
+    conn.request_queue.put((None, None))
+    conn.response_queue.get(timeout=10)
+    first_ms = (time.perf_counter() - start) * 1000.0
+    # 把本句剩余音频收完再结束会话
+    while True:
+        try:
+            conn.response_queue.get(timeout=0.2)
+        except queue.Empty:
+            break
+    pool.release(conn)
+    conn.thread.join(timeout=2)
+    return ready_ms, first_ms
+
+
+def _play(pool, worker, key, result, mode):
+    for i in range(SESSIONS):
+        ready_ms, first_ms = _session(pool, worker, key)
+        result.add(f"{mode}_first_session" if i == 0 else f"{mode}_next_sessions", first_ms)
+        if mode == "pooled":
+            result.add("pooled_ready", ready_ms)
+        time.sleep(SESSION_GAP)
+
+
+async def run(env: BenchEnvironment, iterations: int) -> ScenarioResult:
+    import asyncio
+
+    from main_logic.tts_client import get_tts_worker
+    from main_logic.tts_connection_pool import TTSConnectionPool, pool_key
+
+    result = ScenarioResult("tts_pool")
+    worker = get_tts_worker(core_api_type="qwen", has_custom_voice=False)
+    key = pool_key(worker, "", "bench_voice")
+    hits = 0
+    env.tts.init_delay = HANDSHAKE_MS / 1000.0
+    connections0 = env.tts.connections
+    try:
+        for _ in range(iterations):
+            for mode, spares in (("cold", 0), ("pooled", 1)):
+                pool = TTSConnectionPool(spares=spares, max_idle=30, warm_window=60)
+                await asyncio.to_thread(_play, pool, worker, key, result, mode)
+                if mode == "pooled":
+                    hits += pool.hits
+                pool.shutdown()
+    finally:
+        env.tts.init_delay = 0.0
+    result.counters["worker"] = getattr(worker, "__name__", str(worker))
+    result.counters["pool_hits"] = hits
+    result.counters["upstream_connections"] = env.tts.connections - connections0
+    return result
@@ -0,0 +1,63 @@
+"""
+TTS 流式合成：在线程中运行 tts_client 的 GPT-SoVITS worker，对接替身 TTS 服务。
+
+- ``ready``: worker 启动到发出就绪信号
+- ``first_audio``: 提交第一段文本 → 收到首个音频块
+"""
+
+import asyncio
+import queue
+import threading
+import time
+
+from benchmarks.harness import BenchEnvironment, ScenarioResult
+
+SENTENCE_PIECES = ("主人，", "今天的天气", "真不错呢。", "要不要出去", "散散步？")
+IDLE_GAP = 0.3
+
+
+async def run(env: BenchEnvironment, iterations: int) -> ScenarioResult:
+    from main_logic.tts_client import get_tts_worker
+
+    result = ScenarioResult("tts_stream")
+    loop = asyncio.get_running_loop()
+    request_queue: "queue.Queue" = queue.Queue()
+    response_queue: "queue.Queue" = queue.Queue()
+    worker = get_tts_worker(core_api_type="qwen", has_custom_voice=False)
+    result.counters["worker"] = getattr(worker, "__name__", str(worker))
+
+    start = time.perf_counter()
+    thread = threading.Thread(
+        target=worker, args=(request_queue, response_queue, "", "bench_voice"), name="bench-tts", daemon=True
+    )
+    thread.start()
+    ready = await loop.run_in_executor(None, response_queue.get, True, 10)
+    if ready != ("__ready__", True):
+        result.error = f"TTS worker not ready: {ready!r}"
+        return result
+    result.add("ready", (time.perf_counter() - start) * 1000.0)
+
+    total_bytes = 0
+    try:
+        for i in range(iterations):
+            speech_id = f"bench-{i}"
+            submit = time.perf_counter()
+            for piece in SENTENCE_PIECES:
+                request_queue.put((speech_id, piece))
+            request_queue.put((None, None))
+            first = await loop.run_in_executor(None, response_queue.get, True, 10)
+            result.add("first_audio", (time.perf_counter() - submit) * 1000.0)
+            total_bytes += len(first)
+            while True:
+                try:
+                    chunk = await loop.run_in_executor(None, response_queue.get, True, IDLE_GAP)
+                except queue.Empty:
+                    break
+                if isinstance(chunk, (bytes, bytearray)):
+                    total_bytes += len(chunk)
+        result.counters["audio_bytes_48k"] = total_bytes
+        result.counters["sentences"] = env.tts.sentences
+    finally:
+        # 非元组请求会让 worker 的解包失败并退出主循环
+        request_queue.put(None)
+    return result
@@ -0,0 +1,93 @@
+"""
+语音会话往返：OmniRealtimeClient 经 AudioProcessor 上行 48kHz PCM，
+替身 Realtime 服务端 VAD 断句后回复音频。
+
+- ``stream_audio``: 单次 stream_audio 调用耗时（重采样 + base64 + 发送）
+- ``speech_end_to_first_audio``: 最后一个语音帧发出 → 收到首个音频增量
+- ``turn``: 一轮（语音 + 静音 + 完整回复）总耗时
+"""
+
+import array
+import asyncio
+import math
+import time
+
+from benchmarks.harness import FAKE_REALTIME_MODEL, BenchEnvironment, ScenarioResult
+
+FRAME_SAMPLES = 480  # 48kHz 10ms，对应 stream_audio 的 RNNoise 帧
+SPEECH_FRAMES = 50  # 500ms 语音
+TAIL_SILENCE_FRAMES = 40  # 400ms 静音（替身 VAD 默认 200ms 断句）
+
+
+def _frame(amplitude: int, offset: int) -> bytes:
+    samples = array.array(
+        "h",
+        (int(amplitude * math.sin(2 * math.pi * 300 * (offset + i) / 48000)) for i in range(FRAME_SAMPLES)),
+    )
+    return samples.tobytes()
+
+
+async def run(env: BenchEnvironment, iterations: int) -> ScenarioResult:
+    from main_logic.omni_realtime_client import OmniRealtimeClient
+
+    result = ScenarioResult("voice_session")
+    speech = [_frame(8000, i * FRAME_SAMPLES) for i in range(SPEECH_FRAMES)]
+    silence = _frame(0, 0)
+
+    first_audio = asyncio.Event()
+    response_done = asyncio.Event()
+    audio_bytes = 0
+
+    async def on_audio_delta(data: bytes):
+        nonlocal audio_bytes
+        audio_bytes += len(data)
+        first_audio.set()
+
+    async def on_response_done():
+        response_done.set()
+
+    async def noop(*_args, **_kwargs):
+        return None
+
+    client = OmniRealtimeClient(
+        base_url=env.realtime.url,
+        api_key="sk-neko-bench",
+        model=FAKE_REALTIME_MODEL,
+        api_type="qwen",
+        on_audio_delta=on_audio_delta,
+        on_response_done=on_response_done,
+        on_text_delta=noop,
+        on_input_transcript=noop,
+        on_output_transcript=noop,
+        on_new_message=noop,
+    )
+    await client.connect(instructions="你是一个友善的猫娘。", native_audio=True)
+    reader = asyncio.create_task(client.handle_messages())
+    try:
+        for _ in range(iterations):
+            first_audio.clear()
+            response_done.clear()
+            turn_start = time.perf_counter()
+            for frame in speech:
+                t0 = time.perf_counter()
+                await client.stream_audio(frame)
+                result.add("stream_audio", (time.perf_counter() - t0) * 1000.0)
+            speech_end = time.perf_counter()
+            for _ in range(TAIL_SILENCE_FRAMES):
+                if first_audio.is_set():
+                    break
+                await client.stream_audio(silence)
+            await asyncio.wait_for(first_audio.wait(), timeout=10)
+            result.add("speech_end_to_first_audio", (time.perf_counter() - speech_end) * 1000.0)
+            await asyncio.wait_for(response_done.wait(), timeout=10)
+            result.add("turn", (time.perf_counter() - turn_start) * 1000.0)
+        result.counters["downlink_audio_bytes"] = audio_bytes
+        result.counters["uplink_audio_bytes"] = env.realtime.appended_bytes
+    finally:
+        await client.close()
+        reader.cancel()
+        try:
+            await reader
+        except (asyncio.CancelledError, Exception):
+            pass
+    return result
@@ -0,0 +1,128 @@
+"""
+VRM 目录索引：数百个大体积 VRM 文件下列表与表情接口的耗时。
+
+不依赖替身服务。在用户 VRM 目录生成 ``FILES`` 个约 ``FILE_MB`` MB 的 VRM 1.0 GLB 文件
+（JSON chunk 声明表情与骨骼，其余为二进制填充），直接调用 vrm_router 的处理函数。
+
+- ``legacy_models``: 原实现——每次请求 glob 目录并 stat 每个文件
+- ``catalog_models``: ``utils.vrm_catalog`` 已建好索引后的列表请求
+- ``legacy_expressions``: 原实现——逐目录 resolve/is_file 定位模型，返回固定表情列表
+- ``catalog_expressions``: 从索引返回模型实际声明的表情
+- ``catalog_after_add``: 新增一个文件后的第一次列表请求（只解析新文件）
+- counters: ``files``、``cold_index_ms``（首次建索引，含读全部文件算哈希）、``parsed_after_add``
+"""
+
+import json
+import struct
+import time
+
+from benchmarks.harness import BenchEnvironment, ScenarioResult, Stopwatch
+
+FILES = 240
+FILE_MB = 2
+EXPRESSIONS = ("happy", "angry", "sad", "relaxed", "surprised", "aa", "ih", "ou", "ee", "oh", "blink")
+BONES = ("hips", "spine", "chest", "neck", "head", "leftUpperArm", "rightUpperArm", "leftUpperLeg", "rightUpperLeg")
+
+
+def _glb(index: int) -> bytes:
+    gltf = {
+        "asset": {"version": "2.0"},
+        "extensionsUsed": ["VRMC_vrm"],
+        "extensions": {"VRMC_vrm": {
+            "specVersion": "1.0",
+            "meta": {"name": f"bench_{index}"},
+            "expressions": {"preset": {name: {} for name in EXPRESSIONS}, "custom": {f"custom_{index}": {}}},
+            "humanoid": {"humanBones": {name: {"node": i} for i, name in enumerate(BONES)}},
+        }},
+        "nodes": [{"name": f"node_{i}"} for i in range(2000)],
+    }
+    chunk = json.dumps(gltf).encode("utf-8")
+    chunk += b" " * (-len(chunk) % 4)
+    binary = bytes([index % 251]) * (FILE_MB * 1024 * 1024 - len(chunk))
+    total = 12 + 8 + len(chunk) + 8 + len(binary)
+    return (struct.pack("<4sII", b"glTF", 2, total) + struct.pack("<I4s", len(chunk), b"JSON") + chunk
+            + struct.pack("<I4s", len(binary), b"BIN\x00") + binary)
+
+
+def _legacy_models(cm) -> list:
+    # 改动前 get_vrm_models 的逻辑
+    models, seen_urls = [], set()
+    for base, prefix, location in ((cm.project_root / "static" / "vrm", "/static/vrm", "project"),
+                                   (cm.vrm_dir, "/user_vrm", "user")):
+        if base.exists():
+            for vrm_file in base.glob("*.vrm"):
+                url = f"{prefix}/{vrm_file.name}"
+                if url in seen_urls:
+                    continue
+                seen_urls.add(url)
+                models.append({"name": vrm_file.stem, "filename": vrm_file.name, "url": url, "type": "vrm",
+                               "size": vrm_file.stat().st_size, "location": location})
+    return models
+
+
+def _legacy_find(cm, name: str):
+    for base in (cm.project_root / "static" / "vrm", cm.vrm_dir):
+        resolved = (base / f"{name}.vrm").resolve()
+        resolved.relative_to(base.resolve())
+        if resolved.suffix == ".vrm" and resolved.is_file():
+            return resolved
+    return None
+
+
+async def run(env: BenchEnvironment, iterations: int) -> ScenarioResult:
+    from main_routers import shared_state
+    from main_routers.vrm_router import get_model_expressions, get_vrm_models
+    from utils import vrm_catalog
+    from utils.config_manager import get_config_manager
+
+    result = ScenarioResult("vrm_catalog")
+    cm = get_config_manager()
+    cm.ensure_vrm_directory()
+    for i in range(FILES):
+        path = cm.vrm_dir / f"bench_{i:03d}.vrm"
+        if not path.exists():
+            path.write_bytes(_glb(i))
+    shared_state.init_shared_state(
+        sync_message_queue={}, sync_shutdown_event={}, session_manager={}, session_id={},
+        sync_process={}, websocket_locks={}, steamworks=None, templates=None,
+        config_manager=cm, logger=None,
+    )
+    catalog = vrm_catalog.VrmCatalog(cm)
+    vrm_catalog._catalog = catalog
+    extra = cm.vrm_dir / "bench_extra.vrm"
+    extra.unlink(missing_ok=True)
+    try:
+        with Stopwatch() as sw:
+            response = get_vrm_models()
+        result.counters["cold_index_ms"] = round(sw.ms, 1)
+        result.counters["files"] = len(json.loads(response.body)["models"])
+
+        for i in range(iterations):
+            name = f"bench_{i % FILES:03d}"
+            with Stopwatch() as sw:
+                _legacy_models(cm)
+            result.add("legacy_models", sw.ms)
+            with Stopwatch() as sw:
+                get_vrm_models()
+            result.add("catalog_models", sw.ms)
+
+            with Stopwatch() as sw:
+                _legacy_find(cm, name)
+            result.add("legacy_expressions", sw.ms)
+            with Stopwatch() as sw:
+                body = await get_model_expressions(name)
+            result.add("catalog_expressions", sw.ms)
+            assert f"custom_{i % FILES}" in body["expressions"], body
+
+            extra.write_bytes(_glb(FILES + i))
+            parsed = catalog.stats["parsed"]
+            t0 = time.perf_counter()
+            get_vrm_models()
+            result.add("catalog_after_add", (time.perf_counter() - t0) * 1000.0)
+            result.counters["parsed_after_add"] = catalog.stats["parsed"] - parsed
+            extra.unlink()
+            get_vrm_models()  # 删除后的重扫不计入下一轮的 catalog_models
+    finally:
+        extra.unlink(missing_ok=True)
+        vrm_catalog._catalog = None
+    return result
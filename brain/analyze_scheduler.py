@@ -0,0 +1,155 @@
+"""
+后台对话分析调度器
+
+替代原先"所有 analyze_request 串行排在一把 analyze_lock 后面"的做法：
+
+- 同一角色（lanlan_name）同时最多一个分析在跑；排队中的旧快照被新快照直接替换，
+  正在跑但尚未进入执行阶段（未 ``commit()``）的旧分析会被取消——新快照包含旧快照的全部用户输入，
+  并通过 ``unanalyzed_turns`` 记下有几轮用户发言还没被完整分析过（分析器的本地预筛不能只看最新一句）；
+- 不同角色之间并发，最多 ``slots`` 个分析同时进行；
+- 就绪队列按 (紧急度, 该角色上次被服务的时间, 入队顺序) 排序的堆实现，
+  同等紧急度下最久没被服务的角色优先，避免一个话多的角色饿死其他角色；
+- 完全事件驱动：入队和任务结束时才调度，没有轮询。
+
+排队等待时间通过 ``agent.analyze_queue_wait`` span 上报（/metrics 与 /metrics/turns）。
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# 触发来源 → 紧急度（越大越先调度）；turn_end 发生在对话进行中，用户还在等回应
+TRIGGER_URGENCY = {"turn_end": 1, "session_end": 0}
+
+SUPERSEDED_TOTAL = metrics.counter(
+    "neko_agent_analyze_superseded_total",
+    "Analyses dropped or cancelled because a newer snapshot arrived.",
+    ("state",),
+)
+PENDING_GAUGE = metrics.gauge("neko_agent_analyze_pending", "Analyses waiting for a slot.")
+
+
+@dataclass
+class AnalyzeJob:
+    key: str
+    lanlan_name: Optional[str]
+    messages: List[Dict[str, Any]]
+    urgency: int = 0
+    turn_id: Optional[str] = None
+    seq: int = 0
+    enqueued_at: float = field(default_factory=time.perf_counter)
+    started_at: Optional[float] = None
+    committed: bool = False
+    superseded: bool = False
+    # 快照末尾有几轮用户发言尚未被完整分析（被替换/取消的旧快照的轮次会累加到新快照上）
+    unanalyzed_turns: int = 1
+    task: Optional[asyncio.Task] = None
+
+    def commit(self) -> None:
+        """分析阶段结束、即将产生副作用（执行工具/派发任务）；此后不再被取消。"""
+        self.committed = True
+
+
+class AnalyzeScheduler:
+    """``runner(messages, lanlan_name, job=job)`` 执行一次分析。"""
+
+    def __init__(self, runner: Callable[..., Awaitable[None]], slots: int = 2):
+        self._runner = runner
+        self.slots = max(1, slots)
+        self._seq = itertools.count()
+        self._heap: List[Tuple[int, float, int, str]] = []
+        self._pending: Dict[str, AnalyzeJob] = {}
+        self._running: Dict[str, AnalyzeJob] = {}
+        self._last_served: Dict[str, float] = {}
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    @property
+    def running(self) -> int:
+        return len(self._running)
+
+    def submit(self, key: str, lanlan_name: Optional[str], messages: List[Dict[str, Any]],
+               urgency: int = 0, turn_id: Optional[str] = None) -> AnalyzeJob:
+        job = AnalyzeJob(key, lanlan_name, messages, urgency, turn_id, next(self._seq))
+        old = self._pending.pop(key, None)
+        if old is not None:
+            # 旧快照还没开始：直接替换，保留更高的紧急度与更早的入队时间
+            job.urgency = max(job.urgency, old.urgency)
+            job.enqueued_at = old.enqueued_at
+            job.unanalyzed_turns += old.unanalyzed_turns
+            SUPERSEDED_TOTAL.labels("queued").inc()
+        running = self._running.get(key)
+        if running is not None and not running.committed and not running.superseded and running.task is not None:
+            logger.info("[AnalyzeScheduler] cancel superseded analysis: lanlan=%s", lanlan_name)
+            SUPERSEDED_TOTAL.labels("running").inc()
+            running.superseded = True
+            job.unanalyzed_turns += running.unanalyzed_turns
+            running.task.cancel()
+        self._pending[key] = job
+        heapq.heappush(self._heap, (-job.urgency, self._last_served.get(key, 0.0), job.seq, key))
+        self._idle.clear()
+        self._dispatch()
+        return job
+
+    def _dispatch(self) -> None:
+        deferred = []
+        while self._heap and len(self._running) < self.slots:
+            entry = heapq.heappop(self._heap)
+            key = entry[3]
+            job = self._pending.get(key)
+            if job is None or job.seq != entry[2]:
+                continue  # 已被新快照替换的过期条目
+            if key in self._running:
+                deferred.append(entry)  # 同一角色串行：等当前分析结束
+                continue
+            del self._pending[key]
+            self._start(job)
+        for entry in deferred:
+            heapq.heappush(self._heap, entry)
+        PENDING_GAUGE.set(len(self._pending))
+        if not self._pending and not self._running:
+            self._idle.set()
+
+    def _start(self, job: AnalyzeJob) -> None:
+        job.started_at = time.perf_counter()
+        self._last_served[job.key] = job.started_at
+        metrics.record_span("agent.analyze_queue_wait", job.started_at - job.enqueued_at, job.turn_id)
+        self._running[job.key] = job
+        with metrics.turn_scope(job.turn_id):
+            job.task = asyncio.create_task(self._run(job))
+
+    async def _run(self, job: AnalyzeJob) -> None:
+        try:
+            await self._runner(job.messages, job.lanlan_name, job=job)
+        except asyncio.CancelledError:
+            logger.debug("[AnalyzeScheduler] analysis cancelled: lanlan=%s", job.lanlan_name)
+        except Exception as e:
+            logger.error("[AnalyzeScheduler] analysis failed: lanlan=%s error=%s", job.lanlan_name, e, exc_info=True)
+        finally:
+            if self._running.get(job.key) is job:
+                del self._running[job.key]
+            self._dispatch()
+
+    def cancel_all(self) -> None:
+        self._pending.clear()
+        self._heap.clear()
+        for job in list(self._running.values()):
+            if job.task is not None:
+                job.task.cancel()
+        PENDING_GAUGE.set(0)
+
+    async def join(self) -> None:
+        """等待所有已提交的分析结束（测试/基准用）。"""
+        await self._idle.wait()
@@ -62,6 +62,8 @@ class BrowserUseAdapter:
         # session_id -> Agent instance (preserves memory/plan/history)
         self._agents: Dict[str, Any] = {}
         self._overlay_task: Optional[asyncio.Task] = None
+        # 浏览器会话 / overlay / Agent 缓存都是共享状态，任务必须串行执行
+        self._run_lock: Optional[asyncio.Lock] = None
         try:
             from browser_use import Agent  # noqa: F401
             from browser_use.browser.session import BrowserSession  # noqa: F401
@@ -180,11 +182,23 @@ class BrowserUseAdapter:
     ) -> Dict[str, Any]:
         """Execute a browser task.
 
+        Not re-entrant: concurrent callers (background analyses, the
+        /browser_use/run endpoint) share one browser session, so tasks
+        are queued and run one at a time.
+
         Args:
             instruction: What to do.
             timeout_s: Max seconds before timeout (default 300s).
             session_id: Reuse Agent if same session_id (multi-turn).
         """
+        if self._run_lock is None:
+            self._run_lock = asyncio.Lock()
+        async with self._run_lock:
+            return await self._run_instruction_locked(instruction, timeout_s, session_id)
+
+    async def _run_instruction_locked(
+        self, instruction: str, timeout_s: float, session_id: Optional[str]
+    ) -> Dict[str, Any]:
         status = self.is_available()
         if not status.get("ready"):
             return {"success": False, "error": "; ".join(status.get("reasons", []))}
@@ -6,7 +6,9 @@ Each step: one VLM call with screenshot → structured thought/action/code → e
 The multimodal model handles visual grounding directly in its generated code.
 Supports thinking mode for models that provide it.
 """
-from typing import Dict, Any, Optional, List, Tuple
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, Any, Optional, List, Tuple
 import re
 import base64
 import logging
@@ -15,9 +17,15 @@ import os
 import time
 import traceback
 from openai import OpenAI
-from config import get_extra_body
+from config import (
+    CUA_MAX_NOOP_STEPS,
+    CUA_SETTLE_POLL_INTERVAL,
+    CUA_SETTLE_TIMEOUT,
+    get_extra_body,
+)
 from utils.config_manager import get_config_manager
-from utils.screenshot_utils import compress_screenshot
+from utils.metrics import record_span
+from utils.screenshot_utils import ScreenFrame, compress_screenshot, frames_match, screen_fingerprint
 
 logger = logging.getLogger(__name__)
 
@@ -167,6 +175,12 @@ pyautogui.click(742, 356)
 
 STEP_TEMPLATE = "# Step {step_num}:\n"
 
+# Sent instead of a screenshot when the screen matches the last image in context.
+UNCHANGED_NOTE = (
+    "(The screen has not visibly changed since the previous screenshot; "
+    "your last action had no visible effect.)"
+)
+
 HISTORY_TEMPLATE_THINKING = "{thought}## Action:\n{action}\n"
 HISTORY_TEMPLATE_NON_THINKING = "## Thought:\n{thought}\n\n## Action:\n{action}\n"
 
@@ -316,6 +330,52 @@ class _ScaledPyAutoGUI:
         self.write(text, *a, **kw)
 
 
+# ─── Observation store ──────────────────────────────────────────────────
+
+@dataclass
+class Observation:
+    step: int
+    url: Optional[str]  # data URL, None if the step reused the previous image
+    frame: Optional[ScreenFrame]  # change-detection fingerprint (screen_fingerprint)
+
+
+class ObservationStore:
+    """Screenshots of the last ``max_images`` steps, base64-encoded once.
+
+    Older steps are only ever sent as text, so their payloads are dropped
+    instead of being kept (and re-encoded) for the whole task.
+    """
+
+    def __init__(self, max_images: int):
+        self._items: Deque[Observation] = deque(maxlen=max(0, max_images))
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @staticmethod
+    def encode(jpg_bytes: bytes) -> str:
+        return "data:image/jpeg;base64," + base64.b64encode(jpg_bytes).decode("utf-8")
+
+    def add(self, step: int, url: Optional[str], frame: Optional[ScreenFrame] = None) -> None:
+        self._items.append(Observation(step, url, frame))
+
+    def get(self, step: int) -> Optional[Observation]:
+        for item in self._items:
+            if item.step == step:
+                return item
+        return None
+
+    def latest_image(self) -> Optional[Observation]:
+        """Most recent observation that still has its image in context."""
+        for item in reversed(self._items):
+            if item.url is not None:
+                return item
+        return None
+
+    def clear(self) -> None:
+        self._items.clear()
+
+
 # ─── Main Adapter ───────────────────────────────────────────────────────
 
 class ComputerUseAdapter:
@@ -323,6 +383,9 @@ class ComputerUseAdapter:
 
     Follows the Kimi agent architecture (predict / reset / call_llm /
     history management) with full prompt scaffolding for untrained models.
+
+    ``gui_backend`` / ``screenshot_fn`` default to pyautogui; the replay
+    benchmark passes canned implementations instead.
     """
 
     def __init__(
@@ -331,6 +394,8 @@ class ComputerUseAdapter:
         max_image_history: int = 3,
         max_tokens: int = 4096,
         thinking: bool = True,
+        gui_backend: Any = None,
+        screenshot_fn: Optional[Callable[[], Any]] = None,
     ):
         self.last_error: Optional[str] = None
         self.init_ok = False
@@ -355,15 +420,22 @@ class ComputerUseAdapter:
         # Kimi-style agent state
         self._current_session_id: Optional[str] = None
         self.actions: List[str] = []
-        self.observations: List[bytes] = []
+        self.observations = ObservationStore(max_image_history)
         self.cots: List[Dict[str, str]] = []
+        self.step_stats: List[Dict[str, Any]] = []
+        self.last_usage: Dict[str, int] = {}
+
+        self._gui = gui_backend if gui_backend is not None else pyautogui
+        self._screenshot_fn = screenshot_fn
 
         try:
-            if pyautogui is None:
+            if self._gui is None:
                 self.last_error = "pyautogui not available (no display)"
                 return
 
-            self.screen_width, self.screen_height = pyautogui.size()
+            if self._screenshot_fn is None:
+                self._screenshot_fn = self._gui.screenshot
+            self.screen_width, self.screen_height = self._gui.size()
 
             self._system_prompt = SYSTEM_PROMPT_TEMPLATE.format(
                 platform=platform.system(),
@@ -404,7 +476,7 @@ class ComputerUseAdapter:
         if not model_cfg.get("base_url") or not model_cfg.get("model"):
             ok = False
             reasons.append("Agent endpoint not configured")
-        if pyautogui is None:
+        if self._gui is None:
             ok = False
             reasons.append("pyautogui not installed")
         if not self.init_ok:
@@ -426,6 +498,7 @@ class ComputerUseAdapter:
         self.actions.clear()
         self.observations.clear()
         self.cots.clear()
+        self.step_stats.clear()
 
     def predict(
         self, instruction: str, obs: Dict[str, Any]
@@ -438,13 +511,16 @@ class ComputerUseAdapter:
 
         Args:
             instruction: Natural-language task description.
-            obs: ``{"screenshot": <PNG bytes>}``
+            obs: ``{"screenshot": <JPEG bytes>, "frame": <ScreenFrame, optional>}``.
+                When the fingerprint's pixels match the last image still in
+                context, a text note is sent instead of the screenshot.
 
         Returns:
             ``(info_dict, executable_code_string)``
         """
         step_num = len(self.actions) + 1
         screenshot_bytes: bytes = obs["screenshot"]
+        frame: Optional[ScreenFrame] = obs.get("frame")
 
         # ── Build messages ───────────────────────────────────────────
         messages: list = [{"role": "system", "content": self._system_prompt}]
@@ -455,7 +531,6 @@ class ComputerUseAdapter:
         text_parts: List[str] = []
 
         for i in range(n):
-            b64 = base64.b64encode(self.observations[i]).decode("utf-8")
             step_text = (
                 STEP_TEMPLATE.format(step_num=i + 1)
                 + self._history_template.format(
@@ -471,15 +546,17 @@ class ComputerUseAdapter:
                         "content": "\n".join(text_parts),
                     })
                     text_parts = []
-                messages.append({
-                    "role": "user",
-                    "content": [{
-                        "type": "image_url",
-                        "image_url": {
-                            "url": f"data:image/jpeg;base64,{b64}",
-                        },
-                    }],
-                })
+                item = self.observations.get(i)
+                if item is not None and item.url is not None:
+                    messages.append({
+                        "role": "user",
+                        "content": [{
+                            "type": "image_url",
+                            "image_url": {"url": item.url},
+                        }],
+                    })
+                else:
+                    messages.append({"role": "user", "content": UNCHANGED_NOTE})
                 messages.append({"role": "assistant", "content": step_text})
             else:
                 # Older steps: text only (images dropped to save context)
@@ -498,17 +575,28 @@ class ComputerUseAdapter:
             })
 
         # Current screenshot + task prompt
-        cur_b64 = base64.b64encode(screenshot_bytes).decode("utf-8")
-        messages.append({
-            "role": "user",
-            "content": [
-                {
-                    "type": "image_url",
-                    "image_url": {"url": f"data:image/jpeg;base64,{cur_b64}"},
-                },
-                {"type": "text", "text": instruction_prompt},
-            ],
-        })
+        ref = self.observations.latest_image()
+        # Only withhold the image when the pixels really match (exact bytes,
+        # or dHash plus thumbnail diff); a close dHash alone is not enough.
+        unchanged = (
+            frame is not None and ref is not None and ref.frame is not None
+            and frames_match(frame, ref.frame)
+        )
+        if unchanged:
+            cur_url = None
+            messages.append({
+                "role": "user",
+                "content": [{"type": "text", "text": UNCHANGED_NOTE + "\n\n" + instruction_prompt}],
+            })
+        else:
+            cur_url = self.observations.encode(screenshot_bytes)
+            messages.append({
+                "role": "user",
+                "content": [
+                    {"type": "image_url", "image_url": {"url": cur_url}},
+                    {"type": "text", "text": instruction_prompt},
+                ],
+            })
 
         # ── Call LLM ─────────────────────────────────────────────────
         parsed = self._call_llm(messages)
@@ -519,7 +607,7 @@ class ComputerUseAdapter:
         print(f"[CUA] Step {step_num}, {action[:120]}") # 敏感日志使用print而不是logger，用于脱敏
 
         # ── Update agent state ───────────────────────────────────────
-        self.observations.append(screenshot_bytes)
+        self.observations.add(n, cur_url, frame)
         self.actions.append(action)
         self.cots.append(parsed)
 
@@ -533,17 +621,52 @@ class ComputerUseAdapter:
                 'answer="Reached maximum step limit")'
             )
 
-        return {"thought": thought, "action": action, "code": code}, code
+        return {
+            "thought": thought, "action": action, "code": code,
+            "image_sent": cur_url is not None,
+        }, code
+
+    def _capture(self) -> Tuple[Any, ScreenFrame]:
+        shot = self._screenshot_fn()
+        return shot, screen_fingerprint(shot)
+
+    def _wait_for_settle(self, ref: ScreenFrame) -> Tuple[Any, ScreenFrame, bool]:
+        """Poll screenshots after an action until the screen changes and stops
+        changing, or ``CUA_SETTLE_TIMEOUT`` elapses.
+
+        Returns ``(screenshot, fingerprint, changed)``; ``changed`` is False
+        only when the pixels match the pre-action screen (see ``frames_match``).
+        """
+        deadline = time.monotonic() + CUA_SETTLE_TIMEOUT
+        time.sleep(CUA_SETTLE_POLL_INTERVAL)
+        shot, frame = self._capture()
+        changed = not frames_match(frame, ref)
+        while time.monotonic() < deadline:
+            if changed:
+                # 画面已变化：再等一帧确认动画/加载结束
+                time.sleep(CUA_SETTLE_POLL_INTERVAL)
+                nxt, nxt_frame = self._capture()
+                stable = frames_match(nxt_frame, frame)
+                shot, frame = nxt, nxt_frame
+                if stable:
+                    break
+            else:
+                time.sleep(CUA_SETTLE_POLL_INTERVAL)
+                shot, frame = self._capture()
+                changed = not frames_match(frame, ref)
+        return shot, frame, changed
 
     def run_instruction(
         self, instruction: str, session_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """Execute a natural-language instruction via GUI automation.
 
-        Main loop: screenshot → predict → execute → repeat.
+        Main loop: screenshot → predict → execute → wait for the screen to
+        settle → repeat. After ``CUA_MAX_NOOP_STEPS`` consecutive actions
+        without any visible effect the task ends without another VLM call.
 
         Returns:
-            ``{"success": bool, "result": str, "steps": int}``
+            ``{"success": bool, "result": str, "steps": int, "stats": dict}``
             (plus ``"error"`` on exception).
         """
         if not self._llm_client:
@@ -556,20 +679,41 @@ class ComputerUseAdapter:
         last_action = ""
         success = False
         answer = ""
+        pending: Optional[Tuple[Any, ScreenFrame]] = None
+        noop_streak = 0
 
         try:
             for step in range(1, self.max_steps + 1):
                 t0 = time.monotonic()
-                shot = pyautogui.screenshot()
+                shot, frame = pending if pending is not None else self._capture()
+                pending = None
                 jpg_bytes = compress_screenshot(shot)
                 t_capture = time.monotonic() - t0
 
                 t1 = time.monotonic()
-                info, code = self.predict(instruction, {"screenshot": jpg_bytes})
+                self.last_usage = {}
+                info, code = self.predict(
+                    instruction, {"screenshot": jpg_bytes, "frame": frame}
+                )
                 t_llm = time.monotonic() - t1
+                stats = {
+                    "step": step,
+                    "capture_s": round(t_capture, 3),
+                    "llm_s": round(t_llm, 3),
+                    "exec_s": 0.0,
+                    "image_sent": info.get("image_sent", True),
+                    "screen_changed": None,
+                    "prompt_tokens": self.last_usage.get("prompt_tokens", 0),
+                    "completion_tokens": self.last_usage.get("completion_tokens", 0),
+                }
+                self.step_stats.append(stats)
+                record_span("cua.capture", t_capture)
+                record_span("cua.llm", t_llm)
                 logger.info(
-                    "[CUA] Step %d timing: capture=%.1fs (%dKB), llm=%.1fs",
+                    "[CUA] Step %d timing: capture=%.1fs (%dKB), llm=%.1fs, tokens=%d/%d%s",
                     step, t_capture, len(jpg_bytes) // 1024, t_llm,
+                    stats["prompt_tokens"], stats["completion_tokens"],
+                    "" if stats["image_sent"] else " (screen unchanged, image skipped)",
                 )
 
                 if not code:
@@ -595,20 +739,34 @@ class ComputerUseAdapter:
                     continue
 
                 # ── Execute pyautogui code ───────────────────────────
+                t2 = time.monotonic()
                 try:
                     exec_env: dict = {"__builtins__": __builtins__}
                     exec_env["pyautogui"] = _ScaledPyAutoGUI(
-                        pyautogui, self.screen_width, self.screen_height
+                        self._gui, self.screen_width, self.screen_height
                     )
                     exec_env["time"] = time
                     exec_env["os"] = os
                     exec(code, exec_env)
-                    time.sleep(0.3)
                 except Exception as e:
                     logger.warning(
                         "[CUA] Exec error step %d: %s\nCode: %s", step, e, code
                     )
-                    time.sleep(0.3)
+                shot, new_frame, changed = self._wait_for_settle(frame)
+                pending = (shot, new_frame)
+                stats["exec_s"] = round(time.monotonic() - t2, 3)
+                stats["screen_changed"] = changed
+                record_span("cua.exec", stats["exec_s"])
+
+                noop_streak = 0 if changed else noop_streak + 1
+                if noop_streak >= CUA_MAX_NOOP_STEPS:
+                    logger.warning(
+                        "[CUA] Screen unchanged after %d consecutive actions, stopping",
+                        noop_streak,
+                    )
+                    answer = f"Screen did not change after {noop_streak} consecutive actions"
+                    success = False
+                    break
             else:
                 answer = f"Reached {self.max_steps} steps without completion"
                 success = False
@@ -623,6 +781,17 @@ class ComputerUseAdapter:
             "success": success,
             "result": answer or last_action,
             "steps": len(self.actions),
+            "stats": self._summarize_stats(),
+        }
+
+    def _summarize_stats(self) -> Dict[str, Any]:
+        steps = self.step_stats
+        return {
+            "steps": list(steps),
+            "wall_s": round(sum(s["capture_s"] + s["llm_s"] + s["exec_s"] for s in steps), 3),
+            "prompt_tokens": sum(s["prompt_tokens"] for s in steps),
+            "completion_tokens": sum(s["completion_tokens"] for s in steps),
+            "images_skipped": sum(1 for s in steps if not s["image_sent"]),
         }
 
     # ------------------------------------------------------------------
@@ -655,6 +824,10 @@ class ComputerUseAdapter:
                     max_completion_tokens=self.max_tokens,
                     extra_body=extra or None,
                 )
+                usage = getattr(resp, "usage", None)
+                if usage is not None:
+                    for key in ("prompt_tokens", "completion_tokens"):
+                        self.last_usage[key] = self.last_usage.get(key, 0) + (getattr(usage, key, 0) or 0)
                 msg = resp.choices[0].message
                 content = msg.content or ""
                 reasoning = getattr(msg, "reasoning_content", None)
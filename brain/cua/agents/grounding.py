@@ -1,19 +1,14 @@
 import ast
 import re
-from collections import defaultdict
-from io import BytesIO
 from typing import Any, Dict, List, Optional, Tuple, Union
 
-import pytesseract
-from PIL import Image
-from pytesseract import Output
-
 from brain.cua.memory.procedural_memory import PROCEDURAL_MEMORY
 from brain.cua.core.mllm import LMMAgent
 from brain.cua.utils.common_utils import (
     call_llm_safe,
     parse_single_code_from_string,
 )
+from brain.cua.utils.ocr import OCREngine, get_ocr_engine
 
 
 class ACI:
@@ -165,6 +160,7 @@ class OSWorldACI(ACI):
         engine_params_for_grounding: Dict,
         width: int = 1920,
         height: int = 1080,
+        ocr_engine: Optional[OCREngine] = None,
     ):
         self.platform = (
             platform  # Dictates how the switch_applications agent action works.
@@ -185,6 +181,9 @@ class OSWorldACI(ACI):
         self.grounding_model = LMMAgent(engine_params_for_grounding)
         self.engine_params_for_grounding = engine_params_for_grounding
 
+        # Cached, band-incremental OCR shared by all text grounding calls
+        self.ocr_engine = ocr_engine or get_ocr_engine()
+
         # Configure text grounding agent
         self.text_span_agent = LMMAgent(
             engine_params=engine_params_for_generation,
@@ -210,49 +209,24 @@ class OSWorldACI(ACI):
         assert len(numericals) >= 2
         return [int(numericals[0]), int(numericals[1])]
 
-    # Calls pytesseract to generate word level bounding boxes for text grounding
-    def get_ocr_elements(self, b64_image_data: str) -> Tuple[str, List]:
-        image = Image.open(BytesIO(b64_image_data))
-        image_data = pytesseract.image_to_data(image, output_type=Output.DICT)
-
-        # Clean text by removing leading and trailing spaces and non-alphabetical characters, but keeping punctuation
-        for i, word in enumerate(image_data["text"]):
-            image_data["text"][i] = re.sub(
-                r"^[^a-zA-Z\s.,!?;:\-\+]+|[^a-zA-Z\s.,!?;:\-\+]+$", "", word
-            )
-
-        ocr_elements = []
-        ocr_table = "Text Table:\nWord id\tText\n"
-        # Obtain the <id, text, group number, word number> for each valid element
-        grouping_map = defaultdict(list)
-        ocr_id = 0
-        for i in range(len(image_data["text"])):
-            block_num = image_data["block_num"][i]
-            if image_data["text"][i]:
-                grouping_map[block_num].append(image_data["text"][i])
-                ocr_table += f"{ocr_id}\t{image_data['text'][i]}\n"
-                ocr_elements.append(
-                    {
-                        "id": ocr_id,
-                        "text": image_data["text"][i],
-                        "group_num": block_num,
-                        "word_num": len(grouping_map[block_num]),
-                        "left": image_data["left"][i],
-                        "top": image_data["top"][i],
-                        "width": image_data["width"][i],
-                        "height": image_data["height"][i],
-                    }
-                )
-                ocr_id += 1
-
-        return ocr_table, ocr_elements
+    # Word level bounding boxes for text grounding (pytesseract via the cached OCR engine)
+    def get_ocr_elements(self, b64_image_data: bytes) -> Tuple[str, List]:
+        ocr_index = self.ocr_engine.index(b64_image_data)
+        return ocr_index.table, ocr_index.elements
 
     # Given the state and worker's text phrase, generate the coords of the first/last word in the phrase
     def generate_text_coords(
         self, phrase: str, obs: Dict, alignment: str = ""
     ) -> List[int]:
 
-        ocr_table, ocr_elements = self.get_ocr_elements(obs["screenshot"])
+        ocr_index = self.ocr_engine.index(obs["screenshot"])
+        ocr_table, ocr_elements = ocr_index.table, ocr_index.elements
+
+        # A phrase that occurs exactly once on screen needs no LLM disambiguation
+        matches = ocr_index.find_phrase(phrase)
+        if len(matches) == 1:
+            first_id, last_id = matches[0]
+            return self._word_coords(ocr_elements[last_id if alignment == "end" else first_id], alignment)
 
         alignment_prompt = ""
         if alignment == "start":
@@ -278,7 +252,10 @@ class OSWorldACI(ACI):
         else:
             text_id = 0
         elem = ocr_elements[text_id]
+        return self._word_coords(elem, alignment)
 
+    @staticmethod
+    def _word_coords(elem: Dict, alignment: str) -> List[int]:
         # Compute the element coordinates
         if alignment == "start":
             coords = [elem["left"], elem["top"] + (elem["height"] // 2)]
@@ -1,4 +1,8 @@
 import base64
+import hashlib
+from collections import OrderedDict
+from io import BytesIO
+from typing import Dict, List, Optional
 
 import numpy as np
 
@@ -14,6 +18,213 @@ from brain.cua.core.engine import (
 )
 
 
+# Request budget for LMMAgent conversations, in approximate tokens. Can be
+# overridden per agent with engine_params["token_budget"] (None = unlimited).
+DEFAULT_TOKEN_BUDGET = 64000
+_CHARS_PER_TOKEN = 4
+# Used when an image's size is unknown (~ a 1280x720 screenshot)
+_DEFAULT_IMAGE_TOKENS = 1200
+_MAX_IMAGE_TOKENS = 1600
+_IMAGE_CACHE_SIZE = 64
+
+DUPLICATE_IMAGE_NOTE = "[Same screenshot as in a later message]"
+OMITTED_IMAGE_NOTE = "[Screenshot omitted to fit the context budget]"
+OMITTED_TURNS_NOTE = "[{n} earlier messages omitted to fit the context budget]"
+
+
+class _EncodedImage:
+    __slots__ = ("b64", "tokens", "payloads")
+
+    def __init__(self, b64: str, tokens: int):
+        self.b64 = b64
+        self.tokens = tokens
+        self.payloads: Dict[str, str] = {"": b64}
+
+
+# digest -> encoded image, shared by all agents: the same screenshot is sent to
+# the generator, reflection and grounding agents but only encoded once.
+_image_cache: "OrderedDict[bytes, _EncodedImage]" = OrderedDict()
+# payload string (base64 or data URL) -> encoded image, for cost lookups
+_payload_index: Dict[str, _EncodedImage] = {}
+
+
+def _estimate_image_tokens(raw, image_content) -> int:
+    try:
+        if isinstance(image_content, np.ndarray):
+            height, width = image_content.shape[:2]
+        else:
+            from PIL import Image
+
+            width, height = Image.open(BytesIO(raw)).size
+    except Exception:
+        return _DEFAULT_IMAGE_TOKENS
+    return max(1, min(_MAX_IMAGE_TOKENS, width * height // 750))
+
+
+def encode_image_payload(image_content, prefix: str = "") -> str:
+    """Base64 payload for *image_content* (path, bytes or ndarray), optionally
+    prefixed (e.g. ``data:image/png;base64,``).
+
+    Identical images return the very same string object, which lets
+    ``MessageStore`` recognise duplicates by reference.
+    """
+    if isinstance(image_content, str):
+        with open(image_content, "rb") as image_file:
+            raw = image_file.read()
+    else:
+        raw = image_content
+    digest = hashlib.blake2b(memoryview(raw).cast("B"), digest_size=16).digest()
+    entry = _image_cache.get(digest)
+    if entry is None:
+        entry = _EncodedImage(
+            base64.b64encode(raw).decode("utf-8"),
+            _estimate_image_tokens(raw, image_content),
+        )
+        _image_cache[digest] = entry
+        _payload_index[entry.b64] = entry
+        while len(_image_cache) > _IMAGE_CACHE_SIZE:
+            _, evicted = _image_cache.popitem(last=False)
+            for payload in evicted.payloads.values():
+                _payload_index.pop(payload, None)
+    else:
+        _image_cache.move_to_end(digest)
+    payload = entry.payloads.get(prefix)
+    if payload is None:
+        payload = entry.payloads[prefix] = prefix + entry.b64
+        _payload_index[payload] = entry
+    return payload
+
+
+def _image_payload(part: Dict) -> Optional[str]:
+    if part.get("type") == "image_url":
+        return part["image_url"]["url"]
+    if part.get("type") == "image":
+        return part["source"].get("data")
+    return None
+
+
+def _part_cost(part: Dict):
+    """Approximate (tokens, bytes) of one content part."""
+    payload = _image_payload(part)
+    if payload is not None:
+        entry = _payload_index.get(payload)
+        return (entry.tokens if entry else _DEFAULT_IMAGE_TOKENS), len(payload)
+    text = part.get("text", "")
+    return len(text) // _CHARS_PER_TOKEN + 1, len(text)
+
+
+def message_cost(message: Dict):
+    """Approximate (tokens, bytes) of a message."""
+    content = message.get("content", "")
+    if isinstance(content, str):
+        return len(content) // _CHARS_PER_TOKEN + 1, len(content)
+    tokens = size = 0
+    for part in content:
+        t, b = _part_cost(part)
+        tokens += t
+        size += b
+    return tokens, size
+
+
+class MessageStore(list):
+    """``LMMAgent.messages``: a plain list of messages (callers keep indexing,
+    popping and editing it) plus ``render()``, which builds what is actually
+    sent:
+
+    1. an image that appears again later in the conversation is replaced by a
+       short note, so each distinct screenshot is sent once;
+    2. while the request is over ``budget_tokens``, images are dropped from the
+       oldest messages first, then the oldest turns themselves (a note records
+       how many were dropped).
+
+    Messages are never modified in place; changed ones are shallow copies, and
+    image payloads are the pre-encoded strings shared with the image cache.
+    """
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.last_request: Dict[str, int] = {}
+
+    def render(self, budget_tokens: Optional[int] = None) -> List[Dict]:
+        messages = list(self)
+        head = 1 if messages and messages[0].get("role") == "system" else 0
+
+        # 1. keep only the latest occurrence of each image
+        seen = set()
+        duplicates = 0
+        for i in range(len(messages) - 1, head - 1, -1):
+            content = messages[i].get("content")
+            if not isinstance(content, list):
+                continue
+            parts = None
+            for j, part in enumerate(content):
+                payload = _image_payload(part)
+                if payload is None:
+                    continue
+                if payload in seen:
+                    if parts is None:
+                        parts = list(content)
+                    parts[j] = {"type": "text", "text": DUPLICATE_IMAGE_NOTE}
+                    duplicates += 1
+                else:
+                    seen.add(payload)
+            if parts is not None:
+                messages[i] = {**messages[i], "content": parts}
+
+        costs = [message_cost(m) for m in messages]
+        total = sum(t for t, _ in costs)
+        dropped_images = dropped_messages = 0
+
+        if budget_tokens is not None and total > budget_tokens:
+            # 2a. drop images, oldest first (never from the newest message)
+            for i in range(head, len(messages) - 1):
+                if total <= budget_tokens:
+                    break
+                content = messages[i].get("content")
+                if not isinstance(content, list) or not any(_image_payload(p) is not None for p in content):
+                    continue
+                parts = [
+                    {"type": "text", "text": OMITTED_IMAGE_NOTE} if _image_payload(p) is not None else p
+                    for p in content
+                ]
+                dropped_images += len(parts) - sum(1 for p in content if _image_payload(p) is None)
+                messages[i] = {**messages[i], "content": parts}
+                total -= costs[i][0]
+                costs[i] = message_cost(messages[i])
+                total += costs[i][0]
+
+            # 2b. drop whole turns, oldest first; the history must still start with a user message
+            start = head
+            while total > budget_tokens and start < len(messages) - 1:
+                total -= costs[start][0]
+                start += 1
+                while start < len(messages) - 1 and messages[start].get("role") != "user":
+                    total -= costs[start][0]
+                    start += 1
+            dropped_messages = start - head
+            if dropped_messages:
+                first = messages[start]
+                content = first.get("content")
+                note = {"type": "text", "text": OMITTED_TURNS_NOTE.format(n=dropped_messages)}
+                if isinstance(content, list):
+                    first = {**first, "content": [note] + content}
+                else:
+                    first = {**first, "content": [note, {"type": "text", "text": content}]}
+                messages = messages[:head] + [first] + messages[start + 1:]
+                costs = [message_cost(m) for m in messages]
+                total = sum(t for t, _ in costs)
+
+        self.last_request = {
+            "messages": len(messages),
+            "tokens": total,
+            "bytes": sum(b for _, b in costs),
+            "duplicate_images": duplicates,
+            "dropped_images": dropped_images,
+            "dropped_messages": dropped_messages,
+        }
+        return messages
+
+
 class LMMAgent:
     def __init__(self, engine_params=None, system_prompt=None, engine=None):
         if engine is None:
@@ -42,7 +253,8 @@ class LMMAgent:
         else:
             self.engine = engine
 
-        self.messages = []  # Empty messages
+        self.token_budget = (engine_params or {}).get("token_budget", DEFAULT_TOKEN_BUDGET)
+        self.messages = MessageStore()  # Empty messages
 
         if system_prompt:
             self.add_system_prompt(system_prompt)
@@ -51,22 +263,18 @@ class LMMAgent:
 
     def encode_image(self, image_content):
         # if image_content is a path to an image file, check type of the image_content to verify
-        if isinstance(image_content, str):
-            with open(image_content, "rb") as image_file:
-                return base64.b64encode(image_file.read()).decode("utf-8")
-        else:
-            return base64.b64encode(image_content).decode("utf-8")
+        return encode_image_payload(image_content)
 
     def reset(
         self,
     ):
 
-        self.messages = [
+        self.messages = MessageStore([
             {
                 "role": "system",
                 "content": [{"type": "text", "text": self.system_prompt}],
             }
-        ]
+        ])
 
     def add_system_prompt(self, system_prompt):
         self.system_prompt = system_prompt
@@ -98,12 +306,11 @@ class LMMAgent:
                 "content": [{"type": "text", "text": text_content}],
             }
             if image_content:
-                base64_image = self.encode_image(image_content)
                 self.messages[index]["content"].append(
                     {
                         "type": "image_url",
                         "image_url": {
-                            "url": f"data:image/png;base64,{base64_image}",
+                            "url": encode_image_payload(image_content, "data:image/png;base64,"),
                             "detail": image_detail,
                         },
                     }
@@ -150,24 +357,22 @@ class LMMAgent:
                 if isinstance(image_content, list):
                     # If image_content is a list of images, loop through each image
                     for image in image_content:
-                        base64_image = self.encode_image(image)
                         message["content"].append(
                             {
                                 "type": "image_url",
                                 "image_url": {
-                                    "url": f"data:image/png;base64,{base64_image}",
+                                    "url": encode_image_payload(image, "data:image/png;base64,"),
                                     "detail": image_detail,
                                 },
                             }
                         )
                 else:
                     # If image_content is a single image, handle it directly
-                    base64_image = self.encode_image(image_content)
                     message["content"].append(
                         {
                             "type": "image_url",
                             "image_url": {
-                                "url": f"data:image/png;base64,{base64_image}",
+                                "url": encode_image_payload(image_content, "data:image/png;base64,"),
                                 "detail": image_detail,
                             },
                         }
@@ -248,22 +453,20 @@ class LMMAgent:
                 if isinstance(image_content, list):
                     # If image_content is a list of images, loop through each image
                     for image in image_content:
-                        base64_image = self.encode_image(image)
                         message["content"].append(
                             {
                                 "type": "image_url",
                                 "image_url": {
-                                    "url": f"data:image;base64,{base64_image}"
+                                    "url": encode_image_payload(image, "data:image;base64,")
                                 },
                             }
                         )
                 else:
                     # If image_content is a single image, handle it directly
-                    base64_image = self.encode_image(image_content)
                     message["content"].append(
                         {
                             "type": "image_url",
-                            "image_url": {"url": f"data:image;base64,{base64_image}"},
+                            "image_url": {"url": encode_image_payload(image_content, "data:image;base64,")},
                         }
                     )
 
@@ -281,12 +484,12 @@ class LMMAgent:
         **kwargs,
     ):
         """Generate the next response based on previous messages"""
-        if messages is None:
-            messages = self.messages
         if user_message:
-            messages.append(
+            (self.messages if messages is None else messages).append(
                 {"role": "user", "content": [{"type": "text", "text": user_message}]}
             )
+        if messages is None:
+            messages = self.messages.render(self.token_budget)
 
         # Thinking enabled for Claude Sonnet 3.7 and Gemini 2.5 Pro
         if use_thinking:
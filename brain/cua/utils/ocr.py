@@ -0,0 +1,259 @@
+"""Cached, region-incremental OCR for text grounding.
+
+``OCREngine.index(image_bytes)`` returns an ``OCRIndex`` (word table + phrase
+lookup) for a screenshot:
+
+- whole-image results are cached by content hash, so grounding both ends of a
+  text span on the same screenshot runs OCR once;
+- the screenshot is split into full-width horizontal bands (with a small
+  vertical overlap so no text line is cut in half); each band is cached by its
+  own pixel hash, so between consecutive screenshots only the bands that
+  changed are OCR'd again;
+- dirty bands are OCR'd in parallel in a process pool.
+
+Full-width bands are used instead of a 2D grid because tesseract needs whole
+words: a vertical tile edge would split words, a horizontal one only clips a
+line that is then picked up by the neighbouring (overlapping) band.
+"""
+
+import hashlib
+import re
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Callable, Dict, List, Optional, Tuple
+
+from PIL import Image
+
+# Same cleaning as the original get_ocr_elements: strip leading / trailing
+# characters that are neither letters, whitespace nor punctuation.
+_CLEAN_RE = re.compile(r"^[^a-zA-Z\s.,!?;:\-\+]+|[^a-zA-Z\s.,!?;:\-\+]+$")
+_TOKEN_RE = re.compile(r"[^\w]+")
+
+
+@dataclass(frozen=True)
+class Tile:
+    """Raw RGB pixels of one band plus where its words are kept.
+
+    Words are kept if their vertical centre lies in ``[keep_top, keep_bottom)``
+    (absolute coordinates); the overlap margins above and below are only there
+    to give tesseract complete lines.
+    """
+
+    index: int
+    top: int
+    size: Tuple[int, int]
+    pixels: bytes
+    keep_top: int
+    keep_bottom: int
+
+
+def tesseract_tile(tile: Tile) -> List[Dict]:
+    """OCR one band with tesseract; returns words in absolute coordinates."""
+    import pytesseract
+    from pytesseract import Output
+
+    image = Image.frombytes("RGB", tile.size, tile.pixels)
+    data = pytesseract.image_to_data(image, output_type=Output.DICT)
+    words = []
+    for i, raw in enumerate(data["text"]):
+        text = _CLEAN_RE.sub("", raw)
+        if not text:
+            continue
+        top = data["top"][i] + tile.top
+        height = data["height"][i]
+        centre = top + height // 2
+        if not (tile.keep_top <= centre < tile.keep_bottom):
+            continue
+        words.append({
+            "text": text,
+            "block_num": data["block_num"][i],
+            "left": data["left"][i],
+            "top": top,
+            "width": data["width"][i],
+            "height": height,
+        })
+    return words
+
+
+def _normalize(word: str) -> str:
+    return _TOKEN_RE.sub("", word).lower()
+
+
+class OCRIndex:
+    """Word table for one screenshot.
+
+    ``elements`` and ``table`` have the same shape as the original
+    ``get_ocr_elements`` output; ``find_phrase`` looks up phrase occurrences
+    through a token → word ids map instead of scanning the table.
+    """
+
+    def __init__(self, elements: List[Dict]):
+        self.elements = elements
+        self._positions: Dict[str, List[int]] = defaultdict(list)
+        for elem in elements:
+            token = _normalize(elem["text"])
+            if token:
+                self._positions[token].append(elem["id"])
+        self._table: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.elements)
+
+    def __getitem__(self, word_id: int) -> Dict:
+        return self.elements[word_id]
+
+    @property
+    def table(self) -> str:
+        if self._table is None:
+            rows = [f"{elem['id']}\t{elem['text']}" for elem in self.elements]
+            self._table = "Text Table:\nWord id\tText\n" + "".join(row + "\n" for row in rows)
+        return self._table
+
+    def find_phrase(self, phrase: str) -> List[Tuple[int, int]]:
+        """Return ``(first_id, last_id)`` for every occurrence of *phrase*.
+
+        Matching is on normalized tokens (case and punctuation ignored);
+        empty tokens from OCR noise are skipped.
+        """
+        tokens = [t for t in (_normalize(w) for w in phrase.split()) if t]
+        if not tokens:
+            return []
+        matches = []
+        for start in self._positions.get(tokens[0], ()):
+            word_id, ok = start, True
+            for token in tokens[1:]:
+                word_id += 1
+                while word_id < len(self.elements) and not _normalize(self.elements[word_id]["text"]):
+                    word_id += 1
+                if word_id >= len(self.elements) or _normalize(self.elements[word_id]["text"]) != token:
+                    ok = False
+                    break
+            if ok:
+                matches.append((start, word_id))
+        return matches
+
+
+class OCREngine:
+    """See module docstring. ``workers=0`` runs tiles inline (no pool)."""
+
+    def __init__(
+        self,
+        bands: int = 8,
+        overlap: int = 24,
+        workers: int = 4,
+        cache_size: int = 16,
+        tile_cache_size: int = 256,
+        ocr_fn: Callable[[Tile], List[Dict]] = tesseract_tile,
+    ):
+        self.bands = bands
+        self.overlap = overlap
+        self.workers = workers
+        self.ocr_fn = ocr_fn
+        self._cache: "OrderedDict[str, OCRIndex]" = OrderedDict()
+        self._cache_size = cache_size
+        self._tile_cache: "OrderedDict[Tuple, List[Dict]]" = OrderedDict()
+        self._tile_cache_size = tile_cache_size
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.stats = {"images": 0, "image_hits": 0, "tiles": 0, "tiles_ocrd": 0}
+
+    @staticmethod
+    def _lru_get(cache: OrderedDict, key):
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+    @staticmethod
+    def _lru_put(cache: OrderedDict, key, value, limit: int) -> None:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > limit:
+            cache.popitem(last=False)
+
+    def _split(self, image: Image.Image) -> List[Tile]:
+        width, height = image.size
+        bands = max(1, min(self.bands, height // max(1, 2 * self.overlap)))
+        step = -(-height // bands)
+        tiles = []
+        for i in range(bands):
+            keep_top, keep_bottom = i * step, min(height, (i + 1) * step)
+            top, bottom = max(0, keep_top - self.overlap), min(height, keep_bottom + self.overlap)
+            region = image.crop((0, top, width, bottom))
+            tiles.append(Tile(i, top, region.size, region.tobytes(), keep_top, keep_bottom))
+        return tiles
+
+    def _run_tiles(self, tiles: List[Tile]) -> List[List[Dict]]:
+        if self.workers <= 0 or len(tiles) <= 1:
+            return [self.ocr_fn(tile) for tile in tiles]
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            return list(self._pool.map(self.ocr_fn, tiles))
+        except BrokenProcessPool:
+            self._pool = None
+            return [self.ocr_fn(tile) for tile in tiles]
+
+    def index(self, image_bytes: bytes) -> OCRIndex:
+        self.stats["images"] += 1
+        key = hashlib.blake2b(image_bytes, digest_size=16).hexdigest()
+        cached = self._lru_get(self._cache, key)
+        if cached is not None:
+            self.stats["image_hits"] += 1
+            return cached
+
+        image = Image.open(BytesIO(image_bytes)).convert("RGB")
+        tiles = self._split(image)
+        tile_words: List[Optional[List[Dict]]] = []
+        dirty: List[Tuple[int, Tuple, Tile]] = []
+        for tile in tiles:
+            tile_key = (tile.top, tile.size, hashlib.blake2b(tile.pixels, digest_size=16).digest())
+            words = self._lru_get(self._tile_cache, tile_key)
+            if words is None:
+                dirty.append((len(tile_words), tile_key, tile))
+            tile_words.append(words)
+
+        self.stats["tiles"] += len(tiles)
+        self.stats["tiles_ocrd"] += len(dirty)
+        for (slot, tile_key, _), words in zip(dirty, self._run_tiles([t for _, _, t in dirty])):
+            tile_words[slot] = words
+            self._lru_put(self._tile_cache, tile_key, words, self._tile_cache_size)
+
+        elements: List[Dict] = []
+        group_sizes: Dict[int, int] = defaultdict(int)
+        for tile, words in zip(tiles, tile_words):
+            for word in words:
+                # block numbers are per band; make them unique across bands
+                group = tile.index * 1000 + word["block_num"]
+                group_sizes[group] += 1
+                elements.append({
+                    "id": len(elements),
+                    "text": word["text"],
+                    "group_num": group,
+                    "word_num": group_sizes[group],
+                    "left": word["left"],
+                    "top": word["top"],
+                    "width": word["width"],
+                    "height": word["height"],
+                })
+
+        result = OCRIndex(elements)
+        self._lru_put(self._cache, key, result, self._cache_size)
+        return result
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+_engine: Optional[OCREngine] = None
+
+
+def get_ocr_engine() -> OCREngine:
+    global _engine
+    if _engine is None:
+        _engine = OCREngine()
+    return _engine
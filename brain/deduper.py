@@ -1,33 +1,127 @@
 from typing import List, Dict, Any, Optional, Tuple
+from difflib import SequenceMatcher
+from functools import lru_cache
 import asyncio
 from langchain_openai import ChatOpenAI
 from openai import APIConnectionError, InternalServerError, RateLimitError
-from config import get_extra_body
+from config import get_extra_body, TASK_DEDUP_DUPLICATE_THRESHOLD, TASK_DEDUP_DISTINCT_THRESHOLD
 from utils.config_manager import get_config_manager
+from utils import metrics
 import logging
 import json
+import re
 
 logger = logging.getLogger(__name__)
 
+DEDUP_DECISIONS_TOTAL = metrics.counter(
+    "neko_agent_dedup_decisions_total",
+    "Task dedup decisions by stage (local_duplicate / local_distinct / llm).",
+    ("stage",),
+)
+
+_TOKEN_RE = re.compile(r"[0-9a-z]+|[^\W0-9a-z_]", re.UNICODE)
+# 只影响英文的功能词；中文按 bigram 切分后虚词的影响小得多
+_STOPWORDS = frozenset(
+    "a an the to of for in on at and or my me i you it this that with please can could "
+    "would will be is are do".split()
+)
+
+
+@lru_cache(maxsize=1024)
+def _sequence(text: str) -> Tuple[str, ...]:
+    """按原顺序的词 / 字序列（忽略大小写与标点），用于判断"几乎同形"。"""
+    return tuple(_TOKEN_RE.findall(text.lower()))
+
+
+@lru_cache(maxsize=1024)
+def _shingles(text: str) -> frozenset:
+    """英文/数字按单词、中文等按相邻字符 bigram 切分（忽略大小写与标点）。"""
+    tokens = _TOKEN_RE.findall(text.lower())
+    out = {t for t in tokens if t.isascii() and t not in _STOPWORDS}
+    run: List[str] = []
+    for token in tokens + [" "]:
+        if not token.isascii():
+            run.append(token)
+            continue
+        if len(run) == 1:
+            out.add(run[0])
+        out.update(a + b for a, b in zip(run, run[1:]))
+        run = []
+    return frozenset(out)
+
+
+class LocalTaskMatcher:
+    """
+    TaskDeduper 的第一阶段：纯本地的字面（词 / 字 bigram 集合）相似度判断，不调用 LLM。
+
+    ``classify`` 返回 ``(verdict, matched_id, score)``，verdict 为
+    ``"duplicate"``（与某个候选几乎同形）、``"distinct"``（与所有候选都几乎
+    没有字面重叠）或 ``"ambiguous"``（需要 LLM 判断）。判重复要求词序也一致：
+    集合 Jaccard 达到阈值后，还要按顺序的词 / 字序列完全相同或 SequenceMatcher 比例
+    达到阈值（"从活期转到定期"与"从定期转到活期"词集合相同，但不是重复）；判不重复
+    同时要求"新任务被候选包含"的比例也很低，以免漏掉"严格子集"类重复。
+    """
+
+    def __init__(self, duplicate_threshold: float = TASK_DEDUP_DUPLICATE_THRESHOLD,
+                 distinct_threshold: float = TASK_DEDUP_DISTINCT_THRESHOLD):
+        self.duplicate_threshold = duplicate_threshold
+        self.distinct_threshold = distinct_threshold
+
+    def classify(self, new_task: str, candidates: List[Tuple[str, str]]) -> Tuple[str, Optional[str], float]:
+        new = _shingles(new_task)
+        if not new:
+            return "ambiguous", None, 0.0
+        new_seq = _sequence(new_task)
+        best_id, best_ratio, best_overlap = None, 0.0, 0.0
+        for tid, desc in candidates:
+            old = _shingles(desc)
+            if not old:
+                continue
+            inter = len(new & old)
+            jaccard = inter / len(new | old)
+            best_overlap = max(best_overlap, jaccard, inter / len(new))
+            if jaccard < self.duplicate_threshold:
+                continue
+            old_seq = _sequence(desc)
+            ratio = 1.0 if new_seq == old_seq else SequenceMatcher(None, new_seq, old_seq, autojunk=False).ratio()
+            if ratio > best_ratio:
+                best_id, best_ratio = tid, ratio
+        if best_ratio >= self.duplicate_threshold:
+            return "duplicate", best_id, best_ratio
+        if best_overlap < self.distinct_threshold:
+            return "distinct", None, best_overlap
+        return "ambiguous", None, best_overlap
+
 
 class TaskDeduper:
     """
-    LLM-based deduplication for task scheduling. Given a new task description and
+    Two-stage deduplication for task scheduling. Given a new task description and
     a list of existing task descriptions, decide if the new task is semantically
     duplicate (equivalent or strict subset) of an existing one.
+
+    Stage one (``LocalTaskMatcher``) settles clear matches and clear non-matches
+    locally; only ambiguous cases are sent to the LLM.
     """
 
-    def __init__(self):
-        config_manager = get_config_manager()
-        api_config = config_manager.get_model_api_config('summary')
-        self.llm = ChatOpenAI(
-            model=api_config['model'],
-            base_url=api_config['base_url'],
-            api_key=api_config['api_key'],
-            temperature=0,
-            max_retries=0,
-            extra_body=get_extra_body(api_config['model']) or None
-        )
+    def __init__(self, llm=None, matcher: Optional[LocalTaskMatcher] = None):
+        if llm is None:
+            config_manager = get_config_manager()
+            api_config = config_manager.get_model_api_config('summary')
+            llm = ChatOpenAI(
+                model=api_config['model'],
+                base_url=api_config['base_url'],
+                api_key=api_config['api_key'],
+                temperature=0,
+                max_retries=0,
+                extra_body=get_extra_body(api_config['model']) or None
+            )
+        self.llm = llm
+        self.matcher = matcher or LocalTaskMatcher()
+        self.stats = {"local_duplicate": 0, "local_distinct": 0, "llm": 0}
+
+    def _count(self, stage: str) -> None:
+        self.stats[stage] += 1
+        DEDUP_DECISIONS_TOTAL.labels(stage).inc()
 
     def _build_prompt(self, new_task: str, candidates: List[Tuple[str, str]]) -> str:
         lines = ["New task:", new_task.strip(), "\nExisting tasks:"]
@@ -45,6 +139,18 @@ class TaskDeduper:
         if not new_task or not candidates:
             return {"duplicate": False, "matched_id": None}
 
+        verdict, matched_id, score = self.matcher.classify(new_task, candidates)
+        if verdict == "duplicate":
+            self._count("local_duplicate")
+            logger.debug(f"[Deduper] 本地判定重复: matched={matched_id} score={score:.2f}")
+            return {"duplicate": True, "matched_id": matched_id}
+        if verdict == "distinct":
+            self._count("local_distinct")
+            return {"duplicate": False, "matched_id": None}
+        self._count("llm")
+        return await self._judge_llm(new_task, candidates)
+
+    async def _judge_llm(self, new_task: str, candidates: List[Tuple[str, str]]) -> Dict[str, Any]:
         prompt = self._build_prompt(new_task, candidates)
         
         # Retry策略：重试2次，间隔1秒、2秒
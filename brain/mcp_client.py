@@ -34,6 +34,7 @@ class McpRouterClient:
         self.mcp_endpoint = f"{self.base_url}/mcp"  # MCP协议端点
         self.api_key = api_key
         self._initialized = False
+        self._init_lock: Optional[asyncio.Lock] = None
         self._request_id = 0
         
         # 设置HTTP客户端
@@ -137,26 +138,30 @@ class McpRouterClient:
             return None
     
     async def initialize(self) -> bool:
-        """初始化MCP连接"""
+        """初始化MCP连接（并发调用只会发出一次 initialize 请求）"""
         if self._initialized:
             return True
+        if self._init_lock is None:
+            self._init_lock = asyncio.Lock()
+        async with self._init_lock:
+            if self._initialized:
+                return True
+            result = await self._mcp_request("initialize", {
+                "protocolVersion": "2024-11-05",
+                "capabilities": {},
+                "clientInfo": {
+                    "name": "PROJECT-NEKO-MCP-Client",
+                    "version": "1.0.0"
+                }
+            })
             
-        result = await self._mcp_request("initialize", {
-            "protocolVersion": "2024-11-05",
-            "capabilities": {},
-            "clientInfo": {
-                "name": "PROJECT-NEKO-MCP-Client",
-                "version": "1.0.0"
-            }
-        })
-        
-        if result:
-            self._initialized = True
-            logger.info(f"[MCP] Initialized successfully: {result.get('serverInfo', {}).get('name', 'Unknown')}")
-            return True
-        else:
-            # Throttled in _mcp_request, no need to log again here
-            return False
+            if result:
+                self._initialized = True
+                logger.info(f"[MCP] Initialized successfully: {result.get('serverInfo', {}).get('name', 'Unknown')}")
+                return True
+            else:
+                # Throttled in _mcp_request, no need to log again here
+                return False
 
     async def list_tools(self, force_refresh: bool = False) -> List[Dict[str, Any]]:
         """
@@ -231,6 +236,7 @@ class McpRouterClient:
     async def call_tool(self, tool_name: str, arguments: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         调用MCP工具
+        可重入：每次调用是独立的 HTTP 请求（请求 ID 在事件循环内自增），并发的后台分析可以同时调用
         """
         # 确保已初始化
         if not self._initialized:
@@ -1,24 +1,75 @@
 # -*- coding: utf-8 -*-
 """
 DirectTaskExecutor: 合并 Analyzer + Planner 的功能
-并行评估 MCP 和 ComputerUse 和 UserPlugin 可行性（三个独立 LLM 调用）
+评估 MCP / UserPlugin / BrowserUse / ComputerUse 可行性：
+默认一次 LLM 调用同时判定全部已启用通道（unified），失败时回退为每个通道独立并行评估（parallel）
 优先使用 MCP,其次使用 ComputerUse,最后使用 UserPlugin
 """
 import json
+import re
+import time
 import asyncio
 import logging
-from typing import Dict, Any, List, Optional, Callable, Awaitable
-from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Tuple
+from dataclasses import dataclass, field
 from openai import AsyncOpenAI, APIConnectionError, InternalServerError, RateLimitError
 import httpx
-from config import get_extra_body, USER_PLUGIN_SERVER_PORT
+from config import (
+    get_extra_body,
+    USER_PLUGIN_SERVER_PORT,
+    TASK_CLASSIFIER_MODE,
+    TASK_PREFILTER_ENABLED,
+    TASK_CAPABILITY_SNAPSHOT_TTL,
+)
 from utils.config_manager import get_config_manager
+from utils import metrics
 from .mcp_client import McpRouterClient, McpToolCatalog
 from .computer_use import ComputerUseAdapter
 from .browser_use_adapter import BrowserUseAdapter
 
 logger = logging.getLogger(__name__)
 
+CLASSIFY_TOTAL = metrics.counter(
+    "neko_agent_task_classify_total",
+    "Task classifications by path (prefilter / unified / parallel).",
+    ("path",),
+)
+
+# 本地预筛：整句去掉这些词、标点和表情后什么都不剩，才判定为"明确不是任务"
+_CHITCHAT_PHRASES = (
+    "你好", "您好", "早上好", "早安", "中午好", "下午好", "晚上好", "晚安", "谢谢", "多谢", "感谢",
+    "哈", "嘿", "呵", "嘻", "辛苦了", "拜拜", "再见", "在吗", "在不在", "喵", "真棒", "厉害",
+    "我回来了", "晚点聊", "不客气", "没关系", "没事",
+    "hello", "hi", "hey", "thanks", "thank you", "thx", "lol", "haha", "good morning", "good night",
+    "bye", "goodbye", "see you", "cool", "nice", "great",
+)
+# 应答词：如果上一句是助手的提问（"要我帮你打开吗？"），"好的"就是在确认任务，不能预筛掉
+_AFFIRMATION_PHRASES = (
+    "好的", "好吧", "好呀", "好啊", "好", "行", "可以", "是的", "是啊", "对的", "对", "嗯", "哦", "噢", "啊",
+    "呀", "知道了", "明白了", "收到", "ok", "okay", "yes", "yeah", "yep", "sure", "no", "nope",
+)
+
+
+def _phrase_re(phrases) -> "re.Pattern":
+    return re.compile("|".join(re.escape(p) for p in sorted(phrases, key=len, reverse=True)), re.IGNORECASE)
+
+
+_CHITCHAT_RE = _phrase_re(_CHITCHAT_PHRASES)
+_CHITCHAT_OR_AFFIRMATION_RE = _phrase_re(_CHITCHAT_PHRASES + _AFFIRMATION_PHRASES)
+_FILLER_RE = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def is_clear_non_action(text: str, after_question: bool = False) -> bool:
+    """
+    最新用户发言是否明确不含任务（纯问候 / 感谢 / 语气词）。只在很有把握时返回 True，
+    其余情况一律交给 LLM。after_question: 上一句助手发言是否以问号结尾。
+    """
+    if not text or not text.strip():
+        return False
+    pattern = _CHITCHAT_RE if after_question else _CHITCHAT_OR_AFFIRMATION_RE
+    rest = _FILLER_RE.sub("", pattern.sub(" ", text))
+    return not rest
+
 
 @dataclass
 class TaskResult:
@@ -63,6 +114,18 @@ class BrowserUseDecision:
     task_description: str = ""
     reason: str = ""
 
+@dataclass
+class CapabilitySnapshot:
+    """MCP 工具与用户插件列表的共享快照；内容变化时 version 递增"""
+    version: int = 0
+    mcp_tools: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    plugins: List[Dict[str, Any]] = field(default_factory=list)
+    has_mcp: bool = False
+    has_plugins: bool = False
+    fetched_at: float = 0.0
+    fingerprint: str = ""
+
+
 @dataclass
 class UserPluginDecision:
     """UserPlugin 可行性评估结果"""
@@ -75,12 +138,16 @@ class UserPluginDecision:
     reason: str = ""
 class DirectTaskExecutor:
     """
-    直接任务执行器：并行评估 MCP、UserPlugin 与 ComputerUse 可行性
+    直接任务执行器：评估 MCP、UserPlugin、BrowserUse 与 ComputerUse 可行性
     
     流程:
-    1. 并行调用多个评估器:_assess_mcp、_assess_user_plugin、_assess_computer_use
+    0. 本地预筛：最新用户发言是明确的闲聊时直接返回，不调用 LLM
+    1. unified 模式下 _classify_unified 一次调用判定全部通道；parallel 模式（或 unified 失败时）
+       并行调用 _assess_mcp、_assess_user_plugin、_assess_browser_use、_assess_computer_use
     2. 优先使用 MCP(如果可行),其次 ComputerUse,再次 UserPlugin (优先级可调整)
     3. 执行选中的方法
+
+    MCP 工具与插件列表来自 get_capability_snapshot 的共享快照（TTL 内不重复拉取）。
     """
     
     def __init__(self, computer_use: Optional[ComputerUseAdapter] = None, browser_use: Optional[BrowserUseAdapter] = None):
@@ -92,6 +159,11 @@ class DirectTaskExecutor:
         self.plugin_list = []
         self.user_plugin_enabled_default = False
         self._external_plugin_provider: Optional[Callable[[bool], Awaitable[List[Dict[str, Any]]]]] = None
+        self.classifier_mode = TASK_CLASSIFIER_MODE
+        self.prefilter_enabled = TASK_PREFILTER_ENABLED
+        self._snapshot: Optional[CapabilitySnapshot] = None
+        self._snapshot_lock: Optional[asyncio.Lock] = None
+        self.stats = {"turns": 0, "prefiltered": 0, "llm_calls": 0}
     
     
     def set_plugin_list_provider(self, provider: Callable[[bool], Awaitable[List[Dict[str, Any]]]]):
@@ -137,6 +209,53 @@ class DirectTaskExecutor:
         return self.plugin_list
 
 
+    def _snapshot_fresh(self, snap: Optional[CapabilitySnapshot], mcp: bool, plugins: bool) -> bool:
+        return (
+            snap is not None
+            and time.monotonic() - snap.fetched_at < TASK_CAPABILITY_SNAPSHOT_TTL
+            and (snap.has_mcp or not mcp)
+            and (snap.has_plugins or not plugins)
+        )
+
+    async def get_capability_snapshot(self, mcp: bool = True, plugins: bool = True,
+                                      force_refresh: bool = False) -> CapabilitySnapshot:
+        """返回包含所需部分的能力快照；过期、缺少所需部分或 force_refresh 时重新拉取。"""
+        snap = self._snapshot
+        if not force_refresh and self._snapshot_fresh(snap, mcp, plugins):
+            return snap
+        if self._snapshot_lock is None:
+            self._snapshot_lock = asyncio.Lock()
+        async with self._snapshot_lock:
+            # 等锁期间可能已有并发请求刷新过
+            if self._snapshot is not snap and self._snapshot_fresh(self._snapshot, mcp, plugins):
+                return self._snapshot
+            previous = self._snapshot
+            fresh = CapabilitySnapshot(fetched_at=time.monotonic())
+            if mcp:
+                try:
+                    fresh.mcp_tools = await self.catalog.get_capabilities(force_refresh=True)
+                    fresh.has_mcp = True
+                except Exception as e:
+                    logger.warning(f"[TaskExecutor] Failed to get MCP capabilities: {e}")
+            if plugins:
+                await self.plugin_list_provider(force_refresh=True)
+                fresh.plugins = list(self.plugin_list)
+                fresh.has_plugins = True
+            try:
+                fresh.fingerprint = json.dumps([fresh.mcp_tools, fresh.plugins], sort_keys=True, default=str)
+            except Exception:
+                fresh.fingerprint = repr((sorted(fresh.mcp_tools), len(fresh.plugins)))
+            if previous is None:
+                fresh.version = 1
+            else:
+                fresh.version = previous.version + int(previous.fingerprint != fresh.fingerprint)
+            self._snapshot = fresh
+            return fresh
+
+    def invalidate_capabilities(self) -> None:
+        """丢弃能力快照，下一次分析重新拉取工具与插件列表"""
+        self._snapshot = None
+
     def _get_client(self):
         """动态获取 OpenAI 客户端"""
         api_config = self._config_manager.get_model_api_config('summary')
@@ -195,6 +314,50 @@ class DirectTaskExecutor:
         
         return "\n".join(lines)
     
+    def _format_plugins(self, plugins: Any) -> str:
+        """格式化用户插件列表供 LLM 参考"""
+        # 构建插件描述供 LLM 参考（包含 id, description, input_schema 以及 entries 列表）
+        lines = []
+        try:
+            # plugins can be dict or list
+            iterable = plugins.items() if isinstance(plugins, dict) else enumerate(plugins)
+            for _, p in iterable:
+                pid = p.get("id") if isinstance(p, dict) else getattr(p, "id", None)
+                desc = p.get("description", "") if isinstance(p, dict) else getattr(p, "description", "")
+                schema = p.get("input_schema", {}) if isinstance(p, dict) else getattr(p, "input_schema", {})
+                entries = p.get("entries", []) if isinstance(p, dict) else getattr(p, "entries", []) or []
+                # Only include well-formed plugin entries
+                if not pid:
+                    continue
+                try:
+                    schema_str = json.dumps(schema)
+                except Exception:
+                    schema_str = "{}"
+                # Build entries description: show entry ids and short description to aid LLM in selecting entry_id
+                entry_lines = []
+                try:
+                    for e in entries:
+                        try:
+                            eid = e.get("id") if isinstance(e, dict) else getattr(e, "id", None)
+                            ename = e.get("name", "") if isinstance(e, dict) else getattr(e, "name", "")
+                            edesc = e.get("description", "") if isinstance(e, dict) else getattr(e, "description", "")
+                            if eid:
+                                entry_lines.append(f"{eid} ({ename}): {edesc}")
+                        except Exception:
+                            continue
+                except Exception:
+                    entry_lines = []
+                entry_desc = "; ".join(entry_lines) if entry_lines else "no entries"
+                lines.append(f"- {pid}: {desc} | schema: {schema_str} | entries: {entry_desc}")
+        except Exception:
+            pass
+        
+        plugins_desc = "\n".join(lines) if lines else "No plugins available."
+        # truncate to avoid overly large prompts
+        if len(plugins_desc) > 2000:
+            plugins_desc = plugins_desc[:2000] + "\n... (truncated)"
+        return plugins_desc
+
     async def _assess_mcp(
         self, 
         conversation: str, 
@@ -439,46 +602,7 @@ Rules:
             logger.debug("[UserPlugin] Failed to check plugins validity", exc_info=True)
             return UserPluginDecision(has_task=False, can_execute=False, task_description="", plugin_id=None, plugin_args=None, reason="Invalid plugins")
     
-        # 构建插件描述供 LLM 参考（包含 id, description, input_schema 以及 entries 列表）
-        lines = []
-        try:
-            # plugins can be dict or list
-            iterable = plugins.items() if isinstance(plugins, dict) else enumerate(plugins)
-            for _, p in iterable:
-                pid = p.get("id") if isinstance(p, dict) else getattr(p, "id", None)
-                desc = p.get("description", "") if isinstance(p, dict) else getattr(p, "description", "")
-                schema = p.get("input_schema", {}) if isinstance(p, dict) else getattr(p, "input_schema", {})
-                entries = p.get("entries", []) if isinstance(p, dict) else getattr(p, "entries", []) or []
-                # Only include well-formed plugin entries
-                if not pid:
-                    continue
-                try:
-                    schema_str = json.dumps(schema)
-                except Exception:
-                    schema_str = "{}"
-                # Build entries description: show entry ids and short description to aid LLM in selecting entry_id
-                entry_lines = []
-                try:
-                    for e in entries:
-                        try:
-                            eid = e.get("id") if isinstance(e, dict) else getattr(e, "id", None)
-                            ename = e.get("name", "") if isinstance(e, dict) else getattr(e, "name", "")
-                            edesc = e.get("description", "") if isinstance(e, dict) else getattr(e, "description", "")
-                            if eid:
-                                entry_lines.append(f"{eid} ({ename}): {edesc}")
-                        except Exception:
-                            continue
-                except Exception:
-                    entry_lines = []
-                entry_desc = "; ".join(entry_lines) if entry_lines else "no entries"
-                lines.append(f"- {pid}: {desc} | schema: {schema_str} | entries: {entry_desc}")
-        except Exception:
-            pass
-        
-        plugins_desc = "\n".join(lines) if lines else "No plugins available."
-        # truncate to avoid overly large prompts
-        if len(plugins_desc) > 2000:
-            plugins_desc = plugins_desc[:2000] + "\n... (truncated)"
+        plugins_desc = self._format_plugins(plugins)
         logger.debug(f"[UserPlugin] passing plugin descriptions (truncated): {plugins_desc[:1000]}")
         
         # Strongly enforce JSON-only output to reduce parsing errors
@@ -604,16 +728,218 @@ Return only the JSON object, nothing else.
             except Exception as e:
                 return UserPluginDecision(has_task=False, can_execute=False, task_description="", plugin_id=None, plugin_args=None, reason=f"Assessment error: {e}")
     
+    @staticmethod
+    def _latest_user_turns(messages: List[Dict[str, str]], count: int = 1) -> List[Tuple[str, bool]]:
+        """返回最近 count 条用户发言 [(发言, 它前一条助手发言是否以问号结尾)]，从新到旧"""
+        recent = messages[-10:]
+        turns: List[Tuple[str, bool]] = []
+        for i in range(len(recent) - 1, -1, -1):
+            m = recent[i]
+            if m.get('role') != 'user':
+                continue
+            text = str(m.get('text') or m.get('content') or '').strip()
+            if not text:
+                continue
+            after_question = False
+            if i > 0 and recent[i - 1].get('role') == 'assistant':
+                prev = str(recent[i - 1].get('text') or recent[i - 1].get('content') or '').strip()
+                after_question = prev.endswith(("?", "？"))
+            turns.append((text, after_question))
+            if len(turns) >= count:
+                break
+        return turns
+
+    async def _classify_unified(
+        self,
+        conversation: str,
+        capabilities: Dict[str, Dict[str, Any]],
+        plugins: Any,
+        browser_available: bool,
+        cu_available: bool,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        一次 LLM 调用判定全部已启用通道，返回 {'mcp'|'up'|'bu'|'cu': Decision}（仅含已启用通道）；
+        调用或解析失败返回 None，由调用方回退到逐通道评估。
+        """
+        sections = []
+        output_fields = []
+        if capabilities:
+            sections.append(f"[mcp] MCP tools (call one tool with exact arguments matching its schema):\n{self._format_tools(capabilities)}")
+            output_fields.append('    "mcp": {"can_execute": boolean, "tool_name": "exact_tool_name or null", "tool_args": {...} or null, "reason": "why"}')
+        if plugins:
+            sections.append(f"[user_plugin] User plugins (plugin id + entry_id + plugin_args matching the entry):\n{self._format_plugins(plugins)}")
+            output_fields.append('    "user_plugin": {"can_execute": boolean, "plugin_id": "plugin id or null", "entry_id": "entry id or null", "plugin_args": {...} or null, "reason": "why"}')
+        if browser_available:
+            sections.append("[browser_use] Browser automation: ONLY tasks that need websites, web pages, web forms, web search engines or downloads. "
+                            "NOT local OS operations (opening local apps, files/folders, system settings).")
+            output_fields.append('    "browser_use": {"can_execute": boolean, "reason": "why"}')
+        if cu_available:
+            sections.append("[computer_use] GUI/desktop automation: mouse, keyboard, opening/closing applications, clicking Windows UI elements. "
+                            "Tasks that can be done via API/tools do NOT need GUI.")
+            output_fields.append('    "computer_use": {"can_execute": boolean, "reason": "why"}')
+        if not sections:
+            return {}
+
+        channels_desc = "\n\n".join(sections)
+        fields_desc = ",\n".join(output_fields)
+        system_prompt = f"""You are a unified task classifier for a desktop assistant. Decide in ONE pass whether the conversation contains an actionable task request and which of the available channels can handle it.
+
+AVAILABLE CHANNELS:
+{channels_desc}
+
+INSTRUCTIONS:
+1. Analyze if the conversation contains an actionable task request (casual chat is NOT a task)
+2. For EVERY channel listed in the output format, decide independently whether it can execute the task
+3. If `LATEST_USER_REQUEST` exists, prioritize it over assistant claims like "already done".
+4. OUTPUT MUST BE ONLY a single JSON object and NOTHING ELSE.
+
+OUTPUT FORMAT (strict JSON):
+{{
+    "has_task": boolean,
+    "task_description": "brief description of the task",
+{fields_desc}
+}}"""
+        user_prompt = f"Conversation:\n{conversation}"
+
+        max_retries = 3
+        retry_delays = [1, 2]
+        for attempt in range(max_retries):
+            try:
+                client = self._get_client()
+                model = self._get_model()
+                request_params = {
+                    "model": model,
+                    "messages": [
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt},
+                    ],
+                    "temperature": 0,
+                    "max_tokens": 800
+                }
+                extra_body = get_extra_body(model)
+                if extra_body:
+                    request_params["extra_body"] = extra_body
+
+                self.stats["llm_calls"] += 1
+                response = await client.chat.completions.create(**request_params)
+                text = (response.choices[0].message.content or "").strip()
+                logger.debug(f"[Unified Assessment] Raw response: {text[:300]}...")
+                if text.startswith("```"):
+                    text = text.replace("```json", "").replace("```", "").strip()
+                decision = json.loads(text)
+                if not isinstance(decision, dict):
+                    raise ValueError("response is not a JSON object")
+                break
+            except (APIConnectionError, InternalServerError, RateLimitError) as e:
+                logger.info(f"ℹ️ 捕获到 {type(e).__name__} 错误")
+                if attempt < max_retries - 1:
+                    wait_time = retry_delays[attempt]
+                    logger.warning(f"[Unified Assessment] 调用失败 (尝试 {attempt + 1}/{max_retries})，{wait_time}秒后重试: {e}")
+                    await asyncio.sleep(wait_time)
+                else:
+                    logger.error(f"[Unified Assessment] Failed after {max_retries} attempts: {e}")
+                    return None
+            except Exception as e:
+                logger.warning(f"[Unified Assessment] Failed, falling back to per-channel assessment: {e}")
+                return None
+
+        has_task = bool(decision.get("has_task", False))
+        task_description = decision.get("task_description", "") or ""
+
+        def _part(key: str) -> Dict[str, Any]:
+            part = decision.get(key)
+            return part if isinstance(part, dict) else {}
+
+        results: Dict[str, Any] = {}
+        if capabilities:
+            part = _part("mcp")
+            results['mcp'] = McpDecision(
+                has_task=has_task,
+                can_execute=bool(part.get('can_execute', False)),
+                task_description=task_description,
+                tool_name=part.get('tool_name'),
+                tool_args=part.get('tool_args'),
+                reason=part.get('reason', '')
+            )
+        if plugins:
+            part = _part("user_plugin")
+            results['up'] = UserPluginDecision(
+                has_task=has_task,
+                can_execute=bool(part.get('can_execute', False)),
+                task_description=task_description,
+                plugin_id=part.get('plugin_id'),
+                entry_id=part.get('entry_id') or part.get('plugin_entry_id') or part.get('event_id'),
+                plugin_args=part.get('plugin_args'),
+                reason=part.get('reason', '')
+            )
+        if browser_available:
+            part = _part("browser_use")
+            results['bu'] = BrowserUseDecision(
+                has_task=has_task,
+                can_execute=bool(part.get('can_execute', False)),
+                task_description=task_description,
+                reason=part.get('reason', '')
+            )
+        if cu_available:
+            part = _part("computer_use")
+            results['cu'] = ComputerUseDecision(
+                has_task=has_task,
+                can_execute=bool(part.get('can_execute', False)),
+                task_description=task_description,
+                reason=part.get('reason', '')
+            )
+        return results
+
+    async def _assess_parallel(
+        self,
+        conversation: str,
+        capabilities: Dict[str, Dict[str, Any]],
+        plugins: Any,
+        browser_available: bool,
+        cu_available: bool,
+    ) -> Dict[str, Any]:
+        """逐通道独立评估（每个已启用通道一次 LLM 调用，并行执行）"""
+        assessment_tasks = []
+        if capabilities:
+            assessment_tasks.append(('mcp', self._assess_mcp(conversation, capabilities)))
+        if plugins:
+            assessment_tasks.append(('up', self._assess_user_plugin(conversation, plugins)))
+        if browser_available:
+            assessment_tasks.append(('bu', self._assess_browser_use(conversation, browser_available)))
+        if cu_available:
+            assessment_tasks.append(('cu', self._assess_computer_use(conversation, cu_available)))
+
+        # 并行执行所有评估
+        logger.info(f"[TaskExecutor] Running {len(assessment_tasks)} assessments in parallel...")
+        self.stats["llm_calls"] += len(assessment_tasks)
+        results = await asyncio.gather(*[task[1] for task in assessment_tasks], return_exceptions=True)
+
+        # 收集结果（安全访问，先过滤异常）
+        decisions: Dict[str, Any] = {}
+        for (task_type, _), result in zip(assessment_tasks, results):
+            if isinstance(result, Exception):
+                logger.error(f"[TaskExecutor] {task_type} assessment failed: {result}")
+                continue
+            decisions[task_type] = result
+        return decisions
+
     async def analyze_and_execute(
         self, 
         messages: List[Dict[str, str]], 
         lanlan_name: Optional[str] = None,
-        agent_flags: Optional[Dict[str, bool]] = None
+        agent_flags: Optional[Dict[str, bool]] = None,
+        on_commit: Optional[Callable[[], None]] = None,
+        unanalyzed_turns: int = 1,
     ) -> Optional[TaskResult]:
         """
-        并行评估 MCP 和 ComputerUse，然后执行任务
+        评估各通道可行性（unified 一次调用 / parallel 逐通道），然后执行任务
         
         优先级: MCP > ComputerUse > UserPlugin
+
+        on_commit: 评估结束、开始执行（产生副作用）之前同步调用；
+        调度器据此停止把这次分析当作可取消的旧快照。
+        unanalyzed_turns: 末尾有几轮用户发言还没被完整分析过（之前的分析被新快照取消）；
+        本地预筛要求这些发言全部是闲聊才跳过 LLM。
         """
         import uuid
         task_id = str(uuid.uuid4())
@@ -642,17 +968,25 @@ Return only the JSON object, nothing else.
         if not conversation.strip():
             return None
         
-        # 准备并行评估任务
-        assessment_tasks = []
-        
-        # MCP 评估任务
-        capabilities = {}
+        self.stats["turns"] += 1
+        classify_started = time.perf_counter()
+
+        # 本地预筛：尚未分析过的用户发言全是明确的闲聊时才跳过 LLM 判定
+        # （"帮我打开音乐"的分析被随后的"谢谢"取消时，不能只看"谢谢"）
+        if self.prefilter_enabled:
+            turns = self._latest_user_turns(messages, max(1, unanalyzed_turns))
+            if turns and all(is_clear_non_action(text, after_q) for text, after_q in turns):
+                self.stats["prefiltered"] += 1
+                CLASSIFY_TOTAL.labels("prefilter").inc()
+                metrics.record_span("agent.task_classify", time.perf_counter() - classify_started)
+                logger.debug(f"[TaskExecutor] Prefilter: chit-chat, skipping assessment: {turns[0][0][:50]}")
+                return None
+
+        # MCP 工具与插件列表：共享快照
+        snapshot = await self.get_capability_snapshot(mcp=mcp_enabled, plugins=user_plugin_enabled)
+        capabilities = snapshot.mcp_tools if mcp_enabled else {}
         if mcp_enabled:
-            try:
-                capabilities = await self.catalog.get_capabilities(force_refresh=True)
-                logger.info(f"[TaskExecutor] Found {len(capabilities)} MCP tools")
-            except Exception as e:
-                logger.warning(f"[TaskExecutor] Failed to get MCP capabilities: {e}")
+            logger.info(f"[TaskExecutor] Found {len(capabilities)} MCP tools (snapshot v{snapshot.version})")
         
         # ComputerUse 可用性检查
         cu_available = False
@@ -671,58 +1005,39 @@ Return only the JSON object, nothing else.
             except Exception as e:
                 logger.warning(f"[TaskExecutor] Failed to check BrowserUse: {e}")
         
-        # 并行执行评估（包含 user_plugin 分支）
-        mcp_decision = None
-        cu_decision = None
-        bu_decision = None
-        up_decision = None
-        
-        if mcp_enabled and capabilities:
-            assessment_tasks.append(('mcp', self._assess_mcp(conversation, capabilities)))
-        
         # user plugin 支路（由外部 provider 提供插件列表）
-        plugins = []
-        if user_plugin_enabled:
-            await self.plugin_list_provider()
-            plugins = self.plugin_list
+        plugins = snapshot.plugins if user_plugin_enabled else []
 
-        if user_plugin_enabled and plugins:
-            assessment_tasks.append(('up', self._assess_user_plugin(conversation, plugins)))
-        
-        if browser_use_enabled and browser_available:
-            assessment_tasks.append(('bu', self._assess_browser_use(conversation, browser_available)))
-        
-        if computer_use_enabled and cu_available:
-            assessment_tasks.append(('cu', self._assess_computer_use(conversation, cu_available)))
-        
-        if not assessment_tasks:
+        if not capabilities and not plugins and not browser_available and not cu_available:
             logger.debug("[TaskExecutor] No assessment tasks to run")
             return None
+
+        decisions = None
+        if self.classifier_mode == "unified":
+            decisions = await self._classify_unified(conversation, capabilities, plugins, browser_available, cu_available)
+            if decisions is not None:
+                CLASSIFY_TOTAL.labels("unified").inc()
+        if decisions is None:
+            decisions = await self._assess_parallel(conversation, capabilities, plugins, browser_available, cu_available)
+            CLASSIFY_TOTAL.labels("parallel").inc()
+        metrics.record_span("agent.task_classify", time.perf_counter() - classify_started)
+
+        mcp_decision = decisions.get('mcp')
+        up_decision = decisions.get('up')
+        bu_decision = decisions.get('bu')
+        cu_decision = decisions.get('cu')
+        if mcp_decision:
+            logger.info(f"[MCP] has_task={getattr(mcp_decision,'has_task',None)}, can_execute={getattr(mcp_decision,'can_execute',None)}, reason={getattr(mcp_decision,'reason',None)}")
+        if up_decision:
+            logger.info(f"[UserPlugin] has_task={getattr(up_decision,'has_task',None)}, can_execute={getattr(up_decision,'can_execute',None)}, reason={getattr(up_decision,'reason',None)}")
+        if cu_decision:
+            logger.info(f"[ComputerUse] has_task={getattr(cu_decision,'has_task',None)}, can_execute={getattr(cu_decision,'can_execute',None)}, reason={getattr(cu_decision,'reason',None)}")
+        if bu_decision:
+            logger.info(f"[BrowserUse] has_task={getattr(bu_decision,'has_task',None)}, can_execute={getattr(bu_decision,'can_execute',None)}, reason={getattr(bu_decision,'reason',None)}")
         
-        # 并行执行所有评估
-        logger.info(f"[TaskExecutor] Running {len(assessment_tasks)} assessments in parallel...")
-        results = await asyncio.gather(*[task[1] for task in assessment_tasks], return_exceptions=True)
-        
-        # 收集结果（安全访问，先过滤异常）
-        for i, (task_type, _) in enumerate(assessment_tasks):
-            result = results[i]
-            if isinstance(result, Exception):
-                logger.error(f"[TaskExecutor] {task_type} assessment failed: {result}")
-                continue
-            # safe attribute access via getattr to avoid type issues
-            if task_type == 'mcp':
-                mcp_decision = result
-                logger.info(f"[MCP] has_task={getattr(mcp_decision,'has_task',None)}, can_execute={getattr(mcp_decision,'can_execute',None)}, reason={getattr(mcp_decision,'reason',None)}")
-            elif task_type == 'up':
-                up_decision = result
-                logger.info(f"[UserPlugin] has_task={getattr(up_decision,'has_task',None)}, can_execute={getattr(up_decision,'can_execute',None)}, reason={getattr(up_decision,'reason',None)}")
-            elif task_type == 'cu':
-                cu_decision = result
-                logger.info(f"[ComputerUse] has_task={getattr(cu_decision,'has_task',None)}, can_execute={getattr(cu_decision,'can_execute',None)}, reason={getattr(cu_decision,'reason',None)}")
-            elif task_type == 'bu':
-                bu_decision = result
-                logger.info(f"[BrowserUse] has_task={getattr(bu_decision,'has_task',None)}, can_execute={getattr(bu_decision,'can_execute',None)}, reason={getattr(bu_decision,'reason',None)}")
-        
+        if on_commit is not None:
+            on_commit()
+
         # 决策逻辑：MCP 优先
         # 1. 如果 MCP 可以执行，使用 MCP
         if mcp_decision and mcp_decision.has_task and mcp_decision.can_execute:
@@ -1063,5 +1378,6 @@ Return only the JSON object, nothing else.
         return await self._execute_user_plugin(task_id=task_id, up_decision=up_decision_stub)
     
     async def refresh_capabilities(self) -> Dict[str, Dict[str, Any]]:
-        """刷新并返回 MCP 工具能力列表"""
-        return await self.catalog.get_capabilities(force_refresh=True)
+        """刷新并返回 MCP 工具能力列表（同时刷新共享快照）"""
+        snap = await self.get_capability_snapshot(mcp=True, plugins=False, force_refresh=True)
+        return snap.mcp_tools
@@ -69,6 +69,93 @@ DEFAULT_OPENROUTER_URL = "https://dashscope.aliyuncs.com/compatible-mode/v1"
 NATIVE_IMAGE_MIN_INTERVAL = 1.5
 # 无语音活动时图片发送间隔倍数（实际间隔 = NATIVE_IMAGE_MIN_INTERVAL × 此值）
 IMAGE_IDLE_RATE_MULTIPLIER = 5
+# 屏幕帧去重：感知哈希（64 位 dHash）汉明距离不超过此值时才进一步比较像素（打字等小改动常只差 0~1 位）
+SCREEN_PHASH_CHANGE_THRESHOLD = 1
+# 屏幕帧去重：160x90 灰度缩略图逐像素最大差值不超过此值才视为画面未变化，跳过发送
+SCREEN_PIXEL_CHANGE_THRESHOLD = 12
+# 画面长时间不变时仍按此间隔（秒）重发一帧，避免模型丢失画面上下文
+SCREEN_DEDUP_MAX_AGE = 15.0
+# 截图解码/缩放/编码线程池大小，以及按原始数据哈希缓存的编码结果条数
+IMAGE_PIPELINE_WORKERS = 2
+IMAGE_ENCODE_CACHE_SIZE = 32
+# Computer-Use：执行动作后轮询截图直到画面稳定（秒），超时仍无变化视为无效动作
+CUA_SETTLE_TIMEOUT = 0.6
+CUA_SETTLE_POLL_INTERVAL = 0.1
+# Computer-Use：连续多少步动作后画面都没有变化即判定卡住，不再调用 VLM
+CUA_MAX_NOOP_STEPS = 5
+# agent_server 后台对话分析的并发槽位数（同一角色始终串行）
+AGENT_ANALYZE_SLOTS = 2
+# 任务去重本地预筛：词/字 bigram 集合的 Jaccard 与按顺序的词/字序列相似度都 ≥ 前者才直接判重复（词序不同不算）；
+# 与所有候选的相似度/包含度都 < 后者直接判不重复；其余交给 LLM 判断
+TASK_DEDUP_DUPLICATE_THRESHOLD = 0.9
+TASK_DEDUP_DISTINCT_THRESHOLD = 0.1
+# DirectTaskExecutor 能力判定方式："unified" 一次 LLM 调用覆盖全部已启用通道；"parallel" 每个通道各调一次（旧行为）
+TASK_CLASSIFIER_MODE = "unified"
+# 最新用户发言是明确的闲聊（问候、应答、语气词）时跳过能力判定，不调用 LLM
+TASK_PREFILTER_ENABLED = True
+# MCP 工具 / 用户插件列表快照的有效期（秒），期间各次分析共享同一份快照
+TASK_CAPABILITY_SNAPSHOT_TTL = 30.0
+# VRM 模型/动作目录索引：目录 mtime 未变时，最多隔这么久（秒）才逐个 stat 文件（用于发现原地覆盖的文件）
+VRM_CATALOG_RESCAN_INTERVAL = 5.0
+# user_preferences.json 写回：最后一次修改后静默这么久（秒）才落盘；持续拖动时最迟这么久也会落盘一次
+USER_PREFERENCES_FLUSH_DELAY = 0.5
+USER_PREFERENCES_FLUSH_MAX_DELAY = 2.0
+# /api/agent/*/availability 代理结果的缓存时间（秒）；开关变更时立即失效
+AGENT_AVAILABILITY_CACHE_TTL = 2.0
+# /api/agent/tasks/stream 无事件时发送 SSE 心跳的间隔（秒）
+AGENT_TASK_STREAM_KEEPALIVE = 15.0
+# TTS 下行音频编码："pcm" 原样发送 48kHz int16；"opus" 服务端编码为 Ogg Opus（主页面与 monitor 转发共用，libopus 不可用时回退 pcm）
+TTS_DOWNLINK_CODEC = "pcm"
+TTS_OPUS_BITRATE = 32000
+# TTS 短语缓存：整轮回复按 (worker, voice_id, 规范化文本, 参数) 缓存合成结果（<文档>/tts_cache，超过上限按最近使用淘汰）
+TTS_PHRASE_CACHE_ENABLED = True
+TTS_PHRASE_CACHE_MAX_MB = 64
+# 超过这么多字符的回复不缓存（几乎不会原样重复）
+TTS_PHRASE_CACHE_MAX_CHARS = 40
+# 会话开始时预热的短语；角色配置里的 tts_warm_phrases 优先
+TTS_PHRASE_CACHE_WARM_PHRASES = []
+# TTS 连接池：每组 (worker, 音色, 参数) 预先起好并完成握手的 worker 线程数（0 表示不预热）
+TTS_POOL_SPARES = 1
+# 热备闲置超过这么久（秒）就换新，赶在服务端空闲超时之前
+TTS_POOL_MAX_IDLE = 45.0
+# 距离上次取用超过这么久（秒）就不再续热备
+TTS_POOL_WARM_WINDOW = 600.0
+# 热切换后回放缓存语音：最快按实时的多少倍发送；每包时长（毫秒）
+HOT_SWAP_REPLAY_SPEEDUP = 4.0
+HOT_SWAP_REPLAY_PACKET_MS = 100
+# 回放前裁掉过长的静音：RMS 低于阈值（int16）视为静音，每段最多保留这么久（毫秒）
+HOT_SWAP_REPLAY_SILENCE_RMS = 500
+HOT_SWAP_REPLAY_KEEP_SILENCE_MS = 600
+# 热切换备用会话：触发记忆归档后等这么久（秒，等 memory_server 整理完近期历史）就在后台提前连好备用会话
+HOT_SWAP_SETTLE_S = 10.0
+# 切换时等待备用会话把增量对话同步完的上限（秒），超时则放弃本次切换
+HOT_SWAP_SYNC_TIMEOUT_S = 2.0
+# 输出字幕流式翻译：同时进行的逐句翻译请求数；逐句译文缓存条数
+STREAM_TRANSLATION_CONCURRENCY = 4
+STREAM_TRANSLATION_CACHE_SIZE = 512
+# 输出文本合帧：相邻 delta 最多攒这么久 / 这么多字节（UTF-8）就合成一帧发给前端；间隔为 0 时逐个发送
+TEXT_FRAME_FLUSH_INTERVAL_MS = 50
+TEXT_FRAME_MAX_BYTES = 256
+# 情绪分析：本地词典/emoji/情绪标签判断达到该置信度就不调 LLM；其余请求攒批的窗口与每批上限；按文本缓存的条数
+EMOTION_LOCAL_MIN_CONFIDENCE = 0.75
+EMOTION_BATCH_WINDOW_MS = 40
+EMOTION_BATCH_MAX = 8
+EMOTION_CACHE_SIZE = 1024
+# Realtime 上行音频合包：每包最短时长（毫秒）；按连接 RTT × 系数加长，最长不超过上限
+UPLINK_PACKET_MS = 30
+UPLINK_PACKET_MAX_MS = 100
+UPLINK_PACKET_RTT_RATIO = 0.25
+# 上行静音暂停（仅服务端 VAD 按时长断句的服务商）：RMS 低于阈值（int16）视为静音，持续这么久（毫秒）后停发；
+# 恢复时先补发最近这么久（毫秒）的前导音频；暂停期间每隔这么久（秒）仍发一包防止空闲断开
+UPLINK_PAUSE_RMS = 200
+UPLINK_PAUSE_HANGOVER_MS = 1500
+UPLINK_PAUSE_PREROLL_MS = 300
+UPLINK_PAUSE_KEEPALIVE_S = 10.0
+# 麦克风音频 DSP（RNNoise/AGC/限幅/重采样）进程池：worker 进程数（不超过 CPU 核数；0 表示沿用默认线程池）；
+# 每个 worker 的共享内存环形缓冲槽数与每槽字节数（放不下的块随控制消息直接发送）
+AUDIO_DSP_WORKERS = 2
+AUDIO_DSP_RING_SLOTS = 64
+AUDIO_DSP_SLOT_BYTES = 4096
 
 # 用户自定义模型配置的默认 Provider/URL/API_KEY（空字符串表示使用全局配置）
 DEFAULT_CONVERSATION_MODEL_URL = ""
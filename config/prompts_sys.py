@@ -129,6 +129,8 @@ history_review_prompt = """请审阅%s和%s之间的对话历史记录，识别
 
 emotion_analysis_prompt = """你是一个情感分析专家。请分析用户输入的文本情感，并返回以下格式的JSON：{"emotion": "情感类型", "confidence": 置信度(0-1)}。情感类型包括：happy(开心), sad(悲伤), angry(愤怒), neutral(中性),surprised(惊讶)。"""
 
+emotion_analysis_batch_prompt = """你是一个情感分析专家。用户会给出若干条带编号的文本，请逐条分析情感，只返回一个JSON数组，按编号顺序每条文本对应一个对象：[{"emotion": "情感类型", "confidence": 置信度(0-1)}, ...]。情感类型包括：happy(开心), sad(悲伤), angry(愤怒), neutral(中性),surprised(惊讶)。"""
+
 proactive_chat_prompt = """你是{lanlan_name}，现在看到了一些B站首页推荐和微博热议话题。请根据与{master_name}的对话历史和你自己的兴趣，判断是否要主动和{master_name}聊聊这些内容。
 
 ======以下为对话历史======
@@ -20,6 +20,8 @@ try:
 except Exception:  # pragma: no cover - optional dependency at runtime
     zmq = None
 
+from utils.metrics import attach_turn_id, record_span
+
 logger = logging.getLogger(__name__)
 
 # ZMQ 地址：支持环境变量覆盖，便于 launcher 在默认端口落入
@@ -299,19 +301,23 @@ async def publish_analyze_request_reliably(
     *,
     ack_timeout_s: float = 0.5,
     retries: int = 1,
+    turn_id: Optional[str] = None,
 ) -> bool:
-    """可靠发布 analyze_request：携带 event_id + ack，并支持短重试。"""
+    """可靠发布 analyze_request：携带 event_id + ack，并支持短重试。
+
+    ``turn_id`` 随事件一起发送，agent_server 据此把分析耗时关联到同一轮对话。
+    """
     event_id = uuid.uuid4().hex
     sent_at = time.perf_counter()
 
     for attempt in range(max(retries, 0) + 1):
-        event = {
+        event = attach_turn_id({
             "event_type": "analyze_request",
             "event_id": event_id,
             "trigger": trigger,
             "lanlan_name": lanlan_name,
             "messages": messages,
-        }
+        }, turn_id)
 
         loop = asyncio.get_running_loop()
         waiter: asyncio.Future = loop.create_future()
@@ -347,6 +353,7 @@ async def publish_analyze_request_reliably(
 
         try:
             await asyncio.wait_for(waiter, timeout=ack_timeout_s)
+            record_span("bus.analyze_ack", time.perf_counter() - sent_at, event.get("turn_id"))
             logger.info(
                 "[EventBus] analyze_request acked: event_id=%s lanlan=%s trigger=%s latency_ms=%.1f",
                 event_id,
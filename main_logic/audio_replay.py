@@ -0,0 +1,110 @@
+"""
+热切换音频回放调度
+
+热切换期间用户的语音先缓存起来（16kHz 处理后 PCM），新 session 就位后需要补发。原来的做法是
+把缓存拼起来按固定 25ms 间隔一块块推，最多循环 20 轮，回放速度和真实时间无关，积压越多实时输入
+被拖得越久。AudioReplayScheduler 把积压与回放期间到达的实时音频放进同一个 FIFO：
+- 按单调时钟限速：已发送的音频时长不超过 speedup × 已过去的时间，积压 B 秒约 B/(speedup-1) 秒追平
+- 积压与实时音频严格按到达顺序发送，追平（队列为空且 hold() 不再要求等待）后交回直连路径
+- 入队时按 RMS 静音判定（与 OmniRealtimeClient 的客户端 VAD 阈值一致）裁掉过长的静音段，
+  每段静音最多保留 keep_silence_ms，仍足够服务端 VAD 判断一句话结束
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional
+
+import numpy as np
+
+from config import (
+    HOT_SWAP_REPLAY_KEEP_SILENCE_MS,
+    HOT_SWAP_REPLAY_PACKET_MS,
+    HOT_SWAP_REPLAY_SILENCE_RMS,
+    HOT_SWAP_REPLAY_SPEEDUP,
+)
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class AudioReplayScheduler:
+    def __init__(self, send: Callable[[bytes], Awaitable[None]], sample_rate: int = 16000,
+                 speedup: Optional[float] = None, packet_ms: Optional[int] = None,
+                 keep_silence_ms: Optional[int] = None, silence_rms: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic, sleep=asyncio.sleep):
+        self.send = send
+        self.sample_rate = sample_rate
+        self.speedup = max(1.0, HOT_SWAP_REPLAY_SPEEDUP if speedup is None else speedup)
+        self.packet_bytes = sample_rate * (HOT_SWAP_REPLAY_PACKET_MS if packet_ms is None else packet_ms) // 1000 * 2
+        keep_ms = HOT_SWAP_REPLAY_KEEP_SILENCE_MS if keep_silence_ms is None else keep_silence_ms
+        self.keep_silence_samples = sample_rate * keep_ms // 1000
+        self.silence_rms = HOT_SWAP_REPLAY_SILENCE_RMS if silence_rms is None else silence_rms
+        self._clock = clock
+        self._sleep = sleep
+        self._queue: deque = deque()
+        self._silence_run = 0
+        self.done = False
+        self.queued_seconds = 0.0
+        self.trimmed_seconds = 0.0
+        self.sent_seconds = 0.0
+        self.catch_up_seconds: Optional[float] = None
+
+    def feed(self, chunk: bytes) -> None:
+        """积压与实时音频都从这里入队（同步调用，保证到达顺序）。"""
+        samples = len(chunk) // 2
+        if samples == 0:
+            return
+        seconds = samples / self.sample_rate
+        pcm = np.frombuffer(chunk, dtype=np.int16, count=samples).astype(np.float32)
+        if np.sqrt(np.mean(pcm * pcm)) <= self.silence_rms:
+            if self._silence_run >= self.keep_silence_samples:
+                self.trimmed_seconds += seconds
+                return
+            self._silence_run += samples
+        else:
+            self._silence_run = 0
+        self._queue.append(chunk)
+        self.queued_seconds += seconds
+
+    @property
+    def pending_seconds(self) -> float:
+        return sum(len(c) for c in self._queue) / 2 / self.sample_rate
+
+    def _take_packet(self) -> bytes:
+        parts, size = [], 0
+        while self._queue and size < self.packet_bytes:
+            chunk = self._queue.popleft()
+            room = self.packet_bytes - size
+            if len(chunk) > room:
+                self._queue.appendleft(chunk[room:])
+                chunk = chunk[:room]
+            parts.append(chunk)
+            size += len(chunk)
+        return b"".join(parts)
+
+    async def run(self, on_caught_up: Optional[Callable[[], None]] = None,
+                  hold: Optional[Callable[[], bool]] = None) -> float:
+        """按节奏发送直到追平；返回追平耗时（秒）。hold() 为真时即使队列已空也继续接实时音频。"""
+        start = self._clock()
+        packet_seconds = self.packet_bytes / 2 / self.sample_rate
+        while True:
+            if not self._queue:
+                if hold is not None and hold():
+                    await self._sleep(packet_seconds / 2)
+                    continue
+                # 检查队列与交回直连之间没有 await，不会漏掉或打乱音频
+                self.done = True
+                if on_caught_up is not None:
+                    on_caught_up()
+                break
+            packet = self._take_packet()
+            delay = start + self.sent_seconds / self.speedup - self._clock()
+            if delay > 0:
+                await self._sleep(delay)
+            await self.send(packet)
+            self.sent_seconds += len(packet) / 2 / self.sample_rate
+        self.catch_up_seconds = self._clock() - start
+        metrics.record_span("hot_swap.replay_catch_up", self.catch_up_seconds)
+        return self.catch_up_seconds
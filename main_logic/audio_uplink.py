@@ -0,0 +1,158 @@
+"""
+Realtime 上行音频合包
+
+原来 stream_audio 对每个 10ms（PC 端 RNNoise 帧）/ 32ms（移动端）的 PCM 块都单独 base64 编码、
+构造事件字典、json.dumps 后发送一次，语音会话的 CPU 大头花在编码和序列化上。AudioUplink：
+- 把 16kHz PCM 攒够 packet_ms 再发；包长随连接 RTT 加长（RTT × rtt_ratio），限制在 [packet_ms, max_packet_ms]
+- PCM 写进预分配的 bytearray，经 memoryview 切片交给编码函数，不再额外复制
+- 编码函数由调用方提供，保持各服务商的事件格式；WebSocket 服务商用 ``encode_append_event``
+  按模板拼出 ``input_audio_buffer.append`` 事件（base64 字符无需转义），不再逐包 json.dumps
+- pause_on_silence=True 时，本地判定静音持续 hangover_ms 后停止上行，只保留最近 preroll_ms 的音频；
+  重新检测到声音时先补发这段前导音频（服务端 VAD 需要语音起点）。暂停期间每 keepalive_s 秒仍发一包，
+  避免服务端按空闲断开
+"""
+
+import binascii
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional
+
+from config import (
+    UPLINK_PACKET_MAX_MS,
+    UPLINK_PACKET_MS,
+    UPLINK_PACKET_RTT_RATIO,
+    UPLINK_PAUSE_HANGOVER_MS,
+    UPLINK_PAUSE_KEEPALIVE_S,
+    UPLINK_PAUSE_PREROLL_MS,
+)
+
+logger = logging.getLogger(__name__)
+
+APPEND_EVENT_TEMPLATE = '{"type":"input_audio_buffer.append","audio":"%s","event_id":"event_%d"}'
+
+
+def encode_append_event(pcm: memoryview) -> str:
+    """PCM → input_audio_buffer.append 事件 JSON（字段与 send_event 发出的一致）。"""
+    audio_b64 = binascii.b2a_base64(pcm, newline=False).decode('ascii')
+    return APPEND_EVENT_TEMPLATE % (audio_b64, int(time.time() * 1000))
+
+
+class AudioUplink:
+    def __init__(self, encode: Callable[[memoryview], Any], send: Callable[[Any], Awaitable[None]],
+                 sample_rate: int = 16000, packet_ms: Optional[int] = None,
+                 max_packet_ms: Optional[int] = None, rtt_ratio: Optional[float] = None,
+                 rtt_source: Optional[Callable[[], Optional[float]]] = None,
+                 pause_on_silence: bool = False, hangover_ms: Optional[int] = None,
+                 preroll_ms: Optional[int] = None, keepalive_s: Optional[float] = None):
+        self._encode = encode
+        self._send = send
+        self._bytes_per_ms = sample_rate * 2 // 1000
+        self.min_packet_ms = UPLINK_PACKET_MS if packet_ms is None else packet_ms
+        self.max_packet_ms = max(self.min_packet_ms, UPLINK_PACKET_MAX_MS if max_packet_ms is None else max_packet_ms)
+        self.rtt_ratio = UPLINK_PACKET_RTT_RATIO if rtt_ratio is None else rtt_ratio
+        self._rtt_source = rtt_source
+        self.packet_bytes = self.min_packet_ms * self._bytes_per_ms
+        self._buf = bytearray(self.max_packet_ms * self._bytes_per_ms)
+        self._view = memoryview(self._buf)
+        self._fill = 0
+
+        self.pause_on_silence = pause_on_silence
+        self.hangover = (UPLINK_PAUSE_HANGOVER_MS if hangover_ms is None else hangover_ms) / 1000.0
+        self._preroll_bytes = (UPLINK_PAUSE_PREROLL_MS if preroll_ms is None else preroll_ms) * self._bytes_per_ms
+        self.keepalive = UPLINK_PAUSE_KEEPALIVE_S if keepalive_s is None else keepalive_s
+        self._preroll = deque()
+        self._preroll_size = 0
+        self.paused = False
+        self._last_voice = time.monotonic()
+        self._last_send = self._last_voice
+
+        self.packets = 0
+        self.sent_bytes = 0
+        self.paused_bytes = 0
+
+    def update_rtt(self, rtt: Optional[float]) -> None:
+        """按 RTT（秒）调整包长。"""
+        if not isinstance(rtt, (int, float)) or rtt <= 0:
+            packet_ms = self.min_packet_ms
+        else:
+            packet_ms = min(self.max_packet_ms, max(self.min_packet_ms, int(rtt * 1000 * self.rtt_ratio)))
+        self.packet_bytes = packet_ms * self._bytes_per_ms
+
+    async def push(self, chunk: bytes, voiced: bool = True) -> None:
+        """收到一块 16kHz PCM；voiced 为本地 VAD 结果（仅用于静音暂停）。"""
+        if not self.pause_on_silence:
+            await self._write(chunk)
+            return
+        now = time.monotonic()
+        if voiced:
+            self._last_voice = now
+            if self.paused:
+                self.paused = False
+                held = b''.join(self._preroll)
+                self._clear_preroll()
+                await self._write(held)
+        elif self.paused or now - self._last_voice >= self.hangover:
+            if not self.paused:
+                await self.flush()
+                self.paused = True
+            self._hold(chunk)
+            if now - self._last_send >= self.keepalive:
+                held = b''.join(self._preroll)
+                self._clear_preroll()
+                await self._write(held)
+                await self.flush()
+            return
+        await self._write(chunk)
+
+    async def flush(self) -> None:
+        """把攒着的音频作为一包发出。"""
+        if self._fill == 0:
+            return
+        size, self._fill = self._fill, 0
+        with self._view[:size] as pcm:
+            payload = self._encode(pcm)
+        self.packets += 1
+        self.sent_bytes += size
+        self._last_send = time.monotonic()
+        if self._rtt_source is not None:
+            self.update_rtt(self._rtt_source())
+        await self._send(payload)
+
+    def drain(self) -> bytes:
+        """取出还没发出的音频（暂停期间的前导音频 + 合包缓冲）并清空，热切换时转交新会话。"""
+        held = b''.join(self._preroll) + bytes(self._view[:self._fill])
+        self.reset()
+        return held
+
+    def reset(self) -> None:
+        """丢掉还没发出的音频（服务端缓存被清空/连接关闭）。"""
+        self._fill = 0
+        self._clear_preroll()
+        self.paused = False
+        self._last_voice = self._last_send = time.monotonic()
+
+    async def _write(self, data: bytes) -> None:
+        src = memoryview(data)
+        pos, total = 0, len(src)
+        while pos < total:
+            if self._fill >= self.packet_bytes:
+                await self.flush()
+                continue
+            n = min(total - pos, self.packet_bytes - self._fill)
+            self._buf[self._fill:self._fill + n] = src[pos:pos + n]
+            self._fill += n
+            pos += n
+        if self._fill >= self.packet_bytes:
+            await self.flush()
+
+    def _hold(self, chunk: bytes) -> None:
+        self.paused_bytes += len(chunk)
+        self._preroll.append(chunk)
+        self._preroll_size += len(chunk)
+        while self._preroll and self._preroll_size - len(self._preroll[0]) >= self._preroll_bytes:
+            self._preroll_size -= len(self._preroll.popleft())
+
+    def _clear_preroll(self) -> None:
+        self._preroll.clear()
+        self._preroll_size = 0
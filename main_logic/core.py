@@ -15,15 +15,30 @@ from websockets import exceptions as web_exceptions
 from fastapi import WebSocket, WebSocketDisconnect
 from utils.frontend_utils import contains_chinese, replace_blank, replace_corner_mark, remove_bracket, \
     is_only_punctuation
-from utils.screenshot_utils import process_screen_data
+from utils.screenshot_utils import process_screen_frame
 from main_logic.omni_realtime_client import OmniRealtimeClient
 from main_logic.omni_offline_client import OmniOfflineClient
 from main_logic.tts_client import get_tts_worker
-from config import MEMORY_SERVER_PORT, TOOL_SERVER_PORT
+from main_logic.tts_phrase_cache import with_phrase_cache
+from main_logic.tts_connection_pool import get_tts_pool, pool_key
+from main_logic.audio_replay import AudioReplayScheduler
+from main_logic.session_pool import RealtimeSessionPool
+from main_logic.stream_translation import StreamingTranslator
+from main_logic.text_coalescer import TextFrameCoalescer
+from config import (
+    HOT_SWAP_SETTLE_S,
+    MEMORY_SERVER_PORT,
+    TOOL_SERVER_PORT,
+    TTS_DOWNLINK_CODEC,
+    TTS_OPUS_BITRATE,
+    TTS_PHRASE_CACHE_ENABLED,
+    TTS_PHRASE_CACHE_WARM_PHRASES,
+)
 from utils.config_manager import get_config_manager
 from utils.api_config_loader import get_free_voices
 from utils.language_utils import normalize_language_code
-from threading import Thread
+from utils import metrics
+from utils.opus_downlink import OggOpusStreamEncoder, opus_available, pack_audio_frame
 from queue import Queue
 from uuid import uuid4
 import numpy as np
@@ -46,12 +61,24 @@ class LLMSessionManager:
         self.tts_request_queue = Queue()  # TTS request (线程队列)
         self.tts_response_queue = Queue()  # TTS response (线程队列)
         self.tts_thread = None  # TTS线程
+        self._tts_conn = None  # 从 TTS 连接池取得的 worker（结束时归还）
         # 流式音频重采样器（24kHz→48kHz）- 维护内部状态避免 chunk 边界不连续
         self.audio_resampler = soxr.ResampleStream(24000, 48000, 1, dtype='float32')
         self.lock = asyncio.Lock()  # 使用异步锁替代同步锁
         self.websocket_lock = None  # websocket操作的共享锁，由main_server设置
         self._screenshot_future: asyncio.Future | None = None
         self.current_speech_id = None
+        # 轮次分段计时（perf_counter 时间点），turn_id 即 current_speech_id
+        self._turn_started_at = None
+        self._tts_text_at = None
+        self._first_text_pending = False
+        self._first_audio_pending = False
+        # 下行 Opus 编码（TTS_DOWNLINK_CODEC == "opus"）：每个 speech_id 一个 Ogg 流
+        self._downlink_encoder: OggOpusStreamEncoder | None = None
+        self._downlink_speech_id = None
+        self._downlink_passthrough = False
+        self._downlink_tail_timer: asyncio.TimerHandle | None = None
+        self._downlink_tail_task: asyncio.Task | None = None
         self.emoji_pattern = re.compile(r'[^\w\u4e00-\u9fff\s>][^\w\u4e00-\u9fff\s]{2,}[^\w\u4e00-\u9fff\s<]', flags=re.UNICODE)
         self.emoji_pattern2 = re.compile("["
         u"\U0001F600-\U0001F64F"  # emoticons
@@ -59,7 +86,8 @@ class LLMSessionManager:
         u"\U0001F680-\U0001F6FF"  # transport & map symbols
         u"\U0001F1E0-\U0001F1FF"  # flags (iOS)
                            "]+", flags=re.UNICODE)
-        self.emotion_pattern = re.compile('<(.*?)>')
+        # 输出文本合帧：高速流式输出时把相邻 delta 合成一帧再发给前端/monitor
+        self._text_coalescer = TextFrameCoalescer(self._send_text_frame)
 
         self.lanlan_prompt = lanlan_prompt
         self.lanlan_name = lanlan_name
@@ -103,6 +131,8 @@ class LLMSessionManager:
         self.session_start_time = None
         self.pending_connector = None
         self.pending_session = None
+        self.session_pool = RealtimeSessionPool()  # 热切换备用会话：提前连接 + 增量同步
+        self._hot_swap_started_at = 0.0
         self.is_hot_swap_imminent = False
         self.tts_handler_task = None
         # 热切换相关变量
@@ -155,8 +185,9 @@ class LLMSessionManager:
         # 热切换音频缓存机制：确保热切换期间的用户输入语音不丢失
         self.hot_swap_audio_cache = []  # 热切换期间缓存的音频数据: [bytes, ...]
         self.hot_swap_cache_lock = asyncio.Lock()  # 保护热切换音频缓存的锁
-        self.is_flushing_hot_swap_cache = False  # 是否正在推送热切换缓存（推送期间新音频继续缓存）
-        self.HOT_SWAP_FLUSH_CHUNK_MULTIPLIER = 5  # 热切换后发送的chunk大小倍数(节流)
+        self.is_flushing_hot_swap_cache = False  # 是否正在回放热切换缓存（回放期间新音频进入回放队列）
+        self._hot_swap_replay = None  # 回放调度器（AudioReplayScheduler），追平后置空
+        self._hot_swap_replay_task = None
         
         # 用户活动时间戳：用于主动搭话检测最近是否有用户输入
         self.last_user_activity_time = None  # float timestamp or None
@@ -165,6 +196,10 @@ class LLMSessionManager:
         self.user_language = 'zh-CN'  # 默认中文
         # 翻译服务（延迟初始化）
         self._translation_service = None
+        # 字幕流式翻译：前端打开字幕开关后，输出转录逐句翻译并以 subtitle_segment 推送
+        self.subtitle_translation_enabled = False
+        self._stream_translator = None
+        self._subtitle_turn = 0
         
         # 防止log刷屏机制
         self.session_closed_by_server = False  # Session被服务器关闭的标志
@@ -200,6 +235,9 @@ class LLMSessionManager:
         # 重置音频重采样器状态（新轮次音频不应与上轮次连续）
         self.audio_resampler.clear()
         await self._clear_tts_pipeline()
+        # 已生成的文本照常发完；被打断的那轮不再推送字幕译文（已结束的轮次不受影响）
+        await self._text_coalescer.flush(final=True)
+        self._cancel_stream_translation()
         
         await self.send_user_activity()
         
@@ -208,6 +246,18 @@ class LLMSessionManager:
         # 新回复的 audio_chunk 也不会被错误丢弃
         async with self.lock:
             self.current_speech_id = str(uuid4())
+        self._begin_turn_metrics()
+
+    def _begin_turn_metrics(self):
+        """用户一轮输入结束，开始计时首字/首音频。"""
+        self._turn_started_at = time.perf_counter()
+        self._tts_text_at = None
+        self._first_text_pending = True
+        self._first_audio_pending = True
+
+    def _mark_tts_text(self):
+        if self._tts_text_at is None:
+            self._tts_text_at = time.perf_counter()
 
     async def handle_text_data(self, text: str, is_first_chunk: bool = False):
         """文本回调：处理文本显示和TTS（用于文本模式）"""
@@ -236,6 +286,7 @@ class LLMSessionManager:
                     # TTS已就绪，直接发送
                     try:
                         self.tts_request_queue.put((self.current_speech_id, text))
+                        self._mark_tts_text()
                     except Exception as e:
                         logger.warning(f"⚠️ 发送TTS请求失败: {e}")
                 else:
@@ -251,7 +302,8 @@ class LLMSessionManager:
         if self._is_warmup_in_progress:
             logger.debug("⏭️ 跳过预热期间的TTS信号发送")
             # 仍然发送 turn end 消息（不影响其他逻辑）
-            self.sync_message_queue.put({'type': 'system', 'data': 'turn end'})
+            await self._text_coalescer.flush(final=True)
+            self.sync_message_queue.put({'type': 'system', 'data': 'turn end', 'turn_id': self.current_speech_id})
             return
         
         if self.use_tts and self.tts_thread and self.tts_thread.is_alive():
@@ -260,7 +312,8 @@ class LLMSessionManager:
                 self.tts_request_queue.put((None, None))
             except Exception as e:
                 logger.warning(f"⚠️ 发送TTS结束信号失败: {e}")
-        self.sync_message_queue.put({'type': 'system', 'data': 'turn end'})
+        await self._flush_text_turn()
+        self.sync_message_queue.put({'type': 'system', 'data': 'turn end', 'turn_id': self.current_speech_id})
         
         # 直接向前端发送turn end消息
         try:
@@ -289,29 +342,32 @@ class LLMSessionManager:
                 if has_extra and not self.is_preparing_new_session:
                     await self._trigger_immediate_preparation_for_extra()
 
-                # 3. 后台预热（10s 延迟，适用于定时触发路径；
-                #    即时路径由 _trigger_immediate_preparation_for_extra 在内部直接启动，不走这里）
+                # 3. 后台预热：从触发时刻起等 HOT_SWAP_SETTLE_S（记忆归档整理历史）后立即连接备用会话，
+                #    不再等到那之后的某个轮次结束才开始；即时路径由 _trigger_immediate_preparation_for_extra 直接启动
                 if self.is_preparing_new_session and \
                         self.summary_triggered_time and \
-                        (datetime.now() - self.summary_triggered_time).total_seconds() >= 10 and \
                         (not self.background_preparation_task or self.background_preparation_task.done()) and \
                         not (self.pending_session_warmed_up_event and self.pending_session_warmed_up_event.is_set()):
-                    logger.info(f"[{self.lanlan_name}] Main Listener: Conditions met to start BACKGROUND PREPARATION of pending session.")
+                    elapsed = (datetime.now() - self.summary_triggered_time).total_seconds()
+                    logger.info(f"[{self.lanlan_name}] Main Listener: Scheduling BACKGROUND PREPARATION of pending session.")
                     self.pending_session_warmed_up_event = asyncio.Event()
-                    self.background_preparation_task = asyncio.create_task(self._background_prepare_pending_session())
+                    self.background_preparation_task = asyncio.create_task(
+                        self._background_prepare_pending_session(delay=max(0.0, HOT_SWAP_SETTLE_S - elapsed)))
 
-                # 4. 后台预热完成 + 当前轮次结束 → 执行最终热切换
+                # 4. 备用会话已连好：把本轮新增的对话增量同步过去；用户没在说话（轮次边界）时执行最终热切换
                 elif self.pending_session_warmed_up_event and \
-                        self.pending_session_warmed_up_event.is_set() and \
-                        not self.is_hot_swap_imminent and \
-                        (not self.final_swap_task or self.final_swap_task.done()):
-                    logger.info(
-                        "Main Listener: OLD session completed a turn & PENDING session is warmed up. Triggering FINAL SWAP sequence.")
-                    self.is_hot_swap_imminent = True
-                    self.pending_session_final_prime_complete_event = asyncio.Event()
-                    self.final_swap_task = asyncio.create_task(
-                        self._perform_final_swap_sequence()
-                    )
+                        self.pending_session_warmed_up_event.is_set():
+                    self.session_pool.sync(self.message_cache_for_new_session)
+                    if (not self.final_swap_task or self.final_swap_task.done()) and \
+                            not getattr(self.session, '_audio_in_buffer', False):
+                        logger.info(
+                            "Main Listener: OLD session completed a turn & PENDING session is warmed up. Triggering FINAL SWAP sequence.")
+                        self.is_hot_swap_imminent = True
+                        self.pending_session_final_prime_complete_event = asyncio.Event()
+                        self._hot_swap_started_at = time.perf_counter()
+                        self.final_swap_task = asyncio.create_task(
+                            self._perform_final_swap_sequence()
+                        )
             except Exception as e:
                 logger.error(f"💥 Hot-swap preparation error: {e}")
 
@@ -326,6 +382,8 @@ class LLMSessionManager:
         logger.warning(f"[{self.lanlan_name}] 响应异常已丢弃 (reason={reason}, attempt={attempt}/{max_attempts}, will_retry={will_retry})")
         
         await self._clear_tts_pipeline()
+        self._text_coalescer.discard()
+        self._cancel_stream_translation()
         
         if self.websocket and hasattr(self.websocket, 'client_state') and \
                 self.websocket.client_state == self.websocket.client_state.CONNECTED:
@@ -413,6 +471,7 @@ class LLMSessionManager:
                     # TTS已就绪，直接发送
                     try:
                         self.tts_request_queue.put((self.current_speech_id, text))
+                        self._mark_tts_text()
                     except Exception as e:
                         logger.warning(f"⚠️ 发送TTS请求失败: {e}")
                 else:
@@ -422,13 +481,16 @@ class LLMSessionManager:
                         logger.info("TTS未就绪，开始缓存文本chunk...")
 
     async def send_lanlan_response(self, text: str, is_first_chunk: bool = False):
-        """Qwen输出转录回调：可用于前端显示/缓存/同步。"""
+        """Qwen输出转录回调：可用于前端显示/缓存/同步。相邻 delta 由 TextFrameCoalescer 合成一帧。"""
+        if self._first_text_pending and self._turn_started_at is not None:
+            self._first_text_pending = False
+            metrics.record_span("turn.first_text", time.perf_counter() - self._turn_started_at, self.current_speech_id)
+        await self._text_coalescer.push(text, is_first_chunk)
+
+    async def _send_text_frame(self, text: str, is_first_chunk: bool):
+        """发送一帧合并后的输出文本（情绪标签已由合帧器清理）。"""
         try:
             if self.websocket and hasattr(self.websocket, 'client_state') and self.websocket.client_state == self.websocket.client_state.CONNECTED:
-                # 去掉情绪标签
-                text = self.emotion_pattern.sub('', text)
-                
-
                 message = {
                     "type": "gemini_response",
                     "text": text,  
@@ -436,6 +498,8 @@ class LLMSessionManager:
                 }
                 await self.websocket.send_json(message)
                 self.sync_message_queue.put({"type": "json", "data": message})
+                if self.subtitle_translation_enabled:
+                    self._feed_stream_translation(text, is_first_chunk)
                 if hasattr(self, 'is_preparing_new_session') and self.is_preparing_new_session:
                     if not hasattr(self, 'message_cache_for_new_session'):
                         self.message_cache_for_new_session = []
@@ -549,6 +613,7 @@ class LLMSessionManager:
         self.final_swap_task = None
         self.pending_session_warmed_up_event = None
         self.pending_session_final_prime_complete_event = None
+        self.session_pool.reset()
 
         if clear_main_cache:
             self.message_cache_for_new_session = []
@@ -566,6 +631,7 @@ class LLMSessionManager:
                 logger.error(f"💥 清理pending_session时出错: {e}")
             finally:
                 self.pending_session = None  # 即使close失败也要清除引用
+        self.session_pool.reset()
 
     def _init_renew_status(self):
         self._reset_preparation_state(True)
@@ -583,6 +649,7 @@ class LLMSessionManager:
             logger.info(f"TTS就绪，开始处理缓存的 {chunk_count} 个文本chunk...")
             
             if self.tts_thread and self.tts_thread.is_alive():
+                self._mark_tts_text()
                 for speech_id, text in self.tts_pending_chunks:
                     try:
                         self.tts_request_queue.put((speech_id, text))
@@ -612,75 +679,44 @@ class LLMSessionManager:
             # 清空缓存
             self.pending_input_data.clear()
     
-    async def _flush_hot_swap_audio_cache(self):
-        """热切换完成后，循环推送缓存的音频数据到新session，直到缓存稳定为空"""
-        # 设置标志，让新的音频继续缓存而不是直接发送
+    def _start_hot_swap_replay(self):
+        """热切换完成后，把缓存的音频交给回放调度器按节奏送入新session（不阻塞 swap 其余步骤）"""
+        if not self.session or not self.is_active or not isinstance(self.session, OmniRealtimeClient):
+            if self.hot_swap_audio_cache:
+                logger.warning("⚠️ 热切换音频缓存仅适用于语音模式的活跃session，丢弃缓存")
+            self.hot_swap_audio_cache.clear()
+            return
+        if not self.hot_swap_audio_cache:
+            return
+
+        replay = AudioReplayScheduler(self.session.stream_audio)
+        # 同步完成交接：此后新到的音频直接进入回放队列，排在积压之后
+        for chunk in self.hot_swap_audio_cache:
+            replay.feed(chunk)
+        self.hot_swap_audio_cache.clear()
+        self._hot_swap_replay = replay
         self.is_flushing_hot_swap_cache = True
-        
+        logger.info(f"🔄 开始回放热切换音频缓存: {replay.queued_seconds:.1f}s（裁掉静音 {replay.trimmed_seconds:.1f}s）")
+        self._hot_swap_replay_task = asyncio.create_task(self._flush_hot_swap_audio_cache(replay))
+
+    async def _flush_hot_swap_audio_cache(self, replay: AudioReplayScheduler):
+        """回放直到追平实时输入；swap 收尾期间（is_hot_swap_imminent）继续接住实时音频"""
+
+        def caught_up():
+            self._hot_swap_replay = None
+            self.is_flushing_hot_swap_cache = False
+
         try:
-            # 检查session是否可用
-            if not self.session or not self.is_active:
-                logger.warning("⚠️ 热切换音频缓存刷新时session不可用，丢弃缓存")
-                async with self.hot_swap_cache_lock:
-                    self.hot_swap_audio_cache.clear()
-                return
-            
-            # 检查session类型
-            if not isinstance(self.session, OmniRealtimeClient):
-                logger.warning("⚠️ 热切换音频缓存仅适用于语音模式，当前session类型不匹配")
-                async with self.hot_swap_cache_lock:
-                    self.hot_swap_audio_cache.clear()
-                return
-            
-            max_iterations = 20  # 最多迭代20次，防止无限循环
-            iteration = 0
-            total_chunks_sent = 0
-            
-            logger.info("🔄 开始循环推送热切换音频缓存...")
-            
-            while iteration < max_iterations:
-                # 检查并取出当前缓存
-                async with self.hot_swap_cache_lock:
-                    cache_len = len(self.hot_swap_audio_cache)
-                    
-                    if cache_len == 0:
-                        break
-                    else:
-                        audio_chunks = self.hot_swap_audio_cache.copy()
-                        self.hot_swap_audio_cache.clear()
-                
-                # 如果有缓存，合并并发送
-                if cache_len > 0:
-                    logger.info(f"🔄 推送第{iteration+1}批音频缓存: {cache_len} 个chunk")
-                    
-                    # 合并小chunk成大chunk（节流）
-                    combined_audio = b''.join(audio_chunks)
-                    
-                    # 计算每个大chunk的大小（16kHz，约10ms = 160 samples = 320 bytes）
-                    original_chunk_size = 320  # 16kHz: 160 samples × 2 bytes
-                    large_chunk_size = original_chunk_size * self.HOT_SWAP_FLUSH_CHUNK_MULTIPLIER
-                    
-                    # 分批发送
-                    for i in range(0, len(combined_audio), large_chunk_size):
-                        chunk = combined_audio[i:i + large_chunk_size]
-                        try:
-                            await self.session.stream_audio(chunk)
-                            await asyncio.sleep(0.025)
-                            total_chunks_sent += 1
-                        except Exception as e:
-                            logger.error(f"💥 推送音频缓存失败: {e}")
-                            return  # 推送失败，放弃
-                
-                iteration += 1
-                
-            if iteration >= max_iterations:
-                logger.warning(f"⚠️ 达到最大迭代次数({max_iterations})，停止推送")
-            
-            logger.info(f"✅ 热切换音频缓存推送完成，共推送约 {total_chunks_sent} 个大chunk，迭代 {iteration} 次")
-            
+            catch_up = await replay.run(on_caught_up=caught_up, hold=lambda: self.is_hot_swap_imminent)
+            logger.info(f"✅ 热切换音频缓存回放完成: 发送 {replay.sent_seconds:.1f}s 音频，"
+                        f"裁掉静音 {replay.trimmed_seconds:.1f}s，追平用时 {catch_up:.2f}s")
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"💥 推送音频缓存失败: {e}")
         finally:
             # 无论如何都要清除flag，恢复正常音频输入
-            self.is_flushing_hot_swap_cache = False
+            caught_up()
 
     
     def _is_preset_voice_id(self, voice_id: str) -> bool:
@@ -824,12 +860,13 @@ class LLMSessionManager:
         if not self.use_tts and self.tts_thread and self.tts_thread.is_alive():
             logger.info("当前模式不需要TTS，关闭TTS线程")
             try:
-                self.tts_request_queue.put((None, None))  # 通知线程退出
+                get_tts_pool().release(self._tts_conn)  # 通知线程退出
                 self.tts_thread.join(timeout=1.0)  # 等待线程结束
             except Exception as e:
                 logger.error(f"关闭TTS线程时出错: {e}")
             finally:
                 self.tts_thread = None
+                self._tts_conn = None
 
         # 定义 TTS 启动协程（如果需要）
         async def start_tts_if_needed():
@@ -852,20 +889,24 @@ class LLMSessionManager:
                     has_custom_voice=has_custom_tts
                 )
                 
-                self.tts_request_queue = Queue()  # TTS request (线程队列)
-                self.tts_response_queue = Queue()  # TTS response (线程队列)
                 # 根据是否有自定义音色/TTS配置选择 TTS API 配置
                 # 免费预设音色使用 tts_default（走 step/free TTS 通道）
                 if has_custom_tts:
                     tts_config = self._config_manager.get_model_api_config('tts_custom')
                 else:
                     tts_config = self._config_manager.get_model_api_config('tts_default')
-                self.tts_thread = Thread(
-                    target=tts_worker,
-                    args=(self.tts_request_queue, self.tts_response_queue, tts_config['api_key'], self.voice_id)
-                )
-                self.tts_thread.daemon = True
-                self.tts_thread.start()
+                voice_params = {"base_url": tts_config.get('base_url') or '', "model": tts_config.get('model') or ''}
+                key = pool_key(tts_worker, tts_config['api_key'], self.voice_id, voice_params)
+                if TTS_PHRASE_CACHE_ENABLED:
+                    warm_phrases = self.lanlan_basic_config.get(self.lanlan_name, {}).get('tts_warm_phrases')
+                    warm_phrases = warm_phrases if isinstance(warm_phrases, list) else TTS_PHRASE_CACHE_WARM_PHRASES
+                    tts_worker = with_phrase_cache(tts_worker, voice_params=voice_params, warm_phrases=warm_phrases)
+                    key += ("phrase_cache", tuple(warm_phrases))
+                # 从连接池取 worker 线程：有预热好的直接用，否则现起（线程已启动）
+                self._tts_conn = get_tts_pool().acquire(key, tts_worker, tts_config['api_key'], self.voice_id)
+                self.tts_request_queue = self._tts_conn.request_queue  # TTS request (线程队列)
+                self.tts_response_queue = self._tts_conn.response_queue  # TTS response (线程队列)
+                self.tts_thread = self._tts_conn.thread
                 
                 # 等待TTS进程发送就绪信号（最多等待8秒）
                 tts_type = "free-preset-TTS" if self._is_free_preset_voice else ("custom-TTS" if has_custom_tts else f"{self.core_api_type}-default-TTS")
@@ -1223,11 +1264,13 @@ class LLMSessionManager:
         except Exception:
             return ""
 
-    async def _background_prepare_pending_session(self):
-        """[热切换相关] 后台预热pending session"""
+    async def _background_prepare_pending_session(self, delay: float = 0.0):
+        """[热切换相关] 等 delay 秒（记忆归档整理历史）后在后台连接 pending session，交给 session_pool 增量同步"""
 
         # 2. Create PENDING session components (as before, store in self.pending_connector, self.pending_session)
         try:
+            if delay > 0:
+                await asyncio.sleep(delay)
             # 重新读取配置以支持热重载
             # core_api_type 从 realtime 配置获取，支持自定义 realtime API 时自动设为 'local'
             realtime_config = self._config_manager.get_model_api_config('realtime')
@@ -1304,15 +1347,18 @@ class LLMSessionManager:
             
             initial_prompt = (f"你是一个角色扮演大师，并且精通电脑操作。请按要求扮演以下角色（{self.lanlan_name}），在对方请求时、回答“我试试”并尝试操纵电脑。" if self._is_agent_enabled() else f"你是一个角色扮演大师。请按要求扮演以下角色（{self.lanlan_name}）。") + self.lanlan_prompt
             initial_prompt += await self._fetch_active_agent_tasks_prompt()
-            self.initial_cache_snapshot_len = len(self.message_cache_for_new_session)
+            cache = self.message_cache_for_new_session
+            self.initial_cache_snapshot_len = len(cache)
             async with httpx.AsyncClient() as client:
                 resp = await client.get(f"http://127.0.0.1:{self.memory_server_port}/new_dialog/{self.lanlan_name}")
-                initial_prompt += resp.text + self._convert_cache_to_str(self.message_cache_for_new_session)
+                initial_prompt += resp.text + self._convert_cache_to_str(cache[:self.initial_cache_snapshot_len])
+            initial_prompt += f"========以上为前情概要。现在请{self.lanlan_name}准备，即将开始用语音与{self.master_name}继续对话。========\n"
             # print(initial_prompt)
-            await self.pending_session.connect(initial_prompt, native_audio = not self.use_tts)
+            # 快照之后结束的轮次由 session_pool 在每轮结束时增量同步，切换时不再补发前情概要
+            await self.session_pool.warm(self.pending_session, initial_prompt, not self.use_tts,
+                                         cache[:self.initial_cache_snapshot_len])
+            self.session_pool.sync(self.message_cache_for_new_session)
 
-            # 4. Start temporary listener for PENDING session's *first* ignored response
-            #    and wait for it to complete.
             if self.pending_session_warmed_up_event:
                 self.pending_session_warmed_up_event.set() 
 
@@ -1447,7 +1493,8 @@ class LLMSessionManager:
                 pass
 
         # Turn-end (mirrors proactive_chat — does NOT trigger hot-swap)
-        self.sync_message_queue.put({'type': 'system', 'data': 'turn end'})
+        await self._flush_text_turn()
+        self.sync_message_queue.put({'type': 'system', 'data': 'turn end', 'turn_id': self.current_speech_id})
         try:
             if (
                 self.websocket
@@ -1542,7 +1589,8 @@ class LLMSessionManager:
             except Exception:
                 pass
 
-        self.sync_message_queue.put({'type': 'system', 'data': 'turn end'})
+        await self._flush_text_turn()
+        self.sync_message_queue.put({'type': 'system', 'data': 'turn end', 'turn_id': self.current_speech_id})
         try:
             if (self.websocket
                     and hasattr(self.websocket, 'client_state')
@@ -1680,40 +1728,23 @@ class LLMSessionManager:
             self.is_hot_swap_imminent = False
             return
         
-        # 检查pending_session的websocket是否有效
-        if isinstance(self.pending_session, OmniRealtimeClient):
-            if not hasattr(self.pending_session, 'ws') or not self.pending_session.ws:
-                logger.error("💥 Final Swap Sequence: Pending session的WebSocket已关闭，放弃swap操作")
-                await self._cleanup_pending_session_resources()
-                self._reset_preparation_state(clear_main_cache=True)
-                self.is_hot_swap_imminent = False
-                return
-            
-            # 检查是否发生致命错误
-            if hasattr(self.pending_session, '_fatal_error_occurred') and self.pending_session._fatal_error_occurred:
-                logger.error("💥 Final Swap Sequence: Pending session已发生致命错误，放弃swap操作")
+        try:
+            # 备用会话的上下文已在每轮结束时增量同步，这里只等剩余的增量发完并确认连接可用
+            if await self.session_pool.take() is not self.pending_session:
+                logger.error("💥 Final Swap Sequence: Pending session不可用（连接已关闭/致命错误/同步失败），放弃swap操作")
                 await self._cleanup_pending_session_resources()
                 self._reset_preparation_state(clear_main_cache=True)
                 self.is_hot_swap_imminent = False
                 return
 
-        try:
-            incremental_cache = self.message_cache_for_new_session[self.initial_cache_snapshot_len:]
-            # 1. Send incremental cache (or a heartbeat) to PENDING session for its *second* ignored response
-            if incremental_cache:
-                final_prime_text = self._convert_cache_to_str(incremental_cache)
-            else:  # Ensure session cycles a turn even if no incremental cache
-                final_prime_text = ""  # Initialize to empty string to prevent NameError
-                logger.debug(f"🔄 No incremental cache found. 缓存长度: {len(self.message_cache_for_new_session)}, 快照长度: {self.initial_cache_snapshot_len}")
-
-            # 若存在需要植入的额外提示，则指示模型忽略上一条消息，并在下一次响应中统一向用户补充这些提示
+            # 若存在需要植入的额外提示，则让新session在切换后第一轮统一向用户补充这些提示
             if self.pending_extra_replies and len(self.pending_extra_replies) > 0:
                 try:
                     items = "\n".join([f"- {txt}" for txt in self.pending_extra_replies if isinstance(txt, str) and txt.strip()])
                 except Exception:
                     items = ""
-                final_prime_text += (
-                    f"\n========以上为前情概要。请{self.lanlan_name}先用简洁自然的一段话向{self.master_name}汇报和解释先前执行的任务的结果，简要说明自己做了什么：\n"
+                final_prime_text = (
+                    f"\n========请{self.lanlan_name}先用简洁自然的一段话向{self.master_name}汇报和解释先前执行的任务的结果，简要说明自己做了什么：\n"
                     + items +
                     "\n完成上述汇报后，再恢复正常对话。========\n"
                 )
@@ -1728,21 +1759,8 @@ class LLMSessionManager:
                     self._reset_preparation_state(clear_main_cache=True)
                     self.is_hot_swap_imminent = False
                     return
-            else:
-                final_prime_text += f"========以上为前情概要。现在请{self.lanlan_name}准备，即将开始用语音与{self.master_name}继续对话。========\n"
-                try:
-                    await self.pending_session.create_response(final_prime_text, skipped=True)
-                except (web_exceptions.ConnectionClosed, AttributeError) as e:
-                    # pending_session 连接已关闭或websocket为None，放弃整个 swap 操作
-                    logger.error(f"💥 Final Swap Sequence: pending_session不可用，放弃swap操作: {e}")
-                    await self._cleanup_pending_session_resources()
-                    self._reset_preparation_state(clear_main_cache=True)
-                    self.is_hot_swap_imminent = False
-                    return
+                print(final_prime_text) #只在控制台显示，不输出到日志文件
 
-            print(final_prime_text) #只在控制台显示，不输出到日志文件
-
-            # 2. Start temporary listener for PENDING session's *second* ignored response
             if self.pending_session_final_prime_complete_event:
                 self.pending_session_final_prime_complete_event.set()
 
@@ -1752,16 +1770,24 @@ class LLMSessionManager:
             old_main_message_handler_task = self.message_handler_task
             
             # 执行session切换
-            # 热切换完成后，立即将缓存的音频数据发送到新session
-            await self._flush_hot_swap_audio_cache()
             self.session = self.pending_session
             self.session_start_time = datetime.now()
+            # 旧session合包缓冲里没发出去的音频排在缓存最前面，一起回放给新session
+            if isinstance(old_main_session, OmniRealtimeClient):
+                unsent = old_main_session.take_unsent_audio()
+                if unsent:
+                    self.hot_swap_audio_cache.insert(0, unsent)
+            # 热切换完成后，立即开始把缓存的音频数据回放到新session
+            self._start_hot_swap_replay()
+            metrics.record_span("hot_swap.gap", time.perf_counter() - self._hot_swap_started_at)
             
             # !!CRITICAL!! 立即清除pending_session引用，防止异常处理器误关闭新session
             # 此时self.session和self.pending_session指向同一对象（新session）
             # 如果在此之后发生异常，_cleanup_pending_session_resources()会关闭pending_session
             # 导致新session的websocket被关闭，引发 'NoneType' object has no attribute 'send' 错误
             self.pending_session = None
+            # 新session已就位：回放追平后实时音频直接进新session，不必等下面关闭旧session
+            self.is_hot_swap_imminent = False
 
             # Start the main listener for the NEWLY PROMOTED self.session
             if self.session and hasattr(self.session, 'handle_messages'):
@@ -1952,6 +1978,7 @@ class LLMSessionManager:
                     # 为每次文本输入生成新的speech_id（用于TTS和lipsync）
                     async with self.lock:
                         self.current_speech_id = str(uuid4())
+                    self._begin_turn_metrics()
 
                     await self.send_user_activity()
 
@@ -2030,8 +2057,13 @@ class LLMSessionManager:
                                     logger.error(f"💥 音频预处理失败: {e}")
                                     return
                         
-                        # 热切换期间或推送缓存期间，缓存处理后的音频（16kHz，已降噪）
-                        if self.is_hot_swap_imminent or self.is_flushing_hot_swap_cache:
+                        # 回放热切换缓存期间，新音频排在积压之后由调度器发送
+                        if self._hot_swap_replay is not None:
+                            self._hot_swap_replay.feed(processed_audio)
+                            return
+
+                        # 热切换期间，缓存处理后的音频（16kHz，已降噪）
+                        if self.is_hot_swap_imminent:
                             async with self.hot_swap_cache_lock:
                                 self.hot_swap_audio_cache.append(processed_audio)
                                 if len(self.hot_swap_audio_cache) == 1:
@@ -2094,14 +2126,15 @@ class LLMSessionManager:
 
             elif input_type in ['screen', 'camera']:
                 try:
-                    # 使用统一的屏幕分享工具处理数据（只验证，不缩放）
-                    image_b64 = await process_screen_data(data)
+                    # 使用统一的屏幕分享工具处理数据（只验证，不缩放；在线程池中计算感知哈希）
+                    frame = await process_screen_frame(data)
                     
-                    if image_b64:
+                    if frame:
+                        image_b64 = frame.b64
                         # 如果是文本模式（OmniOfflineClient），只存储图片，不立即发送
                         if isinstance(self.session, OmniOfflineClient):
                             # 只添加到待发送队列，等待与文本一起发送
-                            await self.session.stream_image(image_b64)
+                            await self.session.stream_image(image_b64, frame=frame)
                         
                         # 如果是语音模式（OmniRealtimeClient），检查是否支持视觉并直接发送
                         elif isinstance(self.session, OmniRealtimeClient):
@@ -2111,7 +2144,7 @@ class LLMSessionManager:
                                 return
                             
                             # 语音模式直接发送图片
-                            await self.session.stream_image(image_b64)
+                            await self.session.stream_image(image_b64, frame=frame)
                     else:
                         logger.error("💥 Stream: 屏幕数据验证失败")
                         return
@@ -2170,6 +2203,12 @@ class LLMSessionManager:
             finally:
                 # 清空 session 引用，防止后续使用错误的 session 类型
                 self.session = None
+        if self._hot_swap_replay_task and not self._hot_swap_replay_task.done():
+            self._hot_swap_replay_task.cancel()
+        self._hot_swap_replay_task = None
+        self._text_coalescer.discard()
+        self._cancel_stream_translation()
+
         # 关闭TTS子进程和相关任务
         if self.tts_handler_task and not self.tts_handler_task.done():
             self.tts_handler_task.cancel()
@@ -2181,12 +2220,13 @@ class LLMSessionManager:
             
         if self.tts_thread and self.tts_thread.is_alive():
             try:
-                self.tts_request_queue.put((None, None))  # 通知线程退出
+                get_tts_pool().release(self._tts_conn)  # 通知线程退出
                 self.tts_thread.join(timeout=2.0)  # 等待线程结束
             except Exception as e:
                 logger.error(f"💥 关闭TTS线程时出错: {e}")
             finally:
                 self.tts_thread = None
+                self._tts_conn = None
                 
         # 清理TTS队列和缓存状态
         try:
@@ -2276,6 +2316,62 @@ class LLMSessionManager:
 
         # 文本模式下无需额外同步改写提示语言（已移除 rewrite 逻辑）
     
+    def set_subtitle_translation(self, enabled: bool):
+        """前端字幕开关：打开后输出转录逐句流式翻译，关闭时丢弃进行中的译文。"""
+        self.subtitle_translation_enabled = bool(enabled)
+        if not self.subtitle_translation_enabled:
+            self._cancel_stream_translation()
+        logger.info(f"字幕流式翻译: {'开启' if self.subtitle_translation_enabled else '关闭'}")
+
+    def _feed_stream_translation(self, text: str, is_first_chunk: bool):
+        """把一段输出转录交给本轮的 StreamingTranslator；新消息开始时换一个。"""
+        if is_first_chunk or self._stream_translator is None:
+            self._finish_stream_translation()
+            self._subtitle_turn += 1
+            turn = self._subtitle_turn
+            lang = self.user_language
+
+            async def translate(sentence: str) -> str:
+                return await self._get_translation_service().translate_text_robust(sentence, lang)
+
+            async def emit(index: int, sentence: str, translated: str):
+                await self._send_subtitle_segment(turn, index, sentence, translated)
+
+            self._stream_translator = StreamingTranslator(translate, emit, lang)
+        self._stream_translator.feed(text)
+
+    def emotion_tags_for(self, text: str) -> list:
+        """text 正是最近一条回复时，返回模型在其中标注的情绪标签（合帧时去掉的 <...> 内容）；否则为空。"""
+        return self._text_coalescer.tags_for(text)
+
+    async def _flush_text_turn(self):
+        """turn end 之前：发完合帧器里剩下的文本，再收尾本轮字幕翻译。"""
+        await self._text_coalescer.flush(final=True)
+        self._finish_stream_translation()
+
+    def _finish_stream_translation(self):
+        """本轮输出结束：冲刷最后半句，已提交的译文在后台继续按顺序发出。"""
+        if self._stream_translator is not None:
+            self._stream_translator.finish()
+            self._stream_translator = None
+
+    def _cancel_stream_translation(self):
+        if self._stream_translator is not None:
+            self._stream_translator.cancel()
+            self._stream_translator = None
+
+    async def _send_subtitle_segment(self, turn: int, index: int, sentence: str, translated: str):
+        message = {
+            "type": "subtitle_segment",
+            "turn": turn,
+            "index": index,
+            "text": translated,
+            "original": sentence,
+        }
+        if self.websocket and hasattr(self.websocket, 'client_state') and self.websocket.client_state == self.websocket.client_state.CONNECTED:
+            await self.websocket.send_json(message)
+        self.sync_message_queue.put({"type": "json", "data": message})
+
     async def translate_if_needed(self, text: str) -> str:
         """
         如果需要，翻译文本（公开方法，供外部模块使用）
@@ -2410,13 +2506,30 @@ class LLMSessionManager:
         """发送语音数据到前端，先发送 speech_id 头信息用于精确打断控制"""
         try:
             if self.websocket and hasattr(self.websocket, 'client_state') and self.websocket.client_state == self.websocket.client_state.CONNECTED:
-                # 先发送 audio_chunk 头信息，包含 speech_id
-                await self.websocket.send_json({
-                    "type": "audio_chunk",
-                    "speech_id": self.current_speech_id
-                })
-                # 然后发送二进制音频数据
-                await self.websocket.send_bytes(tts_audio)
+                speech_id = self.current_speech_id
+                if self._first_audio_pending:
+                    self._first_audio_pending = False
+                    now = time.perf_counter()
+                    if self._turn_started_at is not None:
+                        metrics.record_span("turn.first_audio", now - self._turn_started_at, speech_id)
+                    if self._tts_text_at is not None:
+                        metrics.record_span("tts.first_audio", now - self._tts_text_at, speech_id)
+                frame = self._encode_downlink(speech_id, tts_audio)
+                if frame is not None:
+                    # Opus：speech_id 在帧头里，一帧搞定；主页面与 monitor 共用同一份编码结果
+                    if frame:
+                        with metrics.span("ws.send_speech", speech_id):
+                            await self.websocket.send_bytes(frame)
+                        self.sync_message_queue.put({"type": "binary", "data": frame})
+                    return
+                with metrics.span("ws.send_speech", speech_id):
+                    # 先发送 audio_chunk 头信息，包含 speech_id
+                    await self.websocket.send_json({
+                        "type": "audio_chunk",
+                        "speech_id": speech_id
+                    })
+                    # 然后发送二进制音频数据
+                    await self.websocket.send_bytes(tts_audio)
 
                 # 同步到同步服务器
                 self.sync_message_queue.put({"type": "binary", "data": tts_audio})
@@ -2425,6 +2538,47 @@ class LLMSessionManager:
         except Exception as e:
             logger.error(f"💥 WS Send Response Error: {e}")
 
+    def _encode_downlink(self, speech_id, pcm: bytes) -> bytes | None:
+        """按 TTS_DOWNLINK_CODEC 编码下行音频。返回 None 表示走原始 PCM 路径，b"" 表示数据不足一帧。"""
+        if TTS_DOWNLINK_CODEC != "opus" or not opus_available():
+            return None
+        if speech_id != self._downlink_speech_id or (self._downlink_encoder is None and not self._downlink_passthrough):
+            self._downlink_speech_id = speech_id
+            # CosyVoice 等 TTS 本身就输出 Ogg Opus：整段语音原样转发，只加帧头
+            self._downlink_passthrough = pcm[:4] == b"OggS"
+            self._downlink_encoder = None if self._downlink_passthrough else OggOpusStreamEncoder(TTS_OPUS_BITRATE, serial=uuid4().int)
+        if self._downlink_passthrough:
+            return pack_audio_frame(speech_id, pcm)
+        payload = self._downlink_encoder.encode(pcm)
+        # 不足 20ms 的尾巴：若短时间内没有后续音频（一句话说完），补静音发出
+        if self._downlink_tail_timer is not None:
+            self._downlink_tail_timer.cancel()
+            self._downlink_tail_timer = None
+        if self._downlink_encoder.pending_samples:
+            self._downlink_tail_timer = asyncio.get_running_loop().call_later(0.06, self._schedule_downlink_tail)
+        return pack_audio_frame(speech_id, payload) if payload else b""
+
+    def _schedule_downlink_tail(self):
+        self._downlink_tail_timer = None
+        self._downlink_tail_task = asyncio.create_task(self._flush_downlink_tail())
+
+    async def _flush_downlink_tail(self):
+        encoder, speech_id = self._downlink_encoder, self._downlink_speech_id
+        if encoder is None or speech_id != self.current_speech_id:
+            return  # 已被打断或换了新一轮，尾巴直接丢弃
+        payload = encoder.flush_tail()
+        if not payload:
+            return
+        frame = pack_audio_frame(speech_id, payload)
+        try:
+            if self.websocket and hasattr(self.websocket, 'client_state') and self.websocket.client_state == self.websocket.client_state.CONNECTED:
+                await self.websocket.send_bytes(frame)
+                self.sync_message_queue.put({"type": "binary", "data": frame})
+        except WebSocketDisconnect:
+            pass
+        except Exception as e:
+            logger.error(f"💥 WS Send Response Error: {e}")
+
     async def tts_response_handler(self):
         while True:
             while not self.tts_response_queue.empty():
@@ -19,6 +19,7 @@ import json
 import re
 from utils.frontend_utils import replace_blank, is_only_punctuation
 from main_logic.agent_event_bus import publish_analyze_request_reliably
+from utils.metrics import turn_headers
 
 # Setup logger for this module
 logger = logging.getLogger(__name__)
@@ -32,7 +33,7 @@ emoji_pattern2 = re.compile("["
 emotion_pattern = re.compile('<(.*?)>')
 
 
-async def _publish_analyze_request_with_fallback(lanlan_name: str, trigger: str, messages: list[dict]) -> bool:
+async def _publish_analyze_request_with_fallback(lanlan_name: str, trigger: str, messages: list[dict], turn_id: str | None = None) -> bool:
     """Publish analyze request via EventBus with ack/retry."""
     try:
         sent = await publish_analyze_request_reliably(
@@ -41,6 +42,7 @@ async def _publish_analyze_request_with_fallback(lanlan_name: str, trigger: str,
             messages=messages,
             ack_timeout_s=0.5,
             retries=1,
+            turn_id=turn_id,
         )
         if sent:
             logger.info(
@@ -292,6 +294,7 @@ def sync_connector_process(message_queue, shutdown_event, lanlan_name, sync_serv
 
                             if message["data"] == 'turn end': # lanlan的消息结束了
                                 current_turn = 'user'
+                                turn_id = message.get("turn_id")  # 与主服务 speech_id 一致，用于跨服务关联
                                 text_output_cache = normalize_text(text_output_cache)
                                 if len(text_output_cache) > 0:
                                     chat_history.append(
@@ -322,6 +325,7 @@ def sync_connector_process(message_queue, shutdown_event, lanlan_name, sync_serv
                                                 lanlan_name=lanlan_name,
                                                 trigger="turn_end",
                                                 messages=recent,
+                                                turn_id=turn_id,
                                             )
                                             if sent:
                                                 logger.info(f"[{lanlan_name}] analyze_request dispatch success (turn_end), messages={len(recent)}")
@@ -346,6 +350,7 @@ def sync_connector_process(message_queue, shutdown_event, lanlan_name, sync_serv
                                             async with session.post(
                                                 f"http://127.0.0.1:{MEMORY_SERVER_PORT}/cache/{lanlan_name}",
                                                 json={'input_history': json.dumps(new_messages, indent=2, ensure_ascii=False)},
+                                                headers=turn_headers(turn_id),
                                                 timeout=aiohttp.ClientTimeout(total=10.0)
                                             ) as response:
                                                 result = await response.json()
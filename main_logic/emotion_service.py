@@ -0,0 +1,309 @@
+"""
+情绪分析服务
+
+/api/emotion/analysis 原来每个请求新建一个 AsyncOpenAI 客户端、调一次 LLM。Live2D/VRM 表情每句话
+都会请求一次，大部分句子的情绪其实一眼就能看出来。EmotionService 分三层：
+- 本地快速判断：模型输出里的情绪标签（``<...>``，LLMSessionManager 合帧时已解析出来，只用于分析
+  该条回复本身）、emoji/颜文字、中英日情绪词典打分（跳过被否定的情绪词），置信度达到
+  EMOTION_LOCAL_MIN_CONFIDENCE 直接返回，不调 LLM
+- 结果缓存：按文本摘要缓存 EMOTION_CACHE_SIZE 条，相同文本正在分析时复用同一个请求
+- 微批：剩下的请求按 (api key, model, base_url) 分组，攒 EMOTION_BATCH_WINDOW_MS 毫秒或满
+  EMOTION_BATCH_MAX 条后合成一次 LLM 调用；只有一条时仍用原来的单条 prompt
+"""
+
+import asyncio
+import json
+import logging
+import re
+from collections import OrderedDict
+from hashlib import blake2b
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from config import (
+    EMOTION_BATCH_MAX,
+    EMOTION_BATCH_WINDOW_MS,
+    EMOTION_CACHE_SIZE,
+    EMOTION_LOCAL_MIN_CONFIDENCE,
+    get_extra_body,
+)
+from config.prompts_sys import emotion_analysis_batch_prompt, emotion_analysis_prompt
+
+logger = logging.getLogger(__name__)
+
+EMOTIONS = ("happy", "sad", "angry", "neutral", "surprised")
+
+# 情绪标签（模型自己标注的）→ 情绪
+_TAG_EMOTIONS = {
+    "happy": "happy", "joy": "happy", "开心": "happy", "高兴": "happy", "愉快": "happy", "喜悦": "happy",
+    "sad": "sad", "悲伤": "sad", "难过": "sad", "伤心": "sad",
+    "angry": "angry", "愤怒": "angry", "生气": "angry",
+    "surprised": "surprised", "surprise": "surprised", "惊讶": "surprised", "吃惊": "surprised",
+    "neutral": "neutral", "平静": "neutral", "中性": "neutral",
+}
+
+# 词典：(情绪, 权重)。同一位置按最长匹配，"不开心" 不会再算成 "开心"；
+# 前面紧挨着否定词的命中（"不要生气"、"别难过"）不计分，见 _NEGATED
+_LEXICON = {
+    "happy": {
+        "太好了": 2.0, "好开心": 2.0, "开心": 1.5, "高兴": 1.5, "哈哈": 1.5, "嘿嘿": 1.0, "嘻嘻": 1.0,
+        "喜欢": 1.0, "真棒": 1.5, "太棒了": 2.0, "好耶": 2.0, "谢谢": 1.0, "幸福": 1.5, "快乐": 1.5,
+        "元气满满": 1.5, "期待": 1.0, "欢迎回来": 1.0, "好呀": 1.0,
+        "happy": 1.5, "glad": 1.5, "great": 1.0, "awesome": 1.5, "love": 1.0, "yay": 2.0, "haha": 1.5,
+        "嬉しい": 2.0, "楽しい": 1.5, "やった": 2.0, "ありがとう": 1.0,
+    },
+    "sad": {
+        "不开心": 2.0, "难过": 2.0, "伤心": 2.0, "哭": 1.5, "呜呜": 2.0, "遗憾": 1.5, "失望": 1.5,
+        "孤单": 1.5, "寂寞": 1.5, "可惜": 1.0, "心疼": 1.5, "委屈": 1.5, "想你": 1.0, "抱歉": 1.0,
+        "sad": 1.5, "sorry": 1.0, "miss you": 1.0, "lonely": 1.5, "cry": 1.5,
+        "悲しい": 2.0, "寂しい": 1.5, "ごめん": 1.0,
+    },
+    "angry": {
+        "生气": 2.0, "气死": 2.0, "讨厌": 1.5, "烦死": 2.0, "可恶": 2.0, "哼": 1.5, "闭嘴": 2.0,
+        "过分": 1.5, "不许": 1.0, "笨蛋": 1.0,
+        "angry": 1.5, "annoying": 1.5, "hate": 1.5, "stupid": 1.0,
+        "怒": 1.5, "うるさい": 1.5, "ばか": 1.0,
+    },
+    "surprised": {
+        "哇": 1.5, "天哪": 2.0, "天啊": 2.0, "竟然": 1.5, "居然": 1.5, "真的吗": 1.5, "不会吧": 1.5,
+        "没想到": 1.5, "吓": 1.0, "诶": 1.0,
+        "wow": 2.0, "whoa": 2.0, "really?": 1.0, "omg": 2.0,
+        "えっ": 1.5, "まさか": 2.0, "すごい": 1.0,
+    },
+}
+
+# emoji / 颜文字
+_EMOJI = {
+    "happy": "😀😃😄😁😆😊☺🙂😍🥰😘😋😸😺🎉✨💕❤♪",
+    "sad": "😢😭😞😔😟🥺😿💔",
+    "angry": "😠😡🤬💢😾",
+    "surprised": "😮😯😲😱🙀❗‼",
+}
+_KAOMOJI = {
+    "happy": ("^_^", "^^", "^▽^", "(≧▽≦)", "ヾ(≧▽≦*)o", "OvO", "(*^▽^*)"),
+    "sad": ("QAQ", "QwQ", "T_T", "TAT", "T^T", "(╥﹏╥)", "orz"),
+    "angry": ("(╬", "(｀へ´)", "＞＿＜"),
+    "surprised": ("O_O", "o_O", "Σ(", "(⊙o⊙)"),
+}
+
+_LEXICON_PATTERN = re.compile("|".join(
+    re.escape(word) for word in sorted({w for words in _LEXICON.values() for w in words}, key=len, reverse=True)
+), flags=re.IGNORECASE)
+_WORD_EMOTION = {w.lower(): (emotion, weight) for emotion, words in _LEXICON.items() for w, weight in words.items()}
+_EMOJI_EMOTION = {ch: emotion for emotion, chars in _EMOJI.items() for ch in chars}
+_CODE_BLOCK = re.compile(r"```(?:json)?\s*(.+?)\s*```", flags=re.S)
+# 否定词之后、情绪词之前最多隔两个字（"不要生气"、"别再难过"、"不是很开心"），不跨标点；
+# "特别开心" 之类的 "别" 不是否定
+_NEGATED = re.compile(
+    r"(?:(?:[不没莫勿]|(?<![特分区告级])别)[^\s，。！？、,.!?~～]{0,2}|\b(?:not|don't|dont|never|no)\s+(?:\w+\s+)?)$",
+    flags=re.IGNORECASE,
+)
+_NEGATION_WINDOW = 12
+
+
+def classify_local(text: str, tags: Iterable[str] = ()) -> Tuple[str, float]:
+    """本地打分：返回 (情绪, 置信度)；没有明显线索时置信度较低。"""
+    for tag in tags:
+        emotion = _TAG_EMOTIONS.get(tag.strip().lower())
+        if emotion:
+            return emotion, 0.9
+    scores = dict.fromkeys(EMOTIONS, 0.0)
+    for match in _LEXICON_PATTERN.finditer(text):
+        if _NEGATED.search(text[max(0, match.start() - _NEGATION_WINDOW):match.start()]):
+            continue
+        emotion, weight = _WORD_EMOTION[match.group(0).lower()]
+        scores[emotion] += weight
+    for ch in text:
+        emotion = _EMOJI_EMOTION.get(ch)
+        if emotion:
+            scores[emotion] += 1.5
+    for emotion, marks in _KAOMOJI.items():
+        scores[emotion] += 1.5 * sum(1 for mark in marks if mark in text)
+    ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+    (top, top_score), (_, second_score) = ranked[0], ranked[1]
+    if top_score == 0:
+        return "neutral", 0.4
+    margin = top_score - second_score
+    return top, round(min(0.95, 0.4 + 0.2 * margin), 2)
+
+
+def parse_emotion_reply(result_text: str):
+    """解析 LLM 返回的 JSON（兼容 Gemini 的 markdown 代码块）。"""
+    result_text = result_text.strip()
+    code_block_match = _CODE_BLOCK.search(result_text)
+    if code_block_match:
+        result_text = code_block_match.group(1).strip()
+    elif result_text.startswith("```"):
+        lines = result_text.split("\n")
+        if lines[0].startswith("```"):
+            lines = lines[1:]
+        if lines and lines[-1].strip() == "```":
+            lines = lines[:-1]
+        result_text = "\n".join(lines).strip()
+    return json.loads(result_text)
+
+
+def _normalize_result(item) -> Optional[dict]:
+    if not isinstance(item, dict):
+        return None
+    try:
+        confidence = float(item.get("confidence", 0.5))
+    except (TypeError, ValueError):
+        confidence = 0.5
+    return {"emotion": item.get("emotion", "neutral"), "confidence": confidence}
+
+
+class _Batch:
+    __slots__ = ("items", "timer")
+
+    def __init__(self):
+        self.items: List[Tuple[str, str, asyncio.Future]] = []
+        self.timer: Optional[asyncio.Task] = None
+
+
+class EmotionService:
+    def __init__(self, call_llm: Optional[Callable[..., Awaitable[str]]] = None,
+                 batch_window: Optional[float] = None, batch_max: Optional[int] = None,
+                 cache_size: Optional[int] = None, min_confidence: Optional[float] = None):
+        self._call_llm = call_llm or self._call_openai
+        self.batch_window = EMOTION_BATCH_WINDOW_MS / 1000.0 if batch_window is None else batch_window
+        self.batch_max = max(1, EMOTION_BATCH_MAX if batch_max is None else batch_max)
+        self.cache_size = EMOTION_CACHE_SIZE if cache_size is None else cache_size
+        self.min_confidence = EMOTION_LOCAL_MIN_CONFIDENCE if min_confidence is None else min_confidence
+        self._cache: "OrderedDict[str, dict]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._batches: Dict[tuple, _Batch] = {}
+        self._clients: Dict[tuple, object] = {}
+        self.local_hits = 0
+        self.cache_hits = 0
+        self.llm_calls = 0
+
+    @staticmethod
+    def text_key(text: str) -> str:
+        return blake2b(text.strip().encode("utf-8"), digest_size=16).hexdigest()
+
+    def classify_local(self, text: str, tags: Iterable[str] = ()) -> Optional[dict]:
+        """本地判断足够有把握时返回结果，否则 None。"""
+        emotion, confidence = classify_local(text, tags)
+        if confidence >= self.min_confidence:
+            self.local_hits += 1
+            return {"emotion": emotion, "confidence": confidence, "source": "local"}
+        return None
+
+    def cached(self, text: str) -> Optional[dict]:
+        key = self.text_key(text)
+        result = self._cache.get(key)
+        if result is None:
+            return None
+        self._cache.move_to_end(key)
+        self.cache_hits += 1
+        return dict(result, source="cache")
+
+    async def analyze(self, text: str, api_key: str, model: str, base_url: Optional[str] = None,
+                      tags: Iterable[str] = ()) -> dict:
+        """本地 → 缓存 → 微批 LLM。LLM 调用失败时抛出异常，由调用方决定怎么回复。"""
+        local = self.classify_local(text, tags)
+        if local is not None:
+            return local
+        return await self.analyze_remote(text, api_key, model, base_url)
+
+    async def analyze_remote(self, text: str, api_key: str, model: str, base_url: Optional[str] = None) -> dict:
+        hit = self.cached(text)
+        if hit is not None:
+            return hit
+        key = self.text_key(text)
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._inflight[key] = future
+            self._enqueue((api_key, model, base_url), key, text, future)
+        else:
+            self.cache_hits += 1
+        result = await asyncio.shield(future)
+        return dict(result, source="llm")
+
+    def _enqueue(self, group: tuple, key: str, text: str, future: asyncio.Future) -> None:
+        batch = self._batches.get(group)
+        if batch is None:
+            batch = self._batches[group] = _Batch()
+        batch.items.append((key, text, future))
+        if len(batch.items) >= self.batch_max or self.batch_window <= 0:
+            self._batches.pop(group, None)
+            if batch.timer is not None:
+                batch.timer.cancel()
+            asyncio.create_task(self._run_batch(group, batch.items))
+        elif batch.timer is None:
+            batch.timer = asyncio.create_task(self._flush_later(group, batch))
+
+    async def _flush_later(self, group: tuple, batch: _Batch) -> None:
+        await asyncio.sleep(self.batch_window)
+        if self._batches.get(group) is batch:
+            self._batches.pop(group, None)
+            await self._run_batch(group, batch.items)
+
+    async def _run_batch(self, group: tuple, items: List[Tuple[str, str, asyncio.Future]]) -> None:
+        api_key, model, base_url = group
+        try:
+            self.llm_calls += 1
+            if len(items) == 1:
+                reply = await self._call_llm(api_key, model, base_url, emotion_analysis_prompt, items[0][1], 40)
+                parsed = [parse_emotion_reply(reply)]
+            else:
+                numbered = "\n".join(f"{i + 1}. {text}" for i, (_, text, _) in enumerate(items))
+                reply = await self._call_llm(api_key, model, base_url, emotion_analysis_batch_prompt,
+                                             numbered, 30 * len(items) + 20)
+                parsed = parse_emotion_reply(reply)
+                if not isinstance(parsed, list):
+                    parsed = [parsed]
+        except json.JSONDecodeError:
+            # 与原接口一致：解析失败给中性结果（不缓存）
+            parsed = []
+        except Exception as e:
+            for key, _, future in items:
+                self._inflight.pop(key, None)
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for i, (key, _, future) in enumerate(items):
+            self._inflight.pop(key, None)
+            result = _normalize_result(parsed[i]) if i < len(parsed) else None
+            if result is None:
+                result = {"emotion": "neutral", "confidence": 0.5}
+            else:
+                self._cache[key] = result
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            if not future.done():
+                future.set_result(result)
+
+    async def _call_openai(self, api_key: str, model: str, base_url: Optional[str],
+                           system_prompt: str, content: str, max_tokens: int) -> str:
+        from openai import AsyncOpenAI
+
+        client = self._clients.get((api_key, base_url))
+        if client is None:
+            client = self._clients[(api_key, base_url)] = AsyncOpenAI(api_key=api_key, base_url=base_url)
+        request_params = {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": content},
+            ],
+            "temperature": 0.3,
+            # Gemini 模型可能返回 markdown 格式，需要更多 token
+            "max_completion_tokens": max_tokens,
+        }
+        extra_body = get_extra_body(model)
+        if extra_body:
+            request_params["extra_body"] = extra_body
+        response = await client.chat.completions.create(**request_params)
+        return response.choices[0].message.content or ""
+
+
+_service: Optional[EmotionService] = None
+
+
+def get_emotion_service() -> EmotionService:
+    global _service
+    if _service is None:
+        _service = EmotionService()
+    return _service
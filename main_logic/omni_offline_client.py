@@ -2,12 +2,16 @@
 
 import asyncio
 import logging
+import time
 from typing import Optional, Callable, Dict, Any, Awaitable
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
 from openai import APIConnectionError, InternalServerError, RateLimitError
 from config import get_extra_body
-from utils.frontend_utils import calculate_text_similarity, count_words_and_chars
+from utils.frontend_utils import count_words_and_chars
+from utils.text_sketch import RepetitionIndex
+from utils.screenshot_utils import FrameDeduper, ScreenFrame
+from utils import metrics
 
 # Setup logger for this module
 logger = logging.getLogger(__name__)
@@ -100,12 +104,17 @@ class OmniOfflineClient:
         self._conversation_history = []
         self._instructions = ""
         self._stream_task = None
+        self._closed = False
         self._pending_images = []  # Store pending images to send with next text
+        self._frame_deduper = FrameDeduper()  # 画面未变化的帧不重复入队
         
         # 重复度检测
-        self._recent_responses = []  # 存储最近3轮助手回复
         self._repetition_threshold = 0.8  # 相似度阈值
         self._max_recent_responses = 3  # 最多存储的回复数
+        # 最近3轮助手回复的 MinHash 索引
+        self._recent_responses = RepetitionIndex(
+            capacity=self._max_recent_responses, threshold=self._repetition_threshold
+        )
         
         # ========== 普通对话守卫配置 ==========
         self.enable_response_guard = True     # 是否启用质量守卫
@@ -121,7 +130,12 @@ class OmniOfflineClient:
         self._conversation_history = [
             SystemMessage(content=instructions)
         ]
+        self._closed = False
         logger.info("OmniOfflineClient initialized with instructions")
+
+    def is_connected(self) -> bool:
+        """文本模式没有长连接：connect 之后、close 之前都可用。"""
+        return not self._closed
     
     async def send_event(self, event) -> None:
         """Compatibility method - not used in text mode"""
@@ -173,17 +187,8 @@ class OmniOfflineClient:
         如果连续3轮都高度重复，返回 True 并触发回调。
         """
         
-        # 与最近的回复比较相似度
-        high_similarity_count = 0
-        for recent in self._recent_responses:
-            similarity = calculate_text_similarity(response, recent)
-            if similarity >= self._repetition_threshold:
-                high_similarity_count += 1
-        
-        # 添加到最近回复列表
-        self._recent_responses.append(response)
-        if len(self._recent_responses) > self._max_recent_responses:
-            self._recent_responses.pop(0)
+        # 与最近的回复比较相似度，并加入滚动窗口
+        high_similarity_count = self._recent_responses.check_and_insert(response)
         
         # 如果与最近2轮都高度重复（即第3轮重复），触发检测
         if high_similarity_count >= 2:
@@ -305,6 +310,7 @@ class OmniOfflineClient:
                         fence_triggered = False  # 围栏是否已触发
                         guard_triggered = False
                         discard_reason = None
+                        stream_started = time.perf_counter()
                         
                         async for chunk in self.llm.astream(self._conversation_history):
                             if not self._is_responding:
@@ -327,6 +333,8 @@ class OmniOfflineClient:
                                             break
                                 
                                 if truncated_content and truncated_content.strip():
+                                    if is_first_chunk:
+                                        metrics.record_span("llm.first_token", time.perf_counter() - stream_started)
                                     assistant_message += truncated_content
                                     if self.on_text_delta:
                                         await self.on_text_delta(truncated_content, is_first_chunk)
@@ -418,16 +426,20 @@ class OmniOfflineClient:
         """Compatibility method - not used in text mode"""
         pass
     
-    async def stream_image(self, image_b64: str) -> None:
+    async def stream_image(self, image_b64: str, frame: Optional[ScreenFrame] = None) -> None:
         """
         Add an image to pending images queue.
         Images will be sent together with the next text message.
+        ``frame`` 提供时，与上一张入队图片相比画面未变化的帧会被跳过。
         """
         if not image_b64:
             return
+        if self._frame_deduper.is_duplicate(frame):
+            return
         
         # Store base64 image
         self._pending_images.append(image_b64)
+        self._frame_deduper.mark_sent(frame)
         logger.info(f"Added image to pending queue (total: {len(self._pending_images)})")
     
     def has_pending_images(self) -> bool:
@@ -446,7 +458,12 @@ class OmniOfflineClient:
         # Add as system message using langchain format
         if instructions.strip():
             self._conversation_history.append(SystemMessage(content=instructions))
-    
+
+    async def append_history(self, text: str) -> None:
+        """Append finished dialogue to the context without generating a reply."""
+        if text.strip():
+            self._conversation_history.append(SystemMessage(content=text))
+
     async def stream_proactive(self, instruction: str) -> bool:
         """Generate and stream a proactive AI response driven by a system instruction.
 
@@ -525,7 +542,9 @@ class OmniOfflineClient:
     
     async def close(self) -> None:
         """Close the client and cleanup resources."""
+        self._closed = True
         self._is_responding = False
         self._conversation_history = []
         self._pending_images.clear()
+        self._frame_deduper.reset()
         logger.info("OmniOfflineClient closed")
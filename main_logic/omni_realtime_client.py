@@ -4,16 +4,21 @@ import asyncio
 import websockets
 import json
 import base64
+import math
 import time
 import logging
 import numpy as np
 
 from typing import Optional, Callable, Dict, Any, Awaitable
 from enum import Enum
-from config import NATIVE_IMAGE_MIN_INTERVAL, IMAGE_IDLE_RATE_MULTIPLIER
+from config import NATIVE_IMAGE_MIN_INTERVAL, IMAGE_IDLE_RATE_MULTIPLIER, UPLINK_PAUSE_RMS
 from utils.config_manager import get_config_manager
 from utils.audio_processor import AudioProcessor
-from utils.frontend_utils import calculate_text_similarity
+from utils.audio_dsp_pool import get_audio_dsp_pool
+from utils.text_sketch import RepetitionIndex
+from utils.screenshot_utils import FrameDeduper, ScreenFrame
+from utils import metrics
+from main_logic.audio_uplink import AudioUplink, encode_append_event
 
 # Gemini Live API SDK
 try:
@@ -27,6 +32,10 @@ except ImportError:
 # Setup logger for this module
 logger = logging.getLogger(__name__)
 
+# 服务端 VAD 按静音时长断句的服务商，允许本地静音时暂停上行音频
+# （GPT 用 semantic_vad，free/Gemini 没有服务端 VAD 或依赖持续音频，不暂停）
+UPLINK_PAUSE_API_TYPES = ('qwen', 'glm', 'step')
+
 class TurnDetectionMode(Enum):
     SERVER_VAD = "server_vad"
     MANUAL = "manual"
@@ -70,6 +79,12 @@ class OmniRealtimeClient:
             Additional event handlers.
             Is a mapping of event names to functions that process the event payload.
     """
+    _FIRST_TOKEN_EVENTS = frozenset({
+        "response.text.delta", "response.output_text.delta",
+        "response.audio.delta", "response.output_audio.delta",
+        "response.audio_transcript.delta", "response.output_audio_transcript.delta",
+    })
+
     def __init__(
         self,
         base_url,
@@ -141,20 +156,35 @@ class OmniRealtimeClient:
         # Auto-resets after 2 seconds of no speech to prevent state drift
         # Input: 48kHz from PC, 16kHz from mobile
         # Output: 16kHz for API
-        self._audio_processor = AudioProcessor(
+        # 有 DSP 进程池时，处理器状态放在池里固定分片的 worker 进程中
+        audio_options = dict(
             input_sample_rate=48000,
             output_sample_rate=16000,
             noise_reduce_enabled=False,  # RNNoise with auto-reset enabled
-            on_silence_reset=self._on_silence_reset  # 静音重置时发送 input_audio_buffer.clear
         )
+        self._audio_processor = None
+        dsp_pool = get_audio_dsp_pool()
+        if dsp_pool is not None:
+            try:
+                self._audio_processor = dsp_pool.open_session(on_silence_reset=self._on_silence_reset, **audio_options)
+            except Exception as e:
+                logger.warning(f"⚠️ 音频 DSP 进程池不可用，使用进程内处理: {e}")
+        if self._audio_processor is None:
+            self._audio_processor = AudioProcessor(
+                on_silence_reset=self._on_silence_reset,  # 静音重置时发送 input_audio_buffer.clear
+                **audio_options,
+            )
         
         # 静音重置事件异步队列
         self._silence_reset_pending = False
         
         # 重复度检测
-        self._recent_responses = []  # 存储最近3轮助手回复
         self._repetition_threshold = 0.8  # 相似度阈值
         self._max_recent_responses = 3  # 最多存储的回复数
+        # 最近3轮助手回复的 MinHash 索引
+        self._recent_responses = RepetitionIndex(
+            capacity=self._max_recent_responses, threshold=self._repetition_threshold
+        )
         self._current_response_transcript = ""  # 当前回复的转录文本
         
         # Backpressure control - 防止503过载错误
@@ -171,6 +201,8 @@ class OmniRealtimeClient:
         
         # Native image input rate limiting
         self._last_native_image_time = 0.0  # 上次原生图片输入时间戳
+        # 感知哈希去重：画面无明显变化的帧不再发送（相对上一次真正发出的帧）
+        self._frame_deduper = FrameDeduper()
         
         # Unified VAD for image throttling (priority: server VAD > RNNoise > RMS)
         # All native-image paths use _client_vad_active to adjust send rate
@@ -185,6 +217,9 @@ class OmniRealtimeClient:
         
         # Image processing lock
         self._image_lock = asyncio.Lock()
+
+        # speech_stopped 的 perf_counter 时间点，用于统计模型首个 delta 延迟
+        self._first_delta_t0: Optional[float] = None
         
         # Audio processing lock to ensure sequential processing in thread pool
         self._audio_processing_lock = asyncio.Lock()
@@ -211,6 +246,14 @@ class OmniRealtimeClient:
         self._gemini_current_transcript = ""  # Current response transcript for Gemini
         self._gemini_user_transcript = ""  # Accumulated user input transcript
 
+        # 上行音频合包：按 RTT 攒包、模板化事件 JSON；Gemini 走 SDK，只合包
+        self._uplink = AudioUplink(
+            self._encode_uplink_packet,
+            self._send_uplink_packet,
+            rtt_source=self._ws_latency,
+            pause_on_silence=self._api_type.lower() in UPLINK_PAUSE_API_TYPES,
+        )
+
     async def process_audio_chunk_async(self, audio_chunk: bytes) -> bytes:
         """
         Asynchronously process audio chunk using RNNoise in a separate thread.
@@ -220,14 +263,20 @@ class OmniRealtimeClient:
             return audio_chunk
 
         async with self._audio_processing_lock:
+            process_async = getattr(self._audio_processor, 'process_chunk_async', None)
+            if process_async is not None:
+                # DSP 进程池
+                with metrics.span("audio.process"):
+                    return await process_async(audio_chunk)
             # Use run_in_executor to offload heavy processing
             # None = use default ThreadPoolExecutor
             loop = asyncio.get_running_loop()
-            return await loop.run_in_executor(
-                None, 
-                self._audio_processor.process_chunk, 
-                audio_chunk
-            )
+            with metrics.span("audio.process"):
+                return await loop.run_in_executor(
+                    None, 
+                    self._audio_processor.process_chunk, 
+                    audio_chunk
+                )
 
     async def _check_silence_timeout(self):
         """定期检查是否超过静默超时时间，如果是则触发超时回调"""
@@ -284,6 +333,7 @@ class OmniRealtimeClient:
         clear_event = {
             "type": "input_audio_buffer.clear"
         }
+        self._uplink.reset()
         await self.send_event(clear_event)
         logger.debug("📤 已发送 input_audio_buffer.clear 事件")
 
@@ -297,6 +347,8 @@ class OmniRealtimeClient:
 
         # 确保开始新连接时状态完全重置
         self._silence_reset_pending = False
+        self._frame_deduper.reset()
+        self._uplink.reset()
         if self._audio_processor is not None:
             self._audio_processor.reset()
 
@@ -490,11 +542,19 @@ class OmniRealtimeClient:
             logger.debug(f"Gemini mode: skipping WebSocket event {event.get('type', 'unknown')}")
             return
         
+        event['event_id'] = "event_" + str(int(time.time() * 1000))
+        await self._send_raw(json.dumps(event), event.get("type"))
+
+    async def _send_raw(self, payload: str, event_type: Optional[str]) -> None:
+        """发送已序列化的事件（节流、并发限制与致命错误处理）。"""
+        if self._fatal_error_occurred:
+            return
+
         # Backpressure: 检查是否处于节流状态
         if self._is_throttled:
             if time.time() < self._throttle_until:
                 # 仍在节流期，丢弃音频帧以减轻服务器压力
-                if event.get("type") == "input_audio_buffer.append":
+                if event_type == "input_audio_buffer.append":
                     return  # 丢弃音频帧
             else:
                 # 节流期结束，恢复正常发送
@@ -505,16 +565,15 @@ class OmniRealtimeClient:
         if not self.ws:
             return
         
-        event['event_id'] = "event_" + str(int(time.time() * 1000))
         async with self._send_semaphore:  # 限制并发发送数量
             try:
                 if not self.ws:
                     return
-                await self.ws.send(json.dumps(event))
+                await self.ws.send(payload)
             except Exception as e:
                 error_msg = str(e)
                 if '1000' not in error_msg:
-                    logger.warning(f"⚠️ 发送 {event.get('type', '未知')} 事件失败: {error_msg}")
+                    logger.warning(f"⚠️ 发送 {event_type or '未知'} 事件失败: {error_msg}")
                 
                 # 检测致命错误：Response timeout 或 1011 错误码
                 if 'Response timeout' in error_msg or '1011' in error_msg:
@@ -575,34 +634,58 @@ class OmniRealtimeClient:
         if self._client_vad_active and current_time - self._client_vad_last_speech_time > self._client_vad_grace_period:
             self._client_vad_active = False
         
+        rnnoise_vad = self._audio_processor is not None and self._audio_processor.noise_reduce_enabled
+        rms = None
+        if self._uplink.pause_on_silence or (not self._has_server_vad and not rnnoise_vad):
+            samples = np.frombuffer(audio_chunk, dtype=np.int16).astype(np.float32)
+            rms = math.sqrt(float(samples.dot(samples)) / len(samples)) if len(samples) > 0 else 0.0
+
         # Client-side speech detection (only when no server VAD — server events handle it in handle_messages)
         if not self._has_server_vad:
-            if self._audio_processor is not None and self._audio_processor.noise_reduce_enabled:
+            if rnnoise_vad:
                 # Priority 2: RNNoise speech probability
                 if self._audio_processor.speech_probability > 0.4:
                     self._client_vad_last_speech_time = current_time
                     self._client_vad_active = True
             else:
                 # Priority 3: RMS energy fallback
-                samples = np.frombuffer(audio_chunk, dtype=np.int16)
-                if len(samples) > 0:
-                    rms = np.sqrt(np.mean(samples.astype(np.float32) ** 2))
-                    if rms > self._client_vad_threshold:
-                        self._client_vad_last_speech_time = current_time
-                        self._client_vad_active = True
-        
+                if rms > self._client_vad_threshold:
+                    self._client_vad_last_speech_time = current_time
+                    self._client_vad_active = True
+
+        # 上行静音暂停用的本地 VAD：阈值比图片限流低，轻声说话也不会被当成静音
+        voiced = True
+        if self._uplink.pause_on_silence:
+            voiced = rms > UPLINK_PAUSE_RMS or (rnnoise_vad and self._audio_processor.speech_probability > 0.4)
+
+        with metrics.span("realtime.stream_audio"):
+            await self._uplink.push(audio_chunk, voiced)
+
+    def is_connected(self) -> bool:
+        """连接仍可用：WebSocket（Gemini 为 SDK 会话）在且没有发生致命错误。"""
+        return self.ws is not None and not self._fatal_error_occurred
+
+    def take_unsent_audio(self) -> bytes:
+        """取出合包缓冲里还没发出的 16kHz 音频（热切换时转交新会话，避免随旧连接一起丢掉）。"""
+        return self._uplink.drain()
+
+    def _ws_latency(self) -> Optional[float]:
+        """websockets keepalive ping 测得的 RTT（秒）；Gemini SDK 会话没有这个值。"""
+        if self._is_gemini:
+            return None
+        return getattr(self.ws, 'latency', None)
+
+    def _encode_uplink_packet(self, pcm: memoryview):
+        if self._is_gemini:
+            return bytes(pcm)
+        return encode_append_event(pcm)
+
+    async def _send_uplink_packet(self, payload) -> None:
         # Gemini uses different API
         if self._is_gemini:
-            await self._stream_audio_gemini(audio_chunk)
+            await self._stream_audio_gemini(payload)
             return
-        
-        audio_b64 = base64.b64encode(audio_chunk).decode()
-
-        append_event = {
-            "type": "input_audio_buffer.append",
-            "audio": audio_b64
-        }
-        await self.send_event(append_event)
+        await self._send_raw(payload, "input_audio_buffer.append")
     
     async def _stream_audio_gemini(self, audio_chunk: bytes) -> None:
         """Send audio data to Gemini Live API."""
@@ -654,8 +737,11 @@ class OmniRealtimeClient:
                     await self.on_status_message("⚠️ 图片内容被审查系统拦截，请尝试更换图片或内容。")
             return "图片识别发生严重错误！"
     
-    async def stream_image(self, image_b64: str) -> None:
-        """Stream raw image data to the API."""
+    async def stream_image(self, image_b64: str, frame: Optional[ScreenFrame] = None) -> None:
+        """Stream raw image data to the API.
+
+        ``frame`` 为 utils.screenshot_utils 处理得到的 ScreenFrame；提供时跳过与上一帧相比画面未变化的帧。
+        """
 
         try:
             # Models without native vision (step, free on lanlan.tech) — first frame triggers VISION_MODEL analysis
@@ -665,6 +751,8 @@ class OmniRealtimeClient:
             
             # Rate limiting for native image input (with VAD-based throttling)
             if self._supports_native_image:
+                if self._frame_deduper.is_duplicate(frame):
+                    return
                 current_time = time.time()
                 elapsed = current_time - self._last_native_image_time
                 min_interval = NATIVE_IMAGE_MIN_INTERVAL
@@ -683,6 +771,7 @@ class OmniRealtimeClient:
                         await self._gemini_session.send_realtime_input(
                             media={"data": image_bytes, "mime_type": "image/jpeg"}
                         )
+                        self._frame_deduper.mark_sent(frame)
                     except Exception as e:
                         logger.error(f"Error sending image to Gemini: {e}")
                         if "closed" in str(e).lower():
@@ -695,6 +784,7 @@ class OmniRealtimeClient:
                     "image": image_b64
                 }
                 await self.send_event(append_event)
+                self._frame_deduper.mark_sent(frame)
                 return
 
             if self._audio_in_buffer:
@@ -765,6 +855,7 @@ class OmniRealtimeClient:
                     return
                     
                 await self.send_event(append_event)
+                self._frame_deduper.mark_sent(frame)
         except Exception as e:
             logger.error(f"Error streaming image: {e}")
             raise e
@@ -805,6 +896,35 @@ class OmniRealtimeClient:
             logger.info("Creating response without instructions override")
             await self.send_event({"type": "response.create"})
     
+    async def append_history(self, text: str) -> None:
+        """把已结束的对话追加进会话上下文，不请求回复（热切换备用会话的增量同步）。"""
+        if not text or not text.strip():
+            return
+        if self._is_gemini:
+            if not self._gemini_session:
+                raise ConnectionError("Gemini session not available")
+            from google.genai import types as genai_types
+            await self._gemini_session.send_client_content(
+                turns=[genai_types.Content(parts=[genai_types.Part(text=text)], role="user")],
+                turn_complete=False
+            )
+            return
+        if not self.ws:
+            raise ConnectionError("WebSocket not connected")
+        if "qwen" in self.model:
+            # 与 create_response 一致：qwen 的文本上下文放在 instructions 里
+            self.instructions = (self.instructions or "") + "\n" + text
+            await self.update_session({"instructions": self.instructions})
+        else:
+            await self.send_event({
+                "type": "conversation.item.create",
+                "item": {
+                    "type": "message",
+                    "role": "user",
+                    "content": [{"type": "input_text", "text": text}]
+                }
+            })
+
     async def _create_response_gemini(self, instructions: str) -> None:
         """Send text content to Gemini and trigger response."""
         if not self._gemini_session:
@@ -867,17 +987,8 @@ class OmniRealtimeClient:
         如果连续3轮都高度重复，返回 True 并触发回调。
         """
         
-        # 与最近的回复比较相似度
-        high_similarity_count = 0
-        for recent in self._recent_responses:
-            similarity = calculate_text_similarity(response, recent)
-            if similarity >= self._repetition_threshold:
-                high_similarity_count += 1
-        
-        # 添加到最近回复列表
-        self._recent_responses.append(response)
-        if len(self._recent_responses) > self._max_recent_responses:
-            self._recent_responses.pop(0)
+        # 与最近的回复比较相似度，并加入滚动窗口
+        high_similarity_count = self._recent_responses.check_and_insert(response)
         
         # 如果与最近2轮都高度重复（即第3轮重复），触发检测
         if high_similarity_count >= 2:
@@ -1015,6 +1126,7 @@ class OmniRealtimeClient:
                     self._audio_in_buffer = False
                     # Update timestamp so grace period starts from speech end
                     self._client_vad_last_speech_time = time.time()
+                    self._first_delta_t0 = time.perf_counter()
                 elif event_type == "conversation.item.input_audio_transcription.completed":
                     self._print_input_transcript = True
                 elif event_type in ["response.audio_transcript.done", "response.output_audio_transcript.done"]:
@@ -1022,6 +1134,10 @@ class OmniRealtimeClient:
                     self._output_transcript_buffer = ""
 
                 if not self._skip_until_next_response and not self._interrupted:
+                    if self._first_delta_t0 is not None and event_type in self._FIRST_TOKEN_EVENTS:
+                        # 用户说完（server VAD speech_stopped）→ 模型第一个输出 delta
+                        metrics.record_span("llm.first_token", time.perf_counter() - self._first_delta_t0)
+                        self._first_delta_t0 = None
                     if event_type in ["response.text.delta", "response.output_text.delta"]:
                         if self.on_text_delta:
                             if "glm" not in self.model:
@@ -1094,6 +1210,7 @@ class OmniRealtimeClient:
         self._silence_timeout_triggered = False
         self._last_speech_time = None
         self._silence_reset_pending = False
+        self._uplink.reset()
 
         # 保存 debug 音频（RNNoise 处理前后的对比音频）
         if self._audio_processor is not None:
@@ -0,0 +1,128 @@
+"""
+热切换备用会话
+
+原来的热切换在 40s 触发记忆归档后，要等到 10s 后的某个轮次结束才开始建新会话（完整 prompt + 连接），
+再等下一个轮次结束把这期间的对话拼成一段“前情概要”发给新会话并让它生成一条被丢弃的回复，之后才切换。
+RealtimeSessionPool 管理这个备用会话：
+- 历史稳定后（由调用方按记忆归档时间安排）在后台提前连接，连接耗时记为 ``hot_swap.connect``
+- 连好之后每结束一轮，只把新增的对话用 ``append_history``（realtime 为 ``conversation.item.create``）
+  追加过去，不重建 prompt，也不请求回复
+- 切换时 ``take()`` 只等剩余的增量发完，拿到的会话上下文已是最新，可在轮次边界直接换上
+
+关闭会话由调用方负责，池子只记录备用会话与同步进度。
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, List, Optional
+
+from config import HOT_SWAP_SYNC_TIMEOUT_S
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def format_history(entries) -> str:
+    """与热切换 prompt 相同的 ``角色 | 内容`` 逐行格式。"""
+    return "".join(f"{entry['role']} | {entry['text']}\n" for entry in entries)
+
+
+class RealtimeSessionPool:
+    def __init__(self, sync_timeout: Optional[float] = None):
+        self.sync_timeout = HOT_SWAP_SYNC_TIMEOUT_S if sync_timeout is None else sync_timeout
+        self.spare: Any = None
+        self._synced = 0  # 已同步到备用会话的 cache 条目数
+        self._tail_len = 0  # 其中最后一条同步时的文本长度（同一角色连续输出会续写到这一条）
+        self._pending: List[str] = []
+        self._sync_task: Optional[asyncio.Task] = None
+        self._failed = False
+        self.connect_ms = 0.0
+        self.synced_items = 0
+        self.swaps = 0
+
+    @property
+    def ready(self) -> bool:
+        return self.spare is not None and not self._failed
+
+    async def warm(self, session, instructions: str, native_audio: bool, cache) -> None:
+        """用 instructions（已包含 cache 当前内容）连接备用会话；之后 cache 的新增部分走增量同步。"""
+        self.reset()
+        # 连接期间结束的轮次留给连好后的第一次 sync
+        synced, tail_len = len(cache), (len(cache[-1]['text']) if cache else 0)
+        started = time.perf_counter()
+        await session.connect(instructions, native_audio=native_audio)
+        elapsed = time.perf_counter() - started
+        metrics.record_span("hot_swap.connect", elapsed)
+        self.connect_ms = elapsed * 1000.0
+        self.spare = session
+        self._synced, self._tail_len = synced, tail_len
+        logger.info(f"🔄 备用会话已连接（{self.connect_ms:.0f}ms）")
+
+    def sync(self, cache) -> None:
+        """把 cache 自上次同步以来的新增内容排进发送队列（在轮次结束时调用）。"""
+        if not self.ready:
+            return
+        entries = []
+        if 0 < self._synced <= len(cache):
+            tail = cache[self._synced - 1]
+            if len(tail['text']) > self._tail_len:
+                entries.append({"role": tail['role'], "text": tail['text'][self._tail_len:]})
+        entries.extend(cache[self._synced:])
+        self._synced = len(cache)
+        self._tail_len = len(cache[-1]['text']) if cache else 0
+        if not entries:
+            return
+        self._pending.append(format_history(entries))
+        self.synced_items += len(entries)
+        if self._sync_task is None or self._sync_task.done():
+            self._sync_task = asyncio.create_task(self._drain())
+
+    async def _drain(self) -> None:
+        while self._pending and self.spare is not None:
+            text = self._pending.pop(0)
+            try:
+                await self.spare.append_history(text)
+            except Exception as e:
+                logger.error(f"💥 备用会话增量同步失败: {e}")
+                self._failed = True
+                self._pending.clear()
+                return
+
+    async def take(self):
+        """等增量同步完成后交出备用会话；会话已不可用或同步超时则返回 None（仍由调用方关闭）。"""
+        if not self.ready:
+            return None
+        task = self._sync_task
+        if task is not None and not task.done():
+            try:
+                await asyncio.wait_for(asyncio.shield(task), self.sync_timeout)
+            except asyncio.TimeoutError:
+                logger.warning("⚠️ 备用会话增量同步超时，放弃本次切换")
+                return None
+        session = self.spare
+        if self._failed or not session.is_connected():
+            return None
+        self.spare = None
+        self.swaps += 1
+        self.reset()
+        return session
+
+    def reset(self) -> None:
+        """忘掉备用会话与同步进度（不关闭会话）。"""
+        if self._sync_task is not None and not self._sync_task.done():
+            self._sync_task.cancel()
+        self._sync_task = None
+        self.spare = None
+        self._pending.clear()
+        self._synced = 0
+        self._tail_len = 0
+        self._failed = False
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "connect_ms": round(self.connect_ms, 1),
+            "synced_items": self.synced_items,
+            "swaps": self.swaps,
+        }
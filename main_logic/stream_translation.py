@@ -0,0 +1,117 @@
+"""
+流式输出翻译
+
+字幕原来要等整轮回复结束后再把全文翻译一次，字幕总是比语音晚一整轮。StreamingTranslator 在输出
+转录流过时就切句翻译：
+- feed() 累积输出 chunk，用 utils.frontend_utils.split_paragraph 切出完整句子，每句立即并发翻译
+  （同时进行的请求数受 STREAM_TRANSLATION_CONCURRENCY 限制）
+- 译文按句子顺序发出：某句先翻完也要等前面的句子，但不必等整轮结束
+- 按 (目标语言, 句子) 缓存译文，重复的句子（问候、口头禅）不再请求；同一句正在翻译时复用同一个请求
+- finish() 冲刷剩余文本，cancel() 用于打断/丢弃本轮（只停止发送，请求结果仍写入缓存）
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional
+
+from config import STREAM_TRANSLATION_CACHE_SIZE, STREAM_TRANSLATION_CONCURRENCY
+from utils.frontend_utils import split_paragraph
+
+logger = logging.getLogger(__name__)
+
+_cache: "OrderedDict[tuple, str]" = OrderedDict()
+_inflight: Dict[tuple, "asyncio.Future"] = {}
+
+
+def clear_segment_cache() -> None:
+    _cache.clear()
+
+
+class StreamingTranslator:
+    def __init__(self, translate: Callable[[str], Awaitable[str]],
+                 emit: Callable[[int, str, str], Awaitable[None]],
+                 target_lang: str, concurrency: Optional[int] = None):
+        self._translate = translate
+        self._emit = emit
+        self.target_lang = target_lang
+        self._semaphore = asyncio.Semaphore(concurrency or STREAM_TRANSLATION_CONCURRENCY)
+        self._buffer = ""
+        self._queue: "asyncio.Queue" = asyncio.Queue()
+        self._emitter: Optional[asyncio.Task] = None
+        self.segments = 0
+        self.cache_hits = 0
+
+    def feed(self, text: str) -> None:
+        """追加一段输出转录；凑出完整句子就提交翻译。"""
+        if not text:
+            return
+        self._buffer += text
+        ready, self._buffer = split_paragraph(self._buffer, comma_split=False)
+        if ready.strip():
+            self._submit(ready)
+
+    def finish(self) -> asyncio.Task:
+        """本轮结束：冲刷剩余文本，返回发送完所有译文后结束的任务。"""
+        if self._buffer.strip():
+            self._submit(self._buffer)
+        self._buffer = ""
+        self._ensure_emitter()
+        self._queue.put_nowait(None)
+        return self._emitter
+
+    def cancel(self) -> None:
+        """停止发送本轮译文；已发出的翻译请求照常完成并进入缓存。"""
+        if self._emitter is not None:
+            self._emitter.cancel()
+        self._buffer = ""
+
+    def _ensure_emitter(self) -> None:
+        if self._emitter is None:
+            self._emitter = asyncio.create_task(self._run())
+
+    def _submit(self, sentence: str) -> None:
+        self._ensure_emitter()
+        key = (self.target_lang, sentence.strip())
+        if key in _cache:
+            _cache.move_to_end(key)
+            self.cache_hits += 1
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(_cache[key])
+        elif key in _inflight:
+            self.cache_hits += 1
+            future = _inflight[key]
+        else:
+            future = asyncio.ensure_future(self._translate_one(key, sentence))
+            _inflight[key] = future
+        self._queue.put_nowait((self.segments, sentence, future))
+        self.segments += 1
+
+    async def _translate_one(self, key: tuple, sentence: str) -> str:
+        try:
+            async with self._semaphore:
+                translated = await self._translate(sentence)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"流式翻译失败，使用原文: {e}")
+            return sentence
+        finally:
+            _inflight.pop(key, None)
+        _cache[key] = translated
+        while len(_cache) > STREAM_TRANSLATION_CACHE_SIZE:
+            _cache.popitem(last=False)
+        return translated
+
+    async def _run(self) -> None:
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            index, sentence, future = item
+            # shield：同一句可能被别的轮次共用，取消本轮时不能连带取消请求
+            translated = await asyncio.shield(future)
+            try:
+                await self._emit(index, sentence, translated)
+            except Exception as e:
+                logger.error(f"💥 发送译文片段失败: {e}")
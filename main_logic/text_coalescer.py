@@ -0,0 +1,127 @@
+"""
+输出文本合帧
+
+模型流式输出时每个 delta 都要做一次情绪标签清理、一次 websocket.send_json、一次 sync_message_queue.put，
+高速输出时每秒上百个小帧，经 cross_server 转发给 monitor 后又翻一倍。TextFrameCoalescer 把相邻的
+delta 合成一帧：
+- 新消息的第一个 chunk 立即发出（isNewMessage=True，不增加首字延迟），之后的 delta 先攒着
+- 攒够 max_bytes（UTF-8 字节）立即发送，否则最迟 flush_interval 秒后发送
+- 新消息开始前先把上一条攒着的文本发完，isNewMessage 只落在每条消息的第一帧上
+- 情绪标签 ``<...>`` 用预编译的正则在合并后的文本上清理；未闭合的 ``<`` 留到下一帧，
+  避免跨 delta 的标签漏删。短 delta 的清理结果有缓存
+- 清理掉的标签内容记在 tags 里（每条消息重置），供情绪分析当作线索；tags_for() 只在分析的正是
+  这条消息的文本时才返回它们
+- flush() 在 turn end 之前调用，保证文本帧都先于 turn end 到达；discard() 用于响应被丢弃
+"""
+
+import asyncio
+import logging
+import re
+from functools import lru_cache
+from typing import Awaitable, Callable, Optional
+
+from config import TEXT_FRAME_FLUSH_INTERVAL_MS, TEXT_FRAME_MAX_BYTES
+
+logger = logging.getLogger(__name__)
+
+EMOTION_PATTERN = re.compile('<(.*?)>')
+# 未闭合标签最多保留这么多字符，防止正文里的 "<" 把文本一直压着
+_MAX_OPEN_TAG = 32
+
+
+@lru_cache(maxsize=2048)
+def _strip_cached(text: str) -> str:
+    return EMOTION_PATTERN.sub('', text)
+
+
+def strip_emotion_tags(text: str) -> str:
+    """去掉情绪标签；不含 "<" 的文本直接返回。"""
+    if '<' not in text:
+        return text
+    if len(text) <= 64:
+        return _strip_cached(text)
+    return EMOTION_PATTERN.sub('', text)
+
+
+class TextFrameCoalescer:
+    def __init__(self, send: Callable[[str, bool], Awaitable[None]],
+                 flush_interval: Optional[float] = None, max_bytes: Optional[int] = None):
+        self._send = send
+        self.flush_interval = TEXT_FRAME_FLUSH_INTERVAL_MS / 1000.0 if flush_interval is None else flush_interval
+        self.max_bytes = TEXT_FRAME_MAX_BYTES if max_bytes is None else max_bytes
+        self._parts = []
+        self._bytes = 0
+        self._new_message = False
+        self._timer: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self.tags = []
+        self._message = []  # 当前消息已发出的（去掉标签后的）文本
+        self.deltas = 0
+        self.frames = 0
+
+    async def push(self, text: str, is_first_chunk: bool = False) -> None:
+        """收到一个输出 delta。"""
+        self.deltas += 1
+        if is_first_chunk:
+            if self._parts:
+                await self.flush(final=True)
+            self._new_message = True
+            self.tags = []
+            self._message = []
+        if text:
+            self._parts.append(text)
+            self._bytes += len(text.encode('utf-8'))
+        if is_first_chunk or self.flush_interval <= 0 or self._bytes >= self.max_bytes:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def flush(self, final: bool = False) -> None:
+        """发送攒着的文本；final=True 时连同未闭合的标签一起发出（消息结束）。"""
+        async with self._lock:
+            self._cancel_timer()
+            text = ''.join(self._parts)
+            held = ''
+            if not final:
+                start = text.rfind('<')
+                if start != -1 and '>' not in text[start:] and len(text) - start <= _MAX_OPEN_TAG:
+                    text, held = text[:start], text[start:]
+            self._parts = [held] if held else []
+            self._bytes = len(held.encode('utf-8'))
+            if '<' in text:
+                self.tags.extend(EMOTION_PATTERN.findall(text))
+            text = strip_emotion_tags(text)
+            self._message.append(text)
+            if not text and not self._new_message:
+                return
+            is_new, self._new_message = self._new_message, False
+            self.frames += 1
+            await self._send(text, is_new)
+
+    def tags_for(self, text: str) -> list:
+        """text 正是最近一条消息（忽略空白与标签）时返回它的情绪标签，否则返回空列表。"""
+        if not self.tags or not text:
+            return []
+        message = ''.join(self._message)
+        if ''.join(strip_emotion_tags(text).split()) != ''.join(message.split()):
+            return []
+        return list(self.tags)
+
+    def discard(self) -> None:
+        """丢掉还没发出的文本（响应被丢弃/会话结束）。"""
+        self._cancel_timer()
+        self._parts = []
+        self._bytes = 0
+        self._new_message = False
+
+    def _cancel_timer(self) -> None:
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+        self._timer = None
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_interval)
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"💥 输出文本合帧发送失败: {e}")
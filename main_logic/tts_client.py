@@ -731,7 +731,10 @@ def cosyvoice_vc_tts_worker(request_queue, response_queue, audio_api_key, voice_
             time.sleep(0.01)
             continue
 
-        sid, tts_text = request_queue.get()
+        try:
+            sid, tts_text = request_queue.get()
+        except Exception:
+            break
 
         if sid is None:
             # 停止当前合成 - 告诉TTS没有更多文本了
@@ -813,6 +816,12 @@ def cosyvoice_vc_tts_worker(request_queue, response_queue, audio_api_key, voice_
                 synthesizer = None
                 current_speech_id = None
 
+    if synthesizer is not None:
+        try:
+            synthesizer.close()
+        except Exception:
+            pass
+
 
 def cogtts_tts_worker(request_queue, response_queue, audio_api_key, voice_id):
     """
@@ -1475,7 +1484,10 @@ def dummy_tts_worker(request_queue, response_queue, audio_api_key, voice_id):
     while True:
         try:
             # 持续清空队列以避免阻塞，但不做任何处理
-            sid, tts_text = request_queue.get()
+            item = request_queue.get()
+            if item is None:  # 连接池释放：退出
+                break
+            sid, tts_text = item
             # 如果收到结束信号，继续等待下一个请求
             if sid is None:
                 continue
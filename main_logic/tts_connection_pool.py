@@ -0,0 +1,177 @@
+"""
+TTS 连接池
+
+每次 start_session 都新起一个 TTS 线程，worker 从零建立 WebSocket、等服务端握手后才发出就绪信号，
+语音模式的第一句话要先付这段时间。这里按 (worker, api key, voice_id, 参数) 预先起好 worker 线程：
+- acquire() 有热备就直接交出（就绪信号仍留在它的 response_queue 里，core 的等待循环立即拿到），
+  再在后台补一个新的热备；没有热备就现起一个，行为与原来相同
+- 热备线程已退出或就绪失败时丢弃；闲置超过 TTS_POOL_MAX_IDLE 秒的热备赶在服务端空闲超时之前换新，
+  交出去的不会是已被服务端断开的连接
+- 距离上次取用超过 TTS_POOL_WARM_WINDOW 秒就不再续热备，避免长期空挂连接
+- release() 给 worker 发一个非元组请求：worker 解包失败即退出主循环并关闭连接
+"""
+
+import logging
+import threading
+import time
+from hashlib import blake2b
+from queue import Queue
+from typing import Dict, List, Optional
+
+from config import TTS_POOL_MAX_IDLE, TTS_POOL_SPARES, TTS_POOL_WARM_WINDOW
+
+logger = logging.getLogger(__name__)
+
+
+def pool_key(worker, audio_api_key: str, voice_id: str, params: Optional[dict] = None) -> tuple:
+    """连接池的分组键；api key 只保留摘要。"""
+    base = getattr(worker, "func", worker)
+    merged = dict(getattr(worker, "keywords", None) or {}, **(params or {}))
+    key_digest = blake2b((audio_api_key or "").encode("utf-8"), digest_size=8).hexdigest()
+    return (base.__name__, key_digest, voice_id or "", tuple(sorted((k, repr(v)) for k, v in merged.items())))
+
+
+class PooledTTS:
+    """一个已启动的 TTS worker 线程及其两条队列。"""
+
+    __slots__ = ("key", "request_queue", "response_queue", "thread", "created_at")
+
+    def __init__(self, key: tuple, worker, audio_api_key: str, voice_id: str):
+        self.key = key
+        self.request_queue: Queue = Queue()
+        self.response_queue: Queue = Queue()
+        self.created_at = time.monotonic()
+        self.thread = threading.Thread(
+            target=worker,
+            args=(self.request_queue, self.response_queue, audio_api_key, voice_id),
+            name=f"tts-{key[0]}",
+            daemon=True,
+        )
+        self.thread.start()
+
+    def ready_state(self) -> Optional[bool]:
+        """队首的就绪信号；还没发出时返回 None（不出队）。"""
+        with self.response_queue.mutex:
+            head = self.response_queue.queue[0] if self.response_queue.queue else None
+        if isinstance(head, tuple) and len(head) == 2 and head[0] == "__ready__":
+            return bool(head[1])
+        return None
+
+    def close(self) -> None:
+        self.request_queue.put(None)
+
+
+class TTSConnectionPool:
+    def __init__(self, spares: Optional[int] = None, max_idle: Optional[float] = None,
+                 warm_window: Optional[float] = None):
+        self.spares = TTS_POOL_SPARES if spares is None else spares
+        self.max_idle = TTS_POOL_MAX_IDLE if max_idle is None else max_idle
+        self.warm_window = TTS_POOL_WARM_WINDOW if warm_window is None else warm_window
+        self._lock = threading.Lock()
+        self._idle: Dict[tuple, List[PooledTTS]] = {}
+        self._specs: Dict[tuple, tuple] = {}  # key -> (worker, audio_api_key, voice_id)
+        self._last_used: Dict[tuple, float] = {}
+        self._wake = threading.Event()
+        self._maintainer: Optional[threading.Thread] = None
+        self.hits = 0
+        self.misses = 0
+
+    def acquire(self, key: tuple, worker, audio_api_key: str, voice_id: str) -> PooledTTS:
+        """取一个 worker：优先交出热备，否则现起；随后在后台补足热备。"""
+        with self._lock:
+            self._specs[key] = (worker, audio_api_key, voice_id)
+            self._last_used[key] = time.monotonic()
+            conn = self._take(key)
+        if conn is not None:
+            self.hits += 1
+            logger.info(f"🎤 复用预热的 TTS 连接 ({key[0]}, 已闲置 {time.monotonic() - conn.created_at:.1f}s)")
+        else:
+            self.misses += 1
+            conn = PooledTTS(key, worker, audio_api_key, voice_id)
+        self._replenish(key)
+        self._ensure_maintainer()
+        return conn
+
+    @staticmethod
+    def release(conn: Optional[PooledTTS]) -> None:
+        if conn is not None:
+            conn.close()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            idle = [c for conns in self._idle.values() for c in conns]
+            self._idle.clear()
+            self._specs.clear()
+        for conn in idle:
+            conn.close()
+        self._wake.set()
+
+    def _healthy(self, conn: PooledTTS, now: float) -> bool:
+        return (conn.thread.is_alive() and conn.ready_state() is not False
+                and now - conn.created_at < self.max_idle)
+
+    def _take(self, key: tuple) -> Optional[PooledTTS]:
+        now = time.monotonic()
+        conns = self._idle.get(key, [])
+        while conns:
+            conn = conns.pop(0)
+            if self._healthy(conn, now):
+                return conn
+            conn.close()
+        return None
+
+    def _replenish(self, key: tuple) -> None:
+        with self._lock:
+            spec = self._specs.get(key)
+            if spec is None:
+                return
+            conns = self._idle.setdefault(key, [])
+            while len(conns) < self.spares:
+                conns.append(PooledTTS(key, *spec))
+
+    def _ensure_maintainer(self) -> None:
+        if self.spares <= 0 or (self._maintainer is not None and self._maintainer.is_alive()):
+            return
+        self._wake.clear()
+        self._maintainer = threading.Thread(target=self._maintain, name="tts-pool", daemon=True)
+        self._maintainer.start()
+
+    def _maintain(self) -> None:
+        interval = max(0.05, min(self.max_idle / 4, 10.0))
+        while not self._wake.wait(interval):
+            now = time.monotonic()
+            stale, refill = [], []
+            with self._lock:
+                for key, conns in list(self._idle.items()):
+                    failed = any(c.ready_state() is False for c in conns)
+                    keep = [c for c in conns if self._healthy(c, now)]
+                    stale.extend(c for c in conns if c not in keep)
+                    if failed or now - self._last_used.get(key, 0.0) > self.warm_window:
+                        # 就绪失败说明配置或服务有问题，等下次取用再试；太久没用的不再续
+                        stale.extend(keep)
+                        del self._idle[key]
+                        self._specs.pop(key, None)
+                        continue
+                    self._idle[key] = keep
+                    if len(keep) < self.spares:
+                        refill.append(key)
+                if not self._idle:
+                    self._maintainer = None
+            for conn in stale:
+                conn.close()
+            for key in refill:
+                self._replenish(key)
+            if self._maintainer is None:
+                return
+
+
+_pool: Optional[TTSConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_tts_pool() -> TTSConnectionPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = TTSConnectionPool()
+        return _pool
@@ -0,0 +1,443 @@
+"""
+TTS 短语缓存
+
+问候、语气词、主动搭话开场白、重复的短回复每次都重新合成。这里按
+(worker 类型, voice_id, 规范化文本, 参数) 做内容寻址，把一整轮回复（两个 (None, None) 之间）
+合成出的音频块（48kHz PCM；CosyVoice 为 Ogg Opus 页）按原样分块存到有大小上限的磁盘目录里，
+命中时不经过 worker 直接回放。
+
+with_phrase_cache() 包装任意 tts_client 里的 worker（签名不变）：
+- 本轮文本仍可能是某条缓存短语的前缀时先扣住不发给 worker；一旦不可能命中立即放行，
+  所以未命中只多等一两个 LLM chunk
+- 未命中且足够短的轮次：记录 worker 的输出，音频静默 CAPTURE_QUIET 秒后写入缓存；
+  写入后又来了迟到的音频说明切分不准，删掉该条
+- 会话空闲时按角色的预热短语列表逐条合成进缓存：用单独的 worker 实例，音频不发给前端；
+  真实请求到达时立即关掉它，不等待
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import OrderedDict
+from hashlib import blake2b
+from pathlib import Path
+from queue import Empty, Queue
+from typing import Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_FILE_MAGIC = b"NKTC"
+# 最后一块音频之后静默这么久（秒）才认为本轮合成结束
+CAPTURE_QUIET = 0.6
+# 结束信号之后这么久（秒）仍没有任何音频就放弃记录
+CAPTURE_TIMEOUT = 20.0
+
+
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text or "")).strip()
+
+
+class PhraseCache:
+    """磁盘上的内容寻址音频缓存，按最近使用淘汰（线程安全）。
+
+    文件格式：MAGIC | len(meta) | meta JSON | (len(chunk) | chunk)*，保留 worker 输出的分块边界
+    （前端按块首字节判断 Ogg / PCM）。
+    """
+
+    def __init__(self, root, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (size, scope, text)，LRU 顺序
+        self._texts: dict = {}  # scope -> 排好序的文本列表（前缀查询）
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._scan()
+
+    @staticmethod
+    def scope(worker_type: str, voice_id: str, params: Optional[dict] = None) -> str:
+        return json.dumps([worker_type, voice_id or "", params or {}], sort_keys=True, ensure_ascii=False)
+
+    @staticmethod
+    def _key(scope: str, text: str) -> str:
+        return blake2b(f"{scope}\n{text}".encode("utf-8"), digest_size=16).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.pcm"
+
+    def _scan(self):
+        try:
+            files = sorted(self.root.glob("*.pcm"), key=lambda p: p.stat().st_mtime)
+        except OSError:
+            return
+        for path in files:
+            try:
+                with open(path, "rb") as f:
+                    if f.read(4) != _FILE_MAGIC:
+                        continue
+                    meta = json.loads(f.read(int.from_bytes(f.read(4), "little")))
+                size = path.stat().st_size
+            except (OSError, ValueError):
+                continue
+            self._index(path.stem, size, meta["scope"], meta["text"])
+
+    def _index(self, key, size, scope, text):
+        self._entries[key] = (size, scope, text)
+        self._bytes += size
+        texts = self._texts.setdefault(scope, [])
+        i = bisect_left(texts, text)
+        if i == len(texts) or texts[i] != text:
+            texts.insert(i, text)
+
+    def _unindex(self, key):
+        size, scope, text = self._entries.pop(key)
+        self._bytes -= size
+        texts = self._texts.get(scope, [])
+        i = bisect_left(texts, text)
+        if i < len(texts) and texts[i] == text:
+            texts.pop(i)
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+    def __contains__(self, item) -> bool:
+        scope, text = item
+        return self._key(scope, text) in self._entries
+
+    def has_prefix(self, scope: str, text: str) -> bool:
+        """是否有缓存短语以 text 开头（含相等）。"""
+        with self._lock:
+            texts = self._texts.get(scope)
+            if not texts:
+                return False
+            i = bisect_left(texts, text)
+            return i < len(texts) and texts[i].startswith(text)
+
+    def get(self, scope: str, text: str) -> Optional[List[bytes]]:
+        key = self._key(scope, text)
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+        try:
+            with open(self._path(key), "rb") as f:
+                f.read(4)
+                f.seek(int.from_bytes(f.read(4), "little"), os.SEEK_CUR)
+                data = f.read()
+            os.utime(self._path(key))
+        except OSError:
+            data = None
+        chunks = []
+        pos = 0
+        while data is not None and pos + 4 <= len(data):
+            size = int.from_bytes(data[pos:pos + 4], "little")
+            chunks.append(data[pos + 4:pos + 4 + size])
+            pos += 4 + size
+        if chunks and pos == len(data):
+            return chunks
+        with self._lock:
+            if key in self._entries:
+                self._unindex(key)
+        return None
+
+    def put(self, scope: str, text: str, chunks: List[bytes]) -> None:
+        body = b"".join(len(c).to_bytes(4, "little") + c for c in chunks if c)
+        if not body or len(body) > self.max_bytes:
+            return
+        key = self._key(scope, text)
+        meta = json.dumps({"scope": scope, "text": text}, ensure_ascii=False).encode("utf-8")
+        blob = _FILE_MAGIC + len(meta).to_bytes(4, "little") + meta + body
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            tmp = self._path(key).with_suffix(".tmp")
+            with open(tmp, "wb") as f:
+                f.write(blob)
+            os.replace(tmp, self._path(key))
+        except OSError as e:
+            logger.warning(f"TTS 短语缓存写入失败: {e}")
+            return
+        with self._lock:
+            if key in self._entries:
+                self._unindex_keep_file(key)
+            self._index(key, len(blob), scope, text)
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                self._unindex(next(iter(self._entries)))
+
+    def _unindex_keep_file(self, key):
+        size, _, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def discard(self, scope: str, text: str) -> None:
+        key = self._key(scope, text)
+        with self._lock:
+            if key in self._entries:
+                self._unindex(key)
+
+
+_cache: Optional[PhraseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_phrase_cache() -> PhraseCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                from config import TTS_PHRASE_CACHE_MAX_MB
+                from utils.config_manager import get_config_manager
+                root = get_config_manager().app_docs_dir / "tts_cache"
+                _cache = PhraseCache(root, TTS_PHRASE_CACHE_MAX_MB * 1024 * 1024)
+    return _cache
+
+_WORKER_EXITED = object()
+
+
+class _Capture:
+    __slots__ = ("text", "gen", "chunks", "ended_at", "last_audio_at")
+
+    def __init__(self, text: Optional[str] = None, gen: int = 0):
+        self.text = text
+        self.gen = gen
+        self.chunks = []
+        self.ended_at = None
+        self.last_audio_at = None
+
+
+class _CachedSession:
+    """一个 TTS 线程的缓存层：主循环读 request_queue，内层 worker 与输出泵各占一个线程。
+
+    预热在另一个按需启动的 worker 实例上进行，输出只进缓存、从不转给前端；真实请求到达时
+    直接关掉它（代数 +1，迟到的预热输出按代数丢弃），不等预热收尾。
+    """
+
+    def __init__(self, worker, scope: str, cache: PhraseCache, max_chars: int, warm_phrases: Iterable[str]):
+        self.worker = worker
+        self.scope = scope
+        self.cache = cache
+        self.max_chars = max_chars
+        self.warm = [t for t in (normalize_text(p) for p in warm_phrases or ()) if t]
+        self._lock = threading.Lock()
+        self._capture: Optional[_Capture] = None
+        self._finalized: Optional[str] = None  # 最近写入缓存的文本（迟到音频时作废）
+        self._inner_req: Queue = Queue()
+        self._worker_args = ()
+        # 预热 worker：每启动一次代数 +1，输出泵只接受本代的音频
+        self._warm_gen = 0
+        self._warm_req: Optional[Queue] = None
+        self._warm_capture: Optional[_Capture] = None
+        self._warm_finalized: Optional[str] = None
+
+    def run(self, request_queue, response_queue, audio_api_key, voice_id):
+        self._worker_args = (audio_api_key, voice_id)
+        inner_resp: Queue = Queue()
+        threading.Thread(target=self._run_inner, args=(self._inner_req, inner_resp), daemon=True).start()
+        threading.Thread(target=self._pump, args=(inner_resp, response_queue), daemon=True).start()
+
+        sid = None
+        acc = ""
+        held = []
+        while True:
+            try:
+                item = request_queue.get(timeout=0.05)
+            except Empty:
+                self._maybe_finalize()
+                if sid is None:
+                    self._warm_next()
+                continue
+            if not isinstance(item, tuple):
+                # 非元组请求：会话关闭，转给内层 worker 让它同样退出
+                self._stop_warm(requeue=False)
+                self._inner_req.put(item)
+                return
+            req_sid, text = item
+            if req_sid is not None and self._warm_req is not None:
+                # 真实请求优先：放弃正在进行的预热，之后空闲时重试
+                self._stop_warm(requeue=True)
+
+            if req_sid is not None:
+                if req_sid != sid:
+                    sid, acc, held = req_sid, "", []
+                    with self._lock:
+                        self._capture, self._finalized = None, None
+                acc += text or ""
+                if held is not None:
+                    held.append(item)
+                    if not self.cache.has_prefix(self.scope, normalize_text(acc)):
+                        self._release(held)
+                        held = None
+                else:
+                    self._inner_req.put(item)
+                    if len(acc) > self.max_chars:
+                        with self._lock:
+                            self._capture = None
+                continue
+
+            # (None, None)：一轮结束（或会话关闭）
+            if sid is None:
+                self._inner_req.put(item)
+                continue
+            norm = normalize_text(acc)
+            chunks = self.cache.get(self.scope, norm) if held is not None else None
+            if chunks:
+                self.cache.hits += 1
+                for chunk in chunks:
+                    response_queue.put(chunk)
+            else:
+                self.cache.misses += 1
+                if held is not None:
+                    self._release(held)
+                self._inner_req.put(item)
+                with self._lock:
+                    if self._capture is not None:
+                        if norm and len(norm) <= self.max_chars:
+                            self._capture.text = norm
+                            self._capture.ended_at = time.monotonic()
+                        else:
+                            self._capture = None
+            sid, acc, held = None, "", []
+
+    def _release(self, held):
+        with self._lock:
+            self._capture = _Capture()
+        for item in held:
+            self._inner_req.put(item)
+
+    def _run_inner(self, req: Queue, resp: Queue):
+        try:
+            self.worker(req, resp, *self._worker_args)
+        finally:
+            resp.put(_WORKER_EXITED)
+
+    def _pump(self, inner_resp: Queue, response_queue):
+        while True:
+            data = inner_resp.get()
+            if data is _WORKER_EXITED:
+                return
+            if not isinstance(data, (bytes, bytearray)):
+                response_queue.put(data)  # 就绪信号等
+                continue
+            with self._lock:
+                capture = self._capture
+                if capture is not None:
+                    capture.chunks.append(bytes(data))
+                    capture.last_audio_at = time.monotonic()
+                elif self._finalized is not None:
+                    self.cache.discard(self.scope, self._finalized)
+                    self._finalized = None
+            response_queue.put(data)
+
+    def _pump_warm(self, gen: int, warm_resp: Queue):
+        """预热 worker 的输出只写进同一代的预热记录，绝不转给 response_queue。"""
+        while True:
+            data = warm_resp.get()
+            if data is _WORKER_EXITED:
+                return
+            if not isinstance(data, (bytes, bytearray)):
+                continue
+            with self._lock:
+                if gen != self._warm_gen:
+                    continue  # 已被放弃的预热
+                capture = self._warm_capture
+                if capture is not None and capture.gen == gen:
+                    capture.chunks.append(bytes(data))
+                    capture.last_audio_at = time.monotonic()
+                elif self._warm_finalized is not None:
+                    self.cache.discard(self.scope, self._warm_finalized)
+                    self._warm_finalized = None
+
+    @staticmethod
+    def _settled(capture: Optional[_Capture], now: float) -> Optional[bool]:
+        """True：可以写入缓存；False：放弃；None：继续等。"""
+        if capture is None or capture.ended_at is None:
+            return None
+        if not capture.chunks:
+            return False if now - capture.ended_at > CAPTURE_TIMEOUT else None
+        if now - capture.last_audio_at < CAPTURE_QUIET:
+            return None
+        return True
+
+    def _maybe_finalize(self):
+        now = time.monotonic()
+        done = []
+        with self._lock:
+            capture = self._capture
+            settled = self._settled(capture, now)
+            if settled is not None:
+                self._capture = None
+                if settled:
+                    self._finalized = capture.text
+                    done.append(capture)
+            capture = self._warm_capture
+            settled = self._settled(capture, now)
+            if settled is not None:
+                self._warm_capture = None
+                if settled:
+                    self._warm_finalized = capture.text
+                    done.append(capture)
+        for capture in done:
+            self.cache.put(self.scope, capture.text, capture.chunks)
+
+    def _warm_next(self):
+        if self._capture is not None or self._warm_capture is not None:
+            return
+        while self.warm:
+            text = self.warm.pop(0)
+            if (self.scope, text) in self.cache:
+                continue
+            if self._warm_req is None:
+                self._start_warm()
+            with self._lock:
+                capture = _Capture(text, self._warm_gen)
+                capture.ended_at = time.monotonic()
+                self._warm_capture, self._warm_finalized = capture, None
+            self._warm_req.put((f"warm-{time.monotonic_ns()}", text))
+            self._warm_req.put((None, None))
+            return
+        self._stop_warm(requeue=False)
+
+    def _start_warm(self):
+        warm_req, warm_resp = Queue(), Queue()
+        with self._lock:
+            self._warm_gen += 1
+            self._warm_req = warm_req
+            gen = self._warm_gen
+        threading.Thread(target=self._run_inner, args=(warm_req, warm_resp), daemon=True).start()
+        threading.Thread(target=self._pump_warm, args=(gen, warm_resp), daemon=True).start()
+
+    def _stop_warm(self, requeue: bool):
+        with self._lock:
+            warm_req, capture = self._warm_req, self._warm_capture
+            self._warm_gen += 1
+            self._warm_req = self._warm_capture = self._warm_finalized = None
+        if requeue and capture is not None:
+            self.warm.insert(0, capture.text)
+        if warm_req is not None:
+            warm_req.put(None)  # 非元组请求：让预热 worker 退出
+
+
+def with_phrase_cache(worker, voice_params: Optional[dict] = None, warm_phrases: Iterable[str] = (),
+                      cache: Optional[PhraseCache] = None, max_chars: Optional[int] = None):
+    """包装 tts_client 的 worker，签名不变：(request_queue, response_queue, audio_api_key, voice_id)。"""
+    base = getattr(worker, "func", worker)
+    params = dict(getattr(worker, "keywords", None) or {}, **(voice_params or {}))
+
+    def cached_worker(request_queue, response_queue, audio_api_key, voice_id):
+        from config import TTS_PHRASE_CACHE_MAX_CHARS
+        session = _CachedSession(
+            worker,
+            PhraseCache.scope(base.__name__, voice_id, params),
+            cache or get_phrase_cache(),
+            max_chars or TTS_PHRASE_CACHE_MAX_CHARS,
+            warm_phrases,
+        )
+        session.run(request_queue, response_queue, audio_api_key, voice_id)
+
+    cached_worker.__name__ = f"cached_{base.__name__}"
+    return cached_worker
@@ -9,14 +9,22 @@ Handles agent-related endpoints including:
 - Admin control
 """
 
+import asyncio
+import json
 import logging
 import time
+from typing import Any
 
 from fastapi import APIRouter, Request, Body
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 import httpx
 from .shared_state import get_session_manager, get_config_manager
-from config import TOOL_SERVER_PORT, USER_PLUGIN_SERVER_PORT
+from config import (
+    AGENT_AVAILABILITY_CACHE_TTL,
+    AGENT_TASK_STREAM_KEEPALIVE,
+    TOOL_SERVER_PORT,
+    USER_PLUGIN_SERVER_PORT,
+)
 from main_logic.agent_event_bus import publish_session_event
 
 router = APIRouter(prefix="/api/agent", tags=["agent"])
@@ -44,6 +52,74 @@ async def _close_http_client():
         _HTTP_CLIENT = None
 
 
+# 同一 URL 的并发 GET 共享一次上游请求（多个标签页同时轮询时只打一次 agent_server）
+_INFLIGHT_GETS: dict[str, asyncio.Task] = {}
+# availability 代理结果: url -> (写入时间, (status_code, body))
+_AVAILABILITY_CACHE: dict[str, tuple[float, tuple[int, Any]]] = {}
+# /tasks/stream 的订阅者队列
+_TASK_SUBSCRIBERS: set[asyncio.Queue] = set()
+_TASK_QUEUE_SIZE = 256
+
+
+async def _fetch_upstream(url: str, timeout: float) -> tuple[int, Any]:
+    r = await _get_http_client().get(url, timeout=timeout)
+    try:
+        body = r.json()
+    except ValueError:
+        body = None
+    return r.status_code, body
+
+
+async def _coalesced_get(url: str, timeout: float) -> tuple[int, Any]:
+    """GET url 并返回 (status_code, json body)；已有相同请求在途时直接等待它的结果。"""
+    task = _INFLIGHT_GETS.get(url)
+    if task is None or task.done():
+        task = asyncio.create_task(_fetch_upstream(url, timeout))
+        _INFLIGHT_GETS[url] = task
+
+        def _done(t: asyncio.Task) -> None:
+            if _INFLIGHT_GETS.get(url) is t:
+                del _INFLIGHT_GETS[url]
+            if not t.cancelled():
+                t.exception()  # 所有等待者都已断开时，避免 "exception was never retrieved"
+
+        task.add_done_callback(_done)
+    # shield: 某个浏览器断开连接只取消它自己的等待，不影响共享的上游请求
+    return await asyncio.shield(task)
+
+
+async def _cached_availability(url: str, timeout: float) -> tuple[int, Any]:
+    """availability 结果短时缓存；请求异常不缓存，下次直接重试。"""
+    hit = _AVAILABILITY_CACHE.get(url)
+    if hit is not None and time.monotonic() - hit[0] < AGENT_AVAILABILITY_CACHE_TTL:
+        return hit[1]
+    result = await _coalesced_get(url, timeout)
+    _AVAILABILITY_CACHE[url] = (time.monotonic(), result)
+    return result
+
+
+def invalidate_availability_cache() -> None:
+    _AVAILABILITY_CACHE.clear()
+
+
+def publish_task_update(task: dict) -> None:
+    """由 main_server 在收到 ZMQ task_update 事件时调用，推送给所有 /tasks/stream 订阅者。"""
+    if not isinstance(task, dict) or not task.get("id"):
+        return
+    for queue in list(_TASK_SUBSCRIBERS):
+        if queue.full():
+            # 客户端读得太慢：丢掉最旧的一条，保留最新状态
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        queue.put_nowait(task)
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
 @router.post('/flags')
 async def update_agent_flags(request: Request):
     """来自前端的Agent开关更新，级联到各自的session manager。"""
@@ -59,6 +135,7 @@ async def update_agent_flags(request: Request):
             return JSONResponse({"success": False, "error": "lanlan not found"}, status_code=404)
         # Update core flags first
         mgr.update_agent_flags(flags)
+        invalidate_availability_cache()
         # Forward to tool server for MCP/Computer-Use flags
         try:
             forward_payload = {}
@@ -153,6 +230,7 @@ async def post_agent_command(request: Request):
             if key in {"computer_use_enabled", "browser_use_enabled", "mcp_enabled", "user_plugin_enabled"}:
                 mgr.update_agent_flags({key: bool(data.get("value"))})
 
+        invalidate_availability_cache()
         t_proxy = time.perf_counter()
         client = _get_http_client()
         r = await client.post(f"{TOOL_SERVER_BASE}/agent/command", json=data, timeout=1.5)
@@ -219,11 +297,10 @@ async def agent_health():
 @router.get('/computer_use/availability')
 async def proxy_cu_availability():
     try:
-        client = _get_http_client()
-        r = await client.get(f"{TOOL_SERVER_BASE}/computer_use/availability", timeout=1.5)
-        if not r.is_success:
-            return JSONResponse({"ready": False, "reasons": [f"tool_server responded {r.status_code}"]}, status_code=502)
-        return r.json()
+        status_code, body = await _cached_availability(f"{TOOL_SERVER_BASE}/computer_use/availability", 1.5)
+        if not 200 <= status_code < 300:
+            return JSONResponse({"ready": False, "reasons": [f"tool_server responded {status_code}"]}, status_code=502)
+        return body
     except Exception as e:
         return JSONResponse({"ready": False, "reasons": [f"proxy error: {e}"]}, status_code=502)
 
@@ -232,11 +309,10 @@ async def proxy_cu_availability():
 @router.get('/mcp/availability')
 async def proxy_mcp_availability():
     try:
-        client = _get_http_client()
-        r = await client.get(f"{TOOL_SERVER_BASE}/mcp/availability", timeout=1.5)
-        if not r.is_success:
-            return JSONResponse({"ready": False, "reasons": [f"tool_server responded {r.status_code}"]}, status_code=502)
-        return r.json()
+        status_code, body = await _cached_availability(f"{TOOL_SERVER_BASE}/mcp/availability", 1.5)
+        if not 200 <= status_code < 300:
+            return JSONResponse({"ready": False, "reasons": [f"tool_server responded {status_code}"]}, status_code=502)
+        return body
     except Exception as e:
         return JSONResponse({"ready": False, "reasons": [f"proxy error: {e}"]}, status_code=502)
 
@@ -244,12 +320,11 @@ async def proxy_mcp_availability():
 @router.get('/user_plugin/availability')
 async def proxy_up_availability():
     try:
-        client = _get_http_client()
-        r = await client.get(f"{USER_PLUGIN_BASE}/available", timeout=1.5)
-        if r.is_success:
+        status_code, _ = await _cached_availability(f"{USER_PLUGIN_BASE}/available", 1.5)
+        if 200 <= status_code < 300:
             return JSONResponse({"ready": True, "reasons": ["user_plugin server reachable"]}, status_code=200)
         else:
-            return JSONResponse({"ready": False, "reasons": [f"user_plugin server responded {r.status_code}"]}, status_code=502)
+            return JSONResponse({"ready": False, "reasons": [f"user_plugin server responded {status_code}"]}, status_code=502)
     except Exception as e:
         return JSONResponse({"ready": False, "reasons": [f"proxy error: {e}"]}, status_code=502)
 
@@ -257,11 +332,10 @@ async def proxy_up_availability():
 @router.get('/browser_use/availability')
 async def proxy_browser_availability():
     try:
-        client = _get_http_client()
-        r = await client.get(f"{TOOL_SERVER_BASE}/browser_use/availability", timeout=1.5)
-        if not r.is_success:
-            return JSONResponse({"ready": False, "reasons": [f"tool_server responded {r.status_code}"]}, status_code=502)
-        return r.json()
+        status_code, body = await _cached_availability(f"{TOOL_SERVER_BASE}/browser_use/availability", 1.5)
+        if not 200 <= status_code < 300:
+            return JSONResponse({"ready": False, "reasons": [f"tool_server responded {status_code}"]}, status_code=502)
+        return body
     except Exception as e:
         return JSONResponse({"ready": False, "reasons": [f"proxy error: {e}"]}, status_code=502)
 
@@ -271,25 +345,60 @@ async def proxy_browser_availability():
 async def proxy_tasks():
     """Get all tasks from tool server via main_server proxy."""
     try:
-        client = _get_http_client()
-        r = await client.get(f"{TOOL_SERVER_BASE}/tasks", timeout=2.5)
-        if not r.is_success:
-            return JSONResponse({"tasks": [], "error": f"tool_server responded {r.status_code}"}, status_code=502)
-        return r.json()
+        status_code, body = await _coalesced_get(f"{TOOL_SERVER_BASE}/tasks", 2.5)
+        if not 200 <= status_code < 300:
+            return JSONResponse({"tasks": [], "error": f"tool_server responded {status_code}"}, status_code=502)
+        return body
     except Exception as e:
         return JSONResponse({"tasks": [], "error": f"proxy error: {e}"}, status_code=502)
 
 
+@router.get('/tasks/stream')
+async def stream_tasks(request: Request):
+    """SSE 任务流：先发一次 snapshot（当前全部任务），之后推送 ZMQ 事件总线上的 task_update。
+
+    用于替代前端对 /tasks 的轮询。
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=_TASK_QUEUE_SIZE)
+    _TASK_SUBSCRIBERS.add(queue)
+
+    async def _events():
+        try:
+            try:
+                status_code, body = await _coalesced_get(f"{TOOL_SERVER_BASE}/tasks", 2.5)
+                tasks = body.get("tasks", []) if 200 <= status_code < 300 and isinstance(body, dict) else []
+            except Exception as e:
+                logger.debug(f"tasks stream snapshot failed: {e}")
+                tasks = []
+            yield _sse("snapshot", {"tasks": tasks})
+            while True:
+                try:
+                    task = await asyncio.wait_for(queue.get(), timeout=AGENT_TASK_STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                yield _sse("task", task)
+        finally:
+            _TASK_SUBSCRIBERS.discard(queue)
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 
 @router.get('/tasks/{task_id}')
 async def proxy_task_detail(task_id: str):
     """Get specific task details from tool server via main_server proxy."""
     try:
-        client = _get_http_client()
-        r = await client.get(f"{TOOL_SERVER_BASE}/tasks/{task_id}", timeout=1.5)
-        if not r.is_success:
-            return JSONResponse({"error": f"tool_server responded {r.status_code}"}, status_code=502)
-        return r.json()
+        status_code, body = await _coalesced_get(f"{TOOL_SERVER_BASE}/tasks/{task_id}", 1.5)
+        if not 200 <= status_code < 300:
+            return JSONResponse({"error": f"tool_server responded {status_code}"}, status_code=502)
+        return body
     except Exception as e:
         return JSONResponse({"error": f"proxy error: {e}"}, status_code=502)
 
@@ -20,7 +20,7 @@ import pathlib
 import wave
 
 from fastapi import APIRouter, Request, File, UploadFile, Form
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 import httpx
 import dashscope
 from dashscope.audio.tts_v2 import VoiceEnrollmentService, SpeechSynthesizer
@@ -28,6 +28,7 @@ from dashscope.audio.tts_v2 import VoiceEnrollmentService, SpeechSynthesizer
 from .shared_state import get_config_manager, get_session_manager, get_initialize_character_data
 from utils.frontend_utils import find_models, find_model_directory, is_user_imported_model
 from utils.language_utils import normalize_language_code
+from utils.characters_view import get_characters_view
 from config import MEMORY_SERVER_PORT, TFLINK_UPLOAD_URL
 
 router = APIRouter(prefix="/api/characters", tags=["characters"])
@@ -87,10 +88,8 @@ async def send_reload_page_notice(session, message_text: str = "语音已更新
 
 @router.get('/')
 async def get_characters(request: Request):
-    """获取角色数据，支持根据用户语言自动翻译人设"""
+    """获取角色数据，支持根据用户语言自动翻译人设（按语言缓存，支持 ETag/304）"""
     _config_manager = get_config_manager()
-    # 创建深拷贝，避免修改原始配置数据
-    characters_data = copy.deepcopy(_config_manager.load_characters())
     
     # 尝试从请求参数或请求头获取用户语言
     user_language = request.query_params.get('language')
@@ -101,43 +100,18 @@ async def get_characters(request: Request):
     # 使用公共函数归一化语言代码
     user_language = normalize_language_code(user_language, format='full')
     
-    # 如果语言是中文，不需要翻译
-    if user_language == 'zh-CN':
-        return JSONResponse(content=characters_data)
-    
-    # 需要翻译：翻译人设数据（在深拷贝上进行，不影响原始配置）
+    # 中文直接返回原始数据；其他语言返回翻译后的视图（只翻译 档案名/昵称/性别，不翻译 system_prompt）
     try:
-        from utils.language_utils import get_translation_service
-        translation_service = get_translation_service(_config_manager)
-        
-        # 翻译主人数据
-        if '主人' in characters_data and isinstance(characters_data['主人'], dict):
-            characters_data['主人'] = await translation_service.translate_dict(
-                characters_data['主人'],
-                user_language,
-                fields_to_translate=['档案名', '昵称']
-            )
-        
-        # 翻译猫娘数据（并行翻译以提升性能）
-        if '猫娘' in characters_data and isinstance(characters_data['猫娘'], dict):
-            async def translate_catgirl(name, data):
-                if isinstance(data, dict):
-                    return name, await translation_service.translate_dict(
-                        data, user_language,
-                        fields_to_translate=['档案名', '昵称', '性别']  # 注意：不翻译 system_prompt
-                    )
-                return name, data
-            
-            results = await asyncio.gather(*[
-                translate_catgirl(name, data)
-                for name, data in characters_data['猫娘'].items()
-            ])
-            characters_data['猫娘'] = dict(results)
-        
-        return JSONResponse(content=characters_data)
+        snapshot = await get_characters_view(_config_manager).get(user_language)
     except Exception as e:
         logger.error(f"翻译人设数据失败: {e}，返回原始数据")
-        return JSONResponse(content=characters_data)
+        return JSONResponse(content=copy.deepcopy(_config_manager.load_characters()))
+
+    headers = {'ETag': snapshot.etag, 'Cache-Control': 'no-cache', 'Vary': 'Accept-Language'}
+    if_none_match = request.headers.get('If-None-Match', '')
+    if any(tag.strip().removeprefix('W/') == snapshot.etag for tag in if_none_match.split(',')):
+        return Response(status_code=304, headers=headers)
+    return Response(content=snapshot.body, media_type='application/json', headers=headers)
 
 
 @router.get('/current_live2d_model')
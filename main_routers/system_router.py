@@ -17,12 +17,10 @@ import logging
 import re
 import time
 from collections import deque
-from io import BytesIO
 from urllib.parse import unquote
 
 from fastapi import APIRouter, Request
 from fastapi.responses import JSONResponse, Response
-from openai import AsyncOpenAI
 from openai import APIConnectionError, InternalServerError, RateLimitError
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
@@ -31,11 +29,11 @@ import httpx
 from .shared_state import get_steamworks, get_config_manager, get_sync_message_queue, get_session_manager
 from config import get_extra_body, MEMORY_SERVER_PORT
 from config.prompts_sys import (
-    emotion_analysis_prompt,
     get_proactive_screen_prompt, get_proactive_generate_prompt,
 )
+from main_logic.emotion_service import get_emotion_service
 from utils.workshop_utils import get_workshop_path
-from utils.screenshot_utils import compress_screenshot, COMPRESS_TARGET_HEIGHT, COMPRESS_JPEG_QUALITY
+from utils.screenshot_utils import compress_screenshot_async, COMPRESS_TARGET_HEIGHT, COMPRESS_JPEG_QUALITY
 from utils.language_utils import detect_language, translate_text, normalize_language_code, get_global_language
 from utils.web_scraper import (
     fetch_trending_content, format_trending_content,
@@ -361,106 +359,62 @@ async def emotion_analysis(request: Request):
         text = data['text']
         api_key = data.get('api_key')
         model = data.get('model')
-        
-        # 使用参数或默认配置，使用 .get() 安全获取避免 KeyError
-        emotion_config = _config_manager.get_model_api_config('emotion')
-        emotion_api_key = emotion_config.get('api_key')
-        emotion_model = emotion_config.get('model')
-        emotion_base_url = emotion_config.get('base_url')
-        
-        # 优先使用请求参数，其次使用配置
-        api_key = api_key or emotion_api_key
-        model = model or emotion_model
-        
-        if not api_key:
-            return {"error": "情绪分析模型配置缺失: API密钥未提供且配置中未设置默认密钥"}
-        
-        if not model:
-            return {"error": "情绪分析模型配置缺失: 模型名称未提供且配置中未设置默认模型"}
-        
-        # 创建异步客户端
-        client = AsyncOpenAI(api_key=api_key, base_url=emotion_base_url)
-        
-        # 构建请求消息
-        messages = [
-            {
-                "role": "system", 
-                "content": emotion_analysis_prompt
-            },
-            {
-                "role": "user", 
-                "content": text
-            }
-        ]
+        lanlan_name = data.get('lanlan_name')
+        emotion_service = get_emotion_service()
 
-        # 异步调用模型
-        request_params = {
-            "model": model,
-            "messages": messages,
-            "temperature": 0.3,
-            # Gemini 模型可能返回 markdown 格式，需要更多 token
-            "max_completion_tokens": 40
-        }
-        
-        # 只有在需要时才添加 extra_body
-        extra_body = get_extra_body(model)
-        if extra_body:
-            request_params["extra_body"] = extra_body
-        
-        response = await client.chat.completions.create(**request_params)
-        
-        # 解析响应
-        result_text = response.choices[0].message.content.strip()
-
-        # 处理 markdown 代码块格式（Gemini 可能返回 ```json {...} ``` 格式）
-        # 首先尝试使用正则表达式提取第一个代码块
-        code_block_match = re.search(r"```(?:json)?\s*(.+?)\s*```", result_text, flags=re.S)
-        if code_block_match:
-            result_text = code_block_match.group(1).strip()
-        elif result_text.startswith("```"):
-            # 回退到原有的行分割逻辑
-            lines = result_text.split("\n")
-            if lines[0].startswith("```"):
-                lines = lines[1:]  # 移除第一行
-            if lines and lines[-1].strip() == "```":
-                lines = lines[:-1]  # 移除最后一行
-            result_text = "\n".join(lines).strip()
-        
-        # 尝试解析JSON响应
-        try:
-            import json
-            result = json.loads(result_text)
-            # 获取emotion和confidence
-            emotion = result.get("emotion", "neutral")
-            confidence = result.get("confidence", 0.5)
+        # 本地快速判断：情绪标签（仅当分析的正是该角色最近一条回复）、emoji、情绪词典
+        tags = []
+        session_manager = get_session_manager()
+        if lanlan_name and lanlan_name in session_manager:
+            tags_for = getattr(session_manager[lanlan_name], 'emotion_tags_for', None)
+            tags = tags_for(text) if tags_for else []
+        result = emotion_service.classify_local(text, tags) or emotion_service.cached(text)
+
+        if result is None:
+            # 使用参数或默认配置，使用 .get() 安全获取避免 KeyError
+            emotion_config = _config_manager.get_model_api_config('emotion')
+            emotion_api_key = emotion_config.get('api_key')
+            emotion_model = emotion_config.get('model')
+            emotion_base_url = emotion_config.get('base_url')
             
-            # 当confidence小于0.3时，自动将emotion设置为neutral
-            if confidence < 0.3:
-                emotion = "neutral"
+            # 优先使用请求参数，其次使用配置
+            api_key = api_key or emotion_api_key
+            model = model or emotion_model
             
-            # 获取 lanlan_name 并推送到 monitor
-            lanlan_name = data.get('lanlan_name')
-            sync_message_queue = get_sync_message_queue()
-            if lanlan_name and lanlan_name in sync_message_queue:
-                sync_message_queue[lanlan_name].put({
-                    "type": "json",
-                    "data": {
-                        "type": "emotion",
-                        "emotion": emotion,
-                        "confidence": confidence
-                    }
-                })
+            if not api_key:
+                return {"error": "情绪分析模型配置缺失: API密钥未提供且配置中未设置默认密钥"}
             
-            return {
-                "emotion": emotion,
-                "confidence": confidence
-            }
-        except json.JSONDecodeError:
-            # 如果JSON解析失败，返回简单的情感判断
-            return {
-                "emotion": "neutral",
-                "confidence": 0.5
-            }
+            if not model:
+                return {"error": "情绪分析模型配置缺失: 模型名称未提供且配置中未设置默认模型"}
+
+            # 缓存未命中的请求与同一时刻的其他请求合批调用 LLM
+            result = await emotion_service.analyze_remote(text, api_key, model, emotion_base_url)
+
+        # 获取emotion和confidence
+        emotion = result.get("emotion", "neutral")
+        confidence = result.get("confidence", 0.5)
+        
+        # 当confidence小于0.3时，自动将emotion设置为neutral
+        if confidence < 0.3:
+            emotion = "neutral"
+        
+        # 推送到 monitor
+        sync_message_queue = get_sync_message_queue()
+        if lanlan_name and lanlan_name in sync_message_queue:
+            sync_message_queue[lanlan_name].put({
+                "type": "json",
+                "data": {
+                    "type": "emotion",
+                    "emotion": emotion,
+                    "confidence": confidence
+                }
+            })
+        
+        return {
+            "emotion": emotion,
+            "confidence": confidence,
+            "source": result.get("source", "llm")
+        }
             
     except Exception as e:
         logger.error(f"情感分析失败: {e}")
@@ -1068,14 +1022,15 @@ async def proactive_chat(request: Request):
                 # 截图将在 Phase 2 由 vision_model 直接读取原图，这里只做压缩。
                 compressed_b64 = ''
                 try:
-                    from PIL import Image as _PILImage
                     _, b64_raw = screenshot_data.split(',', 1)
-                    img = _PILImage.open(BytesIO(base64.b64decode(b64_raw)))
-                    if img.mode in ('RGBA', 'LA', 'P'):
-                        img = img.convert('RGB')
-                    jpg_bytes = compress_screenshot(img, target_h=COMPRESS_TARGET_HEIGHT, quality=COMPRESS_JPEG_QUALITY)
-                    compressed_b64 = base64.b64encode(jpg_bytes).decode('utf-8')
-                    logger.info(f"[{lanlan_name}] Vision 通道: 截图压缩完成 {len(jpg_bytes)//1024}KB (Phase 2 将直接分析)")
+                    # 解码/缩放/编码在共享线程池中完成，不阻塞事件循环
+                    frame = await compress_screenshot_async(
+                        base64.b64decode(b64_raw), target_h=COMPRESS_TARGET_HEIGHT, quality=COMPRESS_JPEG_QUALITY
+                    )
+                    if frame is None:
+                        raise ValueError("无效的图片数据")
+                    compressed_b64 = frame.b64
+                    logger.info(f"[{lanlan_name}] Vision 通道: 截图压缩完成 {frame.size//1024}KB (Phase 2 将直接分析)")
                 except Exception as compress_err:
                     logger.warning(f"[{lanlan_name}] 截图压缩失败（Phase 2 将无法使用截图）: {compress_err}")
                 return (mode, {'window_title': window_title, 'screenshot_b64': compressed_b64})
@@ -18,6 +18,7 @@ from fastapi import APIRouter, File, Request, UploadFile
 from fastapi.responses import JSONResponse
 
 from .shared_state import get_config_manager
+from utils.vrm_catalog import VrmAsset, get_vrm_catalog
 
 router = APIRouter(prefix="/api/model/vrm", tags=["vrm"])
 logger = logging.getLogger("Main")
@@ -205,49 +206,8 @@ def get_vrm_models():
         config_mgr = get_config_manager()
         config_mgr.ensure_vrm_directory()
 
-        models = []
-        seen_urls = set()  # 使用 set 避免重复（基于 URL）
-
-        # 1. 搜索项目目录下的VRM文件 (static/vrm/)
-        project_root = config_mgr.project_root
-        static_vrm_dir = project_root / "static" / "vrm"
-        if static_vrm_dir.exists():
-            for vrm_file in static_vrm_dir.glob('*.vrm'):
-                url = f"/static/vrm/{vrm_file.name}"
-                # 跳过已存在的 URL（避免重复）
-                if url in seen_urls:
-                    continue
-                seen_urls.add(url)
-                
-                # 移除绝对路径，只返回公共 URL 和相对信息
-                models.append({
-                        "name": vrm_file.stem,
-                        "filename": vrm_file.name,
-                        "url": url,
-                        "type": "vrm",
-                        "size": vrm_file.stat().st_size,
-                        "location": "project"  
-                    })
-
-        # 2. 搜索用户目录下的VRM文件 (user_vrm/)
-        vrm_dir = config_mgr.vrm_dir
-        if vrm_dir.exists():
-            for vrm_file in vrm_dir.glob('*.vrm'):
-                url = f"{VRM_USER_PATH}/{vrm_file.name}"
-                # 跳过已存在的 URL（避免重复）
-                if url in seen_urls:
-                    continue
-                seen_urls.add(url)
-                
-                # 移除绝对路径，只返回公共 URL 和相对信息
-                models.append({
-                        "name": vrm_file.stem,
-                        "filename": vrm_file.name,
-                        "url": url,
-                        "type": "vrm",
-                        "size": vrm_file.stat().st_size,
-                        "location": "user"  
-                    })
+        # 项目目录 static/vrm/ 优先，其次用户目录 user_vrm/；基于 URL 去重
+        models = [asset.to_listing() for asset in get_vrm_catalog(config_mgr).models()]
 
         return JSONResponse(content={
             "success": True,
@@ -267,136 +227,25 @@ def get_vrm_animations():
             config_mgr.ensure_vrm_directory()
         except Exception as ensure_error:
             logger.warning(f"确保VRM目录失败（继续尝试）: {ensure_error}")
-        
-        # 检查animations目录
-        animations_dirs = []
-        static_animation_dir = None
-        user_animation_dir = None
 
-        # 1. 优先检查项目目录下的static/vrm/animation（实际文件位置）
-        try:
-            project_root = config_mgr.project_root
-            static_animation_dir = project_root / "static" / "vrm" / "animation"
-            if static_animation_dir.exists() and static_animation_dir.is_dir():
-                animations_dirs.append(static_animation_dir)
-                logger.debug(f"找到静态动画目录: {static_animation_dir}")
-            else:
-                logger.debug(f"静态动画目录不存在或不是目录: {static_animation_dir}")
-        except Exception as static_error:
-            logger.warning(f"检查静态动画目录失败: {static_error}")
-            static_animation_dir = None
-
-        # 2. 检查用户目录下的vrm/animation（兼容旧版）
-        try:
-            user_animation_dir = config_mgr.vrm_animation_dir
-            if user_animation_dir.exists() and user_animation_dir.is_dir():
-                animations_dirs.append(user_animation_dir)
-                logger.debug(f"找到用户动画目录: {user_animation_dir}")
-            else:
-                logger.debug(f"用户动画目录不存在或不是目录: {user_animation_dir}")
-        except Exception as user_error:
-            logger.warning(f"检查用户动画目录失败: {user_error}")
-            user_animation_dir = None
-        
-        animations = []
-        seen_urls = set()  # 使用 set 存储已见过的 URL，O(1) 查找，避免 O(n²) 列表检查
-        
-        logger.info(f"找到 {len(animations_dirs)} 个动画目录")
-        
-        # 如果没有找到任何目录，直接返回空列表
-        if not animations_dirs:
-            logger.info("未找到任何动画目录，返回空列表")
-            return JSONResponse(content={
-                "success": True,
-                "animations": []
-            })
-        
-        # 预先计算路径字符串，避免在循环中重复计算
-        static_animation_dir_str = str(static_animation_dir) if static_animation_dir else None
-        user_animation_dir_str = str(user_animation_dir) if user_animation_dir else None
-        
-        for anim_dir in animations_dirs:
-            try:
-                # 根据目录确定URL前缀（使用路径字符串比较更安全）
-                anim_dir_str = str(anim_dir)
-                
-                if static_animation_dir_str and anim_dir_str == static_animation_dir_str:
-                    # static/vrm/animation 目录 -> /static/vrm/animation
-                    url_prefix = VRM_STATIC_ANIMATION_PATH
-                elif user_animation_dir_str and anim_dir_str == user_animation_dir_str:
-                    # user_vrm/animation 目录 -> /user_vrm/animation
-                    url_prefix = "/user_vrm/animation"
-                else:
-                    # 默认使用 /user_vrm/animation
-                    url_prefix = "/user_vrm/animation"
-                
-                # 查找.vrma文件
-                for anim_file in anim_dir.glob('*.vrma'):
-                    try:
-                        if not anim_file.exists() or not anim_file.is_file():
-                            continue
-                        
-                        url = f"{url_prefix}/{anim_file.name}"
-                        # 使用 set 去重，基于 URL（逻辑路径）而不是绝对路径
-                        if url in seen_urls:
-                            continue
-                        seen_urls.add(url)
-                        
-                        # 移除绝对路径，只返回公共 URL 和相对信息
-                        animations.append({
-                            "name": anim_file.stem,
-                            "filename": anim_file.name,
-                            "url": url,
-                            "type": "vrma",
-                            "size": anim_file.stat().st_size
-                        })
-                    except Exception as file_error:
-                        logger.warning(f"处理动画文件失败 {anim_file}: {file_error}")
-                        continue
-                
-                # 也支持.vrm文件作为动画（某些情况下）
-                for anim_file in anim_dir.glob('*.vrm'):
-                    try:
-                        if not anim_file.exists() or not anim_file.is_file():
-                            continue
-                        
-                        url = f"{url_prefix}/{anim_file.name}"
-                        # 使用 set 去重，基于 URL（逻辑路径）
-                        if url in seen_urls:
-                            continue
-                        seen_urls.add(url)
-                        
-                        # 移除绝对路径，只返回公共 URL 和相对信息
-                        animations.append({
-                            "name": anim_file.stem,
-                            "filename": anim_file.name,
-                            "url": url,
-                            "type": "vrm",
-                            "size": anim_file.stat().st_size
-                        })
-                    except Exception as file_error:
-                        logger.warning(f"处理动画文件失败 {anim_file}: {file_error}")
-                        continue
-            except Exception as dir_error:
-                logger.warning(f"处理动画目录失败 {anim_dir}: {dir_error}")
-                continue
-        
-        logger.info(f"成功获取VRM动画列表，共 {len(animations)} 个动画文件")
+        # static/vrm/animation（实际文件位置）优先，其次用户目录下的 vrm/animation（兼容旧版）
+        animations = [
+            asset.to_listing(include_location=False)
+            for asset in get_vrm_catalog(config_mgr).animations()
+        ]
+
+        logger.debug(f"成功获取VRM动画列表，共 {len(animations)} 个动画文件")
         return JSONResponse(content={
             "success": True,
             "animations": animations
         })
     except Exception as e:
-        import traceback
-        error_detail = traceback.format_exc()
         logger.exception("获取VRM动画列表失败")
-        logger.error(f"错误详情: {error_detail}")
-        error_message = str(e)
         return JSONResponse(
             status_code=500, 
             content={
                 "success": False, 
-                "error": error_message
+                "error": str(e)
             }
         )
 
@@ -428,8 +277,8 @@ DEFAULT_MOOD_MAP = {
 }
 
 
-def _get_emotion_config_path(model_name: str) -> Path | None:
-    """获取模型情感配置文件路径"""
+def _get_emotion_config_path(model_name: str, create: bool = False) -> Path | None:
+    """获取模型情感配置文件路径（create=True 时确保配置目录存在）"""
     # 允许 Unicode 单词字符（包括 CJK）、下划线、连字符
     # \w 在 Python3 中支持 Unicode，包含字母、数字、下划线（含中日韩字符）
     safe_name = re.sub(r'[^\w-]', '', model_name, flags=re.UNICODE)
@@ -441,7 +290,8 @@ def _get_emotion_config_path(model_name: str) -> Path | None:
 
     # 配置文件存储在 static/vrm/configs/ 目录下
     config_dir = config_mgr.project_root / "static" / "vrm" / "configs"
-    config_dir.mkdir(parents=True, exist_ok=True)
+    if create:
+        config_dir.mkdir(parents=True, exist_ok=True)
 
     config_path = config_dir / f"{safe_name}_emotion.json"
 
@@ -455,42 +305,23 @@ def _get_emotion_config_path(model_name: str) -> Path | None:
     return config_path
 
 
-def _get_model_path(model_name: str) -> tuple[Path | None, str]:
-    """获取VRM模型文件路径，返回 (path, url_prefix)"""
+def _find_model(model_name: str) -> VrmAsset | None:
+    """按模型名在目录索引中查找 .vrm（项目目录 static/vrm 优先，其次 user_vrm）"""
     # 仅允许字母、数字、点、下划线、连字符（含 CJK 等 Unicode 单词字符）
     safe_name = re.sub(r'[^\w.\-]', '', model_name, flags=re.UNICODE)
     if not safe_name or safe_name != model_name:
         logger.warning(f"无效的模型名称: {model_name!r}")
-        return None, ""
+        return None
+    # 索引中只有这两个目录下直接存在的文件，按文件名匹配，不会越界
+    return get_vrm_catalog(get_config_manager()).find_model(safe_name)
 
-    config_mgr = get_config_manager()
-    project_root = config_mgr.project_root
 
-    # 1. 检查项目目录
-    static_vrm_dir = project_root / "static" / "vrm"
-    static_vrm_path = static_vrm_dir / f"{safe_name}.vrm"
-    try:
-        resolved = static_vrm_path.resolve()
-        resolved.relative_to(static_vrm_dir.resolve())
-    except ValueError:
-        logger.warning(f"路径穿越尝试被阻止: {model_name!r}")
-        return None, ""
-    if resolved.suffix == '.vrm' and resolved.is_file():
-        return resolved, "/static/vrm"
-
-    # 2. 检查用户目录
-    config_mgr.ensure_vrm_directory()
-    user_vrm_path = config_mgr.vrm_dir / f"{safe_name}.vrm"
-    try:
-        resolved = user_vrm_path.resolve()
-        resolved.relative_to(config_mgr.vrm_dir.resolve())
-    except ValueError:
-        logger.warning(f"路径穿越尝试被阻止: {model_name!r}")
+def _get_model_path(model_name: str) -> tuple[Path | None, str]:
+    """获取VRM模型文件路径，返回 (path, url_prefix)"""
+    asset = _find_model(model_name)
+    if asset is None:
         return None, ""
-    if resolved.suffix == '.vrm' and resolved.is_file():
-        return resolved, VRM_USER_PATH
-
-    return None, ""
+    return asset.path, (VRM_STATIC_PATH if asset.location == "project" else VRM_USER_PATH)
 
 
 @router.get('/emotion_mapping/{model_name}')
@@ -508,9 +339,8 @@ async def get_emotion_mapping(model_name: str):
                 content={"success": False, "error": error_msg}
             )
 
-        if config_path.exists():
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+        config = get_vrm_catalog(get_config_manager()).emotion_config(config_path)
+        if config is not None:
             return {"success": True, "config": config}
         else:
             # 返回默认配置
@@ -579,7 +409,7 @@ async def update_emotion_mapping(model_name: str, request: Request):
             )
 
         # 保存配置
-        config_path = _get_emotion_config_path(model_name)
+        config_path = _get_emotion_config_path(model_name, create=True)
         if not config_path:
             return JSONResponse(
                 status_code=500,
@@ -608,17 +438,17 @@ async def update_emotion_mapping(model_name: str, request: Request):
 
 @router.get('/expressions/{model_name}')
 async def get_model_expressions(model_name: str):
-    """获取VRM模型支持的表情列表（从配置中读取，如果有的话）"""
-    # TODO: model_name parameter is intentionally unused. Model-specific expression
-    # resolution is not implemented here because VRM files must be parsed on the frontend.
-    # The frontend obtains actual expression lists after loading the model.
-    # This endpoint returns a common expression list as a reference.
-    _ = model_name  # Mark as intentionally unused
-
+    """获取VRM模型支持的表情列表（来自目录索引解析出的模型表情，解析不到时返回常见表情列表）"""
     try:
-        # 由于VRM文件需要前端解析，这里返回常见表情列表
-        # 前端会在加载模型后获取实际表情列表
+        asset = _find_model(model_name)
+        if asset is not None and asset.expressions:
+            return {
+                "success": True,
+                "expressions": list(asset.expressions),
+                "spec_version": asset.spec_version,
+            }
 
+        # 模型不存在或未声明表情：返回常见表情列表，前端会在加载模型后获取实际表情列表
         common_expressions = [
             "neutral", "happy", "joy", "fun", "smile", "joy_01",
             "relaxed", "content",
@@ -120,6 +120,9 @@ async def websocket_endpoint(websocket: WebSocket, lanlan_name: str):
                 b64 = raw.split(",", 1)[1] if "," in raw else raw
                 session_manager[lanlan_name].resolve_screenshot_request(b64)
 
+            elif action == "subtitle_translation":
+                session_manager[lanlan_name].set_subtitle_translation(message.get("enabled", False))
+
             elif action == "ping":
                 # 心跳保活消息，回复pong
                 await websocket.send_text(json.dumps({"type": "pong"}))
@@ -45,6 +45,7 @@ import atexit # noqa
 import httpx # noqa
 from config import MAIN_SERVER_PORT, MONITOR_SERVER_PORT # noqa
 from utils.config_manager import get_config_manager # noqa
+from utils.metrics import install_metrics # noqa
 # 导入创意工坊工具模块
 from utils.workshop_utils import ( # noqa
     get_workshop_root,
@@ -136,6 +137,12 @@ def cleanup():
             sync_shutdown_event[k].set()
         except Exception:
             pass
+    # 偏好设置是防抖写回的，退出前把未落盘的修改写入文件（信号处理走 os._exit，不会触发 atexit）
+    try:
+        from utils.preferences import flush_user_preferences
+        flush_user_preferences()
+    except Exception as e:
+        logger.warning(f"保存用户偏好失败: {e}")
 
 # 只在主进程中注册 cleanup 函数，防止子进程退出时执行清理
 if _IS_MAIN_PROCESS:
@@ -200,6 +207,11 @@ async def _handle_agent_event(event: dict):
                             pass
             return
 
+        if event_type == "task_update":
+            # /api/agent/tasks/stream 的订阅者不区分角色
+            from main_routers.agent_router import publish_task_update
+            publish_task_update(event.get("task") or {})
+
         if not lanlan or lanlan not in session_manager:
             return
         mgr = session_manager.get(lanlan)
@@ -425,6 +437,8 @@ lock = asyncio.Lock()
 
 # --- FastAPI App Setup ---
 app = FastAPI()
+# /metrics 需先于 pages_router 的兜底路由注册
+install_metrics(app, "main")
 
 
 
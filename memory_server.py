@@ -11,6 +11,7 @@ from langchain_core.messages import convert_to_messages
 from uuid import uuid4
 from config import MEMORY_SERVER_PORT
 from utils.config_manager import get_config_manager
+from utils.metrics import install_metrics
 from pydantic import BaseModel
 import re
 import asyncio
@@ -26,6 +27,7 @@ class HistoryRequest(BaseModel):
     input_history: str
 
 app = FastAPI()
+install_metrics(app, "memory")
 
 
 # ── 健康检查 / 指纹端点 ──────────────────────────────────────────
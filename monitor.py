@@ -175,6 +175,10 @@ connected_clients = set()
 subtitle_clients = set()
 current_subtitle = ""
 should_clear_next = False
+# 后端流式逐句翻译（subtitle_segment）：按 turn 累积译文
+segment_turn = None
+segment_parts = []
+segment_closed_turn = 0  # 新一轮开始后，之前轮次迟到的译文直接丢弃
 
 def is_japanese(text):
     import re
@@ -214,9 +218,9 @@ async def subtitle_websocket_endpoint(websocket: WebSocket):
 
 
 # 广播字幕到所有字幕客户端
-async def broadcast_subtitle():
+async def broadcast_subtitle(clear_first=True):
     global current_subtitle, should_clear_next
-    if should_clear_next:
+    if should_clear_next and clear_first:
         await clear_subtitle()
         should_clear_next = False
         # 给一个短暂的延迟让清空动画完成
@@ -254,6 +258,9 @@ async def clear_subtitle():
 async def sync_endpoint(websocket: WebSocket, lanlan_name:str):
     await websocket.accept()
     print(f"✅ [SYNC] 主服务器已连接: {websocket.client}")
+    # 主服务器可能重启过，译文 turn 编号重新计数
+    global segment_closed_turn
+    segment_closed_turn = 0
 
     try:
         while True:
@@ -266,17 +273,35 @@ async def sync_endpoint(websocket: WebSocket, lanlan_name:str):
                 msg_type = data.get("type", "unknown")
 
 
+                global segment_turn, segment_parts
                 if msg_type == "gemini_response":
-                    # 发送到字幕显示
+                    # 发送到字幕显示；本轮已有译文时字幕只显示译文
                     subtitle_text = data.get("text", "")
-                    current_subtitle += subtitle_text
-                    if subtitle_text:
-                        await broadcast_subtitle()
+                    if data.get("isNewMessage"):
+                        if segment_turn is not None:
+                            segment_closed_turn = max(segment_closed_turn, segment_turn)
+                        segment_turn, segment_parts = None, []
+                    if not segment_parts:
+                        current_subtitle += subtitle_text
+                        if subtitle_text:
+                            await broadcast_subtitle()
+
+                elif msg_type == "subtitle_segment":
+                    if data.get("turn", 0) <= segment_closed_turn:
+                        continue
+                    if data.get("turn") != segment_turn:
+                        segment_turn, segment_parts = data.get("turn"), []
+                    index = data.get("index", len(segment_parts))
+                    segment_parts.extend([""] * (index + 1 - len(segment_parts)))
+                    segment_parts[index] = data.get("text", "")
+                    current_subtitle = "".join(segment_parts)
+                    # 译文属于屏幕上正在显示的这一轮（可能在 turn end 之后才到），不能先清屏
+                    await broadcast_subtitle(clear_first=False)
 
                 elif msg_type == "turn end":
                     # 处理回合结束
-                    if current_subtitle:
-                        # 检查是否为日文，如果是则翻译
+                    if current_subtitle and not segment_parts:
+                        # 检查是否为日文，如果是则翻译（已流式翻译过的轮次跳过）
                         if is_japanese(current_subtitle):
                             translated_text = await translate_japanese_to_chinese(current_subtitle)
                             current_subtitle = translated_text
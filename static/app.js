@@ -224,6 +224,7 @@ function init_app() {
     let currentPlayingSpeechId = null;   // 当前正在播放的 speech_id
     let pendingDecoderReset = false;     // 是否需要在下一个新 speech_id 时重置解码器
     let skipNextAudioBlob = false;       // 是否跳过下一个音频 blob（被打断的旧音频）
+    let opusFrameChain = Promise.resolve(); // Opus 下行帧按到达顺序串行解码
 
     // 麦克风静音检测相关变量
     let silenceDetectionTimer = null;
@@ -381,6 +382,11 @@ function init_app() {
                 }
             }, HEARTBEAT_INTERVAL);
             console.log(window.t('console.heartbeatStarted'));
+
+            // 字幕开关已打开时，让后端开始逐句流式翻译
+            if (typeof syncSubtitleTranslation === 'function') {
+                syncSubtitleTranslation(socket);
+            }
         };
 
         socket.onmessage = (event) => {
@@ -411,9 +417,14 @@ function init_app() {
                     if (isNewMessage) {
                         lastVoiceUserMessage = null;
                         lastVoiceUserMessageTime = 0;
+                        if (typeof resetStreamedSubtitle === 'function') {
+                            resetStreamedSubtitle();
+                        }
                     }
 
                     appendMessage(response.text, 'gemini', isNewMessage);
+                } else if (response.type === 'subtitle_segment') {
+                    handleSubtitleSegment(response);
                 } else if (response.type === 'response_discarded') {
                     const attempt = response.attempt || 0;
                     const maxAttempts = response.max_attempts || 0;
@@ -893,7 +904,8 @@ function init_app() {
                                 // }
 
                                 // 用户要求：只在开启字幕翻译开关后才进行翻译
-                                if (subtitleEnabled) {
+                                // 后端已流式推送过译文时不再整轮翻译一次
+                                if (subtitleEnabled && !hasStreamedSubtitle()) {
                                     await translateAndShowSubtitle(fullText);
                                 }
                             } catch (error) {
@@ -4384,19 +4396,55 @@ function init_app() {
     }
 
 
-    async function handleAudioBlob(blob) {
-        // 精确打断控制：检查是否应跳过此音频（属于被打断的旧音频）
-        if (skipNextAudioBlob) {
-            console.log('跳过被打断的音频 blob');
-            return;
+    // 解析 Opus 下行帧："NKAU" | version(1) | len(speech_id) | speech_id | Ogg 页（见 utils/opus_downlink.py）
+    function parseSpeechAudioFrame(arrayBuffer) {
+        const bytes = new Uint8Array(arrayBuffer);
+        if (bytes.length < 6 || bytes[0] !== 0x4E || bytes[1] !== 0x4B || bytes[2] !== 0x41 || bytes[3] !== 0x55 || bytes[4] !== 1) {
+            return null;
         }
+        const end = 6 + bytes[5];
+        return { speechId: new TextDecoder().decode(bytes.subarray(6, end)), payload: bytes.subarray(end) };
+    }
+
+    async function decodeSpeechAudioFrame(frame) {
+        // 精确打断控制：Opus 帧自带 speech_id，不依赖 audio_chunk 头
+        if (frame.speechId && interruptedSpeechId && frame.speechId === interruptedSpeechId) {
+            return null;
+        }
+        if (frame.speechId && frame.speechId !== currentPlayingSpeechId) {
+            currentPlayingSpeechId = frame.speechId;
+            interruptedSpeechId = null;
+            pendingDecoderReset = false;
+        }
+        // 每段语音是一个新的 Ogg 流：首页带 BOS 标志（header_type & 0x02）时先重置解码器
+        const payload = frame.payload;
+        if (payload.length > 5 && payload[0] === 0x4F && (payload[5] & 0x02)) {
+            await resetOggOpusDecoder();
+        }
+        return decodeOggOpusChunk(payload);
+    }
 
+    async function handleAudioBlob(blob) {
+        const skipPcm = skipNextAudioBlob;
         const arrayBuffer = await blob.arrayBuffer();
         if (!arrayBuffer || arrayBuffer.byteLength === 0) {
             console.warn('收到空的音频数据，跳过处理');
             return;
         }
 
+        const speechFrame = parseSpeechAudioFrame(arrayBuffer);
+        // 精确打断控制：检查是否应跳过此音频（属于被打断的旧音频）
+        if (!speechFrame && skipPcm) {
+            console.log('跳过被打断的音频 blob');
+            return;
+        }
+        let speechFrameDecoding = null;
+        if (speechFrame) {
+            // 共用一个流式解码器，重置与解码不能交错
+            speechFrameDecoding = opusFrameChain.then(() => decodeSpeechAudioFrame(speechFrame));
+            opusFrameChain = speechFrameDecoding.catch(() => null);
+        }
+
         if (!audioPlayerContext) {
             audioPlayerContext = new (window.AudioContext || window.webkitAudioContext)();
             syncAudioGlobals();
@@ -4413,7 +4461,19 @@ function init_app() {
         let float32Data;
         let sampleRate = 48000;
 
-        if (isOgg) {
+        if (speechFrameDecoding) {
+            try {
+                const result = await speechFrameDecoding;
+                if (!result) {
+                    return;
+                }
+                float32Data = result.float32Data;
+                sampleRate = result.sampleRate;
+            } catch (e) {
+                console.error('OGG OPUS 解码失败:', e);
+                return;
+            }
+        } else if (isOgg) {
             // OGG OPUS 格式，用 WASM 流式解码
             try {
                 const result = await decodeOggOpusChunk(new Uint8Array(arrayBuffer));
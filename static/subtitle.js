@@ -363,6 +363,92 @@ async function translateAndShowSubtitle(text) {
     }
 }
 
+// 后端流式逐句翻译：开关打开后，后端每翻完一句就推送 subtitle_segment，不必等整轮结束
+let subtitleSocket = null;
+let streamedSubtitleTurn = null;
+let streamedSubtitleParts = [];
+let streamedSubtitleTranslated = false;
+let latestSubtitleTurn = 0;
+
+// 把字幕开关和目标语言同步给后端（WebSocket 连接建立和切换开关时调用）
+function syncSubtitleTranslation(ws) {
+    if (ws) {
+        // 新连接（可能是后端重启）的 turn 编号重新计数
+        subtitleSocket = ws;
+        latestSubtitleTurn = 0;
+    }
+    if (!subtitleSocket || subtitleSocket.readyState !== WebSocket.OPEN) {
+        return;
+    }
+    const message = { action: 'subtitle_translation', enabled: subtitleEnabled };
+    if (userLanguage !== null) {
+        message.language = userLanguage;
+    }
+    subtitleSocket.send(JSON.stringify(message));
+}
+
+// 收到一句译文：按 turn 累积，整轮里有句子确实被翻译过才显示
+function handleSubtitleSegment(segment) {
+    if (!subtitleEnabled || !segment || typeof segment.text !== 'string') {
+        return;
+    }
+    // 上一轮迟到的译文不覆盖新一轮
+    if (segment.turn < latestSubtitleTurn) {
+        return;
+    }
+    latestSubtitleTurn = segment.turn;
+    if (segment.turn !== streamedSubtitleTurn) {
+        streamedSubtitleTurn = segment.turn;
+        streamedSubtitleParts = [];
+        streamedSubtitleTranslated = false;
+    }
+    streamedSubtitleParts[segment.index] = segment.text;
+    if (segment.text.trim() !== (segment.original || '').trim()) {
+        streamedSubtitleTranslated = true;
+    }
+    if (!streamedSubtitleTranslated) {
+        return;
+    }
+    // 整轮翻译请求已经没用了，避免旧结果覆盖流式字幕
+    if (currentTranslateAbortController) {
+        currentTranslateAbortController.abort();
+        currentTranslateAbortController = null;
+    }
+    pendingTranslation = null;
+
+    const subtitleDisplay = document.getElementById('subtitle-display');
+    if (!subtitleDisplay) {
+        return;
+    }
+    showSubtitlePrompt();
+    subtitleDisplay.textContent = streamedSubtitleParts.filter(part => part).join('');
+    subtitleDisplay.classList.add('show');
+    subtitleDisplay.classList.remove('hidden');
+    subtitleDisplay.style.opacity = '1';
+
+    if (subtitleTimeout) {
+        clearTimeout(subtitleTimeout);
+    }
+    subtitleTimeout = setTimeout(() => {
+        const subtitleDisplayForTimeout = document.getElementById('subtitle-display');
+        if (subtitleDisplayForTimeout && subtitleDisplayForTimeout.classList.contains('show')) {
+            hideSubtitle();
+        }
+    }, 30000);
+}
+
+// 新一轮回复开始：清掉上一轮的流式字幕状态
+function resetStreamedSubtitle() {
+    streamedSubtitleTurn = null;
+    streamedSubtitleParts = [];
+    streamedSubtitleTranslated = false;
+}
+
+// 本轮是否已由后端流式推送过译文（turn end 时据此跳过整轮翻译）
+function hasStreamedSubtitle() {
+    return subtitleEnabled && streamedSubtitleTranslated;
+}
+
 // 隐藏字幕
 function hideSubtitle() {
     const subtitleDisplay = document.getElementById('subtitle-display');
@@ -518,6 +604,7 @@ function showSubtitlePrompt() {
         subtitleEnabled = !subtitleEnabled;
         localStorage.setItem('subtitleEnabled', subtitleEnabled.toString());
         updateIndicator();
+        syncSubtitleTranslation();
         console.log('字幕开关:', subtitleEnabled ? '开启' : '关闭');
         
         if (!subtitleEnabled) {
@@ -0,0 +1,49 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from brain.browser_use_adapter import BrowserUseAdapter
+from brain.mcp_client import McpRouterClient
+
+
+@pytest.mark.unit
+async def test_browser_use_runs_one_instruction_at_a_time(monkeypatch):
+    adapter = BrowserUseAdapter()
+    active = []
+    peak = []
+
+    async def fake_run(instruction, timeout_s, session_id):
+        active.append(instruction)
+        peak.append(len(active))
+        await asyncio.sleep(0.01)
+        active.remove(instruction)
+        return {"success": True, "result": instruction}
+
+    monkeypatch.setattr(adapter, "_run_instruction_locked", fake_run)
+    results = await asyncio.gather(*(adapter.run_instruction(f"task{i}") for i in range(3)))
+    assert [r["result"] for r in results] == ["task0", "task1", "task2"]
+    assert max(peak) == 1
+
+
+@pytest.mark.unit
+async def test_mcp_call_tool_is_reentrant_and_initializes_once(monkeypatch):
+    client = McpRouterClient(base_url="http://mcp.invalid", api_key="")
+    calls = []
+
+    async def fake_request(method, params=None):
+        calls.append(method)
+        await asyncio.sleep(0.01)
+        if method == "initialize":
+            return {"serverInfo": {"name": "fake"}}
+        return {"content": [{"type": "text", "text": params["name"]}]}
+
+    monkeypatch.setattr(client, "_mcp_request", fake_request)
+    results = await asyncio.gather(*(client.call_tool(f"tool{i}", {}) for i in range(3)))
+    assert all(r["success"] for r in results)
+    assert [r["result"]["content"][0]["text"] for r in results] == ["tool0", "tool1", "tool2"]
+    assert calls.count("initialize") == 1 and calls.count("tools/call") == 3
+    await client.aclose()
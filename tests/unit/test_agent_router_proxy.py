@@ -0,0 +1,78 @@
+import asyncio
+import importlib
+import json
+import os
+import sys
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+# main_routers 包把模块名导出成了 APIRouter 对象，这里取模块本身
+agent_router = importlib.import_module("main_routers.agent_router")
+router = agent_router.router
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """替身 agent_server：记录每个路径收到的请求数，每次响应耗时 50ms。"""
+    hits = {}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        hits[request.url.path] = hits.get(request.url.path, 0) + 1
+        await asyncio.sleep(0.05)
+        if request.url.path == "/tasks":
+            return httpx.Response(200, json={"tasks": [{"id": "t1", "status": "running"}]})
+        return httpx.Response(200, json={"ready": True, "reasons": []})
+
+    monkeypatch.setattr(agent_router, "_HTTP_CLIENT", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(agent_router, "_INFLIGHT_GETS", {})
+    monkeypatch.setattr(agent_router, "_AVAILABILITY_CACHE", {})
+    return hits
+
+
+@pytest.mark.unit
+async def test_open_tabs_polling_tasks_share_upstream_requests(upstream):
+    app = FastAPI()
+    app.include_router(router)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://main") as browser:
+        async def tab():
+            bodies = []
+            for _ in range(3):
+                r = await browser.get("/api/agent/tasks")
+                bodies.append(r.json())
+                await browser.get("/api/agent/mcp/availability")
+            return bodies
+
+        results = await asyncio.gather(*[tab() for _ in range(8)])
+
+    assert all(body["tasks"][0]["id"] == "t1" for bodies in results for body in bodies)
+    # 8 个标签页 × 3 轮：每轮的并发请求合并成一次上游请求
+    assert upstream["/tasks"] <= 3
+    # availability 在 TTL 内命中缓存
+    assert upstream["/mcp/availability"] == 1
+
+
+@pytest.mark.unit
+async def test_task_stream_sends_snapshot_then_bus_updates(upstream):
+    class _Request:
+        async def is_disconnected(self):
+            return False
+
+    response = await agent_router.stream_tasks(_Request())
+    events = response.body_iterator
+    snapshot = await events.__anext__()
+    assert snapshot.startswith("event: snapshot")
+    assert json.loads(snapshot.split("data: ", 1)[1])["tasks"][0]["id"] == "t1"
+
+    agent_router.publish_task_update({"id": "t1", "status": "completed"})
+    agent_router.publish_task_update({"status": "ignored-without-id"})
+    update = await asyncio.wait_for(events.__anext__(), timeout=1)
+    assert update.startswith("event: task")
+    assert json.loads(update.split("data: ", 1)[1])["status"] == "completed"
+
+    await events.aclose()
+    assert not agent_router._TASK_SUBSCRIBERS
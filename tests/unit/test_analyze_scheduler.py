@@ -0,0 +1,75 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from brain.analyze_scheduler import AnalyzeScheduler
+
+
+class _Runner:
+    def __init__(self, delay=0.02, commit=False):
+        self.delay = delay
+        self.commit = commit
+        self.started = []
+        self.finished = []
+        self.active = 0
+        self.peak = 0
+        self.unanalyzed = []
+
+    async def __call__(self, messages, lanlan_name, job=None):
+        self.started.append((lanlan_name, messages[0]))
+        self.unanalyzed.append(job.unanalyzed_turns)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            if self.commit:
+                job.commit()
+            await asyncio.sleep(self.delay)
+            self.finished.append((lanlan_name, messages[0]))
+        finally:
+            self.active -= 1
+
+
+@pytest.mark.unit
+async def test_newer_snapshot_supersedes_uncommitted_and_pending():
+    runner = _Runner()
+    scheduler = AnalyzeScheduler(runner, slots=2)
+    scheduler.submit("a", "a", [1])
+    await asyncio.sleep(0)
+    scheduler.submit("a", "a", [2])  # 取消正在跑的 1
+    scheduler.submit("a", "a", [3])  # 替换排队中的 2
+    await scheduler.join()
+    assert runner.finished == [("a", 3)]
+    assert runner.peak == 1
+    # 1、2 都没有分析完：3 需要把这三轮用户发言都当作未分析
+    assert runner.unanalyzed == [1, 3]
+
+
+@pytest.mark.unit
+async def test_committed_analysis_is_not_cancelled():
+    runner = _Runner(commit=True)
+    scheduler = AnalyzeScheduler(runner, slots=2)
+    scheduler.submit("a", "a", [1])
+    await asyncio.sleep(0)
+    scheduler.submit("a", "a", [2])
+    await scheduler.join()
+    assert runner.finished == [("a", 1), ("a", 2)]
+    assert runner.unanalyzed == [1, 1]
+
+
+@pytest.mark.unit
+async def test_slots_urgency_and_fairness():
+    runner = _Runner(delay=0.01)
+    scheduler = AnalyzeScheduler(runner, slots=1)
+    scheduler.submit("chatty", "chatty", [0])
+    await scheduler.join()  # chatty 已被服务过一次
+    scheduler.submit("busy", "busy", [0])  # 占住唯一的 slot
+    scheduler.submit("chatty", "chatty", [1])
+    scheduler.submit("quiet", "quiet", [0])
+    scheduler.submit("late", "late", [0], urgency=1)
+    await scheduler.join()
+    assert runner.peak == 1
+    assert [name for name, _ in runner.started] == ["chatty", "busy", "late", "quiet", "chatty"]
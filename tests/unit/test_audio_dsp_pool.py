@@ -0,0 +1,58 @@
+import asyncio
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from utils.audio_dsp_pool import AudioDSPPool
+from utils.audio_processor import AudioProcessor
+
+OPTIONS = dict(input_sample_rate=48000, output_sample_rate=16000, noise_reduce_enabled=False)
+
+
+def _chunk(i: int, amplitude: float) -> bytes:
+    t = np.arange(i * 480, (i + 1) * 480) / 48000.0
+    return (np.sin(2 * np.pi * 300 * t) * amplitude).astype(np.int16).tobytes()
+
+
+@pytest.fixture
+def pool():
+    pool = AudioDSPPool(workers=1, slots=4)
+    yield pool
+    pool.close()
+
+
+@pytest.mark.unit
+async def test_sessions_keep_their_own_state_across_chunks(pool):
+    quiet, loud = pool.open_session(**OPTIONS), pool.open_session(**OPTIONS)
+    ref_quiet, ref_loud = AudioProcessor(**OPTIONS), AudioProcessor(**OPTIONS)
+    # 两个会话在同一分片上交替处理，AGC 增益各自延续；环形槽比块数少，槽要循环复用
+    for i in range(12):
+        a, b = _chunk(i, 300), _chunk(i, 12000)
+        out_a, out_b = await asyncio.gather(quiet.process_chunk_async(a), loud.process_chunk_async(b))
+        assert out_a == ref_quiet.process_chunk(a)
+        assert out_b == ref_loud.process_chunk(b)
+
+    stats = pool.stats()["shards"][0]
+    assert stats["sessions"] == 2 and stats["chunks"] == 24 and stats["inline_chunks"] == 0
+    assert stats["queue_p95_ms"] >= stats["queue_p50_ms"] >= 0.0
+
+
+@pytest.mark.unit
+async def test_session_falls_back_in_process_when_worker_dies(pool):
+    session = pool.open_session(**OPTIONS)
+    assert len(await session.process_chunk_async(_chunk(0, 8000))) == 320
+    shard = pool._shards[0]
+    shard.process.kill()
+    shard.process.join(timeout=5)
+    for _ in range(100):
+        if not shard.alive:
+            break
+        await asyncio.sleep(0.02)
+    assert len(await session.process_chunk_async(_chunk(1, 8000))) == 320
+    assert session._local is not None
+    with pytest.raises(RuntimeError):
+        pool.open_session(**OPTIONS)
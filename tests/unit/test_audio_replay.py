@@ -0,0 +1,90 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from main_logic.audio_replay import AudioReplayScheduler
+
+RATE = 16000
+CHUNK = 512  # 16kHz 下每块 32ms，与实时上行一致
+
+
+def _chunk(index: int, speech: bool) -> bytes:
+    """第一个采样点编码序号，便于校验顺序；speech=False 时其余为静音。"""
+    samples = np.full(CHUNK, 3000 if speech else 0, dtype=np.int16)
+    samples[0] = index % 30000
+    return samples.tobytes()
+
+
+class VirtualTime:
+    """虚拟时钟：sleep 推进时间，并按实时节奏喂入期间到达的实时音频。"""
+
+    def __init__(self, scheduler_ref, live_seconds: float):
+        self.now = 0.0
+        self.scheduler_ref = scheduler_ref
+        self.live_total = int(live_seconds * RATE / CHUNK)
+        self.live_fed = 0
+        self.next_index = 0
+
+    def clock(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.now += seconds
+        while self.live_fed < self.live_total and (self.live_fed + 1) * CHUNK / RATE <= self.now:
+            self.scheduler_ref[0].feed(_chunk(self.next_index, speech=True))
+            self.next_index += 1
+            self.live_fed += 1
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("backlog_seconds", [0, 5, 30])
+async def test_backlog_is_replayed_in_order_and_catches_up(backlog_seconds):
+    ref = []
+    vt = VirtualTime(ref, live_seconds=60)
+    sent = []
+
+    async def send(packet):
+        sent.append(packet)
+
+    replay = AudioReplayScheduler(send, speedup=4.0, packet_ms=100, keep_silence_ms=600,
+                                  clock=vt.clock, sleep=vt.sleep)
+    ref.append(replay)
+    n = int(backlog_seconds * RATE / CHUNK)
+    for i in range(n):
+        # 每 3 秒里有 1 秒静音
+        replay.feed(_chunk(i, speech=(i * CHUNK // RATE) % 3 != 2))
+    vt.next_index = n
+
+    catch_up = await replay.run()
+    assert replay.done
+    # 积压与实时音频都按到达顺序发出，中间没有丢失非静音块
+    pcm = np.frombuffer(b"".join(sent), dtype=np.int16).reshape(-1, CHUNK)
+    speech_ids = [int(row[0]) for row in pcm if row[1] != 0]
+    assert speech_ids == sorted(speech_ids)
+    assert speech_ids == [i for i in range(vt.next_index) if i >= n or (i * CHUNK // RATE) % 3 != 2]
+    # 4 倍速：追平时间约为 积压/(4-1)，静音裁剪后更短
+    assert catch_up <= backlog_seconds / 3 + 0.2
+    if backlog_seconds:
+        assert replay.trimmed_seconds > 0
+        assert replay.sent_seconds <= (catch_up + 1e-6) * 4 + 0.1
+
+
+@pytest.mark.unit
+async def test_hold_keeps_forwarding_live_audio_until_released():
+    ref = []
+    vt = VirtualTime(ref, live_seconds=2)
+    sent = []
+
+    async def send(packet):
+        sent.append(packet)
+
+    replay = AudioReplayScheduler(send, clock=vt.clock, sleep=vt.sleep)
+    ref.append(replay)
+    caught_up = []
+    await replay.run(on_caught_up=lambda: caught_up.append(vt.now), hold=lambda: vt.now < 1.0)
+    assert caught_up and caught_up[0] >= 1.0
+    assert sum(len(p) for p in sent) // 2 // CHUNK >= int(0.9 * RATE / CHUNK)
@@ -0,0 +1,71 @@
+import base64
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from main_logic.audio_uplink import AudioUplink, encode_append_event
+
+CHUNK_10MS = 320  # 16kHz int16
+
+
+def _chunk(value: int) -> bytes:
+    return bytes([value]) * CHUNK_10MS
+
+
+class Sink:
+    def __init__(self):
+        self.events = []
+
+    async def send(self, payload):
+        self.events.append(json.loads(payload))
+
+    def pcm(self):
+        return b''.join(base64.b64decode(e["audio"]) for e in self.events)
+
+
+@pytest.mark.unit
+async def test_chunks_are_packed_into_append_events():
+    sink = Sink()
+    uplink = AudioUplink(encode_append_event, sink.send, packet_ms=30, max_packet_ms=100, rtt_ratio=0.25)
+    audio = [_chunk(i) for i in range(1, 10)]
+    for chunk in audio:
+        await uplink.push(chunk)
+    assert len(sink.events) == 3
+    assert all(set(e) == {"type", "audio", "event_id"} and e["type"] == "input_audio_buffer.append"
+               and e["event_id"].startswith("event_") for e in sink.events)
+    assert sink.pcm() == b''.join(audio)
+
+    # RTT 200ms → 50ms 一包；RTT 很大时不超过上限
+    uplink.update_rtt(0.2)
+    assert uplink.packet_bytes == 50 * 32
+    uplink.update_rtt(5.0)
+    assert uplink.packet_bytes == 100 * 32
+    uplink.update_rtt(None)
+    assert uplink.packet_bytes == 30 * 32
+
+
+@pytest.mark.unit
+async def test_silence_pauses_uplink_and_resumes_with_preroll():
+    sink = Sink()
+    uplink = AudioUplink(encode_append_event, sink.send, packet_ms=10, pause_on_silence=True,
+                         hangover_ms=0, preroll_ms=20, keepalive_s=3600)
+    await uplink.push(_chunk(1), voiced=True)
+    for i in range(2, 8):
+        await uplink.push(_chunk(i), voiced=False)
+    assert uplink.paused and sink.pcm() == _chunk(1)
+
+    await uplink.push(_chunk(9), voiced=True)
+    assert not uplink.paused
+    # 只补发最近 20ms 的静音，然后是新的语音
+    assert sink.pcm() == _chunk(1) + _chunk(6) + _chunk(7) + _chunk(9)
+
+    # 不允许暂停的服务商照常上行
+    plain = Sink()
+    uplink = AudioUplink(encode_append_event, plain.send, packet_ms=10, hangover_ms=0)
+    for i in range(1, 4):
+        await uplink.push(_chunk(i), voiced=False)
+    assert len(plain.events) == 3
@@ -0,0 +1,41 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from benchmarks.harness import percentile, summarize
+from benchmarks.run import check_thresholds
+
+
+def _scenarios(p50, p95):
+    return {"text_chat": {"metrics": {"turn": {"p50_ms": p50, "p95_ms": p95}}, "counters": {}}}
+
+
+@pytest.mark.unit
+def test_percentile_interpolates():
+    assert percentile([1, 2, 3, 4], 50) == pytest.approx(2.5)
+    assert summarize([5.0])["p95_ms"] == 5.0
+
+
+@pytest.mark.unit
+def test_absolute_threshold_violation():
+    thresholds = {"metrics": {"text_chat.turn": {"p95_ms": 100.0}}}
+    assert check_thresholds(_scenarios(50.0, 90.0), thresholds) == []
+    assert len(check_thresholds(_scenarios(50.0, 120.0), thresholds)) == 1
+
+
+@pytest.mark.unit
+def test_baseline_regression_respects_min_delta():
+    thresholds = {"max_regression_pct": 25.0, "min_regression_ms": 1.0}
+    # +50% 但绝对值只增加 0.5ms，视为噪声
+    assert check_thresholds(_scenarios(1.5, 2.0), thresholds, {"scenarios": _scenarios(1.0, 2.0)}) == []
+    violations = check_thresholds(_scenarios(20.0, 30.0), thresholds, {"scenarios": _scenarios(10.0, 20.0)})
+    assert violations and "text_chat.turn" in violations[0]
+
+
+@pytest.mark.unit
+def test_scenario_error_is_reported():
+    scenarios = {"memory": {"metrics": {}, "counters": {}, "error": "boom"}}
+    assert check_thresholds(scenarios, {}) == ["memory failed: boom"]
@@ -0,0 +1,105 @@
+import asyncio
+import copy
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from utils.characters_view import CharactersView
+
+
+class _Translator:
+    def __init__(self):
+        self.calls = []
+
+    async def translate_dict(self, data, target_lang, fields_to_translate=None):
+        self.calls.append(dict(data))
+        return {k: f"{v}|{target_lang}" if k in fields_to_translate else v for k, v in data.items()}
+
+
+class _ConfigManager:
+    def __init__(self, data):
+        self.data = data
+        self.listeners = []
+
+    def load_characters(self):
+        return copy.deepcopy(self.data)
+
+    def add_characters_listener(self, callback):
+        self.listeners.append(callback)
+
+    def save_characters(self, data):
+        self.data = copy.deepcopy(data)
+        for listener in self.listeners:
+            listener(data)
+
+
+def _data():
+    return {
+        "主人": {"档案名": "主人"},
+        "猫娘": {
+            "a": {"档案名": "a", "昵称": "小a", "live2d": "m1"},
+            "b": {"档案名": "b", "昵称": "小b", "live2d": "m2"},
+        },
+    }
+
+
+@pytest.mark.unit
+async def test_unchanged_data_reuses_snapshot_and_zh_is_untranslated():
+    translator = _Translator()
+    view = CharactersView(_ConfigManager(_data()), translation_service=translator)
+    first = await view.get("en")
+    second = await view.get("en")
+    assert second is first
+    assert view.stats["hits"] == 1
+    assert json.loads(first.body)["猫娘"]["a"]["昵称"] == "小a|en"
+    zh = await view.get("zh-CN")
+    assert json.loads(zh.body) == _data()
+    assert zh.etag != first.etag
+    assert len(translator.calls) == 3
+
+
+@pytest.mark.unit
+async def test_only_changed_translated_fields_are_retranslated():
+    translator = _Translator()
+    cm = _ConfigManager(_data())
+    view = CharactersView(cm, translation_service=translator, warm_delay=0)
+    first = await view.get("en")
+    translator.calls.clear()
+
+    data = _data()
+    data["猫娘"]["a"]["live2d"] = "m3"
+    cm.data = data
+    second = await view.get("en")
+    assert translator.calls == []
+    assert second.etag != first.etag
+    assert json.loads(second.body)["猫娘"]["a"]["live2d"] == "m3"
+
+    data["猫娘"]["b"]["昵称"] = "小小b"
+    cm.data = data
+    third = await view.get("en")
+    assert translator.calls == [{"档案名": "b", "昵称": "小小b"}]
+    assert json.loads(third.body)["猫娘"]["b"]["昵称"] == "小小b|en"
+
+
+@pytest.mark.unit
+async def test_save_warms_cached_languages_in_background():
+    translator = _Translator()
+    cm = _ConfigManager(_data())
+    view = CharactersView(cm, translation_service=translator, warm_delay=0)
+    await view.get("en")
+    data = _data()
+    data["猫娘"]["a"]["昵称"] = "小小a"
+    cm.save_characters(data)
+    for _ in range(20):
+        await asyncio.sleep(0.01)
+        if view.stats["warms"]:
+            break
+    assert view.stats["warms"] == 1
+    renders = view.stats["renders"]
+    snapshot = await view.get("en")
+    assert view.stats["renders"] == renders
+    assert json.loads(snapshot.body)["猫娘"]["a"]["昵称"] == "小小a|en"
@@ -0,0 +1,107 @@
+import os
+import sys
+
+import pytest
+from PIL import Image, ImageDraw
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+import brain.computer_use as cu
+from brain.computer_use import ComputerUseAdapter, ObservationStore
+
+
+def _screen(variant: int = 0) -> Image.Image:
+    img = Image.new("RGB", (640, 360), (60, 120, 180))
+    ImageDraw.Draw(img).rectangle((40 + 200 * variant, 40, 300 + 200 * variant, 300), fill=(240, 240, 240))
+    return img
+
+
+class _StillGUI:
+    def size(self):
+        return 640, 360
+
+    def screenshot(self):
+        return _screen()
+
+    def moveTo(self, *_args, **_kwargs):
+        pass
+
+
+def _adapter(monkeypatch, code: str, sent: list, gui=None) -> ComputerUseAdapter:
+    adapter = ComputerUseAdapter(max_steps=20, max_image_history=2, thinking=False, gui_backend=gui or _StillGUI())
+    adapter._system_prompt = "system"
+    adapter._llm_client = object()
+
+    def fake_call(messages):
+        sent.append(messages)
+        adapter.last_usage = {"prompt_tokens": 10, "completion_tokens": 2}
+        return {"thought": "t", "action": "a", "code": code, "raw": ""}
+
+    monkeypatch.setattr(adapter, "_call_llm", fake_call)
+    return adapter
+
+
+def _images(messages) -> int:
+    return sum(1 for m in messages if isinstance(m["content"], list)
+               for part in m["content"] if part.get("type") == "image_url")
+
+
+@pytest.mark.unit
+def test_store_keeps_only_recent_payloads():
+    store = ObservationStore(2)
+    for step in range(5):
+        store.add(step, store.encode(b"jpg%d" % step) if step != 4 else None)
+    assert len(store) == 2 and store.get(2) is None
+    assert store.latest_image().step == 3
+
+
+@pytest.mark.unit
+def test_unchanged_screen_sends_note_instead_of_image(monkeypatch):
+    sent = []
+    adapter = _adapter(monkeypatch, "pyautogui.moveTo(1, 1)", sent)
+    shot = cu.compress_screenshot(_screen())
+    adapter.predict("task", {"screenshot": shot, "frame": cu.screen_fingerprint(_screen())})
+    info, _ = adapter.predict("task", {"screenshot": shot, "frame": cu.screen_fingerprint(_screen())})
+    assert not info["image_sent"] and _images(sent[1]) == 1
+    assert cu.UNCHANGED_NOTE in sent[1][-1]["content"][0]["text"]
+    # 输入一个字符：dHash 不变，但像素变了，必须发送截图
+    typed = _screen()
+    ImageDraw.Draw(typed).text((60, 60), "a", fill=(0, 0, 0))
+    assert cu.screen_fingerprint(typed).phash == cu.screen_fingerprint(_screen()).phash
+    info, _ = adapter.predict("task", {"screenshot": cu.compress_screenshot(typed), "frame": cu.screen_fingerprint(typed)})
+    assert info["image_sent"] and _images(sent[2]) == 2
+
+
+class _TypingGUI(_StillGUI):
+    """每次按键都在画面上多出一个字符：dHash 几乎不变，但属于真实进展。"""
+
+    def __init__(self):
+        self.typed = 0
+
+    def screenshot(self):
+        img = _screen()
+        ImageDraw.Draw(img).text((60, 60), "a" * self.typed, fill=(0, 0, 0))
+        return img
+
+    def press(self, *_args, **_kwargs):
+        self.typed += 1
+
+
+@pytest.mark.unit
+def test_run_stops_after_consecutive_noop_actions(monkeypatch):
+    monkeypatch.setattr(cu, "CUA_SETTLE_TIMEOUT", 0.02)
+    monkeypatch.setattr(cu, "CUA_SETTLE_POLL_INTERVAL", 0.005)
+    sent = []
+    adapter = _adapter(monkeypatch, "pyautogui.moveTo(1, 1)", sent)
+    res = adapter.run_instruction("task")
+    assert not res["success"] and res["steps"] == cu.CUA_MAX_NOOP_STEPS
+    stats = res["stats"]
+    assert stats["prompt_tokens"] == 10 * cu.CUA_MAX_NOOP_STEPS
+    # 窗口为 2：连续两步跳过后上下文里已没有图片，第 4 步重新发送
+    assert [step["image_sent"] for step in stats["steps"]] == [True, False, False, True, False]
+    assert all(step["screen_changed"] is False for step in stats["steps"])
+
+    # 打字：每步都有真实变化，不能被当成无效动作而中止
+    adapter = _adapter(monkeypatch, "pyautogui.press('a')", [], gui=_TypingGUI())
+    res = adapter.run_instruction("task")
+    assert res["steps"] == 20 and not any(step["screen_changed"] is False for step in res["stats"]["steps"])
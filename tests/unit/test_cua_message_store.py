@@ -0,0 +1,68 @@
+import os
+import sys
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from brain.cua.core import mllm
+from brain.cua.core.engine import LMMEngineOpenAI
+
+
+class _Engine(LMMEngineOpenAI):
+    def __init__(self):
+        super().__init__(model="fake")
+        self.requests = []
+
+    def generate(self, messages, **kwargs):
+        self.requests.append(messages)
+        return "ok"
+
+
+def _png(color) -> bytes:
+    buf = BytesIO()
+    Image.new("RGB", (750, 100), color).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def _agent(budget):
+    engine = _Engine()
+    return mllm.LMMAgent({"token_budget": budget}, system_prompt="sys", engine=engine), engine
+
+
+@pytest.mark.unit
+def test_identical_images_are_encoded_once_and_sent_once():
+    shot = _png((10, 20, 30))
+    assert mllm.encode_image_payload(shot, "data:image/png;base64,") is \
+        mllm.encode_image_payload(bytes(shot), "data:image/png;base64,")
+
+    agent, engine = _agent(None)
+    agent.add_message("step 1", image_content=shot, role="user")
+    agent.add_message("plan", role="assistant")
+    agent.add_message("step 2", image_content=shot, role="user")
+    agent.get_response()
+
+    sent = engine.requests[-1]
+    assert sent[1]["content"][1] == {"type": "text", "text": mllm.DUPLICATE_IMAGE_NOTE}
+    assert sent[3]["content"][1]["type"] == "image_url"
+    assert agent.messages[1]["content"][1]["type"] == "image_url"  # stored history untouched
+    assert agent.messages.last_request["duplicate_images"] == 1
+
+
+@pytest.mark.unit
+def test_budget_drops_old_images_then_old_turns():
+    agent, engine = _agent(400)
+    for i in range(6):
+        agent.add_message(f"step {i} " + "x" * 200, image_content=_png((i, 0, 0)), role="user")
+        agent.add_message("plan " + "y" * 200, role="assistant")
+    agent.add_message("now", image_content=_png((99, 0, 0)), role="user")
+    agent.get_response()
+
+    sent = engine.requests[-1]
+    stats = agent.messages.last_request
+    assert stats["tokens"] <= 400 and stats["dropped_images"] == 6 and stats["dropped_messages"] > 0
+    assert sent[0]["role"] == "system" and sent[1]["role"] == "user"
+    assert sent[1]["content"][0]["text"] == mllm.OMITTED_TURNS_NOTE.format(n=stats["dropped_messages"])
+    assert sent[-1]["content"][1]["type"] == "image_url"
@@ -0,0 +1,57 @@
+import os
+import sys
+from io import BytesIO
+
+import pytest
+from PIL import Image, ImageDraw
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from brain.cua.utils.ocr import OCREngine, OCRIndex
+
+CALLS = []
+
+
+def _fake_ocr(tile):
+    """One word per band: its index and how many dark pixels it contains."""
+    CALLS.append(tile.index)
+    image = Image.frombytes("RGB", tile.size, tile.pixels)
+    dark = image.convert("L").point(lambda px: 255 if px < 128 else 0).histogram()[255]
+    return [{"text": f"band{tile.index}:{dark}", "block_num": 1, "left": 0,
+             "top": tile.keep_top, "width": tile.size[0], "height": 10}]
+
+
+def _png(marks) -> bytes:
+    img = Image.new("RGB", (320, 240), (255, 255, 255))
+    draw = ImageDraw.Draw(img)
+    for y in marks:
+        draw.rectangle((10, y, 60, y + 4), fill=(0, 0, 0))
+    buf = BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+@pytest.mark.unit
+def test_same_screenshot_is_ocrd_once_and_only_changed_bands_rerun():
+    CALLS.clear()
+    engine = OCREngine(bands=4, overlap=8, workers=0, ocr_fn=_fake_ocr)
+    first = engine.index(_png([20]))
+    assert engine.index(_png([20])) is first and len(CALLS) == 4
+
+    second = engine.index(_png([20, 200]))
+    assert CALLS[4:] == [3]
+    assert [e["text"] for e in second.elements[:3]] == [e["text"] for e in first.elements[:3]]
+    assert second.elements[3]["text"] != first.elements[3]["text"]
+    assert engine.stats == {"images": 3, "image_hits": 1, "tiles": 8, "tiles_ocrd": 5}
+
+
+@pytest.mark.unit
+def test_index_table_and_phrase_lookup():
+    words = ["File", "Edit", "Save", "as...", "Save", "all", "Close"]
+    index = OCRIndex([{"id": i, "text": w, "group_num": 1, "word_num": i + 1,
+                       "left": 0, "top": 0, "width": 1, "height": 1} for i, w in enumerate(words)])
+    assert index.table.startswith("Text Table:\nWord id\tText\n0\tFile\n")
+    assert index.find_phrase("save") == [(2, 2), (4, 4)]
+    assert index.find_phrase("Save As") == [(2, 3)]
+    assert index.find_phrase("save all close") == [(4, 6)]
+    assert index.find_phrase("open") == []
@@ -0,0 +1,64 @@
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from main_logic.emotion_service import EmotionService
+
+
+class FakeLLM:
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, api_key, model, base_url, system_prompt, content, max_tokens):
+        self.calls.append(content)
+        await asyncio.sleep(0.01)
+        lines = content.splitlines()
+        if len(lines) == 1 and not lines[0].startswith("1. "):
+            return '```json\n{"emotion": "neutral", "confidence": 0.8}\n```'
+        return json.dumps([{"emotion": "sad" if "雨" in line else "neutral", "confidence": 0.7} for line in lines])
+
+
+@pytest.mark.unit
+async def test_confident_cases_are_answered_locally():
+    llm = FakeLLM()
+    service = EmotionService(call_llm=llm)
+    cases = [
+        ("太好了，我们一起去吧！", (), "happy"),
+        ("呜呜，我好难过", (), "sad"),
+        ("今天我一点都不开心，好难过", (), "sad"),
+        ("你这个笨蛋，气死我了！", (), "angry"),
+        ("天哪，没想到你竟然来了", (), "surprised"),
+        ("晚饭吃咖喱吧😊🎉", (), "happy"),
+        ("嗯，知道了。", ("生气",), "angry"),
+        ("今天特别开心，哈哈！", (), "happy"),
+    ]
+    for text, tags, expected in cases:
+        result = await service.analyze(text, "sk", "m", tags=tags)
+        assert (result["emotion"], result["source"]) == (expected, "local"), text
+    assert llm.calls == []
+    # 没有线索的句子不做本地判断
+    assert service.classify_local("我把文件放在桌上了。") is None
+    # 被否定的情绪词不算线索：安慰的话不能判成生气/难过
+    for text in ("不要生气啦，我请你吃蛋糕", "别难过，我会一直陪着你的", "don't be sad, I'm here"):
+        assert service.classify_local(text) is None, text
+
+
+@pytest.mark.unit
+async def test_uncertain_requests_are_batched_and_cached():
+    llm = FakeLLM()
+    service = EmotionService(call_llm=llm, batch_window=0.02, batch_max=8)
+    texts = ["我把文件放在桌上了。", "外面下雨了。", "明天八点出发。", "外面下雨了。"]
+    results = await asyncio.gather(*(service.analyze(t, "sk", "m") for t in texts))
+    assert len(llm.calls) == 1
+    assert llm.calls[0].splitlines() == ["1. 我把文件放在桌上了。", "2. 外面下雨了。", "3. 明天八点出发。"]
+    assert [r["emotion"] for r in results] == ["neutral", "sad", "neutral", "sad"]
+
+    again = await service.analyze("外面下雨了。", "sk", "m")
+    assert again == {"emotion": "sad", "confidence": 0.7, "source": "cache"}
+    single = await service.analyze("这是新的一句。", "sk", "m")
+    assert single["confidence"] == 0.8 and len(llm.calls) == 2
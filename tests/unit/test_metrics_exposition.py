@@ -0,0 +1,57 @@
+import os
+import sys
+
+import httpx
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from utils import metrics
+
+
+@pytest.mark.unit
+def test_histogram_renders_cumulative_buckets():
+    registry = metrics.MetricsRegistry()
+    hist = registry.histogram("neko_test_seconds", "test", ("stage",), buckets=(0.01, 0.1))
+    hist.labels("a").observe(0.005)
+    hist.labels("a").observe(0.05)
+    hist.labels("a").observe(3.0)
+    text = registry.render()
+    assert "# TYPE neko_test_seconds histogram" in text
+    assert 'neko_test_seconds_bucket{stage="a",le="0.01"} 1' in text
+    assert 'neko_test_seconds_bucket{stage="a",le="0.1"} 2' in text
+    assert 'neko_test_seconds_bucket{stage="a",le="+Inf"} 3' in text
+    assert 'neko_test_seconds_count{stage="a"} 3' in text
+
+
+@pytest.mark.unit
+def test_span_records_under_turn_scope():
+    metrics.TURN_LOG.clear()
+    with metrics.turn_scope("turn-abc"):
+        with metrics.span("unit.stage"):
+            pass
+        event = metrics.attach_turn_id({"event_type": "analyze_request"})
+    assert event["turn_id"] == "turn-abc"
+    turns = metrics.TURN_LOG.snapshot()
+    assert turns[-1]["turn_id"] == "turn-abc"
+    assert "unit.stage" in turns[-1]["spans_ms"]
+    assert metrics.get_turn_id() is None
+
+
+@pytest.mark.unit
+async def test_install_metrics_binds_turn_header():
+    from fastapi import FastAPI
+
+    app = FastAPI()
+    metrics.install_metrics(app, "unit")
+
+    @app.get("/echo_turn")
+    async def echo_turn():
+        return {"turn_id": metrics.get_turn_id()}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.get("/echo_turn", headers=metrics.turn_headers("turn-xyz"))
+        assert resp.json() == {"turn_id": "turn-xyz"}
+        text = (await client.get("/metrics")).text
+    assert 'neko_http_request_duration_seconds_count{service="unit",method="GET",handler="echo_turn",status="200"} 1' in text
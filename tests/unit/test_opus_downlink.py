@@ -0,0 +1,51 @@
+import io
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from utils.opus_downlink import OggOpusStreamEncoder, opus_available, pack_audio_frame, unpack_audio_frame
+
+pytestmark = pytest.mark.skipif(not opus_available(), reason="PyAV/libopus not available")
+
+
+def _speech(seconds: float) -> bytes:
+    t = np.arange(int(48000 * seconds)) / 48000
+    return (np.sin(2 * np.pi * 220 * t) * np.sin(2 * np.pi * 3 * t) * 12000).astype(np.int16).tobytes()
+
+
+@pytest.mark.unit
+def test_uneven_chunks_decode_to_the_original_length():
+    import av
+
+    pcm = _speech(1.01)
+    encoder = OggOpusStreamEncoder(32000)
+    out = b""
+    step = 2 * 1234  # 不是 20ms 帧长的整数倍
+    for i in range(0, len(pcm), step):
+        out += encoder.encode(pcm[i:i + step])
+    assert encoder.pending_samples
+    out += encoder.flush_tail()
+    assert not encoder.pending_samples
+
+    assert out[:4] == b"OggS" and out[5] & 0x02  # 首页是 BOS
+    assert len(out) < len(pcm) / 10
+    with av.open(io.BytesIO(out), format="ogg") as container:
+        decoded = sum(frame.samples for frame in container.decode(audio=0))
+    # 解码长度 = 原始长度补齐到 20ms 后减去 pre-skip
+    assert decoded == -(-len(pcm) // 2 // 960) * 960 - 312
+
+
+@pytest.mark.unit
+def test_frame_header_carries_speech_id():
+    encoder = OggOpusStreamEncoder()
+    frame = pack_audio_frame("speech-1", encoder.encode(_speech(0.1)))
+    speech_id, payload = unpack_audio_frame(frame)
+    assert speech_id == "speech-1"
+    assert payload[:4] == b"OggS"
+    assert unpack_audio_frame(_speech(0.02)) is None
+    second = encoder.encode(_speech(0.1))
+    assert second[:4] == b"OggS" and not second[5] & 0x02  # 同一段语音后续页不再带头
@@ -0,0 +1,55 @@
+import json
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from utils.preferences import PreferenceStore
+
+
+def _pref(path, x):
+    return {"model_path": path, "position": {"x": x, "y": 0}, "scale": {"x": 1, "y": 1}}
+
+
+@pytest.mark.unit
+def test_burst_is_coalesced_into_one_atomic_write(tmp_path):
+    path = tmp_path / "user_preferences.json"
+    path.write_text(json.dumps([_pref("a", 0), _pref("b", 0)]), encoding="utf-8")
+    store = PreferenceStore(str(path), flush_delay=0.05, max_delay=1.0)
+
+    for x in range(50):
+        store.put("b", _pref("b", x))
+    store.put("c", _pref("c", 1))
+    assert store.move_to_top("a")
+    assert not store.move_to_top("missing")
+    assert store.get("b")["position"]["x"] == 49
+    assert store.writes == 0
+
+    time.sleep(0.3)
+    assert store.writes == 1
+    saved = json.loads(path.read_text(encoding="utf-8"))
+    assert [p["model_path"] for p in saved] == ["a", "c", "b"]
+    assert saved[2]["position"]["x"] == 49
+    assert not os.path.exists(f"{path}.tmp")
+
+
+@pytest.mark.unit
+def test_continuous_updates_flush_by_max_delay_and_external_edits_reload(tmp_path):
+    path = tmp_path / "user_preferences.json"
+    store = PreferenceStore(str(path), flush_delay=0.1, max_delay=0.15)
+    deadline = time.monotonic() + 0.5
+    x = 0
+    while time.monotonic() < deadline:
+        store.put("a", _pref("a", x))
+        x += 1
+        time.sleep(0.02)
+    assert 2 <= store.writes < x
+    assert store.flush()
+    assert json.loads(path.read_text(encoding="utf-8"))[0]["position"]["x"] == x - 1
+
+    path.write_text(json.dumps([_pref("z", 7)]), encoding="utf-8")  # 其他进程写入
+    time.sleep(0.01)
+    assert store.get()["model_path"] == "z"
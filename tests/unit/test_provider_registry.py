@@ -0,0 +1,52 @@
+import json
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from utils.api_config_loader import MODEL_TYPE_MAPPING, ProviderRegistry, resolve_model_api_config
+from utils.config_manager import ConfigManager
+
+
+@pytest.mark.unit
+def test_registry_matches_uncached_resolution():
+    core_config = {
+        "ENABLE_CUSTOM_API": True, "assistApi": "qwen", "CORE_API_TYPE": "qwen",
+        "CORE_MODEL": "core-model", "CORE_URL": "wss://core", "CORE_API_KEY": "core-key",
+        "OPENROUTER_URL": "https://assist", "OPENROUTER_API_KEY": "assist-key",
+        "SUMMARY_MODEL": "summary-model", "VISION_MODEL": "custom-vision", "VISION_MODEL_URL": "http://vision",
+    }
+    registry = ProviderRegistry(core_config, assist_profiles={})
+    for model_type in MODEL_TYPE_MAPPING:
+        expected = resolve_model_api_config(core_config, model_type, dict)
+        entry = registry.get(model_type)
+        assert {k: entry[k] for k in expected} == expected
+        assert "extra_body" in entry
+    assert registry.get("vision")["provider"] == "custom"
+    assert registry.get("summary")["provider"] == "qwen"
+    registry.get("summary")["model"] = "mutated"
+    assert registry.get("summary")["model"] == "summary-model"
+    with pytest.raises(ValueError):
+        registry.get("unknown")
+
+
+@pytest.mark.unit
+def test_registry_is_rebuilt_only_when_core_config_changes(tmp_path):
+    with patch.object(ConfigManager, "_get_documents_directory", return_value=tmp_path):
+        cm = ConfigManager("NEKO_REGISTRY_TEST")
+    cm.config_dir.mkdir(parents=True, exist_ok=True)
+    path = cm.config_dir / "core_config.json"
+    path.write_text(json.dumps({"coreApiKey": "key-1"}), encoding="utf-8")
+
+    first = cm.get_provider_registry()
+    assert cm.get_provider_registry() is first
+    assert cm.get_core_config()["CORE_API_KEY"] == "key-1"
+    cm.get_core_config()["CORE_API_KEY"] = "mutated"
+    assert cm.get_core_config()["CORE_API_KEY"] == "key-1"
+
+    path.write_text(json.dumps({"coreApiKey": "key-22"}), encoding="utf-8")
+    assert cm.get_provider_registry() is not first
+    assert cm.get_model_api_config("realtime")["api_key"] == "key-22"
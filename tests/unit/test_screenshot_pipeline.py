@@ -0,0 +1,83 @@
+import base64
+import os
+import sys
+from io import BytesIO
+
+import pytest
+from PIL import Image, ImageDraw
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from utils.screenshot_utils import (
+    FrameDeduper,
+    ImagePipeline,
+    ScreenFrame,
+    hamming_distance,
+    perceptual_hash,
+    process_screen_frame,
+)
+
+
+def _screen(color=(60, 120, 180), cursor=(100, 100)) -> Image.Image:
+    img = Image.new("RGB", (640, 360), color)
+    draw = ImageDraw.Draw(img)
+    draw.rectangle((40, 40, 300, 200), fill=(240, 240, 240))
+    draw.rectangle((360, 80, 600, 320), fill=(20, 20, 20))
+    x, y = cursor
+    draw.polygon([(x, y), (x + 8, y + 12), (x, y + 14)], fill=(255, 255, 255))
+    return img
+
+
+def _jpeg(img: Image.Image) -> bytes:
+    buf = BytesIO()
+    img.save(buf, format="JPEG", quality=80)
+    return buf.getvalue()
+
+
+@pytest.mark.unit
+def test_perceptual_hash_ignores_cursor_but_not_scene_change():
+    base = perceptual_hash(_screen())
+    assert hamming_distance(base, perceptual_hash(_screen(cursor=(500, 30)))) <= 4
+    changed = _screen()
+    ImageDraw.Draw(changed).rectangle((0, 0, 640, 180), fill=(0, 0, 0))
+    assert hamming_distance(base, perceptual_hash(changed)) > 4
+
+
+def _frame(img: Image.Image, pipeline: ImagePipeline):
+    return pipeline.inspect_sync(base64.b64encode(_jpeg(img)).decode())
+
+
+@pytest.mark.unit
+def test_frame_deduper_skips_only_unchanged_screens():
+    pipeline = ImagePipeline(workers=1)
+    dedup = FrameDeduper(max_age=60)
+    first = _frame(_screen(), pipeline)
+    assert not dedup.is_duplicate(first)
+    dedup.mark_sent(first)
+    assert dedup.is_duplicate(_frame(_screen(), pipeline))
+    # 输入一个字符：dHash 几乎不变，但像素有变化，不能当作重复
+    typed = _screen()
+    ImageDraw.Draw(typed).text((60, 60), "a", fill=(0, 0, 0))
+    typed_frame = _frame(typed, pipeline)
+    assert hamming_distance(first.phash, typed_frame.phash) <= 1
+    assert not dedup.is_duplicate(typed_frame)
+    # 仅 dHash 相同而没有缩略图时也不判重复
+    assert not dedup.is_duplicate(ScreenFrame(first.b64, first.phash, 640, 360, 0))
+    assert not dedup.is_duplicate(None)
+    dedup.reset()
+    assert not dedup.is_duplicate(first)
+
+
+@pytest.mark.unit
+async def test_pipeline_caches_by_exact_content_and_validates_screen_data():
+    pipeline = ImagePipeline(workers=1)
+    raw = _jpeg(_screen())
+    first = await pipeline.compress(raw, target_h=180)
+    moved = await pipeline.compress(_jpeg(_screen(cursor=(101, 101))), target_h=180)
+    assert moved is not first and moved.b64 != first.b64 and pipeline.cache_hits == 0
+    assert await pipeline.compress(raw, target_h=180) is first and pipeline.cache_hits == 1
+    assert Image.open(BytesIO(base64.b64decode(first.b64))).height == 180
+
+    frame = await process_screen_frame("data:image/jpeg;base64," + base64.b64encode(raw).decode())
+    assert frame is not None and frame.width == 640
+    assert await process_screen_frame("data:image/jpeg;base64," + base64.b64encode(b"not an image").decode()) is None
@@ -0,0 +1,82 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from main_logic.omni_offline_client import OmniOfflineClient
+from main_logic.session_pool import RealtimeSessionPool
+
+
+class FakeSession:
+    def __init__(self, append_delay: float = 0.0):
+        self.instructions = None
+        self.history = []
+        self.ws = None
+        self._fatal_error_occurred = False
+        self.append_delay = append_delay
+
+    async def connect(self, instructions, native_audio=False):
+        self.instructions = instructions
+        self.ws = object()
+
+    async def append_history(self, text):
+        await asyncio.sleep(self.append_delay)
+        self.history.append(text)
+
+    def is_connected(self):
+        return self.ws is not None and not self._fatal_error_occurred
+
+
+@pytest.mark.unit
+async def test_only_new_dialogue_is_synced_incrementally():
+    pool = RealtimeSessionPool()
+    cache = [{"role": "主人", "text": "早上好"}]
+    session = FakeSession(append_delay=0.01)
+    await pool.warm(session, "prompt", True, cache)
+    assert pool.ready and session.instructions == "prompt"
+
+    cache[0]["text"] += "呀"
+    cache.append({"role": "猫娘", "text": "喵～"})
+    pool.sync(cache)
+    pool.sync(cache)  # 没有新增内容时不发送
+    cache[-1]["text"] += "早！"
+    cache.append({"role": "主人", "text": "吃了吗"})
+    pool.sync(cache)
+
+    # take 会等剩余增量发完
+    assert await pool.take() is session
+    assert session.history == ["主人 | 呀\n猫娘 | 喵～\n", "猫娘 | 早！\n主人 | 吃了吗\n"]
+    assert pool.stats()["synced_items"] == 4 and pool.stats()["swaps"] == 1
+    assert not pool.ready and await pool.take() is None
+
+
+@pytest.mark.unit
+async def test_unusable_spare_is_not_handed_over():
+    pool = RealtimeSessionPool(sync_timeout=0.05)
+    session = FakeSession(append_delay=1.0)
+    await pool.warm(session, "prompt", True, [])
+    pool.sync([{"role": "主人", "text": "在吗"}])
+    assert await pool.take() is None  # 同步超时
+
+    pool.reset()
+    session = FakeSession()
+    await pool.warm(session, "prompt", True, [])
+    session.ws = None  # 服务端已断开
+    assert await pool.take() is None
+
+
+@pytest.mark.unit
+async def test_text_mode_spare_is_handed_over():
+    pool = RealtimeSessionPool()
+    session = OmniOfflineClient(base_url="http://127.0.0.1:9/v1", api_key="sk-test", model="fake-model")
+    await pool.warm(session, "prompt", False, [])
+    pool.sync([{"role": "主人", "text": "在吗"}])
+    assert await pool.take() is session
+    assert [m.content for m in session._conversation_history] == ["prompt", "主人 | 在吗\n"]
+
+    await pool.warm(session, "prompt", False, [])
+    await session.close()
+    assert await pool.take() is None
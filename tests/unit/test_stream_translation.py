@@ -0,0 +1,86 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from main_logic.stream_translation import StreamingTranslator, clear_segment_cache
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    clear_segment_cache()
+    yield
+    clear_segment_cache()
+
+
+S1 = "今天的天气真的非常不错呢。"
+S2 = "我们一起去公园散步好不好呀？"
+S3 = "要记得带上水和小零食哦！"
+
+
+@pytest.mark.unit
+async def test_segments_are_emitted_in_order_as_soon_as_ready():
+    # 第一句翻得最慢，第二句先翻完也要等它；但不必等整轮结束
+    delays = {S1: 0.08, S2: 0.01, S3: 0.01}
+    calls = []
+    emitted = []
+
+    async def translate(sentence):
+        calls.append(sentence)
+        await asyncio.sleep(delays[sentence])
+        return f"<{sentence}>"
+
+    async def emit(index, sentence, translated):
+        emitted.append((index, translated))
+
+    translator = StreamingTranslator(translate, emit, "en")
+    for chunk in (S1[:5], S1[5:] + S2[:2], S2[2:] + S3[:1]):
+        translator.feed(chunk)
+    await asyncio.sleep(0)
+    assert calls == [S1, S2]
+    await asyncio.sleep(0.04)
+    assert emitted == []
+    await asyncio.sleep(0.08)
+    assert emitted == [(0, f"<{S1}>"), (1, f"<{S2}>")]
+
+    translator.feed(S3[1:])
+    await asyncio.wait_for(translator.finish(), 1)
+    assert emitted == [(0, f"<{S1}>"), (1, f"<{S2}>"), (2, f"<{S3}>")]
+
+
+@pytest.mark.unit
+async def test_repeated_sentences_hit_cache_and_share_inflight_requests():
+    calls = []
+    out = []
+
+    async def translate(sentence):
+        calls.append(sentence)
+        await asyncio.sleep(0.02)
+        return f"<{sentence}>"
+
+    async def emit(index, sentence, translated):
+        out.append(translated)
+
+    # 同一轮里重复的句子复用正在进行的请求
+    first = StreamingTranslator(translate, emit, "en")
+    first.feed(S1 + "我们")
+    first.feed(S2[2:] + "今天")
+    first.feed(S1[2:])
+    await asyncio.wait_for(first.finish(), 1)
+    assert out == [f"<{S1}>", f"<{S2}>", f"<{S1}>"]
+    assert calls == [S1, S2] and first.cache_hits == 1
+
+    # 下一轮命中缓存；换目标语言则重新翻译
+    out.clear()
+    second = StreamingTranslator(translate, emit, "en")
+    second.feed(S2)
+    await asyncio.wait_for(second.finish(), 1)
+    third = StreamingTranslator(translate, emit, "ja")
+    third.feed(S2)
+    await asyncio.wait_for(third.finish(), 1)
+    assert out == [f"<{S2}>", f"<{S2}>"]
+    assert second.cache_hits == 1 and third.cache_hits == 0
+    assert calls == [S1, S2, S2]
@@ -0,0 +1,50 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from brain.deduper import LocalTaskMatcher, TaskDeduper
+
+
+class _LLM:
+    def __init__(self, reply):
+        self.reply = reply
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+
+        class _Resp:
+            content = self.reply
+
+        return _Resp()
+
+
+@pytest.mark.unit
+def test_local_matcher_verdicts():
+    matcher = LocalTaskMatcher(duplicate_threshold=0.9, distinct_threshold=0.1)
+    candidates = [("t1", "Book a table for two at 7pm tonight"), ("t2", "设置明早七点的闹钟")]
+    assert matcher.classify("book a table for two at 7pm tonight!", candidates)[:2] == ("duplicate", "t1")
+    assert matcher.classify("整理一下桌面上的图标", candidates)[0] == "distinct"
+    # 字面相近但目标不同：交给 LLM
+    assert matcher.classify("取消明早七点的闹钟", candidates)[0] == "ambiguous"
+    # 词集合相同但顺序相反：不能本地判重复
+    transfer = [("t3", "move money from checking to savings")]
+    assert matcher.classify("move money from savings to checking", transfer)[0] == "ambiguous"
+    assert matcher.classify("从活期转钱到定期", [("t4", "从定期转钱到活期")])[0] == "ambiguous"
+
+
+@pytest.mark.unit
+async def test_only_ambiguous_cases_reach_llm():
+    llm = _LLM('["t2", true]')
+    deduper = TaskDeduper(llm=llm, matcher=LocalTaskMatcher(0.9, 0.1))
+    candidates = [("t1", "Book a table for two at 7pm tonight"), ("t2", "设置明早七点的闹钟")]
+
+    assert await deduper.judge("Book a table for two at 7pm tonight", candidates) == {"duplicate": True, "matched_id": "t1"}
+    assert await deduper.judge("Find a recipe for mapo tofu", candidates) == {"duplicate": False, "matched_id": None}
+    assert llm.calls == 0
+    assert await deduper.judge("设置一个明早七点起床的闹钟", candidates) == {"duplicate": True, "matched_id": "t2"}
+    assert llm.calls == 1
+    assert deduper.stats == {"local_duplicate": 1, "local_distinct": 1, "llm": 1}
@@ -0,0 +1,100 @@
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from brain.task_executor import DirectTaskExecutor, is_clear_non_action
+
+
+class _Ready:
+    def is_available(self):
+        return {"ready": True, "reasons": []}
+
+
+class _Catalog:
+    def __init__(self):
+        self.fetches = 0
+
+    async def get_capabilities(self, force_refresh=False):
+        self.fetches += 1
+        return {"get_weather": {"description": "weather", "input_schema": {}}}
+
+
+class _Client:
+    def __init__(self, reply):
+        self.prompts = []
+
+        async def create(**params):
+            self.prompts.append(params["messages"][0]["content"])
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=reply))])
+
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=create))
+
+
+def _executor(reply):
+    executor = DirectTaskExecutor(computer_use=_Ready(), browser_use=_Ready())
+    executor.catalog = _Catalog()
+    client = _Client(reply)
+    executor._get_client = lambda: client
+    executor._get_model = lambda: "fake-model"
+    return executor, client
+
+
+@pytest.mark.unit
+def test_prefilter_only_skips_clear_chit_chat():
+    assert is_clear_non_action("早上好呀！😊")
+    assert is_clear_non_action("thanks, good night~")
+    assert is_clear_non_action("好的")
+    # 对助手提问的肯定回答是在确认任务
+    assert not is_clear_non_action("好的", after_question=True)
+    assert not is_clear_non_action("好的，帮我打开计算器")
+    assert not is_clear_non_action("上海天气怎么样")
+
+
+@pytest.mark.unit
+async def test_unified_mode_makes_one_call_and_reuses_snapshot():
+    reply = json.dumps({
+        "has_task": True,
+        "task_description": "open calculator",
+        "mcp": {"can_execute": False, "reason": "no tool"},
+        "browser_use": {"can_execute": False, "reason": "local app"},
+        "computer_use": {"can_execute": True, "reason": "gui"},
+    })
+    executor, client = _executor(reply)
+    flags = {"mcp_enabled": True, "browser_use_enabled": True, "computer_use_enabled": True}
+
+    for _ in range(2):
+        res = await executor.analyze_and_execute([{"role": "user", "content": "帮我打开计算器"}], agent_flags=flags)
+        assert res.execution_method == "computer_use"
+        assert res.task_description == "open calculator"
+    assert len(client.prompts) == 2
+    assert "unified task classifier" in client.prompts[0]
+    assert executor.catalog.fetches == 1
+
+    assert await executor.analyze_and_execute([{"role": "user", "content": "哈哈哈"}], agent_flags=flags) is None
+    assert len(client.prompts) == 2
+    assert executor.stats == {"turns": 3, "prefiltered": 1, "llm_calls": 2}
+
+    # "帮我打开音乐"的分析被"谢谢"取消：两轮都未分析过，不能只看"谢谢"就预筛掉
+    history = [
+        {"role": "user", "content": "帮我打开音乐"},
+        {"role": "assistant", "content": "好呀~"},
+        {"role": "user", "content": "谢谢"},
+    ]
+    assert await executor.analyze_and_execute(history, agent_flags=flags, unanalyzed_turns=1) is None
+    res = await executor.analyze_and_execute(history, agent_flags=flags, unanalyzed_turns=2)
+    assert res.execution_method == "computer_use" and len(client.prompts) == 3
+
+
+@pytest.mark.unit
+async def test_unified_parse_failure_falls_back_to_parallel():
+    executor, client = _executor("not json")
+    flags = {"browser_use_enabled": True, "computer_use_enabled": True}
+    res = await executor.analyze_and_execute([{"role": "user", "content": "帮我打开计算器"}], agent_flags=flags)
+    assert res is None
+    # 1 次统一判定 + 回退后每个通道各 1 次
+    assert len(client.prompts) == 3
@@ -0,0 +1,52 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from main_logic.text_coalescer import TextFrameCoalescer
+
+
+@pytest.mark.unit
+async def test_deltas_are_merged_and_new_message_flag_is_preserved():
+    frames = []
+
+    async def send(text, is_new):
+        frames.append((text, is_new))
+
+    coalescer = TextFrameCoalescer(send, flush_interval=0.03, max_bytes=1000)
+    for turn in ("第一条消息，慢慢地流出来。", "第二条！"):
+        for i, ch in enumerate(turn):
+            await coalescer.push(ch, is_first_chunk=(i == 0))
+            await asyncio.sleep(0.002)
+    await coalescer.flush(final=True)
+
+    # 第一个 chunk 立即单独发出，其余字合成少数几帧
+    assert frames[0] == ("第", True)
+    assert len(frames) < len("第一条消息，慢慢地流出来。第二条！") / 2
+    assert [is_new for _, is_new in frames].count(True) == 2
+    starts = [i for i, (_, is_new) in enumerate(frames) if is_new]
+    assert "".join(t for t, _ in frames[:starts[1]]) == "第一条消息，慢慢地流出来。"
+    assert "".join(t for t, _ in frames[starts[1]:]) == "第二条！"
+
+
+@pytest.mark.unit
+async def test_emotion_tags_split_across_deltas_are_stripped():
+    frames = []
+
+    async def send(text, is_new):
+        frames.append(text)
+
+    coalescer = TextFrameCoalescer(send, flush_interval=10, max_bytes=4)
+    for delta in ("嗯", "好的<ha", "ppy>主人", "，", "1 <", " 2"):
+        await coalescer.push(delta, is_first_chunk=(delta == "嗯"))
+    await coalescer.flush(final=True)
+    assert "".join(frames) == "嗯好的主人，1 < 2"
+    assert all("<ha" not in f and "ppy>" not in f for f in frames)
+    # 标签只用于分析它所在的那条回复
+    assert coalescer.tags_for("嗯好的主人， 1 < 2") == ["happy"]
+    assert coalescer.tags_for("别的句子") == []
+    await coalescer.push("下一条", is_first_chunk=True)
+    assert coalescer.tags_for("嗯好的主人，1 < 2") == []
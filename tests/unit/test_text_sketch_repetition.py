@@ -0,0 +1,44 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from utils.frontend_utils import calculate_text_similarity
+from utils.text_sketch import MinHasher, RepetitionIndex
+
+REPLY = "好呀，我听到啦，主人今天辛苦了喵。要不要先喝点水，休息一下再继续呢？"
+OTHER = "今天天气很好，我们一起去公园散步吧，顺便买点好吃的小鱼干回来。"
+
+
+@pytest.mark.unit
+def test_signature_similarity_tracks_exact_jaccard():
+    hasher = MinHasher()
+    edited = REPLY.replace("喝点水", "喝杯茶")
+    exact = calculate_text_similarity(REPLY, edited)
+    approx = MinHasher.similarity(hasher.signature(REPLY), hasher.signature(edited))
+    assert abs(exact - approx) < 0.15
+    assert MinHasher.similarity(hasher.signature(REPLY), hasher.signature(REPLY.upper() + "  ")) == 1.0
+
+
+@pytest.mark.unit
+def test_check_and_insert_counts_recent_duplicates():
+    index = RepetitionIndex(capacity=3, threshold=0.8)
+    assert index.check_and_insert(REPLY) == 0
+    assert index.check_and_insert(REPLY) == 1
+    assert index.check_and_insert(REPLY) == 2
+    assert index.check_and_insert(OTHER) == 0
+    index.clear()
+    assert len(index) == 0 and index.check_and_insert(REPLY) == 0
+
+
+@pytest.mark.unit
+def test_window_evicts_oldest_entry():
+    index = RepetitionIndex(capacity=2, threshold=0.8)
+    index.check_and_insert(REPLY)
+    index.check_and_insert(OTHER)
+    index.check_and_insert("")
+    assert len(index) == 2
+    assert index.query(REPLY) == []
+    assert len(index.query(OTHER)) == 1
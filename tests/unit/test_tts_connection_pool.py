@@ -0,0 +1,68 @@
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from main_logic.tts_connection_pool import TTSConnectionPool, pool_key
+
+HANDSHAKE = 0.1
+
+
+def handshake_worker(request_queue, response_queue, audio_api_key, voice_id):
+    """替身 TTS：模拟建连握手后发出就绪信号，非元组请求时退出。"""
+    time.sleep(HANDSHAKE)
+    response_queue.put(("__ready__", audio_api_key != "bad-key"))
+    while True:
+        try:
+            sid, _ = request_queue.get()
+        except Exception:
+            break
+
+
+def _wait_ready(conn, timeout=1.0):
+    deadline = time.monotonic() + timeout
+    while conn.ready_state() is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return conn.ready_state()
+
+
+@pytest.mark.unit
+def test_second_session_gets_a_warm_worker_and_release_stops_it():
+    pool = TTSConnectionPool(spares=1, max_idle=30, warm_window=30)
+    key = pool_key(handshake_worker, "key", "voice-a")
+    first = pool.acquire(key, handshake_worker, "key", "voice-a")
+    assert first.ready_state() is None  # 冷启动：要等握手
+    assert _wait_ready(first) is True
+    pool.release(first)
+    first.thread.join(timeout=1)
+    assert not first.thread.is_alive()
+
+    time.sleep(HANDSHAKE * 1.5)  # 热备在后台完成握手
+    second = pool.acquire(key, handshake_worker, "key", "voice-a")
+    assert second.ready_state() is True
+    assert (pool.hits, pool.misses) == (1, 1)
+    assert pool_key(handshake_worker, "key", "voice-b") != key
+    pool.shutdown()
+
+
+@pytest.mark.unit
+def test_stale_and_failed_spares_are_not_handed_out():
+    pool = TTSConnectionPool(spares=1, max_idle=0.4, warm_window=30)
+    key = pool_key(handshake_worker, "key", "voice-a")
+    pool.release(pool.acquire(key, handshake_worker, "key", "voice-a"))
+    spare = pool._idle[key][0]
+    time.sleep(0.6)  # 维护线程按 max_idle 换新
+    spare.thread.join(timeout=1)
+    assert not spare.thread.is_alive()
+    assert pool._idle[key] and pool._idle[key][0] is not spare
+
+    bad = pool_key(handshake_worker, "bad-key", "voice-a")
+    pool.release(pool.acquire(bad, handshake_worker, "bad-key", "voice-a"))
+    time.sleep(HANDSHAKE * 1.5)
+    conn = pool.acquire(bad, handshake_worker, "bad-key", "voice-a")
+    assert pool.hits == 0  # 就绪失败的热备被丢弃，现起一个
+    pool.shutdown()
+    pool.release(conn)
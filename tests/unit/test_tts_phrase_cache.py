@@ -0,0 +1,121 @@
+import os
+import sys
+import threading
+import time
+from queue import Empty, Queue
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from main_logic import tts_phrase_cache
+from main_logic.tts_phrase_cache import PhraseCache, with_phrase_cache
+
+
+def fake_worker(request_queue, response_queue, audio_api_key, voice_id, received=None, slow=()):
+    """替身 TTS：累积一轮文本，结束信号后按文本生成两块 PCM（slow 中的文本合成得很慢）。"""
+    response_queue.put(("__ready__", True))
+    text = ""
+    while True:
+        item = request_queue.get()
+        if not isinstance(item, tuple):
+            return
+        sid, chunk = item
+        if sid is not None:
+            received.append(chunk)
+            text += chunk
+            continue
+        if text:
+            time.sleep(1.0 if text in slow else 0.02)
+            pcm = text.encode("utf-8") * 200
+            response_queue.put(pcm[: len(pcm) // 2])
+            response_queue.put(pcm[len(pcm) // 2:])
+        text = ""
+
+
+def _start(tmp_path, warm=(), slow=()):
+    received = []
+    cache = PhraseCache(tmp_path, max_bytes=1 << 20)
+
+    def worker(req, resp, key, voice):
+        fake_worker(req, resp, key, voice, received, slow)
+
+    requests, responses = Queue(), Queue()
+    cached = with_phrase_cache(worker, warm_phrases=warm, cache=cache, max_chars=20)
+    threading.Thread(target=cached, args=(requests, responses, "", "voice-a"), daemon=True).start()
+    assert responses.get(timeout=1) == ("__ready__", True)
+    return requests, responses, received, cache
+
+
+def _turn(requests, responses, sid, chunks):
+    for chunk in chunks:
+        requests.put((sid, chunk))
+    requests.put((None, None))
+    audio = b""
+    while True:
+        try:
+            audio += responses.get(timeout=0.3)
+        except Empty:
+            return audio
+
+
+@pytest.fixture(autouse=True)
+def _fast_capture(monkeypatch):
+    monkeypatch.setattr(tts_phrase_cache, "CAPTURE_QUIET", 0.1)
+
+
+@pytest.mark.unit
+def test_repeated_turn_is_served_from_cache(tmp_path):
+    requests, responses, received, cache = _start(tmp_path)
+    first = _turn(requests, responses, "s1", ["你好", "呀！"])
+    assert first == "你好呀！".encode("utf-8") * 200
+    time.sleep(0.2)
+
+    received.clear()
+    second = _turn(requests, responses, "s2", ["你好呀", "！"])
+    assert second == first
+    assert received == []
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # 以缓存短语开头但更长的回复：扣住的 chunk 原样放行给 worker
+    longer = _turn(requests, responses, "s3", ["你好呀！", "今天", "想聊什么"])
+    assert longer == "你好呀！今天想聊什么".encode("utf-8") * 200
+    assert received == ["你好呀！", "今天", "想聊什么"]
+
+    # 重启后从磁盘恢复，且保留 worker 输出的分块边界（Ogg 页不能被切开）
+    chunks = PhraseCache(tmp_path, max_bytes=1 << 20).get(cache.scope("worker", "voice-a"), "你好呀!")
+    assert [len(c) for c in chunks] == [len(first) // 2, len(first) - len(first) // 2]
+
+
+@pytest.mark.unit
+def test_warm_phrases_are_cached_without_playing(tmp_path):
+    requests, responses, received, cache = _start(tmp_path, warm=["早上好"])
+    time.sleep(0.5)
+    with pytest.raises(Empty):
+        responses.get_nowait()
+    assert received == ["早上好"]
+
+    received.clear()
+    assert _turn(requests, responses, "s1", ["早上", "好"]) == "早上好".encode("utf-8") * 200
+    assert received == []
+
+
+@pytest.mark.unit
+def test_live_turn_preempts_warm_up_without_leaking_its_audio(tmp_path):
+    requests, responses, received, cache = _start(tmp_path, warm=["晚安喵"], slow=["晚安喵"])
+    time.sleep(0.2)  # 预热已发给 worker，正在慢慢合成
+    started = time.monotonic()
+    audio = _turn(requests, responses, "s1", ["你好"])
+    # 不等预热收尾，也没有混入预热的音频
+    assert audio == "你好".encode("utf-8") * 200
+    assert time.monotonic() - started < 0.8
+    scope = cache.scope("worker", "voice-a")
+    time.sleep(1.2)  # 被放弃的预热 worker 此时才吐出音频：按代数丢弃
+    assert b"".join(cache.get(scope, "你好")) == audio
+    # 之后空闲时重新预热，缓存里是正确的音频，也没有发给前端
+    deadline = time.monotonic() + 3
+    while (scope, "晚安喵") not in cache and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert b"".join(cache.get(scope, "晚安喵")) == "晚安喵".encode("utf-8") * 200
+    with pytest.raises(Empty):
+        responses.get_nowait()
@@ -0,0 +1,82 @@
+import json
+import os
+import struct
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from utils.vrm_catalog import VrmCatalog
+
+
+def _glb(extensions, payload=b"\0" * 64):
+    chunk = json.dumps({"asset": {"version": "2.0"}, "extensions": extensions}).encode("utf-8")
+    chunk += b" " * (-len(chunk) % 4)
+    total = 12 + 8 + len(chunk) + 8 + len(payload)
+    return (struct.pack("<4sII", b"glTF", 2, total) + struct.pack("<I4s", len(chunk), b"JSON") + chunk
+            + struct.pack("<I4s", len(payload), b"BIN\x00") + payload)
+
+
+VRM1 = {"VRMC_vrm": {"specVersion": "1.0", "expressions": {"preset": {"happy": {}, "aa": {}}, "custom": {"wink": {}}},
+                     "humanoid": {"humanBones": {"hips": {"node": 0}, "head": {"node": 1}}}}}
+VRM0 = {"VRM": {"blendShapeMaster": {"blendShapeGroups": [{"presetName": "joy", "name": "Joy"},
+                                                          {"presetName": "unknown", "name": "Smug"}]},
+                "humanoid": {"humanBones": [{"bone": "hips"}, {"bone": "spine"}]}}}
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    project_root = tmp_path / "project"
+    user_vrm = tmp_path / "docs" / "vrm"
+    for d in (project_root / "static" / "vrm" / "animation", user_vrm / "animation"):
+        d.mkdir(parents=True)
+    cm = SimpleNamespace(project_root=project_root, vrm_dir=user_vrm, vrm_animation_dir=user_vrm / "animation")
+    return VrmCatalog(cm, rescan_interval=60.0), project_root / "static" / "vrm", user_vrm
+
+
+@pytest.mark.unit
+def test_lists_models_with_parsed_metadata(catalog):
+    cat, static_vrm, user_vrm = catalog
+    (static_vrm / "a.vrm").write_bytes(_glb(VRM1))
+    (user_vrm / "a.vrm").write_bytes(_glb(VRM0))  # 与项目目录同名，但 URL 不同
+    (user_vrm / "b.vrm").write_bytes(_glb(VRM0))
+    (static_vrm / "animation" / "wave.vrma").write_bytes(_glb({"VRMC_vrm_animation": {"specVersion": "1.0"}}))
+
+    listing = [m.to_listing() for m in cat.models()]
+    assert [(m["url"], m["location"]) for m in listing] == [
+        ("/static/vrm/a.vrm", "project"), ("/user_vrm/a.vrm", "user"), ("/user_vrm/b.vrm", "user")]
+    assert listing[0]["size"] == (static_vrm / "a.vrm").stat().st_size
+    assert listing[1]["hash"] == listing[2]["hash"] != listing[0]["hash"]
+
+    model = cat.find_model("a")
+    assert model.location == "project"
+    assert model.expressions == ("happy", "aa", "wink")
+    assert model.bones == ("hips", "head")
+    assert cat.find_model("b").expressions == ("joy", "Smug")
+    assert [(a.url, a.type) for a in cat.animations()] == [("/static/vrm/animation/wave.vrma", "vrma")]
+
+
+@pytest.mark.unit
+def test_refresh_parses_only_new_or_changed_files(catalog):
+    cat, _static_vrm, user_vrm = catalog
+    (user_vrm / "a.vrm").write_bytes(_glb(VRM1))
+    (user_vrm / "b.vrm").write_bytes(_glb(VRM1))
+    cat.models()
+    assert cat.stats["parsed"] == 2
+
+    cat.models()
+    assert cat.stats["parsed"] == 2
+
+    (user_vrm / "c.vrm").write_bytes(_glb(VRM0))
+    assert [m.name for m in cat.models()] == ["a", "b", "c"]
+    assert cat.stats["parsed"] == 3
+
+    (user_vrm / "a.vrm").write_bytes(_glb(VRM0, payload=b"\1" * 128))  # 原地覆盖，目录 mtime 不变
+    cat.invalidate()
+    assert cat.find_model("a").expressions == ("joy", "Smug")
+    assert cat.stats["parsed"] == 4
+
+    (user_vrm / "b.vrm").unlink()
+    assert [m.name for m in cat.models()] == ["a", "c"]
@@ -7,17 +7,23 @@ import json
 import logging
 from copy import deepcopy
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, Optional, Tuple
 
 from config import (
     DEFAULT_CORE_API_PROFILES,
     DEFAULT_ASSIST_API_PROFILES,
     DEFAULT_ASSIST_API_KEY_FIELDS,
+    get_extra_body,
 )
 logger = logging.getLogger(__name__)
 
 # 配置缓存
 _config_cache: Optional[Dict[str, Any]] = None
+# 上一次加载到的配置内容与版本号：重新加载后内容没变则版本号不变，下游编译结果继续有效
+_loaded_config: Optional[Dict[str, Any]] = None
+_config_generation = 0
+# 转换后的 profile 缓存：名称 -> (版本号, 结果)
+_converted_cache: Dict[str, Tuple[int, Any]] = {}
 
 
 def _get_default_core_api_profiles() -> Dict[str, Dict[str, Any]]:
@@ -156,18 +162,37 @@ def get_config(force_reload: bool = False) -> Dict[str, Any]:
     Returns:
         Dict: 配置字典
     """
-    global _config_cache
+    global _config_cache, _loaded_config, _config_generation
     
     if _config_cache is None or force_reload:
         try:
-            _config_cache = _load_json_config()
+            config = _load_json_config()
         except (FileNotFoundError, json.JSONDecodeError) as e:
             logger.error(f"加载配置失败，使用空配置: {e}")
-            _config_cache = {}
+            config = {}
+        if config != _loaded_config:
+            _loaded_config = config
+            _config_generation += 1
+        _config_cache = _loaded_config
     
     return _config_cache
 
 
+def get_config_generation() -> int:
+    """当前 api_providers.json 内容的版本号（内容变化时递增），用于判断编译结果是否过期"""
+    get_config()
+    return _config_generation
+
+
+def _cached_conversion(name: str, build: Callable[[], Dict[str, Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    # 同一版本的配置只转换一次；返回副本，调用方修改不影响缓存
+    entry = _converted_cache.get(name)
+    if entry is None or entry[0] != _config_generation:
+        entry = (_config_generation, build())
+        _converted_cache[name] = entry
+    return {key: dict(profile) for key, profile in entry[1].items()}
+
+
 def get_core_api_profiles(force_reload: bool = False) -> Dict[str, Dict[str, Any]]:
     """
     获取核心API配置（兼容原有的 CORE_API_PROFILES 格式）
@@ -179,17 +204,21 @@ def get_core_api_profiles(force_reload: bool = False) -> Dict[str, Dict[str, Any
         Dict: 核心API配置字典，格式与 CORE_API_PROFILES 相同
     """
     config = get_config(force_reload=force_reload)
-    core_providers = config.get('core_api_providers', {})
-    
-    result = {}
-    for key, profile in core_providers.items():
-        # 转换为Python代码使用的格式
-        result[key] = _convert_core_api_profile(profile)
-    
-    if not result:
-        return _get_default_core_api_profiles()
-    
-    return result
+
+    def build():
+        core_providers = config.get('core_api_providers', {})
+        
+        result = {}
+        for key, profile in core_providers.items():
+            # 转换为Python代码使用的格式
+            result[key] = _convert_core_api_profile(profile)
+        
+        if not result:
+            return _get_default_core_api_profiles()
+        
+        return result
+
+    return _cached_conversion('core', build)
 
 
 def get_assist_api_profiles(force_reload: bool = False) -> Dict[str, Dict[str, Any]]:
@@ -202,34 +231,37 @@ def get_assist_api_profiles(force_reload: bool = False) -> Dict[str, Dict[str, A
     Returns:
         Dict: 辅助API配置字典，格式与 ASSIST_API_PROFILES 相同
     """
-    # 首先获取默认配置作为基础
-    defaults = _get_default_assist_api_profiles()
-    
     config = get_config(force_reload=force_reload)
-    assist_providers = config.get('assist_api_providers', {})
-    
-    if not assist_providers:
-        return defaults
-    
-    result = {}
-    for key, profile in assist_providers.items():
-        # 转换为Python代码使用的格式
-        converted = _convert_assist_api_profile(profile)
+
+    def build():
+        # 首先获取默认配置作为基础
+        defaults = _get_default_assist_api_profiles()
+        assist_providers = config.get('assist_api_providers', {})
         
-        # 与默认配置合并：默认配置作为基础，JSON配置覆盖
-        if key in defaults:
-            merged = dict(defaults[key])  # 复制默认配置
-            merged.update(converted)  # JSON 配置覆盖
-            result[key] = merged
-        else:
-            result[key] = converted
-    
-    # 添加默认配置中有但 JSON 中没有的 provider
-    for key in defaults:
-        if key not in result:
-            result[key] = defaults[key]
-    
-    return result
+        if not assist_providers:
+            return defaults
+        
+        result = {}
+        for key, profile in assist_providers.items():
+            # 转换为Python代码使用的格式
+            converted = _convert_assist_api_profile(profile)
+            
+            # 与默认配置合并：默认配置作为基础，JSON配置覆盖
+            if key in defaults:
+                merged = dict(defaults[key])  # 复制默认配置
+                merged.update(converted)  # JSON 配置覆盖
+                result[key] = merged
+            else:
+                result[key] = converted
+        
+        # 添加默认配置中有但 JSON 中没有的 provider
+        for key in defaults:
+            if key not in result:
+                result[key] = defaults[key]
+        
+        return result
+
+    return _cached_conversion('assist', build)
 
 
 def get_assist_api_key_fields() -> Dict[str, str]:
@@ -324,6 +356,179 @@ def get_free_voices() -> Dict[str, str]:
     return config.get('free_voices', {})
 
 
+# 模型类型到配置字段的映射
+# fallback_type: 'assist' = 辅助API, 'core' = 核心API
+MODEL_TYPE_MAPPING = {
+    'conversation': {
+        'custom_model': 'CONVERSATION_MODEL',
+        'custom_url': 'CONVERSATION_MODEL_URL',
+        'custom_key': 'CONVERSATION_MODEL_API_KEY',
+        'default_model': 'CONVERSATION_MODEL',
+        'fallback_type': 'assist',
+    },
+    'summary': {
+        'custom_model': 'SUMMARY_MODEL',
+        'custom_url': 'SUMMARY_MODEL_URL',
+        'custom_key': 'SUMMARY_MODEL_API_KEY',
+        'default_model': 'SUMMARY_MODEL',
+        'fallback_type': 'assist',
+    },
+    'correction': {
+        'custom_model': 'CORRECTION_MODEL',
+        'custom_url': 'CORRECTION_MODEL_URL',
+        'custom_key': 'CORRECTION_MODEL_API_KEY',
+        'default_model': 'CORRECTION_MODEL',
+        'fallback_type': 'assist',
+    },
+    'emotion': {
+        'custom_model': 'EMOTION_MODEL',
+        'custom_url': 'EMOTION_MODEL_URL',
+        'custom_key': 'EMOTION_MODEL_API_KEY',
+        'default_model': 'EMOTION_MODEL',
+        'fallback_type': 'assist',
+    },
+    'vision': {
+        'custom_model': 'VISION_MODEL',
+        'custom_url': 'VISION_MODEL_URL',
+        'custom_key': 'VISION_MODEL_API_KEY',
+        'default_model': 'VISION_MODEL',
+        'fallback_type': 'assist',
+    },
+    'agent': {
+        'custom_model': 'AGENT_MODEL',
+        'custom_url': 'AGENT_MODEL_URL',
+        'custom_key': 'AGENT_MODEL_API_KEY',
+        'default_model': 'AGENT_MODEL',
+        'fallback_type': 'assist',
+    },
+    'realtime': {
+        'custom_model': 'REALTIME_MODEL',
+        'custom_url': 'REALTIME_MODEL_URL',
+        'custom_key': 'REALTIME_MODEL_API_KEY',
+        'default_model': 'CORE_MODEL',
+        'fallback_type': 'core',  # 实时模型回退到核心API
+    },
+    'tts_default': {
+        'custom_model': 'TTS_MODEL',
+        'custom_url': 'TTS_MODEL_URL',
+        'custom_key': 'TTS_MODEL_API_KEY',
+        'default_model': 'CORE_MODEL',
+        'fallback_type': 'core',  # 默认TTS回退到核心API
+    },
+    'tts_custom': {
+        'custom_model': 'TTS_MODEL',
+        'custom_url': 'TTS_MODEL_URL',
+        'custom_key': 'TTS_MODEL_API_KEY',
+        'default_model': 'CORE_MODEL',
+        'fallback_type': 'assist',  # 自定义TTS回退到辅助API
+    },
+}
+
+
+def resolve_model_api_config(core_config: Dict[str, Any], model_type: str,
+                             assist_profiles: Callable[[], Dict[str, Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    由合并后的核心配置解析指定模型类型的 API 配置（ConfigManager.get_model_api_config 的实现）
+
+    ``assist_profiles`` 仅在自定义音色回退到 Qwen 时调用。
+    """
+    if model_type not in MODEL_TYPE_MAPPING:
+        raise ValueError(f"Unknown model_type: {model_type}. Valid types: {list(MODEL_TYPE_MAPPING.keys())}")
+    
+    mapping = MODEL_TYPE_MAPPING[model_type]
+    enable_custom_api = core_config.get('ENABLE_CUSTOM_API', False)
+    
+    # agent 不依赖 enable_custom_api 开关；其余模型遵循原逻辑
+    if enable_custom_api or model_type == 'agent':
+        custom_model = core_config.get(mapping['custom_model'], '')
+        custom_url = core_config.get(mapping['custom_url'], '')
+        custom_key = core_config.get(mapping['custom_key'], '')
+        
+        # 自定义配置完整时使用自定义配置
+        if custom_model and custom_url:
+            return {
+                'model': custom_model,
+                'api_key': custom_key,
+                'base_url': custom_url,
+                'is_custom': True,
+                # 对于 realtime 模型，自定义配置时 api_type 设为 'local'
+                # TODO: 后续完善 'local' 类型的具体实现（如本地推理服务等）
+                'api_type': 'local' if model_type == 'realtime' else None,
+            }
+    
+    # 自定义音色(CosyVoice)的特殊回退逻辑：优先尝试用户保存的 Qwen Cosyvoice API，
+    # 只有在缺少 Qwen Cosyvoice API 时才再回退到辅助 API（CosyVoice 目前是唯一支持 voice clone 的）
+    if model_type == 'tts_custom':
+        qwen_api_key = (core_config.get('ASSIST_API_KEY_QWEN') or '').strip()
+        if qwen_api_key:
+            qwen_profile = assist_profiles().get('qwen', {})
+            return {
+                'model': core_config.get(mapping['default_model'], ''), # Placeholder only, will be overridden by the actual model
+                'api_key': qwen_api_key,
+                'base_url': qwen_profile.get('OPENROUTER_URL', core_config.get('OPENROUTER_URL', '')), # Placeholder only, will be overridden by the actual url
+                'is_custom': False,
+            }
+
+    # 根据 fallback_type 回退到不同的 API
+    if mapping['fallback_type'] == 'core':
+        # 回退到核心 API 配置
+        return {
+            'model': core_config.get(mapping['default_model'], ''),
+            'api_key': core_config.get('CORE_API_KEY', ''),
+            'base_url': core_config.get('CORE_URL', ''),
+            'is_custom': False,
+            # 对于 realtime 模型，回退到核心API时使用配置的 CORE_API_TYPE
+            'api_type': core_config.get('CORE_API_TYPE', '') if model_type == 'realtime' else None,
+        }
+    else:
+        # 回退到辅助 API 配置
+        return {
+            'model': core_config.get(mapping['default_model'], ''),
+            'api_key': core_config.get('OPENROUTER_API_KEY', ''),
+            'base_url': core_config.get('OPENROUTER_URL', ''),
+            'is_custom': False,
+        }
+
+
+class ProviderRegistry:
+    """
+    编译后的 API 配置（不可变，整体替换）
+
+    - ``core_config``: get_core_config 的合并结果
+    - 每个 model_type 预先解析好 model/api_key/base_url，并附带 ``extra_body``（config.get_extra_body）
+      与 ``provider``（回退到核心 API 时为 CORE_API_TYPE，否则为 assistApi；自定义配置为 'custom'）
+    - ``stamp`` 为编译时各来源的版本，来源不变时由调用方直接复用
+    """
+
+    __slots__ = ('stamp', 'core_config', '_entries')
+
+    def __init__(self, core_config: Dict[str, Any], stamp: Any = None,
+                 assist_profiles: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.stamp = stamp
+        self.core_config = core_config
+        profiles = assist_profiles if assist_profiles is not None else {}
+        entries = {}
+        for model_type, mapping in MODEL_TYPE_MAPPING.items():
+            entry = resolve_model_api_config(core_config, model_type, lambda: profiles)
+            if entry['is_custom']:
+                provider = 'custom'
+            elif mapping['fallback_type'] == 'core':
+                provider = core_config.get('CORE_API_TYPE', '')
+            else:
+                provider = core_config.get('assistApi', '')
+            entry['provider'] = provider
+            entry['extra_body'] = get_extra_body(entry['model'])
+            entries[model_type] = entry
+        self._entries = entries
+
+    def get(self, model_type: str) -> Dict[str, Any]:
+        """O(1) 查找；返回副本"""
+        try:
+            return dict(self._entries[model_type])
+        except KeyError:
+            raise ValueError(f"Unknown model_type: {model_type}. Valid types: {list(MODEL_TYPE_MAPPING.keys())}") from None
+
+
 # 导出主要函数
 __all__ = [
     'get_core_api_profiles',
@@ -335,4 +540,7 @@ __all__ = [
     'reload_config',
     'get_config',
     'get_free_voices',
+    'get_config_generation',
+    'resolve_model_api_config',
+    'ProviderRegistry',
 ]
@@ -0,0 +1,376 @@
+# -- coding: utf-8 --
+"""
+麦克风音频 DSP 进程池
+
+OmniRealtimeClient 原来用 run_in_executor 把 AudioProcessor（RNNoise -> AGC -> Limiter -> 降采样）丢进默认线程池，
+所有角色的音频处理都和 main_server 的其余工作抢同一把 GIL。AudioDSPPool 起若干个独立的 worker 进程（分片）：
+
+- 每个会话在 open_session 时固定到当前会话数最少的分片，AudioProcessor 实例（RNNoise 的 GRU 状态、AGC 增益、
+  帧缓冲）留在 worker 里跨块保持；同一分片按 FIFO 处理，会话内的块天然有序
+- PCM 经每个分片一块共享内存里的环形槽传递（输入写入槽，worker 原地写回输出），控制管道里只有很小的元组；
+  槽用满或块太大时才把 PCM 随消息直接发送
+- worker 回报每块的排队时间（发出 → 被取走）和处理时间，排队时间记入
+  ``neko_audio_dsp_queue_seconds{shard=...}`` 直方图，``stats()`` 给出各分片的会话数与排队延迟分位数
+- worker 退出时，该分片上的会话自动回退到进程内 AudioProcessor（线程池），不中断语音
+
+PooledAudioProcessor 是会话侧代理，提供与 AudioProcessor 相同的属性与方法（speech_probability、reset() 等），
+另加 ``process_chunk_async``。
+"""
+
+import asyncio
+import atexit
+import functools
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional
+
+from config import AUDIO_DSP_RING_SLOTS, AUDIO_DSP_SLOT_BYTES, AUDIO_DSP_WORKERS
+from utils import metrics
+from utils.audio_processor import AudioProcessor
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SECONDS = metrics.histogram(
+    "neko_audio_dsp_queue_seconds", "Time microphone chunks wait before a DSP worker picks them up.", ("shard",)
+)
+# stats() 统计最近这么多块的排队延迟
+_QUEUE_WINDOW = 2048
+
+
+def _worker_main(conn, shm_name: str, slot_bytes: int) -> None:
+    """worker 进程：按顺序处理控制管道里的消息。"""
+    # spawn 出来的 worker 与主进程共用同一个资源跟踪器，挂载时的重复登记不影响主进程 unlink 时注销；
+    # 这里不能再 unregister，否则主进程关闭时跟踪器会因找不到登记而报 KeyError
+    shm = shared_memory.SharedMemory(name=shm_name)
+    buf = shm.buf
+    processors: Dict[int, AudioProcessor] = {}
+    silence_resets = set()
+    try:
+        while True:
+            try:
+                msg = conn.recv()
+            except (EOFError, OSError):
+                break
+            op = msg[0]
+            if op == "chunk":
+                _, sid, slot, length, inline, sent_at = msg
+                started = time.perf_counter()
+                data = inline if slot is None else buf[slot * slot_bytes:slot * slot_bytes + length]
+                processor = processors.get(sid)
+                try:
+                    out = processor.process_chunk(data) if processor is not None else bytes(data)
+                except Exception as e:
+                    logger.error(f"❌ 音频 DSP 处理失败: {e}")
+                    out = bytes(data)
+                if slot is not None:
+                    try:
+                        data.release()
+                    except BufferError:
+                        pass  # 调试录音等仍引用着这段内存，交给 GC
+                prob = processor.speech_probability if processor is not None else 0.0
+                reset = sid in silence_resets
+                silence_resets.discard(sid)
+                if slot is not None and len(out) <= slot_bytes:
+                    buf[slot * slot_bytes:slot * slot_bytes + len(out)] = out
+                    out_inline = None
+                else:
+                    out_inline = out
+                conn.send((len(out), out_inline, prob, reset, started - sent_at, time.perf_counter() - started))
+            elif op == "open":
+                _, sid, options = msg
+                processors[sid] = AudioProcessor(on_silence_reset=functools.partial(silence_resets.add, sid), **options)
+            elif op == "call":
+                _, sid, method, args = msg
+                processor = processors.get(sid)
+                if processor is not None:
+                    try:
+                        getattr(processor, method)(*args)
+                    except Exception as e:
+                        logger.error(f"❌ 音频 DSP 调用 {method} 失败: {e}")
+            elif op == "close":
+                processors.pop(msg[1], None)
+                silence_resets.discard(msg[1])
+            elif op == "stop":
+                break
+    finally:
+        del buf
+        try:
+            shm.close()
+        except Exception:
+            pass
+
+
+def _set_result(fut: asyncio.Future, value) -> None:
+    if not fut.done():
+        fut.set_result(value)
+
+
+def _set_exception(fut: asyncio.Future, exc: BaseException) -> None:
+    if not fut.done():
+        fut.set_exception(exc)
+
+
+class _Shard:
+    def __init__(self, index: int, ctx, slots: int, slot_bytes: int):
+        self.index = index
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main, args=(child, self.shm.name, slot_bytes),
+            name=f"neko-audio-dsp-{index}", daemon=True,
+        )
+        self.process.start()
+        child.close()
+        self.alive = True
+        self.sessions = 0
+        self.chunks = 0
+        self.inline_chunks = 0
+        self.queue_delays = deque(maxlen=_QUEUE_WINDOW)
+        self._queue_metric = QUEUE_SECONDS.labels(str(index))
+        self._lock = threading.Lock()
+        self._pending = deque()
+        self._head = 0
+        self._in_use = 0
+        self._reader = threading.Thread(target=self._read_replies, name=f"neko-audio-dsp-reader-{index}", daemon=True)
+        self._reader.start()
+
+    def send(self, msg) -> None:
+        with self._lock:
+            if self.alive:
+                self.conn.send(msg)
+
+    def submit(self, sid: int, chunk: bytes) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        length = len(chunk)
+        with self._lock:
+            if not self.alive:
+                raise RuntimeError("audio DSP worker is not running")
+            if length <= self.slot_bytes and self._in_use < self.slots:
+                # 回复按 FIFO 到达，槽也按 FIFO 释放，所以 head 处的槽一定空闲
+                slot = self._head
+                self._head = (slot + 1) % self.slots
+                self._in_use += 1
+                self.shm.buf[slot * self.slot_bytes:slot * self.slot_bytes + length] = chunk
+                msg = ("chunk", sid, slot, length, None, time.perf_counter())
+            else:
+                slot = None
+                self.inline_chunks += 1
+                msg = ("chunk", sid, None, length, bytes(chunk), time.perf_counter())
+            self._pending.append((fut, loop, slot))
+            self.chunks += 1
+            self.conn.send(msg)
+        return fut
+
+    def _read_replies(self) -> None:
+        while True:
+            try:
+                length, inline, prob, reset, queue_s, service_s = self.conn.recv()
+            except (EOFError, OSError):
+                break
+            with self._lock:
+                fut, loop, slot = self._pending.popleft()
+                if slot is not None:
+                    data = inline if inline is not None else bytes(
+                        self.shm.buf[slot * self.slot_bytes:slot * self.slot_bytes + length])
+                    self._in_use -= 1
+                else:
+                    data = inline
+            self.queue_delays.append(queue_s)
+            self._queue_metric.observe(queue_s)
+            try:
+                loop.call_soon_threadsafe(_set_result, fut, (data, prob, reset))
+            except RuntimeError:
+                pass  # 事件循环已关闭
+        with self._lock:
+            was_alive, self.alive = self.alive, False
+            pending, self._pending = list(self._pending), deque()
+        if was_alive:
+            logger.warning(f"⚠️ 音频 DSP worker {self.index} 已退出，会话回退到进程内处理")
+        for fut, loop, _ in pending:
+            try:
+                loop.call_soon_threadsafe(_set_exception, fut, RuntimeError("audio DSP worker exited"))
+            except RuntimeError:
+                pass
+
+    def close(self) -> None:
+        self.send(("stop",))
+        with self._lock:
+            self.alive = False
+        self.process.join(timeout=2)
+        if self.process.is_alive():
+            self.process.terminate()
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+        self._reader.join(timeout=2)
+        try:
+            self.shm.close()
+            self.shm.unlink()
+        except Exception:
+            pass
+
+
+def _release_session(shard: _Shard, sid: int) -> None:
+    shard.sessions -= 1
+    shard.send(("close", sid))
+
+
+class PooledAudioProcessor:
+    """进程池里某个会话的 AudioProcessor 代理；worker 不可用时回退到进程内 AudioProcessor。"""
+
+    def __init__(self, shard: _Shard, sid: int, options: dict, on_silence_reset: Optional[Callable[[], None]] = None):
+        self._shard = shard
+        self._sid = sid
+        self._options = options
+        self.on_silence_reset = on_silence_reset
+        self.noise_reduce_enabled = options.get("noise_reduce_enabled", True)
+        self.agc_enabled = options.get("agc_enabled", True)
+        self.limiter_enabled = options.get("limiter_enabled", True)
+        self._speech_prob = 0.0
+        self._local: Optional[AudioProcessor] = None
+        weakref.finalize(self, _release_session, shard, sid)
+
+    @property
+    def shard(self) -> int:
+        return self._shard.index
+
+    @property
+    def speech_probability(self) -> float:
+        if self._local is not None:
+            return self._local.speech_probability
+        return self._speech_prob
+
+    async def process_chunk_async(self, audio_bytes: bytes) -> bytes:
+        if self._local is None:
+            try:
+                data, prob, reset = await self._shard.submit(self._sid, audio_bytes)
+            except RuntimeError as e:
+                logger.warning(f"⚠️ 音频 DSP 进程池不可用（{e}），回退到进程内处理")
+                self._local = self._new_local()
+            else:
+                self._speech_prob = prob
+                if reset and self.on_silence_reset:
+                    try:
+                        self.on_silence_reset()
+                    except Exception as e:
+                        logger.error(f"❌ on_silence_reset callback error: {e}")
+                return data
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._local.process_chunk, audio_bytes)
+
+    def _new_local(self) -> AudioProcessor:
+        options = dict(self._options, noise_reduce_enabled=self.noise_reduce_enabled,
+                       agc_enabled=self.agc_enabled, limiter_enabled=self.limiter_enabled)
+        return AudioProcessor(on_silence_reset=self.on_silence_reset, **options)
+
+    def _call(self, method: str, *args) -> None:
+        if self._local is not None:
+            getattr(self._local, method)(*args)
+        else:
+            self._shard.send(("call", self._sid, method, args))
+
+    def reset(self) -> None:
+        self._speech_prob = 0.0
+        self._call("reset")
+
+    def request_reset(self) -> None:
+        self._call("request_reset")
+
+    def save_debug_audio(self) -> None:
+        self._call("save_debug_audio")
+
+    def set_enabled(self, enabled: bool) -> None:
+        self.noise_reduce_enabled = enabled
+        self._call("set_enabled", enabled)
+
+    def set_agc_enabled(self, enabled: bool) -> None:
+        self.agc_enabled = enabled
+        self._call("set_agc_enabled", enabled)
+
+    def set_limiter_enabled(self, enabled: bool) -> None:
+        self.limiter_enabled = enabled
+        self._call("set_limiter_enabled", enabled)
+
+
+class AudioDSPPool:
+    """见模块说明。worker 进程在第一次 open_session 时才启动。"""
+
+    def __init__(self, workers: Optional[int] = None, slots: Optional[int] = None, slot_bytes: Optional[int] = None):
+        workers = AUDIO_DSP_WORKERS if workers is None else workers
+        self.workers = max(1, min(workers, os.cpu_count() or 1))
+        self.slots = AUDIO_DSP_RING_SLOTS if slots is None else slots
+        self.slot_bytes = AUDIO_DSP_SLOT_BYTES if slot_bytes is None else slot_bytes
+        self._shards: List[_Shard] = []
+        self._sids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _start(self) -> None:
+        # spawn：与 Windows 行为一致，也避免在带线程的事件循环进程里 fork
+        ctx = multiprocessing.get_context("spawn")
+        self._shards = [_Shard(i, ctx, self.slots, self.slot_bytes) for i in range(self.workers)]
+        logger.info(f"🎛️ 音频 DSP 进程池已启动：{self.workers} 个 worker")
+
+    def open_session(self, on_silence_reset: Optional[Callable[[], None]] = None, **options) -> PooledAudioProcessor:
+        """为一个会话分配分片；options 即 AudioProcessor 的构造参数。"""
+        with self._lock:
+            if not self._shards:
+                self._start()
+            alive = [s for s in self._shards if s.alive]
+            if not alive:
+                raise RuntimeError("no audio DSP worker is running")
+            shard = min(alive, key=lambda s: s.sessions)
+            shard.sessions += 1
+            sid = next(self._sids)
+        shard.send(("open", sid, options))
+        return PooledAudioProcessor(shard, sid, options, on_silence_reset)
+
+    def stats(self) -> dict:
+        """各分片的会话数、处理块数与最近的排队延迟（毫秒）。"""
+        shards = []
+        for shard in self._shards:
+            delays = sorted(shard.queue_delays)
+            p50 = delays[len(delays) // 2] * 1000.0 if delays else 0.0
+            p95 = delays[min(len(delays) - 1, int(len(delays) * 0.95))] * 1000.0 if delays else 0.0
+            shards.append({
+                "shard": shard.index,
+                "alive": shard.alive,
+                "sessions": shard.sessions,
+                "chunks": shard.chunks,
+                "inline_chunks": shard.inline_chunks,
+                "queue_p50_ms": round(p50, 3),
+                "queue_p95_ms": round(p95, 3),
+            })
+        return {"workers": self.workers, "shards": shards}
+
+    def close(self) -> None:
+        with self._lock:
+            shards, self._shards = self._shards, []
+        for shard in shards:
+            shard.close()
+
+
+_pool: Optional[AudioDSPPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_audio_dsp_pool() -> Optional[AudioDSPPool]:
+    """全局进程池；AUDIO_DSP_WORKERS <= 0 时返回 None（沿用线程池）。"""
+    global _pool
+    if AUDIO_DSP_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = AudioDSPPool()
+            atexit.register(_pool.close)
+        return _pool
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+GET /api/characters 的按语言物化视图
+
+非中文用户每次打开角色列表都要把主人和每个猫娘的 档案名/昵称/性别 翻译一遍。这里：
+
+- 每个角色的可翻译字段按 (语言, 字段原文) 缓存译文：只有这些字段本身变化时才重新翻译，
+  改模型、改音色等其他字段不会触发翻译；
+- 整个响应按 (语言, 角色数据哈希) 缓存序列化后的 body 与 ETag，数据没变时直接复用，
+  客户端带 If-None-Match 时由路由返回 304；
+- ``ConfigManager.save_characters`` 之后在后台为最近访问过的语言预先重建视图，
+  编辑完回到列表页时通常已经是热的。
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MASTER_FIELDS = ('档案名', '昵称')
+CATGIRL_FIELDS = ('档案名', '昵称', '性别')  # 注意：不翻译 system_prompt
+# 译文与原文完全相同（可能本来就是目标语言，也可能是翻译失败回退了原文）的条目只缓存这么久
+UNCHANGED_TTL = 60.0
+
+
+@dataclass(frozen=True)
+class CharactersSnapshot:
+    """某个语言下已序列化的角色数据"""
+    source_hash: str
+    body: bytes
+    etag: str
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _dumps(content: Any) -> bytes:
+    # 与 fastapi JSONResponse 的序列化参数一致
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+class CharactersView:
+    """见模块说明。``config_manager`` 提供 load_characters 与翻译服务所需的配置。"""
+
+    def __init__(self, config_manager, max_translations: int = 1024, max_languages: int = 8,
+                 warm_delay: float = 0.2, translation_service=None):
+        self._config_manager = config_manager
+        self._translation_service = translation_service
+        self._translations: "OrderedDict[Tuple[str, str], Tuple[Dict[str, Any], Optional[float]]]" = OrderedDict()
+        self._max_translations = max_translations
+        self._snapshots: "OrderedDict[str, CharactersSnapshot]" = OrderedDict()
+        self._max_languages = max_languages
+        self._warm_delay = warm_delay
+        self._warm_task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stats = {"hits": 0, "renders": 0, "translations": 0, "warms": 0}
+        add_listener = getattr(config_manager, "add_characters_listener", None)
+        if add_listener is not None:
+            add_listener(self.notify_changed)
+
+    def _service(self):
+        if self._translation_service is None:
+            from utils.language_utils import get_translation_service
+            self._translation_service = get_translation_service(self._config_manager)
+        return self._translation_service
+
+    async def get(self, language: str, characters: Optional[Dict[str, Any]] = None) -> CharactersSnapshot:
+        """返回 ``language`` 下的角色数据；``characters`` 为空时从配置读取。"""
+        self._loop = asyncio.get_running_loop()
+        if characters is None:
+            characters = self._config_manager.load_characters()
+        source_hash = _digest(json.dumps(characters, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8"))
+        cached = self._snapshots.get(language)
+        if cached is not None and cached.source_hash == source_hash:
+            self._snapshots.move_to_end(language)
+            self.stats["hits"] += 1
+            return cached
+
+        content = characters if language == 'zh-CN' else await self._translate(characters, language)
+        body = _dumps(content)
+        snapshot = CharactersSnapshot(source_hash, body, f'"{_digest(body)}"')
+        self.stats["renders"] += 1
+        self._snapshots[language] = snapshot
+        self._snapshots.move_to_end(language)
+        while len(self._snapshots) > self._max_languages:
+            self._snapshots.popitem(last=False)
+        return snapshot
+
+    async def _translate(self, characters: Dict[str, Any], language: str) -> Dict[str, Any]:
+        # 只替换被翻译的角色条目，其余部分原样引用（characters 每次都是新读出来的）
+        result = dict(characters)
+        master = characters.get('主人')
+        if isinstance(master, dict):
+            result['主人'] = await self._translate_fields(master, MASTER_FIELDS, language)
+        catgirls = characters.get('猫娘')
+        if isinstance(catgirls, dict):
+            names = list(catgirls)
+            translated = await asyncio.gather(*[
+                self._translate_fields(catgirls[name], CATGIRL_FIELDS, language)
+                if isinstance(catgirls[name], dict) else _as_is(catgirls[name])
+                for name in names
+            ])
+            result['猫娘'] = dict(zip(names, translated))
+        return result
+
+    async def _translate_fields(self, data: Dict[str, Any], fields: Tuple[str, ...], language: str) -> Dict[str, Any]:
+        subset = {f: data[f] for f in fields if f in data}
+        if not subset:
+            return data
+        key = (language, json.dumps(subset, ensure_ascii=False, sort_keys=True, default=str))
+        entry = self._translations.get(key)
+        now = time.monotonic()
+        if entry is not None and (entry[1] is None or entry[1] > now):
+            self._translations.move_to_end(key)
+            translated = entry[0]
+        else:
+            translated = await self._service().translate_dict(copy.deepcopy(subset), language, fields_to_translate=list(fields))
+            self.stats["translations"] += 1
+            expires = now + UNCHANGED_TTL if translated == subset else None
+            self._translations[key] = (translated, expires)
+            while len(self._translations) > self._max_translations:
+                self._translations.popitem(last=False)
+        result = dict(data)
+        result.update(translated)
+        return result
+
+    def notify_changed(self, characters: Optional[Dict[str, Any]] = None) -> None:
+        """角色数据已保存：在后台为最近访问过的语言重建视图。可在任意线程调用。"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            if _running_loop() is loop:
+                self._schedule_warm()
+            else:
+                loop.call_soon_threadsafe(self._schedule_warm)
+        except RuntimeError:
+            pass
+
+    def _schedule_warm(self) -> None:
+        # 连续多次保存（如批量修改）只重建一次
+        if self._warm_task is not None and not self._warm_task.done():
+            self._warm_task.cancel()
+        self._warm_task = asyncio.ensure_future(self._warm())
+
+    async def _warm(self) -> None:
+        await asyncio.sleep(self._warm_delay)
+        try:
+            characters = self._config_manager.load_characters()
+            for language in list(self._snapshots):
+                await self.get(language, characters)
+            self.stats["warms"] += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"后台重建角色视图失败: {e}")
+
+    def clear(self) -> None:
+        self._translations.clear()
+        self._snapshots.clear()
+
+
+async def _as_is(value):
+    return value
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+_view: Optional[CharactersView] = None
+_view_lock = threading.Lock()
+
+
+def get_characters_view(config_manager) -> CharactersView:
+    """获取角色视图实例（单例）"""
+    global _view
+    if _view is None:
+        with _view_lock:
+            if _view is None:
+                _view = CharactersView(config_manager)
+    return _view
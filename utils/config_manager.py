@@ -8,6 +8,7 @@ import os
 import json
 import shutil
 import logging
+import threading
 from copy import deepcopy
 from pathlib import Path
 
@@ -18,9 +19,12 @@ from config import (
 )
 from config.prompts_chara import lanlan_prompt
 from utils.api_config_loader import (
+    ProviderRegistry,
     get_core_api_profiles,
     get_assist_api_profiles,
     get_assist_api_key_fields,
+    get_config_generation,
+    resolve_model_api_config,
 )
 
 # Workshop配置相关常量 - 将在ConfigManager实例化时使用self.workshop_dir
@@ -55,6 +59,11 @@ class ConfigManager:
 
         self.project_config_dir = self._get_project_config_directory()
         self.project_memory_dir = self._get_project_memory_directory()
+        # save_characters 之后的回调（例如 /api/characters 视图的后台重建）
+        self._characters_listeners = []
+        # 编译后的 API 配置（见 get_provider_registry），来源变化时整体替换
+        self._provider_registry = None
+        self._provider_registry_lock = threading.Lock()
     
     def _log(self, msg):
         """仅在主进程中打印调试信息"""
@@ -537,6 +546,17 @@ class ConfigManager:
         with open(character_json_path, 'w', encoding='utf-8') as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
 
+        for listener in list(self._characters_listeners):
+            try:
+                listener(data)
+            except Exception as e:
+                logger.warning("角色配置保存回调失败: %s", e)
+
+    def add_characters_listener(self, callback):
+        """注册 save_characters 之后的回调，callback(data)"""
+        if callback not in self._characters_listeners:
+            self._characters_listeners.append(callback)
+
     # --- Voice storage helpers ---
 
     def load_voice_storage(self):
@@ -773,8 +793,45 @@ class ConfigManager:
         
         return url
 
+    def get_provider_registry(self) -> ProviderRegistry:
+        """
+        返回编译后的 API 配置。来源（core_config.json、api_providers.json、免费版地区判断）
+        都没变时直接复用；变化时在锁内重新编译并整体替换，读取方不会看到编译到一半的结果。
+        """
+        stamp = self._provider_registry_stamp()
+        registry = self._provider_registry
+        if registry is not None and registry.stamp == stamp:
+            return registry
+        with self._provider_registry_lock:
+            registry = self._provider_registry
+            if registry is not None and registry.stamp == stamp:
+                return registry
+            core_config = self._compile_core_config()
+            registry = ProviderRegistry(core_config, stamp, get_assist_api_profiles())
+            self._provider_registry = registry
+            return registry
+
+    def _provider_registry_stamp(self):
+        path = str(self.get_config_path('core_config.json'))
+        try:
+            st = os.stat(path)
+            file_stamp = (path, st.st_mtime_ns, st.st_size)
+        except OSError:
+            file_stamp = (path, None, None)
+        region = ConfigManager._region_cache
+        if region is None:
+            # 地区尚未确定（Steam 未就绪）时每次都探测一下，确定后 URL 改写结果随之变化
+            region = self._check_non_mainland()
+        return (file_stamp, get_config_generation(), region)
+
     def get_core_config(self):
-        """动态读取核心配置"""
+        """动态读取核心配置（来源未变时返回已编译结果的副本）"""
+        if getattr(self, '_provider_registry_lock', None) is None:
+            return self._compile_core_config()
+        return dict(self.get_provider_registry().core_config)
+
+    def _compile_core_config(self):
+        """读取 core_config.json 并与 API profile 合并"""
         # 从 config 模块导入所有默认配置值
         from config import (
             DEFAULT_CORE_API_KEY,
@@ -1033,133 +1090,12 @@ class ConfigManager:
                 - 'api_key': API密钥
                 - 'base_url': API端点URL
                 - 'is_custom': 是否使用自定义API配置
+                - 'provider' / 'extra_body': 实际使用的服务商与该模型的 extra_body（编译结果中才有）
         """
-        core_config = self.get_core_config()
-        enable_custom_api = core_config.get('ENABLE_CUSTOM_API', False)
-        
-        # 模型类型到配置字段的映射
-        # fallback_type: 'assist' = 辅助API, 'core' = 核心API
-        model_type_mapping = {
-            'conversation': {
-                'custom_model': 'CONVERSATION_MODEL',
-                'custom_url': 'CONVERSATION_MODEL_URL',
-                'custom_key': 'CONVERSATION_MODEL_API_KEY',
-                'default_model': 'CONVERSATION_MODEL',
-                'fallback_type': 'assist',
-            },
-            'summary': {
-                'custom_model': 'SUMMARY_MODEL',
-                'custom_url': 'SUMMARY_MODEL_URL',
-                'custom_key': 'SUMMARY_MODEL_API_KEY',
-                'default_model': 'SUMMARY_MODEL',
-                'fallback_type': 'assist',
-            },
-            'correction': {
-                'custom_model': 'CORRECTION_MODEL',
-                'custom_url': 'CORRECTION_MODEL_URL',
-                'custom_key': 'CORRECTION_MODEL_API_KEY',
-                'default_model': 'CORRECTION_MODEL',
-                'fallback_type': 'assist',
-            },
-            'emotion': {
-                'custom_model': 'EMOTION_MODEL',
-                'custom_url': 'EMOTION_MODEL_URL',
-                'custom_key': 'EMOTION_MODEL_API_KEY',
-                'default_model': 'EMOTION_MODEL',
-                'fallback_type': 'assist',
-            },
-            'vision': {
-                'custom_model': 'VISION_MODEL',
-                'custom_url': 'VISION_MODEL_URL',
-                'custom_key': 'VISION_MODEL_API_KEY',
-                'default_model': 'VISION_MODEL',
-                'fallback_type': 'assist',
-            },
-            'agent': {
-                'custom_model': 'AGENT_MODEL',
-                'custom_url': 'AGENT_MODEL_URL',
-                'custom_key': 'AGENT_MODEL_API_KEY',
-                'default_model': 'AGENT_MODEL',
-                'fallback_type': 'assist',
-            },
-            'realtime': {
-                'custom_model': 'REALTIME_MODEL',
-                'custom_url': 'REALTIME_MODEL_URL',
-                'custom_key': 'REALTIME_MODEL_API_KEY',
-                'default_model': 'CORE_MODEL',
-                'fallback_type': 'core',  # 实时模型回退到核心API
-            },
-            'tts_default': {
-                'custom_model': 'TTS_MODEL',
-                'custom_url': 'TTS_MODEL_URL',
-                'custom_key': 'TTS_MODEL_API_KEY',
-                'default_model': 'CORE_MODEL',
-                'fallback_type': 'core',  # 默认TTS回退到核心API
-            },
-            'tts_custom': {
-                'custom_model': 'TTS_MODEL',
-                'custom_url': 'TTS_MODEL_URL',
-                'custom_key': 'TTS_MODEL_API_KEY',
-                'default_model': 'CORE_MODEL',
-                'fallback_type': 'assist',  # 自定义TTS回退到辅助API
-            },
-        }
-        
-        if model_type not in model_type_mapping:
-            raise ValueError(f"Unknown model_type: {model_type}. Valid types: {list(model_type_mapping.keys())}")
-        
-        mapping = model_type_mapping[model_type]
-        
-        # agent 不依赖 enable_custom_api 开关；其余模型遵循原逻辑
-        if enable_custom_api or model_type == 'agent':
-            custom_model = core_config.get(mapping['custom_model'], '')
-            custom_url = core_config.get(mapping['custom_url'], '')
-            custom_key = core_config.get(mapping['custom_key'], '')
-            
-            # 自定义配置完整时使用自定义配置
-            if custom_model and custom_url:
-                return {
-                    'model': custom_model,
-                    'api_key': custom_key,
-                    'base_url': custom_url,
-                    'is_custom': True,
-                    # 对于 realtime 模型，自定义配置时 api_type 设为 'local'
-                    # TODO: 后续完善 'local' 类型的具体实现（如本地推理服务等）
-                    'api_type': 'local' if model_type == 'realtime' else None,
-                }
-        
-        # 自定义音色(CosyVoice)的特殊回退逻辑：优先尝试用户保存的 Qwen Cosyvoice API，
-        # 只有在缺少 Qwen Cosyvoice API 时才再回退到辅助 API（CosyVoice 目前是唯一支持 voice clone 的）
-        if model_type == 'tts_custom':
-            qwen_api_key = (core_config.get('ASSIST_API_KEY_QWEN') or '').strip()
-            if qwen_api_key:
-                qwen_profile = get_assist_api_profiles().get('qwen', {})
-                return {
-                    'model': core_config.get(mapping['default_model'], ''), # Placeholder only, will be overridden by the actual model
-                    'api_key': qwen_api_key,
-                    'base_url': qwen_profile.get('OPENROUTER_URL', core_config.get('OPENROUTER_URL', '')), # Placeholder only, will be overridden by the actual url
-                    'is_custom': False,
-                }
-
-        # 根据 fallback_type 回退到不同的 API
-        if mapping['fallback_type'] == 'core':
-            # 回退到核心 API 配置
-            return {
-                'model': core_config.get(mapping['default_model'], ''),
-                'api_key': core_config.get('CORE_API_KEY', ''),
-                'base_url': core_config.get('CORE_URL', ''),
-                'is_custom': False,
-                # 对于 realtime 模型，回退到核心API时使用配置的 CORE_API_TYPE
-                'api_type': core_config.get('CORE_API_TYPE', '') if model_type == 'realtime' else None,
-            }
-        else:
-            # 回退到辅助 API 配置
-            return {
-                'model': core_config.get(mapping['default_model'], ''),
-                'api_key': core_config.get('OPENROUTER_API_KEY', ''),
-                'base_url': core_config.get('OPENROUTER_URL', ''),
-                'is_custom': False,
-            }
+        # 未经 __init__ 构造的实例没有编译缓存，按当前核心配置现算
+        if getattr(self, '_provider_registry_lock', None) is None:
+            return resolve_model_api_config(self.get_core_config(), model_type, get_assist_api_profiles)
+        return self.get_provider_registry().get(model_type)
 
     def is_agent_api_ready(self) -> tuple[bool, list[str]]:
         """
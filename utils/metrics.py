@@ -0,0 +1,494 @@
+# -*- coding: utf-8 -*-
+"""
+N.E.K.O. 进程内指标与轮次追踪
+
+不依赖 prometheus_client，提供最小可用的 Counter / Gauge / Histogram 以及
+Prometheus 文本格式导出；各服务通过 ``install_metrics(app, service)`` 挂载
+``GET /metrics``（Prometheus 抓取）和 ``GET /metrics/turns``（最近轮次的分段耗时）。
+
+轮次追踪：每一轮对话有一个 turn_id（主服务中即 ``current_speech_id``），
+通过 ContextVar 在协程间传递，HTTP 请求使用 ``X-Neko-Turn-Id`` 头，
+ZMQ 事件使用 ``turn_id`` 字段，使 main / memory / agent 三个进程的
+分段耗时可以按同一 turn_id 关联。
+
+    with metrics.span("tts.synthesis", turn_id=speech_id):
+        ...
+    metrics.record_span("llm.first_token", elapsed_s)
+
+热路径上每次 observe 只做一次 bisect 和一次加锁累加；
+``set_enabled(False)`` 可整体关闭（benchmarks/metrics_overhead 用它对比开销）。
+"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+TURN_ID_HEADER = "X-Neko-Turn-Id"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 秒为单位；覆盖 0.1ms 级的音频帧处理到 10s 级的模型调用
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+TURN_HISTORY_SIZE = 128
+
+_enabled = True
+
+
+def set_enabled(enabled: bool) -> None:
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+# ---------------------------------------------------------------------------
+#  指标类型
+# ---------------------------------------------------------------------------
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape_label(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        """返回指定标签组合的子指标（首次访问时创建）。"""
+        key = tuple(str(v) for v in values)
+        if len(key) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        return self.labels()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in sorted(self._children.items()):
+            lines.extend(child.render(self.name, self.labelnames, key))
+        return lines
+
+
+class _ValueChild:
+    __slots__ = ("_lock", "value")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = float(value)
+
+    def render(self, name, labelnames, key) -> List[str]:
+        return [f"{name}{_format_labels(labelnames, key)} {_format_value(self.value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _ValueChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        if _enabled:
+            self._default().inc(amount)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _ValueChild()
+
+    def set(self, value: float) -> None:
+        self._default().set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._default().dec(amount)
+
+
+class _HistogramChild:
+    __slots__ = ("_lock", "_bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self._lock = threading.Lock()
+        self._bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        idx = bisect_left(self._bounds, value)
+        with self._lock:
+            self.counts[idx] += 1
+            self.sum += value
+            self.count += 1
+
+    def render(self, name, labelnames, key) -> List[str]:
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        lines = []
+        cumulative = 0
+        for bound, c in zip(self._bounds + (float("inf"),), counts):
+            cumulative += c
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f"{name}_bucket{_format_labels(labelnames, key, le)} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labelnames, key)} {_format_value(total)}")
+        lines.append(f"{name}_count{_format_labels(labelnames, key)} {count}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        if _enabled:
+            self._default().observe(value)
+
+
+class MetricsRegistry:
+    """按名称登记指标；同名重复注册返回已有实例（便于模块被多次导入）。"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: "OrderedDict[str, _Metric]" = OrderedDict()
+        self._collectors: List[Callable[[], None]] = []
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, documentation, labelnames, **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, cls):
+                raise ValueError(f"metric {name} already registered as {metric.kind}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def add_collector(self, fn: Callable[[], None]) -> None:
+        """注册在每次导出前调用的回调，用于刷新 Gauge（例如进程资源占用）。"""
+        self._collectors.append(fn)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        for fn in list(self._collectors):
+            try:
+                fn()
+            except Exception as e:
+                logger.debug(f"metrics collector failed: {e}")
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.counter(name, documentation, labelnames)
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return REGISTRY.gauge(name, documentation, labelnames)
+
+
+def histogram(name: str, documentation: str, labelnames: Sequence[str] = (),
+              buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.histogram(name, documentation, labelnames, buckets)
+
+
+def render_prometheus() -> str:
+    return REGISTRY.render()
+
+
+# ---------------------------------------------------------------------------
+#  轮次关联
+# ---------------------------------------------------------------------------
+
+_current_turn: ContextVar[Optional[str]] = ContextVar("neko_turn_id", default=None)
+
+
+def new_turn_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def get_turn_id() -> Optional[str]:
+    return _current_turn.get()
+
+
+def set_turn_id(turn_id: Optional[str]):
+    """绑定当前上下文的 turn_id，返回可交给 ``reset_turn_id`` 的 token。"""
+    return _current_turn.set(turn_id or None)
+
+
+def reset_turn_id(token) -> None:
+    _current_turn.reset(token)
+
+
+@contextmanager
+def turn_scope(turn_id: Optional[str]):
+    token = _current_turn.set(turn_id or None)
+    try:
+        yield turn_id
+    finally:
+        _current_turn.reset(token)
+
+
+def turn_headers(turn_id: Optional[str] = None) -> Dict[str, str]:
+    """给跨服务 HTTP 请求附带 turn_id；没有 turn 时返回空字典。"""
+    turn_id = turn_id or _current_turn.get()
+    return {TURN_ID_HEADER: turn_id} if turn_id else {}
+
+
+def attach_turn_id(event: dict, turn_id: Optional[str] = None) -> dict:
+    """给 ZMQ 事件附带 turn_id（已存在则保留）。"""
+    turn_id = turn_id or _current_turn.get()
+    if turn_id and not event.get("turn_id"):
+        event["turn_id"] = turn_id
+    return event
+
+
+class _TurnLog:
+    """最近 N 轮的分段耗时，供 /metrics/turns 排查单轮延迟。"""
+
+    def __init__(self, size: int = TURN_HISTORY_SIZE):
+        self._size = size
+        self._lock = threading.Lock()
+        self._turns: "OrderedDict[str, dict]" = OrderedDict()
+
+    def add(self, turn_id: str, name: str, seconds: float) -> None:
+        with self._lock:
+            entry = self._turns.get(turn_id)
+            if entry is None:
+                entry = {"turn_id": turn_id, "started_at": time.time(), "spans": {}}
+                self._turns[turn_id] = entry
+                while len(self._turns) > self._size:
+                    self._turns.popitem(last=False)
+            spans = entry["spans"]
+            # 同名分段在一轮内多次出现（如逐帧 send_speech）时累加
+            spans[name] = round(spans.get(name, 0.0) + seconds * 1000.0, 3)
+
+    def snapshot(self, limit: int = 20) -> List[dict]:
+        with self._lock:
+            items = list(self._turns.values())[-limit:]
+            return [{"turn_id": e["turn_id"], "started_at": e["started_at"], "spans_ms": dict(e["spans"])} for e in items]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._turns.clear()
+
+
+TURN_LOG = _TurnLog()
+
+SPAN_SECONDS = histogram("neko_span_duration_seconds", "Duration of instrumented pipeline stages.", ("span",))
+# span 名 → 子直方图，跳过热路径上的标签元组构造
+_span_children: Dict[str, _HistogramChild] = {}
+
+
+# ---------------------------------------------------------------------------
+#  Span
+# ---------------------------------------------------------------------------
+
+def record_span(name: str, seconds: float, turn_id: Optional[str] = None) -> None:
+    """记录一个已测得的分段耗时（秒）。"""
+    if not _enabled:
+        return
+    child = _span_children.get(name)
+    if child is None:
+        child = _span_children.setdefault(name, SPAN_SECONDS.labels(name))
+    child.observe(seconds)
+    turn_id = turn_id or _current_turn.get()
+    if turn_id:
+        TURN_LOG.add(turn_id, name, seconds)
+
+
+class span:
+    """计时上下文管理器，同时支持 ``with`` 与 ``async with``。"""
+
+    __slots__ = ("name", "turn_id", "_start")
+
+    def __init__(self, name: str, turn_id: Optional[str] = None):
+        self.name = name
+        self.turn_id = turn_id
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record_span(self.name, time.perf_counter() - self._start, self.turn_id)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+
+# ---------------------------------------------------------------------------
+#  进程资源
+# ---------------------------------------------------------------------------
+
+_PROCESS_CPU = gauge("neko_process_cpu_seconds", "CPU time consumed by this process.")
+_PROCESS_RSS = gauge("neko_process_resident_memory_bytes", "Resident memory of this process.")
+_PROCESS_THREADS = gauge("neko_process_threads", "Number of live Python threads.")
+
+
+def _collect_process() -> None:
+    _PROCESS_CPU.set(time.process_time())
+    _PROCESS_THREADS.set(threading.active_count())
+    try:
+        import psutil
+        _PROCESS_RSS.set(psutil.Process(os.getpid()).memory_info().rss)
+    except Exception:
+        pass
+
+
+REGISTRY.add_collector(_collect_process)
+
+
+# ---------------------------------------------------------------------------
+#  HTTP 集成
+# ---------------------------------------------------------------------------
+
+HTTP_SECONDS = histogram(
+    "neko_http_request_duration_seconds",
+    "HTTP request latency by handler.",
+    ("service", "method", "handler", "status"),
+)
+
+
+class MetricsMiddleware:
+    """纯 ASGI 中间件：绑定请求头中的 turn_id，并按处理函数记录请求耗时。
+
+    标签使用处理函数名而非原始路径，避免 /api/xxx/{name} 这类路径导致标签爆炸。
+    """
+
+    _header = TURN_ID_HEADER.lower().encode()
+
+    def __init__(self, app, service: str):
+        self.app = app
+        self.service = service
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _enabled or scope.get("path", "").startswith("/metrics"):
+            await self.app(scope, receive, send)
+            return
+
+        turn_id = None
+        for key, value in scope.get("headers") or ():
+            if key == self._header:
+                turn_id = value.decode("latin-1")
+                break
+        status = [500]
+
+        async def _send(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        token = _current_turn.set(turn_id) if turn_id else None
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            endpoint = scope.get("endpoint")
+            handler = getattr(endpoint, "__name__", None) or (type(endpoint).__name__ if endpoint else "unmatched")
+            HTTP_SECONDS.labels(self.service, scope.get("method", ""), handler, status[0]).observe(
+                time.perf_counter() - start
+            )
+            if token is not None:
+                _current_turn.reset(token)
+
+
+def install_metrics(app, service: str) -> None:
+    """给 FastAPI 应用挂载 /metrics、/metrics/turns 以及计时中间件。
+
+    需在兜底路由（如 pages_router 的 catch-all）之前调用。
+    """
+    from fastapi.responses import JSONResponse, Response
+
+    async def metrics_endpoint():
+        return Response(content=render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+    async def metrics_turns(limit: int = 20):
+        return JSONResponse({"service": service, "turns": TURN_LOG.snapshot(limit)})
+
+    app.add_api_route("/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False)
+    app.add_api_route("/metrics/turns", metrics_turns, methods=["GET"], include_in_schema=False)
+    app.add_middleware(MetricsMiddleware, service=service)
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+TTS 下行音频的 Opus 编码
+
+把 send_speech 发出的 48kHz/mono/int16 PCM 编码为 Ogg Opus（libopus，经 PyAV），
+每段语音（speech_id）一个 Ogg 逻辑流，前端用 ogg-opus-decoder-wrapper.js 流式解码。
+
+下行二进制帧格式（单帧，不再额外发送 audio_chunk JSON 头）：
+
+    MAGIC(4) | version(1) | len(speech_id)(1) | speech_id(utf-8) | Ogg 页
+
+自适应分页：每次 encode() 调用产出的所有 Opus 包放进同一个 Ogg 页（TTS 大块 -> 大页，
+页头开销摊薄）；不足一帧（20ms）的尾巴先留在编码器里，由调用方在 TTS 空闲时 flush_tail()。
+"""
+
+import logging
+import struct
+from typing import Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FRAME_MAGIC = b"NKAU"
+FRAME_VERSION = 1
+SAMPLE_RATE = 48000
+
+_opus_available: Optional[bool] = None
+
+
+def opus_available() -> bool:
+    """PyAV 和 libopus 编码器是否可用（结果缓存）。"""
+    global _opus_available
+    if _opus_available is None:
+        try:
+            import av
+            av.codec.Codec("libopus", "w")
+            _opus_available = True
+        except Exception as e:
+            logger.warning(f"Opus 下行编码不可用，回退到 PCM: {e}")
+            _opus_available = False
+    return _opus_available
+
+
+def pack_audio_frame(speech_id: Optional[str], payload: bytes) -> bytes:
+    sid = (speech_id or "").encode("utf-8")[:255]
+    return FRAME_MAGIC + bytes((FRAME_VERSION, len(sid))) + sid + payload
+
+
+def unpack_audio_frame(frame: bytes) -> Optional[Tuple[str, bytes]]:
+    """解析 pack_audio_frame 的输出；不是该格式时返回 None。"""
+    if len(frame) < 6 or frame[:4] != FRAME_MAGIC or frame[4] != FRAME_VERSION:
+        return None
+    end = 6 + frame[5]
+    return frame[6:end].decode("utf-8", errors="replace"), frame[end:]
+
+
+def _crc_table():
+    table = []
+    for i in range(256):
+        r = i << 24
+        for _ in range(8):
+            r = ((r << 1) ^ 0x04C11DB7) if r & 0x80000000 else (r << 1)
+        table.append(r & 0xFFFFFFFF)
+    return table
+
+
+_CRC_TABLE = _crc_table()
+
+
+def _ogg_crc(data: bytes) -> int:
+    crc = 0
+    for b in data:
+        crc = ((crc << 8) & 0xFFFFFFFF) ^ _CRC_TABLE[((crc >> 24) & 0xFF) ^ b]
+    return crc
+
+
+class OggOpusStreamEncoder:
+    """一段语音的 Ogg Opus 流式编码器（非线程安全，每个 speech_id 新建一个）。"""
+
+    def __init__(self, bitrate: int = 32000, frame_ms: int = 20, serial: int = 1):
+        import av
+
+        ctx = av.codec.CodecContext.create("libopus", "w")
+        ctx.sample_rate = SAMPLE_RATE
+        ctx.layout = "mono"
+        ctx.format = "s16"
+        ctx.bit_rate = bitrate
+        ctx.options = {"frame_duration": str(frame_ms), "application": "voip"}
+        ctx.open()
+        self._ctx = ctx
+        self._frame_samples = SAMPLE_RATE * frame_ms // 1000
+        self._serial = serial & 0xFFFFFFFF
+        self._seq = 0
+        self._granule = 0
+        self._pts = 0
+        self._pending = np.zeros(0, dtype=np.int16)
+        self._header = self._page([bytes(ctx.extradata)], granule=0, flags=0x02)
+        self._header += self._page([b"OpusTags" + struct.pack("<I", 4) + b"NEKO" + struct.pack("<I", 0)], granule=0)
+        self._header_sent = False
+
+    @property
+    def pending_samples(self) -> int:
+        return len(self._pending)
+
+    def encode(self, pcm: bytes) -> bytes:
+        """编码一块 PCM，返回本次产出的 Ogg 字节（首次调用带上 OpusHead/OpusTags）。"""
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        if len(self._pending):
+            samples = np.concatenate((self._pending, samples))
+        usable = len(samples) - len(samples) % self._frame_samples
+        self._pending = samples[usable:].copy()
+        return self._emit(samples[:usable])
+
+    def flush_tail(self) -> bytes:
+        """用静音补齐不足一帧的尾巴并输出（TTS 空闲时调用，流不结束）。"""
+        if not len(self._pending):
+            return b""
+        padded = np.zeros(self._frame_samples, dtype=np.int16)
+        padded[:len(self._pending)] = self._pending
+        self._pending = np.zeros(0, dtype=np.int16)
+        return self._emit(padded)
+
+    def _emit(self, samples: np.ndarray) -> bytes:
+        import av
+
+        packets = []
+        for start in range(0, len(samples), self._frame_samples):
+            frame = av.AudioFrame.from_ndarray(
+                samples[start:start + self._frame_samples].reshape(1, -1), format="s16", layout="mono")
+            frame.sample_rate = SAMPLE_RATE
+            frame.pts = self._pts
+            self._pts += self._frame_samples
+            packets.extend(bytes(p) for p in self._ctx.encode(frame))
+        out = b""
+        if not self._header_sent:
+            out, self._header_sent = self._header, True
+        # 单页最多 255 个 lacing 段，超出时拆成多页
+        page, segments = [], 0
+        for p in packets:
+            need = len(p) // 255 + 1
+            if page and segments + need > 255:
+                out += self._data_page(page)
+                page, segments = [], 0
+            page.append(p)
+            segments += need
+        if page:
+            out += self._data_page(page)
+        return out
+
+    def _data_page(self, packets) -> bytes:
+        self._granule += len(packets) * self._frame_samples
+        return self._page(packets, granule=self._granule)
+
+    def _page(self, packets, granule: int, flags: int = 0) -> bytes:
+        lacing = bytearray()
+        for p in packets:
+            lacing += b"\xff" * (len(p) // 255) + bytes((len(p) % 255,))
+        header = struct.pack("<4sBBqIIIB", b"OggS", 0, flags, granule, self._serial, self._seq, 0, len(lacing))
+        self._seq += 1
+        page = bytearray(header + bytes(lacing) + b"".join(packets))
+        struct.pack_into("<I", page, 22, _ogg_crc(bytes(page)))
+        return bytes(page)
@@ -1,6 +1,13 @@
+import atexit
+import copy
 import json
 import os
+import threading
+import time
+from collections import OrderedDict
 from typing import Dict, Any, Optional, List
+
+from config import USER_PREFERENCES_FLUSH_DELAY, USER_PREFERENCES_FLUSH_MAX_DELAY
 from utils.config_manager import get_config_manager
 
 # 初始化配置管理器
@@ -9,16 +16,19 @@ _config_manager = get_config_manager()
 # 用户偏好文件路径（从配置管理器获取）
 PREFERENCES_FILE = str(_config_manager.get_config_path('user_preferences.json'))
 
-def load_user_preferences() -> List[Dict[str, Any]]:
-    """
-    加载用户偏好设置
-    
-    Returns:
-        List[Dict[str, Any]]: 用户偏好列表，每个元素对应一个模型的偏好设置，如果文件不存在或读取失败则返回空列表
-    """
+
+def _file_stamp(path: str):
     try:
-        if os.path.exists(PREFERENCES_FILE):
-            with open(PREFERENCES_FILE, 'r', encoding='utf-8') as f:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _read_preferences_file(path: str) -> List[Dict[str, Any]]:
+    try:
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
                 data = json.load(f)
                 # 兼容旧格式：如果是字典格式，转换为列表格式
                 if isinstance(data, dict):
@@ -34,9 +44,186 @@ def load_user_preferences() -> List[Dict[str, Any]]:
         print(f"加载用户偏好失败: {e}")
     return []
 
+
+class PreferenceStore:
+    """
+    user_preferences.json 的内存副本
+
+    - 按 model_path 建索引（OrderedDict，顺序即偏好顺序，第一个为首选模型），查找/更新/置顶都是 O(1)；
+    - 修改只改内存并标记为脏，由后台线程防抖落盘：最后一次修改后静默 ``flush_delay`` 秒写一次，
+      持续修改时最迟 ``max_delay`` 秒写一次；写入先写临时文件再 os.replace，不会留下半个文件；
+    - 没有未落盘的修改时，读取前比较文件 (mtime, 大小)，其他进程（如 monitor）写过就重新加载；
+    - 进程退出时（atexit）同步落盘。
+
+    ``path`` 为空时使用配置目录下的 user_preferences.json（每次落盘前重新获取，路径可能已迁移）。
+    """
+
+    def __init__(self, path: Optional[str] = None, flush_delay: float = USER_PREFERENCES_FLUSH_DELAY,
+                 max_delay: float = USER_PREFERENCES_FLUSH_MAX_DELAY):
+        self._path = path
+        self.flush_delay = flush_delay
+        self.max_delay = max_delay
+        self._cond = threading.Condition(threading.RLock())
+        self._write_lock = threading.Lock()
+        self._prefs: Optional["OrderedDict[Any, Dict[str, Any]]"] = None
+        self._stamp = None
+        self._dirty_since: Optional[float] = None
+        self._deadline: Optional[float] = None
+        self._version = 0
+        self._flusher: Optional[threading.Thread] = None
+        self.writes = 0
+
+    @property
+    def path(self) -> str:
+        return self._path or PREFERENCES_FILE
+
+    # --- 读取 ---
+
+    def _loaded(self) -> "OrderedDict[Any, Dict[str, Any]]":
+        if self._prefs is not None and (self._dirty_since is not None or _file_stamp(self.path) == self._stamp):
+            return self._prefs
+        stamp = _file_stamp(self.path)
+        prefs = OrderedDict()
+        for i, pref in enumerate(_read_preferences_file(self.path)):
+            key = pref.get('model_path') if isinstance(pref, dict) else None
+            prefs[key if isinstance(key, str) and key not in prefs else ('', i)] = pref
+        self._prefs, self._stamp = prefs, stamp
+        return prefs
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._cond:
+            return copy.deepcopy(list(self._loaded().values()))
+
+    def get(self, model_path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        with self._cond:
+            prefs = self._loaded()
+            if model_path:
+                pref = prefs.get(model_path)
+            else:
+                pref = next(iter(prefs.values()), None)
+            return copy.deepcopy(pref)
+
+    # --- 修改 ---
+
+    def replace_all(self, preferences: List[Dict[str, Any]]) -> None:
+        with self._cond:
+            prefs = OrderedDict()
+            for i, pref in enumerate(preferences):
+                key = pref.get('model_path') if isinstance(pref, dict) else None
+                prefs[key if isinstance(key, str) and key not in prefs else ('', i)] = copy.deepcopy(pref)
+            self._prefs = prefs
+            self._mark_dirty()
+
+    def put(self, model_path: str, pref: Dict[str, Any]) -> None:
+        """更新已有模型的偏好（保持原位置），或把新模型插到最前面（作为首选）"""
+        with self._cond:
+            prefs = self._loaded()
+            is_new = model_path not in prefs
+            prefs[model_path] = pref
+            if is_new:
+                prefs.move_to_end(model_path, last=False)
+            self._mark_dirty()
+
+    def move_to_top(self, model_path: str) -> bool:
+        with self._cond:
+            prefs = self._loaded()
+            if model_path not in prefs:
+                return False
+            prefs.move_to_end(model_path, last=False)
+            self._mark_dirty()
+            return True
+
+    def _mark_dirty(self) -> None:
+        now = time.monotonic()
+        self._version += 1
+        if self._dirty_since is None:
+            self._dirty_since = now
+        self._deadline = min(now + self.flush_delay, self._dirty_since + self.max_delay)
+        if self._flusher is None or not self._flusher.is_alive():
+            self._flusher = threading.Thread(target=self._run, name="PreferenceStoreFlusher", daemon=True)
+            self._flusher.start()
+        self._cond.notify()
+
+    # --- 落盘 ---
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._deadline is None:
+                    self._cond.wait()
+                remaining = self._deadline - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+            self.flush()
+
+    def flush(self) -> bool:
+        """立即把未落盘的修改写入文件（没有修改时什么都不做）"""
+        global PREFERENCES_FILE
+        with self._write_lock:
+            with self._cond:
+                if self._dirty_since is None:
+                    self._deadline = None
+                    return True
+                version = self._version
+                data = json.dumps(list(self._prefs.values()), ensure_ascii=False, indent=2)
+                self._deadline = None
+            try:
+                if self._path is None:
+                    # 确保配置目录存在
+                    _config_manager.ensure_config_directory()
+                    # 更新路径（可能已迁移）
+                    PREFERENCES_FILE = str(_config_manager.get_config_path('user_preferences.json'))
+                path = self.path
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, path)
+            except Exception as e:
+                print(f"保存用户偏好失败: {e}")
+                with self._cond:
+                    self._deadline = time.monotonic() + self.max_delay  # 稍后重试
+                    self._cond.notify()
+                return False
+            with self._cond:
+                self.writes += 1
+                self._stamp = _file_stamp(path)
+                if self._version == version:
+                    self._dirty_since = None
+            return True
+
+
+_store = PreferenceStore()
+atexit.register(_store.flush)
+
+
+def get_preference_store() -> PreferenceStore:
+    return _store
+
+
+def flush_user_preferences() -> bool:
+    """把尚未落盘的偏好修改立即写入文件（关闭服务前调用）"""
+    return _store.flush()
+
+
+def load_user_preferences() -> List[Dict[str, Any]]:
+    """
+    加载用户偏好设置
+    
+    Returns:
+        List[Dict[str, Any]]: 用户偏好列表，每个元素对应一个模型的偏好设置，如果文件不存在或读取失败则返回空列表
+    """
+    try:
+        return _store.snapshot()
+    except Exception as e:
+        print(f"加载用户偏好失败: {e}")
+    return []
+
 def save_user_preferences(preferences: List[Dict[str, Any]]) -> bool:
     """
-    保存用户偏好设置
+    保存用户偏好设置（写入内存，由后台防抖落盘；需要立即写入时调用 flush_user_preferences）
     
     Args:
         preferences (List[Dict[str, Any]]): 要保存的偏好设置列表
@@ -45,14 +232,7 @@ def save_user_preferences(preferences: List[Dict[str, Any]]) -> bool:
         bool: 保存成功返回True，失败返回False
     """
     try:
-        # 确保配置目录存在
-        _config_manager.ensure_config_directory()
-        # 更新路径（可能已迁移）
-        global PREFERENCES_FILE
-        PREFERENCES_FILE = str(_config_manager.get_config_path('user_preferences.json'))
-        
-        with open(PREFERENCES_FILE, 'w', encoding='utf-8') as f:
-            json.dump(preferences, f, ensure_ascii=False, indent=2)
+        _store.replace_all(preferences)
         return True
     except Exception as e:
         print(f"保存用户偏好失败: {e}")
@@ -75,82 +255,33 @@ def update_model_preferences(model_path: str, position: Dict[str, float], scale:
         bool: 更新成功返回True，失败返回False
     """
     try:
-        # 加载现有偏好
-        current_preferences = load_user_preferences()
-        
-        # 查找是否已存在该模型的偏好
-        model_index = -1
-        for i, pref in enumerate(current_preferences):
-            if pref.get('model_path') == model_path:
-                model_index = i
-                break
-        
         # 创建新的模型偏好
         new_model_pref = {
             'model_path': model_path,
-            'position': position,
-            'scale': scale
+            'position': copy.deepcopy(position),
+            'scale': copy.deepcopy(scale)
         }
-        
-        # 如果有参数，添加到偏好中
-        if parameters is not None:
-            new_model_pref['parameters'] = parameters
-
-        # 如果有显示器信息，添加到偏好中（用于多屏幕位置恢复）
-        if display is not None:
-            new_model_pref['display'] = display
 
-        # 【新增】如果有旋转信息，添加到偏好中（用于VRM模型朝向）
-        if rotation is not None:
-            new_model_pref['rotation'] = rotation
-
-        # 如果有视口信息，添加到偏好中（用于跨分辨率位置和缩放归一化）
-        if viewport is not None:
-            new_model_pref['viewport'] = viewport
+        # 可选字段：传入时覆盖，为 None 时保留已有值
+        optional_fields = {
+            'parameters': parameters,  # 模型参数
+            'display': display,  # 显示器信息（用于多屏幕位置恢复）
+            'rotation': rotation,  # 旋转信息（用于VRM模型朝向）
+            'viewport': viewport,  # 视口信息（用于跨分辨率位置和缩放归一化）
+            'camera_position': camera_position,  # 相机位置信息（用于恢复VRM滚轮缩放状态）
+        }
 
-        # 如果有相机位置信息，添加到偏好中（用于恢复VRM滚轮缩放状态）
-        if camera_position is not None:
-            new_model_pref['camera_position'] = camera_position
-        
-        if model_index >= 0:
-            # 更新现有模型的偏好，保留已有的参数（如果新参数为None则不更新参数）
-            existing_pref = current_preferences[model_index]
-            if parameters is not None:
-                existing_pref['parameters'] = parameters
-            elif 'parameters' in existing_pref:
-                # 保留已有参数
-                new_model_pref['parameters'] = existing_pref['parameters']
-            # 处理显示器信息
-            if display is not None:
-                pass  # 已在上面添加到 new_model_pref
-            elif 'display' in existing_pref:
-                # 保留已有显示器信息
-                new_model_pref['display'] = existing_pref['display']
-            # 【新增】处理旋转信息
-            if rotation is not None:
-                pass  # 已在上面添加到 new_model_pref
-            elif 'rotation' in existing_pref:
-                # 保留已有旋转信息
-                new_model_pref['rotation'] = existing_pref['rotation']
-            # 处理视口信息
-            if viewport is not None:
-                pass  # 已在上面添加到 new_model_pref
-            elif 'viewport' in existing_pref:
-                # 保留已有视口信息
-                new_model_pref['viewport'] = existing_pref['viewport']
-            # 处理相机位置信息
-            if camera_position is not None:
-                pass  # 已在上面添加到 new_model_pref
-            elif 'camera_position' in existing_pref:
-                # 保留已有相机位置信息
-                new_model_pref['camera_position'] = existing_pref['camera_position']
-            current_preferences[model_index] = new_model_pref
-        else:
-            # 添加新模型的偏好到列表开头（作为首选）
-            current_preferences.insert(0, new_model_pref)
-        
-        # 保存更新后的偏好
-        return save_user_preferences(current_preferences)
+        with _store._cond:
+            # 按 model_path 直接查找已有偏好（内存索引，不读文件）
+            existing_pref = _store._loaded().get(model_path)
+            for field, value in optional_fields.items():
+                if value is not None:
+                    new_model_pref[field] = copy.deepcopy(value)
+                elif existing_pref is not None and field in existing_pref:
+                    new_model_pref[field] = existing_pref[field]
+            # 已有模型原地更新；新模型插到列表开头（作为首选）
+            _store.put(model_path, new_model_pref)
+        return True
     except Exception as e:
         print(f"更新模型偏好失败: {e}")
         return False
@@ -165,20 +296,7 @@ def get_model_preferences(model_path: Optional[str] = None) -> Optional[Dict[str
     Returns:
         Optional[Dict[str, Any]]: 包含model_path, position, scale的字典，如果没有则返回None
     """
-    preferences = load_user_preferences()
-    
-    if not preferences:
-        return None
-    
-    if model_path:
-        # 查找指定模型的偏好
-        for pref in preferences:
-            if pref.get('model_path') == model_path:
-                return pref
-        return None
-    else:
-        # 返回首选模型（列表第一个）的偏好
-        return preferences[0] if preferences else None
+    return _store.get(model_path)
 
 def get_preferred_model_path() -> Optional[str]:
     """
@@ -187,10 +305,8 @@ def get_preferred_model_path() -> Optional[str]:
     Returns:
         Optional[str]: 首选模型的路径，如果没有则返回None
     """
-    preferences = load_user_preferences()
-    if preferences and len(preferences) > 0:
-        return preferences[0].get('model_path')
-    return None
+    preferred = _store.get()
+    return preferred.get('model_path') if preferred else None
 
 def validate_model_preferences(preferences: Dict[str, Any]) -> bool:
     """
@@ -233,23 +349,8 @@ def move_model_to_top(model_path: str) -> bool:
         bool: 操作成功返回True，失败返回False
     """
     try:
-        preferences = load_user_preferences()
-        
-        # 查找模型索引
-        model_index = -1
-        for i, pref in enumerate(preferences):
-            if pref.get('model_path') == model_path:
-                model_index = i
-                break
-        
-        if model_index >= 0:
-            # 将模型移动到顶部
-            model_pref = preferences.pop(model_index)
-            preferences.insert(0, model_pref)
-            return save_user_preferences(preferences)
-        else:
-            # 如果模型不存在，返回False
-            return False
+        # 如果模型不存在，返回False
+        return _store.move_to_top(model_path)
     except Exception as e:
         print(f"移动模型到顶部失败: {e}")
         return False 
\ No newline at end of file
@@ -3,13 +3,27 @@
 提供截图分析功能，包括前端浏览器发送的截图和屏幕分享数据流处理
 """
 import base64
+import hashlib
 import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from typing import Optional
 import asyncio
 from io import BytesIO
+import numpy as np
 from PIL import Image
 from openai import AsyncOpenAI
-from config import get_extra_body
+from config import (
+    get_extra_body,
+    SCREEN_PHASH_CHANGE_THRESHOLD,
+    SCREEN_PIXEL_CHANGE_THRESHOLD,
+    SCREEN_DEDUP_MAX_AGE,
+    IMAGE_PIPELINE_WORKERS,
+    IMAGE_ENCODE_CACHE_SIZE,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -49,6 +63,219 @@ def compress_screenshot(
     return buf.getvalue()
 
 
+# ─── 截图处理流水线 ──────────────────────────────────────────────
+# 解码 / 缩放 / 编码放到线程池执行（PIL 在这些操作中会释放 GIL）。
+# 编码结果按原始数据的 blake2b 摘要缓存（只有完全相同的输入才复用）；
+# 64 位 dHash + 灰度缩略图只用于判断"画面没变、跳过发送"。
+
+SIGNATURE_SIZE = (160, 90)
+
+
+@dataclass
+class ScreenFrame:
+    """流水线输出：JPEG base64（不含 data: 前缀）、感知哈希、原始数据摘要及灰度缩略图。"""
+    b64: str
+    phash: int
+    width: int
+    height: int
+    size: int
+    digest: bytes = b""
+    thumb: Optional[np.ndarray] = field(default=None, compare=False, repr=False)
+
+
+def perceptual_hash(img: Image.Image) -> int:
+    """64 位 difference hash：缩到 9x8 灰度后比较相邻像素。"""
+    small = img.convert("L").resize((9, 8), Image.BOX)
+    px = np.asarray(small, dtype=np.int16)
+    bits = (px[:, 1:] > px[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def content_digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def screen_signature(img: Image.Image) -> np.ndarray:
+    """缩到 SIGNATURE_SIZE 的灰度图，用于像素级变化判断（输入一个字符也能看出差别）。"""
+    return np.asarray(img.convert("L").resize(SIGNATURE_SIZE, Image.BOX), dtype=np.int16)
+
+
+def pixel_change(a: Optional[np.ndarray], b: Optional[np.ndarray]) -> Optional[int]:
+    """两张缩略图逐像素的最大差值；缺失或尺寸不同时返回 None（无法判断）。"""
+    if a is None or b is None or a.shape != b.shape:
+        return None
+    return int(np.abs(a - b).max())
+
+
+def screen_fingerprint(img: Image.Image) -> ScreenFrame:
+    """本地截图（如 computer_use）的变化判断用指纹：原始像素摘要 + dHash + 缩略图，不做编码。"""
+    w, h = img.size
+    return ScreenFrame("", perceptual_hash(img), w, h, 0, content_digest(img.tobytes()), screen_signature(img))
+
+
+def frames_match(a: ScreenFrame, b: ScreenFrame, phash_threshold: int = SCREEN_PHASH_CHANGE_THRESHOLD,
+                 pixel_threshold: int = SCREEN_PIXEL_CHANGE_THRESHOLD) -> bool:
+    """原始数据完全相同，或 dHash 与缩略图像素都几乎没变时视为同一画面；仅 dHash 相近不算。"""
+    if a.digest and a.digest == b.digest:
+        return True
+    if hamming_distance(a.phash, b.phash) > phash_threshold:
+        return False
+    change = pixel_change(a.thumb, b.thumb)
+    return change is not None and change <= pixel_threshold
+
+
+class FrameDeduper:
+    """
+    记录最近一次真正发出的帧；与之相比画面未变化（见 ``frames_match``）时判定为重复。
+    超过 ``max_age`` 秒仍会放行一帧，避免长时间静止画面导致模型侧上下文过期。
+    """
+
+    def __init__(self, threshold: int = SCREEN_PHASH_CHANGE_THRESHOLD,
+                 pixel_threshold: int = SCREEN_PIXEL_CHANGE_THRESHOLD, max_age: float = SCREEN_DEDUP_MAX_AGE):
+        self.threshold = threshold
+        self.pixel_threshold = pixel_threshold
+        self.max_age = max_age
+        self.skipped = 0
+        self._last: Optional[ScreenFrame] = None
+        self._last_sent_at = 0.0
+
+    def is_duplicate(self, frame: Optional[ScreenFrame]) -> bool:
+        if frame is None or self._last is None:
+            return False
+        if time.monotonic() - self._last_sent_at >= self.max_age:
+            return False
+        if frames_match(frame, self._last, self.threshold, self.pixel_threshold):
+            self.skipped += 1
+            return True
+        return False
+
+    def mark_sent(self, frame: Optional[ScreenFrame]) -> None:
+        if frame is None:
+            return
+        self._last = frame
+        self._last_sent_at = time.monotonic()
+
+    def reset(self) -> None:
+        self._last = None
+        self._last_sent_at = 0.0
+
+
+class ImagePipeline:
+    """共享的截图处理线程池 + 按 (原始数据摘要, 目标高度, 质量) 缓存的 JPEG 编码结果。"""
+
+    def __init__(self, workers: int = IMAGE_PIPELINE_WORKERS, cache_size: int = IMAGE_ENCODE_CACHE_SIZE):
+        self._workers = workers
+        self._cache_size = cache_size
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[tuple, ScreenFrame]" = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="neko-image")
+        return self._executor
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), fn, *args)
+
+    def _cache_get(self, key) -> Optional[ScreenFrame]:
+        with self._lock:
+            frame = self._cache.get(key)
+            if frame is not None:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+            return frame
+
+    def _cache_put(self, key, frame: ScreenFrame) -> None:
+        with self._lock:
+            self._cache[key] = frame
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    def compress_sync(self, image_bytes: bytes, target_h: int = COMPRESS_TARGET_HEIGHT,
+                      quality: int = COMPRESS_JPEG_QUALITY) -> Optional[ScreenFrame]:
+        digest = content_digest(image_bytes)
+        key = (digest, target_h, quality)
+        # 完全相同的输入直接复用，连解码都省掉
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        image = _validate_image_data(image_bytes)
+        if image is None:
+            return None
+        if image.format == 'JPEG':
+            # 感知哈希与缩略图只需要 1/8 缩放解码
+            probe = Image.open(BytesIO(image_bytes))
+            probe.draft('L', (max(image.width // 8, 9), max(image.height // 8, 8)))
+        else:
+            probe = None
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGB')
+        if probe is None:
+            probe = image
+        phash = perceptual_hash(probe)
+        thumb = screen_signature(probe)
+        jpg_bytes = compress_screenshot(image, target_h=target_h, quality=quality)
+        w, h = image.size
+        frame = ScreenFrame(base64.b64encode(jpg_bytes).decode('utf-8'), phash, w, h, len(jpg_bytes), digest, thumb)
+        self._cache_put(key, frame)
+        return frame
+
+    def inspect_sync(self, img_b64: str) -> Optional[ScreenFrame]:
+        """已是 JPEG 的屏幕帧：只验证 + 计算感知哈希与缩略图，不重新编码。"""
+        img_bytes = base64.b64decode(img_b64)
+        try:
+            image = Image.open(BytesIO(img_bytes))
+            w, h = image.size
+            # JPEG 可按 1/8 比例解码，感知哈希与缩略图只需要小尺寸灰度图；
+            # 解码本身即完成数据有效性校验，无需再单独 verify()
+            image.draft('L', (max(w // 8, 9), max(h // 8, 8)))
+            phash = perceptual_hash(image)
+            thumb = screen_signature(image)
+        except Exception as e:
+            logger.warning(f"图片验证失败: {e}")
+            return None
+        return ScreenFrame(img_b64, phash, w, h, len(img_bytes), content_digest(img_bytes), thumb)
+
+    async def compress(self, image_bytes: bytes, target_h: int = COMPRESS_TARGET_HEIGHT,
+                       quality: int = COMPRESS_JPEG_QUALITY) -> Optional[ScreenFrame]:
+        return await self._run(self.compress_sync, image_bytes, target_h, quality)
+
+    async def inspect(self, img_b64: str) -> Optional[ScreenFrame]:
+        return await self._run(self.inspect_sync, img_b64)
+
+
+_image_pipeline: Optional[ImagePipeline] = None
+
+
+def get_image_pipeline() -> ImagePipeline:
+    global _image_pipeline
+    if _image_pipeline is None:
+        _image_pipeline = ImagePipeline()
+    return _image_pipeline
+
+
+async def compress_screenshot_async(
+    image_bytes: bytes,
+    target_h: int = COMPRESS_TARGET_HEIGHT,
+    quality: int = COMPRESS_JPEG_QUALITY,
+) -> Optional[ScreenFrame]:
+    """在共享线程池中解码 + 缩放 + 编码；画面未变化时直接复用缓存的编码结果。"""
+    return await get_image_pipeline().compress(image_bytes, target_h, quality)
+
+
 async def process_screen_data(data: str) -> Optional[str]:
     """
     处理前端发送的屏幕分享数据流
@@ -59,6 +286,12 @@ async def process_screen_data(data: str) -> Optional[str]:
     
     返回: 验证后的base64字符串（不含data:前缀），如果验证失败则返回None
     """
+    frame = await process_screen_frame(data)
+    return frame.b64 if frame else None
+
+
+async def process_screen_frame(data: str) -> Optional[ScreenFrame]:
+    """同 process_screen_data，但返回带感知哈希的 ScreenFrame；验证在线程池中执行。"""
     try:
         if not isinstance(data, str) or not data.startswith('data:image/jpeg;base64,'):
             logger.error("无效的屏幕数据格式")
@@ -70,17 +303,14 @@ async def process_screen_data(data: str) -> Optional[str]:
             logger.error(f"屏幕数据过大: {len(img_b64)} 字节，超过限制 {MAX_BASE64_SIZE}")
             return None
         
-        img_bytes = base64.b64decode(img_b64)
-        
-        image = _validate_image_data(img_bytes)
-        if image is None:
+        frame = await get_image_pipeline().inspect(img_b64)
+        if frame is None:
             logger.error("无效的图片数据")
             return None
         
-        w, h = image.size
-        logger.debug(f"屏幕数据验证完成: 尺寸 {w}x{h}")
+        logger.debug(f"屏幕数据验证完成: 尺寸 {frame.width}x{frame.height}")
         
-        return img_b64
+        return frame
             
     except ValueError as ve:
         logger.error(f"Base64解码错误 (屏幕数据): {ve}")
@@ -210,22 +440,15 @@ async def analyze_screenshot_from_data_url(data_url: str, window_title: str = ''
             logger.error(f"截图数据过大: {len(base64_data)} 字节")
             return None
         
-        # 验证图片有效性并转换为JPEG
+        # 验证图片有效性并转换为JPEG（线程池中执行，含 resize）
         try:
             image_bytes = base64.b64decode(base64_data)
-            image = _validate_image_data(image_bytes)
-            if image is None:
+            frame = await compress_screenshot_async(image_bytes)
+            if frame is None:
                 logger.error("无效的图片数据")
                 return None
-            
-            # 统一压缩为 JPEG（含 resize）
-            if image.mode in ('RGBA', 'LA', 'P'):
-                image = image.convert('RGB')
-            orig_w, orig_h = image.size
-            jpg_bytes = compress_screenshot(image, target_h=COMPRESS_TARGET_HEIGHT, quality=COMPRESS_JPEG_QUALITY)
-            base64_data = base64.b64encode(jpg_bytes).decode('utf-8')
-            new_size = len(jpg_bytes)
-            logger.info(f"截图验证成功: {orig_w}x{orig_h} → 压缩后 {new_size//1024}KB")
+            base64_data = frame.b64
+            logger.info(f"截图验证成功: {frame.width}x{frame.height} → 压缩后 {frame.size//1024}KB")
         except Exception as e:
             logger.error(f"图片数据解码/验证失败: {e}")
             return None
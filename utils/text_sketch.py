@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+MinHash + LSH 近重复检测
+
+``calculate_text_similarity``（utils.frontend_utils）对每条历史回复重新构造 trigram
+集合并求精确 Jaccard，单次检测为 O(历史条数 × 文本长度)。这里为每条回复只计算一次
+MinHash 签名，按 LSH 分带放入桶中：插入和查询都只与桶内候选比较，
+与历史条数基本无关。
+
+shingle 定义与 ``calculate_text_similarity`` 保持一致（小写、去首尾空白、字符级 trigram，
+不足 3 个字符时整段作为一个 shingle），因此同一阈值语义不变；签名相似度是 Jaccard 的
+无偏估计，num_perm=128 时标准差约 0.035（J=0.8）。
+"""
+
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+_MASK32 = np.uint64(0xFFFFFFFF)
+_MIX1 = np.uint64(0x9E3779B97F4A7C15)
+_MIX2 = np.uint64(0xC2B2AE3D27D4EB4F)
+_SPLITMIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_SPLITMIX2 = np.uint64(0x94D049BB133111EB)
+_EMPTY_SLOT = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+def _shingle_hashes(text: str) -> Optional[np.ndarray]:
+    """字符级 trigram 的 32 位哈希（去重后）；空文本返回 None。"""
+    text = text.lower().strip()
+    if not text:
+        return None
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    if len(codes) < 3:
+        codes = np.concatenate([codes, np.zeros(3 - len(codes), dtype=np.uint64)])
+    with np.errstate(over="ignore"):
+        h = codes[:-2] * _MIX1
+        h = (h ^ codes[1:-1]) * _MIX2
+        h = (h ^ codes[2:]) * _MIX1
+        h ^= h >> np.uint64(29)
+    return np.unique(h & _MASK32)
+
+
+class MinHasher:
+    """固定随机种子的 MinHash 签名生成器（同一进程内签名可直接比较）。"""
+
+    def __init__(self, num_perm: int = 128, seed: int = 0x4E454B4F):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self._seeds = rng.integers(0, np.iinfo(np.uint64).max, size=num_perm, dtype=np.uint64, endpoint=True)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        hashes = _shingle_hashes(text)
+        if hashes is None:
+            return None
+        # 每个"排列"= 与独立种子异或后做 splitmix64 终混；线性哈希 (a*h+b) mod p
+        # 在短文本上 min-wise 独立性不足，误差明显偏大
+        with np.errstate(over="ignore"):
+            z = hashes[:, None] ^ self._seeds
+            z = (z ^ (z >> np.uint64(30))) * _SPLITMIX1
+            z = (z ^ (z >> np.uint64(27))) * _SPLITMIX2
+            z ^= z >> np.uint64(31)
+        return z.min(axis=0)
+
+    @staticmethod
+    def similarity(sig1: np.ndarray, sig2: np.ndarray) -> float:
+        return float(np.count_nonzero(sig1 == sig2)) / len(sig1)
+
+
+class RepetitionIndex:
+    """
+    滚动窗口的近重复索引：保留最近 ``capacity`` 条签名，超出后淘汰最旧的一条。
+
+    - ``query(text)``: 返回与窗口内各条的估计相似度中 ≥ threshold 的部分
+    - ``check_and_insert(text)``: 先查询再插入，返回高相似条数（对应原
+      ``_check_repetition`` 的 high_similarity_count）
+
+    bands × rows = num_perm；默认 32 × 4，候选阈值约 (1/32)^(1/4) ≈ 0.42，
+    远低于 0.8 的判定阈值，漏检概率可忽略，误报由签名相似度二次确认。
+    """
+
+    def __init__(self, capacity: int = 3, threshold: float = 0.8, num_perm: int = 128,
+                 bands: int = 32, hasher: Optional[MinHasher] = None):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.capacity = capacity
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._hasher = hasher or _shared_hasher(num_perm)
+        self._next_id = 0
+        self._order: Deque[int] = deque()
+        self._signatures: Dict[int, np.ndarray] = {}
+        self._buckets: List[Dict[bytes, Set[int]]] = [dict() for _ in range(bands)]
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def _band_keys(self, sig: np.ndarray):
+        r = self.rows
+        for band in range(self.bands):
+            yield band, sig[band * r:(band + 1) * r].tobytes()
+
+    def _candidates(self, sig: np.ndarray) -> Set[int]:
+        found: Set[int] = set()
+        for band, key in self._band_keys(sig):
+            ids = self._buckets[band].get(key)
+            if ids:
+                found |= ids
+        return found
+
+    def query_signature(self, sig: Optional[np.ndarray]) -> List[Tuple[int, float]]:
+        if sig is None:
+            return []
+        matches = []
+        for item_id in self._candidates(sig):
+            score = MinHasher.similarity(sig, self._signatures[item_id])
+            if score >= self.threshold:
+                matches.append((item_id, score))
+        return matches
+
+    def query(self, text: str) -> List[float]:
+        return [score for _, score in self.query_signature(self._hasher.signature(text))]
+
+    def insert_signature(self, sig: Optional[np.ndarray]) -> None:
+        if sig is None:
+            # 空回复也占一个窗口位置，保持与原列表实现一致的"最近 N 轮"语义
+            sig = np.full(self._hasher.num_perm, _EMPTY_SLOT, dtype=np.uint64)
+        item_id = self._next_id
+        self._next_id += 1
+        self._signatures[item_id] = sig
+        self._order.append(item_id)
+        if sig[0] != _EMPTY_SLOT:
+            for band, key in self._band_keys(sig):
+                self._buckets[band].setdefault(key, set()).add(item_id)
+        while len(self._order) > self.capacity:
+            self._evict(self._order.popleft())
+
+    def _evict(self, item_id: int) -> None:
+        sig = self._signatures.pop(item_id)
+        if sig[0] == _EMPTY_SLOT:
+            return
+        for band, key in self._band_keys(sig):
+            ids = self._buckets[band].get(key)
+            if ids is not None:
+                ids.discard(item_id)
+                if not ids:
+                    del self._buckets[band][key]
+
+    def check_and_insert(self, text: str) -> int:
+        sig = self._hasher.signature(text)
+        count = len(self.query_signature(sig))
+        self.insert_signature(sig)
+        return count
+
+    def clear(self) -> None:
+        self._order.clear()
+        self._signatures.clear()
+        for bucket in self._buckets:
+            bucket.clear()
+
+
+_hashers: Dict[int, MinHasher] = {}
+
+
+def _shared_hasher(num_perm: int) -> MinHasher:
+    hasher = _hashers.get(num_perm)
+    if hasher is None:
+        hasher = _hashers.setdefault(num_perm, MinHasher(num_perm))
+    return hasher
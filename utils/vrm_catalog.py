@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+"""
+VRM 模型 / VRMA 动作目录索引
+
+/api/model/vrm 下的列表、表情、情感映射接口原本每次请求都 glob 目录并 stat 每个文件。这里：
+
+- 每个 .vrm/.vrma 只在首次出现或 (大小, mtime) 变化时读一次：解析 glTF(GLB) 头部的 JSON chunk，
+  提取表情名、humanoid 骨骼、规范版本，同时计算内容哈希；
+- 目录的 mtime 没变时直接用内存中的列表（新增/删除/重命名都会改变目录 mtime），
+  每隔 ``VRM_CATALOG_RESCAN_INTERVAL`` 秒才逐个 stat 一次，用于发现原地覆盖的文件；
+- 情感映射配置按 (mtime, 大小) 缓存解析结果。
+"""
+
+import hashlib
+import json
+import logging
+import os
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import VRM_CATALOG_RESCAN_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+GLB_MAGIC = b'glTF'
+GLB_CHUNK_JSON = 0x4E4F534A
+MAX_JSON_CHUNK = 64 * 1024 * 1024
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class VrmAsset:
+    """一个 VRM 模型或 VRMA 动作文件"""
+    name: str
+    filename: str
+    url: str
+    type: str
+    location: str
+    path: Path
+    size: int
+    mtime_ns: int
+    content_hash: str = ''
+    spec_version: Optional[str] = None
+    expressions: Tuple[str, ...] = ()
+    bones: Tuple[str, ...] = ()
+
+    def to_listing(self, include_location: bool = True) -> Dict[str, Any]:
+        """列表接口返回的字段（不暴露绝对路径）"""
+        item = {
+            "name": self.name,
+            "filename": self.filename,
+            "url": self.url,
+            "type": self.type,
+            "size": self.size,
+        }
+        if include_location:
+            item["location"] = self.location
+        item["hash"] = self.content_hash
+        return item
+
+
+@dataclass(frozen=True)
+class CatalogSource:
+    """被索引的目录：目录路径、对外 URL 前缀、location 标签、文件后缀（按顺序列出）"""
+    path: Path
+    url_prefix: str
+    location: str
+    suffixes: Tuple[str, ...]
+
+
+@dataclass
+class _DirState:
+    mtime_ns: int
+    verified_at: float
+    assets: List[VrmAsset] = field(default_factory=list)
+    by_filename: Dict[str, VrmAsset] = field(default_factory=dict)
+
+
+def read_gltf_json(path: Path) -> Tuple[Optional[Dict[str, Any]], str]:
+    """读取 GLB 的 JSON chunk 并计算整个文件的内容哈希；非 GLB 文件返回 (None, 哈希)。"""
+    digest = hashlib.blake2b(digest_size=16)
+    gltf = None
+    with open(path, 'rb') as f:
+        header = f.read(20)
+        digest.update(header)
+        if len(header) == 20:
+            magic, _version, _length, chunk_len, chunk_type = struct.unpack('<4sIIII', header)
+            if magic == GLB_MAGIC and chunk_type == GLB_CHUNK_JSON and chunk_len <= MAX_JSON_CHUNK:
+                chunk = f.read(chunk_len)
+                digest.update(chunk)
+                try:
+                    gltf = json.loads(chunk)
+                except (ValueError, UnicodeDecodeError) as e:
+                    logger.warning(f"VRM 文件 JSON chunk 解析失败 {path.name}: {e}")
+        while True:
+            block = f.read(HASH_CHUNK_SIZE)
+            if not block:
+                break
+            digest.update(block)
+    return (gltf if isinstance(gltf, dict) else None), digest.hexdigest()
+
+
+def _unique(names) -> Tuple[str, ...]:
+    return tuple(dict.fromkeys(n for n in names if isinstance(n, str) and n))
+
+
+def extract_vrm_metadata(gltf: Dict[str, Any]) -> Tuple[Optional[str], Tuple[str, ...], Tuple[str, ...]]:
+    """从 glTF JSON 中提取 (规范版本, 表情名, humanoid 骨骼名)，兼容 VRM 0.x / 1.0 与 VRMA。"""
+    extensions = gltf.get('extensions') or {}
+    for key in ('VRMC_vrm', 'VRMC_vrm_animation'):
+        ext = extensions.get(key)
+        if isinstance(ext, dict):
+            expressions = ext.get('expressions') or {}
+            names = list(expressions.get('preset') or {}) + list(expressions.get('custom') or {})
+            bones = (ext.get('humanoid') or {}).get('humanBones') or {}
+            return ext.get('specVersion', '1.0'), _unique(names), _unique(bones)
+    ext = extensions.get('VRM')
+    if isinstance(ext, dict):
+        groups = (ext.get('blendShapeMaster') or {}).get('blendShapeGroups') or []
+        names = []
+        for group in groups:
+            if isinstance(group, dict):
+                preset = group.get('presetName')
+                names.append(preset if preset and preset != 'unknown' else group.get('name'))
+        bones = (ext.get('humanoid') or {}).get('humanBones') or []
+        return (ext.get('specVersion') or '0.0'), _unique(names), _unique(
+            b.get('bone') for b in bones if isinstance(b, dict))
+    return None, (), ()
+
+
+class VrmCatalog:
+    """见模块说明。``models()`` / ``animations()`` 的来源目录由 config_manager 决定。"""
+
+    def __init__(self, config_manager, rescan_interval: float = VRM_CATALOG_RESCAN_INTERVAL):
+        self._config_manager = config_manager
+        self.rescan_interval = rescan_interval
+        self._lock = threading.Lock()
+        self._dirs: Dict[Tuple[Path, Tuple[str, ...]], _DirState] = {}
+        self._emotion_configs: Dict[Path, Tuple[Tuple[int, int], Any]] = {}
+        self.stats = {"parsed": 0, "rescans": 0}
+
+    def model_sources(self) -> List[CatalogSource]:
+        cm = self._config_manager
+        return [
+            CatalogSource(Path(cm.project_root) / "static" / "vrm", "/static/vrm", "project", ('.vrm',)),
+            CatalogSource(Path(cm.vrm_dir), "/user_vrm", "user", ('.vrm',)),
+        ]
+
+    def animation_sources(self) -> List[CatalogSource]:
+        cm = self._config_manager
+        # 也支持 .vrm 文件作为动画（某些情况下）
+        return [
+            CatalogSource(Path(cm.project_root) / "static" / "vrm" / "animation", "/static/vrm/animation",
+                          "project", ('.vrma', '.vrm')),
+            CatalogSource(Path(cm.vrm_animation_dir), "/user_vrm/animation", "user", ('.vrma', '.vrm')),
+        ]
+
+    def models(self) -> List[VrmAsset]:
+        return self._collect(self.model_sources())
+
+    def animations(self) -> List[VrmAsset]:
+        return self._collect(self.animation_sources())
+
+    def find_model(self, name: str) -> Optional[VrmAsset]:
+        """按模型名查找 .vrm（项目目录优先）；``name`` 需由调用方先做合法性校验。"""
+        filename = f"{name}.vrm"
+        for source in self.model_sources():
+            self.scan(source)
+            state = self._dirs.get((source.path, source.suffixes))
+            if state is not None and filename in state.by_filename:
+                return state.by_filename[filename]
+        return None
+
+    def _collect(self, sources: List[CatalogSource]) -> List[VrmAsset]:
+        assets, seen_urls = [], set()
+        for source in sources:
+            for asset in self.scan(source):
+                if asset.url not in seen_urls:
+                    seen_urls.add(asset.url)
+                    assets.append(asset)
+        return assets
+
+    def scan(self, source: CatalogSource) -> List[VrmAsset]:
+        """返回目录中的文件；目录未变化且未到重扫间隔时不访问任何文件。"""
+        key = (source.path, source.suffixes)
+        try:
+            dir_mtime = os.stat(source.path).st_mtime_ns
+        except OSError:
+            self._dirs.pop(key, None)
+            return []
+        state = self._dirs.get(key)
+        now = time.monotonic()
+        if state is not None and state.mtime_ns == dir_mtime and now - state.verified_at < self.rescan_interval:
+            return state.assets
+        with self._lock:
+            state = self._dirs.get(key)
+            if state is not None and state.mtime_ns == dir_mtime and now - state.verified_at < self.rescan_interval:
+                return state.assets
+            assets = self._rescan(source, state)
+            state = _DirState(dir_mtime, now, assets, {a.filename: a for a in assets})
+            self._dirs[key] = state
+            self.stats["rescans"] += 1
+            return state.assets
+
+    def _rescan(self, source: CatalogSource, old: Optional[_DirState]) -> List[VrmAsset]:
+        known = {a.filename: a for a in old.assets} if old is not None else {}
+        found: Dict[str, List[VrmAsset]] = {suffix: [] for suffix in source.suffixes}
+        try:
+            entries = sorted(os.scandir(source.path), key=lambda e: e.name)
+        except OSError as e:
+            logger.warning(f"扫描 VRM 目录失败 {source.path}: {e}")
+            return []
+        for entry in entries:
+            suffix = next((s for s in source.suffixes if entry.name.endswith(s)), None)
+            if suffix is None:
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                st = entry.stat()
+                asset = known.get(entry.name)
+                if asset is None or asset.size != st.st_size or asset.mtime_ns != st.st_mtime_ns:
+                    asset = self._index(source, Path(entry.path), suffix, st)
+                found[suffix].append(asset)
+            except OSError as e:
+                logger.warning(f"处理 VRM 文件失败 {entry.name}: {e}")
+        return [asset for suffix in source.suffixes for asset in found[suffix]]
+
+    def _index(self, source: CatalogSource, path: Path, suffix: str, st: os.stat_result) -> VrmAsset:
+        spec, expressions, bones = None, (), ()
+        gltf, content_hash = read_gltf_json(path)
+        if gltf is not None:
+            spec, expressions, bones = extract_vrm_metadata(gltf)
+        self.stats["parsed"] += 1
+        return VrmAsset(
+            name=path.stem, filename=path.name, url=f"{source.url_prefix}/{path.name}",
+            type=suffix.lstrip('.'), location=source.location, path=path,
+            size=st.st_size, mtime_ns=st.st_mtime_ns, content_hash=content_hash,
+            spec_version=spec, expressions=expressions, bones=bones,
+        )
+
+    def emotion_config(self, config_path: Path) -> Optional[Any]:
+        """读取情感映射配置（按 mtime/大小缓存）；文件不存在返回 None，JSON 损坏抛 JSONDecodeError。"""
+        try:
+            st = os.stat(config_path)
+        except OSError:
+            self._emotion_configs.pop(config_path, None)
+            return None
+        stamp = (st.st_mtime_ns, st.st_size)
+        cached = self._emotion_configs.get(config_path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        self._emotion_configs[config_path] = (stamp, config)
+        return config
+
+    def invalidate(self) -> None:
+        """丢弃所有目录状态（已解析的文件按 (大小, mtime) 重新校验，不会重复解析）。"""
+        with self._lock:
+            for state in self._dirs.values():
+                state.verified_at = float('-inf')
+
+
+_catalog: Optional[VrmCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_vrm_catalog(config_manager) -> VrmCatalog:
+    """获取 VRM 目录索引实例（单例）"""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = VrmCatalog(config_manager)
+    return _catalog